@@ -1,16 +1,24 @@
 import os
 import time
+import asyncio
 import uvicorn
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
-from src.base.leads_loader.airtable import AirtableLeadLoader
+from fastapi.responses import RedirectResponse, PlainTextResponse
+from src.base.leads_loader import create_lead_loader_from_env
 from src.vapi_automation import VapiAutomation
+from src.campaign_dispatcher import CampaignDispatcher
+from src.base.metrics import REGISTRY
+from src.base.structured_logging import configure_logging, get_logger
 from dotenv import load_dotenv
 
 # Load .env file
 load_dotenv()
 
+# Log lines are written to stdout by a background thread, never by the event loop
+configure_logging()
+logger = get_logger("app")
+
 app = FastAPI()
 
 # Set all CORS enabled origins
@@ -23,16 +31,75 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
-# Initialize leads loader (Airtable, Sheets, Hubspot or add your own custom CRM)
-lead_loader = AirtableLeadLoader(
-    access_token=os.getenv("AIRTABLE_ACCESS_TOKEN"),
-    base_id=os.getenv("AIRTABLE_BASE_ID"),
-    table_name=os.getenv("AIRTABLE_TABLE_NAME"),
-)
+# Initialize leads loader selected by LEAD_LOADER (airtable, google_sheets, hubspot or your own custom CRM)
+# Only the selected CRM SDK is imported
+lead_loader = create_lead_loader_from_env()
+
+# Pause between two dials of the same worker
+DIAL_INTERVAL_SECONDS = float(os.getenv("DIAL_INTERVAL_SECONDS", "1"))
+
+# How often idle workers check the shared campaign queue for leads enqueued through another worker (0 disables)
+LEAD_POLL_INTERVAL_SECONDS = float(os.getenv("LEAD_POLL_INTERVAL_SECONDS", "5"))
 
 # Get Vapi automation instance
 automation = VapiAutomation(lead_loader)
 
+# Leads are leased from a queue shared by all the workers of the host, so they are never dialed twice
+dispatcher = CampaignDispatcher(automation, dial_interval=DIAL_INTERVAL_SECONDS)
+# Unanswered leads are queued again through the dispatcher
+automation.dispatcher = dispatcher
+
+# Metrics refreshed when scraped
+CALLS_BY_STATE = REGISTRY.gauge("leads_calls", "Number of call attempts per lifecycle state.", ("state",))
+PROVIDER_AVAILABLE = REGISTRY.gauge(
+    "leads_provider_available", "1 if the provider circuit breaker lets calls through, 0 if open.", ("provider",)
+)
+LEADS_BY_LEASE_STATE = REGISTRY.gauge(
+    "leads_queue", "Number of leads in the shared campaign queue per lease state.", ("state",)
+)
+PHONE_NUMBER_LIVE_CALLS = REGISTRY.gauge(
+    "leads_phone_number_live_calls", "Reserved or ongoing calls per caller phone number.", ("number",)
+)
+PHONE_NUMBER_AVAILABLE = REGISTRY.gauge(
+    "leads_phone_number_available", "1 if the caller phone number takes new calls, 0 if cooling down.", ("number",)
+)
+CRM_BUFFERED_UPDATES = REGISTRY.gauge(
+    "leads_crm_buffered_updates", "Leads with CRM updates waiting in the write-behind buffer (pending or dead).", ("state",)
+)
+
+_dispatcher_task = None
+_drain_task = None
+
+
+def start_dialing():
+    """Dial the queued leads in the background: wake the campaign worker, or drain the queue once without one."""
+    global _drain_task
+    if _dispatcher_task is not None and not _dispatcher_task.done():
+        dispatcher.wake()
+    elif _drain_task is None or _drain_task.done():
+        _drain_task = asyncio.create_task(dispatcher.drain())
+
+
+@app.on_event("startup")
+async def start_campaign_worker():
+    # Join the campaigns started through the other workers
+    global _dispatcher_task
+    if LEAD_POLL_INTERVAL_SECONDS > 0:
+        _dispatcher_task = asyncio.create_task(dispatcher.run(LEAD_POLL_INTERVAL_SECONDS))
+    # Send the CRM updates in the background, including those left by a previous run
+    automation.crm_writes.start()
+
+
+@app.on_event("shutdown")
+async def stop_campaign_worker():
+    for task in (_dispatcher_task, _drain_task):
+        if task is not None:
+            task.cancel()
+    dispatcher.shutdown()
+    automation.live_analysis.close()
+    await asyncio.to_thread(automation.crm_writes.close)
+    await asyncio.to_thread(automation.event_log.close)
+
 @app.get("/")
 async def redirect_root_to_docs():
     return RedirectResponse("/docs")
@@ -47,32 +114,30 @@ async def execute(payload: dict):
         # Fetch leads based on provided IDs
         lead_ids = payload.get("lead_ids", [])
         
-        print("Fetching lead data...")
-        leads = automation.load_leads(lead_ids=lead_ids)
+        logger.info("execute_requested", leads=len(lead_ids))
+        # The CRM clients block, keep the event loop serving the webhooks of ongoing calls
+        leads = await asyncio.to_thread(automation.load_leads, lead_ids=lead_ids)
         if not leads:
             return {"message": "No leads found."}
         
-        for lead in leads:
-            # Augment the lead data (web research, linkedIn profile,...) 
-            automation.pre_call_processing(lead)
-            
-            # Structure the required call parameters in Vapi format
-            call_params = automation.get_call_input_params(lead)
-            print("Call Inputs:\n", call_params)
-            
-            # Initiate the call
-            print(f"Calling Lead {lead.id}...")
-            output = await automation.make_call(call_params)
-            
-            # await 1s
-            time.sleep(1)
-
-        return {"message": "Calls initiated successfully for all leads."}
+        # Queue the leads for every worker, the campaign worker of this process starts dialing them right away
+        # Calls go through the first healthy provider (Vapi, falls back to Retell and OpenAI Realtime if configured)
+        # Leads outside their local calling hours are dialed when their window opens
+        queued = dispatcher.enqueue(leads)
+        start_dialing()
+
+        now = time.time()
+        return {
+            "message": "Leads queued, calls are placed in the background.",
+            "queued": len(queued),
+            "already_queued": len(leads) - len(queued),
+            "scheduled_later": sum(1 for call_at in queued.values() if call_at > now),
+        }
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        print(e)
+    except Exception:
+        logger.exception("execute_failed")
         raise HTTPException(status_code=500, detail="An error occurred while executing the workflow")
 
 @app.post("/webhook")
@@ -84,9 +149,152 @@ async def handle_webhook(request: Request):
         response = await automation.handle_webhook_call(request)
         return response
     except Exception as e:
-        print("Error processing webhook:", str(e))
+        logger.warning("webhook_invalid", provider="vapi", error=str(e))
         raise HTTPException(status_code=400, detail="Invalid webhook payload")
 
 
+@app.post("/retell/webhook")
+async def handle_retell_webhook(request: Request):
+    """
+    Handle incoming webhook requests from Retell (fallback provider).
+    """
+    if automation.retell is None:
+        raise HTTPException(status_code=404, detail="Retell fallback is not configured")
+    return await automation.retell.handle_webhook_call(request)
+
+
+@app.websocket("/retell/llm-websocket/{call_id}")
+async def handle_retell_llm_websocket(websocket: WebSocket, call_id: str):
+    """
+    Custom LLM websocket of a Retell call, answering the lead with streamed tokens until hang-up.
+    """
+    if automation.retell is None:
+        await websocket.close()
+        return
+    await automation.retell.custom_llm.handle_websocket(websocket, call_id)
+
+
+@app.post("/openai/status")
+async def handle_openai_status(request: Request):
+    """
+    Handle the Twilio status callbacks of the OpenAI Realtime calls.
+    """
+    if automation.openai is None:
+        raise HTTPException(status_code=404, detail="OpenAI Realtime provider is not configured")
+    return await automation.openai.handle_webhook_call(request)
+
+
+@app.websocket("/openai/media-stream")
+async def handle_openai_media_stream(websocket: WebSocket):
+    """
+    Twilio media stream of an answered OpenAI Realtime call, bridged to the Realtime API until hang-up.
+    """
+    if automation.openai is None:
+        await websocket.close()
+        return
+    await automation.openai.handle_media_stream(websocket)
+
+
+@app.get("/providers/health")
+async def get_providers_health():
+    """
+    Circuit breaker state and health of every configured voice provider.
+    """
+    return automation.provider_router.health()
+
+
+@app.get("/pacer")
+async def get_pacer():
+    """
+    Dial concurrency set by the pacer, with the answer rate and call durations it is based on.
+    """
+    return automation.pacer.status()
+
+
+@app.get("/phone-numbers")
+async def get_phone_numbers():
+    """
+    Live calls, capacity and cooldown of every caller phone number of the pool.
+    """
+    return automation.phone_numbers.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus metrics: latency histograms, counters and in-flight gauges of every pipeline stage.
+    """
+    for state, count in automation.call_states.counts().items():
+        CALLS_BY_STATE.set(count, state=state)
+    for provider, health in automation.provider_router.health().items():
+        PROVIDER_AVAILABLE.set(0 if health["state"] == "open" else 1, provider=provider)
+    for state, count in dispatcher.leases.counts().items():
+        LEADS_BY_LEASE_STATE.set(count, state=state)
+    for number in automation.phone_numbers.stats():
+        PHONE_NUMBER_LIVE_CALLS.set(number["live_calls"], number=number["number_id"])
+        PHONE_NUMBER_AVAILABLE.set(0 if number["cooling_down"] else 1, number=number["number_id"])
+    for state, count in automation.crm_writes.stats().items():
+        CRM_BUFFERED_UPDATES.set(count, state=state)
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/leads/queue")
+async def get_leads_queue():
+    """
+    Number of leads in the shared campaign queue per lease state (pending, scheduled, leased, expired, done).
+    """
+    return dispatcher.leases.counts()
+
+
+@app.get("/calls/stats")
+async def get_calls_stats(since: float = None):
+    """
+    Number of calls per lifecycle state (queued, dialing, in_progress, ended, analyzed, crm_synced, failed).
+    """
+    return automation.call_states.counts(since=since)
+
+
+@app.get("/calls/{call_id}")
+async def get_call_state(call_id: str):
+    """
+    Current lifecycle state of a call.
+    """
+    call = automation.call_states.get_by_call(call_id)
+    if not call:
+        raise HTTPException(status_code=404, detail="Call not found")
+    return call
+
+
+@app.get("/calls/{call_id}/transcript")
+async def get_call_transcript(call_id: str, expires: int = None, signature: str = None):
+    """
+    Full transcript of a call, from the local transcript store. Only served through the signed,
+    expiring links written to the CRM.
+    """
+    if not automation.transcripts.verify_link(call_id, expires, signature):
+        raise HTTPException(status_code=403, detail="Invalid or expired transcript link")
+    transcript = automation.transcripts.get(call_id)
+    if not transcript:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+    return transcript
+
+
+@app.get("/leads/{lead_id}/transcripts")
+async def get_lead_transcripts(lead_id: str):
+    """
+    Transcripts stored for the calls of a lead (call ID, size and date), oldest first.
+    The content hashes are not exposed, this endpoint is not authenticated.
+    """
+    return automation.transcripts.list_for_lead(lead_id)
+
+
+@app.get("/leads/{lead_id}/calls")
+async def get_lead_calls(lead_id: str):
+    """
+    All call attempts of a lead with their lifecycle state.
+    """
+    return automation.call_states.get_attempts_for_lead(lead_id)
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,162 @@
+"""
+Throughput benchmark of the audio frame pipeline (`voice_agent_providers.audio_frames`).
+
+Pushes 20 ms frames through each stage of a self-hosted media path on a single thread and reports
+frames per second per core, microseconds per frame and the calls a core can transcode in real time
+(50 frames per second in each direction). The preallocated pipeline is compared with a straightforward
+NumPy implementation allocating new arrays for every frame. Memory traced during the run shows that
+the pipeline allocates nothing per frame.
+
+Usage:
+    python -m benchmarks.audio_frames
+    python -m benchmarks.audio_frames --frames 200000 --output audio.json
+"""
+import json
+import time
+import argparse
+import itertools
+import tracemalloc
+import numpy as np
+from src.base.voice_agent_providers.audio_frames import (
+    JitterBuffer,
+    TelephonyTranscoder,
+    ULAW_TO_PCM16,
+    PCM16_TO_ULAW,
+    _lowpass,
+    ulaw_encode,
+)
+
+FRAMES_PER_SECOND = 50
+
+
+def make_frames(count: int = 500, seed: int = 7):
+    """Speech-like test audio: μ-law telephony frames and the matching 24 kHz PCM16 frames."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(count * 160) / 8000
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t)
+    signal = envelope * (6000 * np.sin(2 * np.pi * 220 * t) + 3000 * np.sin(2 * np.pi * 1250 * t))
+    signal += rng.normal(0, 300, len(t))
+    ulaw = bytes(ulaw_encode(np.clip(signal, -32768, 32767).astype("<i2")))
+    pcm = np.repeat(np.clip(signal, -32768, 32767).astype("<i2"), 3).tobytes()
+    return (
+        [ulaw[i * 160:(i + 1) * 160] for i in range(count)],
+        [pcm[i * 960:(i + 1) * 960] for i in range(count)],
+    )
+
+
+class NaiveTranscoder:
+    """Reference implementation allocating new arrays for every frame."""
+
+    def __init__(self):
+        self.up_kernel = _lowpass(3, 16) * 3
+        self.down_kernel = _lowpass(3, 16)
+        self.up_history = np.zeros(len(self.up_kernel) - 1, dtype=np.float32)
+        self.down_history = np.zeros(len(self.down_kernel) - 1, dtype=np.float32)
+
+    def to_model(self, frame) -> bytes:
+        samples = ULAW_TO_PCM16[np.frombuffer(frame, dtype=np.uint8)].astype(np.float32)
+        stuffed = np.zeros(len(samples) * 3, dtype=np.float32)
+        stuffed[::3] = samples
+        padded = np.concatenate([self.up_history, stuffed])
+        self.up_history = padded[-len(self.up_history):]
+        out = np.convolve(padded, self.up_kernel, mode="valid")
+        return np.clip(np.rint(out), -32768, 32767).astype("<i2").tobytes()
+
+    def to_telephony(self, frame) -> bytes:
+        samples = np.frombuffer(frame, dtype="<i2").astype(np.float32)
+        padded = np.concatenate([self.down_history, samples])
+        self.down_history = padded[-len(self.down_history):]
+        out = np.convolve(padded, self.down_kernel, mode="valid")[2::3]
+        pcm = np.clip(np.rint(out), -32768, 32767).astype("<i2")
+        return PCM16_TO_ULAW[pcm.view(np.uint16)].tobytes()
+
+
+def measure(step, frames: int) -> dict:
+    """Run `step(i)` for `frames` frames, returns frames per second and microseconds per frame."""
+    for i in range(min(frames, 500)):
+        step(i)
+    started_at = time.perf_counter()
+    for i in range(frames):
+        step(i)
+    elapsed = time.perf_counter() - started_at
+    return {
+        "frames_per_second": round(frames / elapsed),
+        "us_per_frame": round(elapsed / frames * 1e6, 2),
+    }
+
+
+def traced_peak(step, frames: int) -> int:
+    """Peak memory allocated while running `step` for `frames` frames, in bytes."""
+    step(0)
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        for i in range(frames):
+            step(i)
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmark(frames: int) -> dict:
+    ulaw_frames, pcm_frames = make_frames()
+    count = len(ulaw_frames)
+    transcoder = TelephonyTranscoder()
+    naive = NaiveTranscoder()
+    jitter = JitterBuffer()
+    # Sequence numbers keep increasing over the warm-up and measured runs
+    sequence = itertools.count()
+
+    def jitter_step(i):
+        jitter.put(next(sequence), ulaw_frames[i % count])
+        jitter.get()
+
+    def duplex_step(i):
+        jitter.put(next(sequence), ulaw_frames[i % count])
+        frame = jitter.get()
+        if frame is not None:
+            transcoder.to_model(frame)
+        transcoder.to_telephony(pcm_frames[i % count])
+
+    def naive_duplex_step(i):
+        naive.to_model(ulaw_frames[i % count])
+        naive.to_telephony(pcm_frames[i % count])
+
+    stages = {
+        "decode_upsample": lambda i: transcoder.to_model(ulaw_frames[i % count]),
+        "downsample_encode": lambda i: transcoder.to_telephony(pcm_frames[i % count]),
+        "jitter_buffer": jitter_step,
+        "full_duplex": duplex_step,
+        "naive_decode_upsample": lambda i: naive.to_model(ulaw_frames[i % count]),
+        "naive_downsample_encode": lambda i: naive.to_telephony(pcm_frames[i % count]),
+        "naive_full_duplex": naive_duplex_step,
+    }
+    report = {}
+    for name, step in stages.items():
+        report[name] = measure(step, frames)
+        if name.endswith("full_duplex"):
+            report[name]["calls_per_core"] = report[name]["frames_per_second"] // FRAMES_PER_SECOND
+    # Constant whatever the number of frames when nothing is allocated per frame
+    report["jitter_buffer_stats"] = jitter.stats()
+    report["traced_peak_bytes"] = {
+        "full_duplex": {n: traced_peak(duplex_step, n) for n in (1000, 10000)},
+        "naive_full_duplex": {n: traced_peak(naive_duplex_step, n) for n in (1000, 10000)},
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the throughput of the audio frame pipeline")
+    parser.add_argument("--frames", type=int, default=50000, help="Frames per stage")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.frames)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
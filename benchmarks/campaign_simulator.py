@@ -0,0 +1,404 @@
+"""
+Discrete-event campaign simulator for capacity planning.
+
+Runs a whole campaign through the real `VapiAutomation` pipeline (lead loading, call parameters,
+provider routing, call state tracking, call output processing, post-call analysis and CRM update)
+with a stub provider, a stub CRM and a stub LLM. Time is virtual: call durations, API latencies
+and rate limits are sampled from the given distributions and advanced on an event queue, so a
+50k-lead campaign is simulated in seconds.
+
+Distributions are given as `kind:params`:
+    const:3            always 3
+    uniform:5,30       uniform between 5 and 30
+    exp:20             exponential with mean 20
+    lognormal:1.2,0.6  lognormal with median 1.2 and shape 0.6
+    normal:3,1         normal, truncated at 0
+
+Leads are released by the `DialScheduler` of the app: with `--calling-hours`, each lead is only
+dialed inside its local calling window, starting from `--start`.
+
+Usage:
+    python -m benchmarks.campaign_simulator --leads 50000 --answer-rate 0.35 \\
+        --call-minutes lognormal:2,0.7 --phone-numbers 10 --workers 4
+    python -m benchmarks.campaign_simulator --leads 5000 --calling-hours 9-20 --start 2026-03-02T08:00:00-05:00
+"""
+import os
+import math
+import heapq
+import uuid
+import random
+import asyncio
+import argparse
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+from benchmarks.harness import BENCHMARK_ENV
+from benchmarks.payloads import make_lead_records, make_transcript, vapi_end_of_call_report
+
+
+class Distribution:
+    """Random variable parsed from a `kind:params` spec."""
+
+    def __init__(self, spec: str):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        self.kind = kind
+        self.params = [float(value) for value in params.split(",") if value]
+        if kind not in ("const", "uniform", "exp", "lognormal", "normal"):
+            raise argparse.ArgumentTypeError(f"Unknown distribution: {spec}")
+
+    def sample(self) -> float:
+        p = self.params
+        if self.kind == "const":
+            return p[0]
+        if self.kind == "uniform":
+            return random.uniform(p[0], p[1])
+        if self.kind == "exp":
+            return random.expovariate(1 / p[0])
+        if self.kind == "lognormal":
+            return random.lognormvariate(math.log(p[0]), p[1])
+        return max(0.0, random.gauss(p[0], p[1]))
+
+    def __repr__(self):
+        return self.spec
+
+
+class VirtualRateLimit:
+    """Token bucket in virtual time: returns when a request issued at `now` may actually be sent."""
+
+    def __init__(self, rate: float, burst: float = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated_at = 0.0
+
+    def available_at(self, now: float) -> float:
+        """Earliest time a request issued at `now` could be sent, without taking a token."""
+        if not self.rate:
+            return now
+        tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        return now if tokens >= 1 else now + (1 - tokens) / self.rate
+
+    def reserve(self, now: float) -> float:
+        """Take a token and return the time the request is actually sent."""
+        if not self.rate:
+            return now
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return now
+        return now - self._tokens / self.rate
+
+
+class SimulatedProvider:
+    """Stub of the Vapi calls API: accepts every call instantly and keeps its parameters."""
+
+    def __init__(self):
+        self.calls = {}
+
+    async def create(self, **request):
+        call = SimpleNamespace(id=str(uuid.uuid4()), status="queued")
+        self.calls[call.id] = request
+        return call
+
+
+def build_simulated_lead_loader(records: list):
+    """Stub CRM implementing `LeadLoaderBase` in memory and counting requests by operation."""
+    from src.base.leads_loader.lead_loader_base import LeadLoaderBase
+
+    class SimulatedLeadLoader(LeadLoaderBase):
+        name = "simulated"
+
+        def __init__(self):
+            self.records = {record["id"]: record for record in records}
+            self.requests = {"fetch": 0, "get": 0, "update": 0}
+
+        def fetch_records(self, lead_ids=None, status="NEW"):
+            if lead_ids:
+                self.requests["get"] += len(lead_ids)
+                return [self.records[lead_id] for lead_id in lead_ids if lead_id in self.records]
+            # Paginated listing, 100 records per request
+            self.requests["fetch"] += max(1, math.ceil(len(self.records) / 100))
+            return [record for record in self.records.values() if record.get("Status") == status]
+
+        def update_record(self, lead_id, updates):
+            # Read-modify-write, like the Airtable loader
+            self.requests["get"] += 1
+            self.requests["update"] += 1
+            self.records[lead_id].update(updates)
+            return self.records[lead_id]
+
+    return SimulatedLeadLoader()
+
+
+class CampaignSimulator:
+    def __init__(self, args):
+        self.args = args
+        self.events = []
+        self._sequence = 0
+        self.now = 0.0
+
+        self.provider_limit = VirtualRateLimit(args.provider_rate_limit, burst=args.provider_rate_limit or 1)
+        self.crm_limit = VirtualRateLimit(args.crm_rate_limit, burst=args.crm_rate_limit or 1)
+        self.llm_limit = VirtualRateLimit(args.llm_rate_limit, burst=args.llm_rate_limit or 1)
+
+        self.line_capacity = args.phone_numbers * args.calls_per_number
+        self.live_calls = 0
+        self.busy_workers = 0
+        self.postcall_queue = []
+        self.next_dial_at = 0.0
+        self.dial_scheduled = False
+
+        self.stats = {
+            "peak_live_calls": 0,
+            "peak_postcall_backlog": 0,
+            "line_seconds": 0.0,
+            "connected_calls": 0,
+            "voice_minutes": 0.0,
+            "llm_requests": 0,
+            "llm_input_tokens": 0,
+            "llm_output_tokens": 0,
+            "crm_requests": 0,
+            "dialing_done_at": 0.0,
+            "completed_at": 0.0,
+            "crm_synced": 0,
+        }
+
+    def schedule(self, at: float, handler, *args):
+        self._sequence += 1
+        heapq.heappush(self.events, (at, self._sequence, handler, args))
+
+    async def run(self) -> dict:
+        for key, value in BENCHMARK_ENV.items():
+            os.environ.setdefault(key, value)
+        # Only Vapi, the simulated provider replaces it
+        os.environ.pop("RETELL_API_KEY", None)
+
+        import src.tools.call_analysis as call_analysis
+        from src.vapi_automation import VapiAutomation
+        from src.base.call_state import CallStateStore
+        from src.base.dial_scheduler import DialScheduler, CallWindow
+        from src.base.leads_loader import CRMWriteBuffer
+        from src.base.transcript_store import TranscriptStore
+        from src.base.webhook_event_log import WebhookEventLog
+        from src.base.voice_agent_providers.phone_number_pool import PhoneNumberPool
+        from src.base.voice_agent_providers.provider_router import ProviderRouter, ProviderRoute
+        from src.base.rate_limiter import AdaptiveRateLimiter
+
+        call_analysis.invoke_llm = self._invoke_llm
+        self.loader = build_simulated_lead_loader(make_lead_records(self.args.leads))
+        # Line capacity is enforced by the simulator in virtual time, the pool spreads the calls over the numbers
+        phone_numbers = PhoneNumberPool(
+            [f"sim-phone-{i}" for i in range(self.args.phone_numbers)],
+            ":memory:",
+            max_concurrent_calls=self.args.calls_per_number,
+            min_interval=0,
+            unanswered_threshold=self.args.leads + 1,
+        )
+        self.automation = VapiAutomation(
+            self.loader,
+            call_states=CallStateStore(":memory:"),
+            phone_numbers=phone_numbers,
+            crm_writes=CRMWriteBuffer(self.loader, ":memory:"),
+            transcripts=TranscriptStore(tempfile.mkdtemp(prefix="leads-sim-transcripts-")),
+            event_log=WebhookEventLog(tempfile.mkdtemp(prefix="leads-sim-webhooks-")),
+        )
+        # Calls go through the Vapi route of the automation, which reserves their caller number
+        self.provider = SimulatedProvider()
+        self.automation.client = SimpleNamespace(calls=self.provider)
+        self.automation.rate_limiter = AdaptiveRateLimiter("vapi:simulator", rate=1e9, burst=1e9)
+        self.automation.provider_router = ProviderRouter(
+            [ProviderRoute("vapi", self.automation, self.automation.get_call_input_params)]
+        )
+
+        # Virtual time 0 is the start of the campaign
+        self.started_at = (datetime.fromisoformat(self.args.start) if self.args.start else datetime.now()).timestamp()
+        self.scheduler = DialScheduler(CallWindow(self.args.calling_hours, self.args.calling_days))
+        for lead in self.automation.load_leads(lead_ids=None):
+            self.scheduler.push(lead, self.started_at)
+            self.automation.call_states.record_queued(lead.id)
+
+        self._schedule_dial(0.0)
+        while self.events:
+            at, _, handler, args = heapq.heappop(self.events)
+            self.now = at
+            result = handler(*args)
+            if asyncio.iscoroutine(result):
+                await result
+
+        self.stats["crm_requests"] = sum(self.loader.requests.values())
+        self.stats["call_states"] = self.automation.call_states.counts()
+        return self.report()
+
+    # Dialing
+
+    def _schedule_dial(self, at):
+        if not self.dial_scheduled and len(self.scheduler):
+            self.dial_scheduled = True
+            self.schedule(max(at, self.next_dial_at), self._dial)
+
+    async def _dial(self):
+        self.dial_scheduled = False
+        if not len(self.scheduler) or self.live_calls >= self.line_capacity:
+            return
+
+        send_at = self.provider_limit.available_at(self.now)
+        if send_at > self.now:
+            self._schedule_dial(send_at)
+            return
+
+        lead = self.scheduler.pop_ready(self.started_at + self.now)
+        if lead is None:
+            # Every remaining lead is outside its calling window
+            self._schedule_dial(self.scheduler.next_ready_at() - self.started_at)
+            return
+        self.provider_limit.reserve(self.now)
+        _, call = await self.automation.dial_lead(lead)
+        self.live_calls += 1
+        self.stats["peak_live_calls"] = max(self.stats["peak_live_calls"], self.live_calls)
+
+        # Outcome of the call
+        answered = random.random() < self.args.answer_rate
+        ring = self.args.ring_seconds.sample()
+        if answered:
+            talk = self.args.call_minutes.sample() * 60
+            ended_reason = "customer-ended-call"
+            self.stats["connected_calls"] += 1
+        else:
+            talk = 0.0
+            ended_reason = "voicemail" if random.random() < self.args.voicemail_rate else "customer-did-not-answer"
+        self.schedule(self.now + ring + talk, self._call_ended, call.id, ring, talk, ended_reason)
+
+        self.next_dial_at = self.now + self.args.dial_interval
+        if not len(self.scheduler):
+            self.stats["dialing_done_at"] = self.now
+        self._schedule_dial(self.next_dial_at)
+
+    def _call_ended(self, call_id, ring_seconds, talk_seconds, ended_reason):
+        request = self.provider.calls.pop(call_id)
+        self.live_calls -= 1
+        # As the `ended` status update would
+        self.automation.phone_numbers.release_call(call_id, ended_reason)
+        self.stats["line_seconds"] += ring_seconds + talk_seconds
+        self.stats["voice_minutes"] += talk_seconds / 60
+
+        call = {
+            "id": call_id,
+            "status": "ended",
+            "assistantOverrides": {"variableValues": request["assistant_overrides"]["variable_values"]},
+        }
+        report = vapi_end_of_call_report(call, ended_reason=ended_reason, duration=talk_seconds / 60)
+        if talk_seconds:
+            # Longer calls produce proportionally longer transcripts
+            turns = max(1, int(talk_seconds / 8))
+            first_name = call["assistantOverrides"]["variableValues"]["firstName"]
+            report["message"]["artifact"]["transcript"] = "\n".join(
+                [make_transcript(first_name)] * max(1, turns // 8)
+            )
+        self.postcall_queue.append(report["message"])
+        self.stats["peak_postcall_backlog"] = max(self.stats["peak_postcall_backlog"], len(self.postcall_queue))
+        self._start_postcall()
+        self._schedule_dial(self.now)
+
+    # Post-call processing (webhook workers)
+
+    def _start_postcall(self):
+        while self.postcall_queue and self.busy_workers < self.args.workers:
+            message = self.postcall_queue.pop(0)
+            self.busy_workers += 1
+
+            crm_before = sum(self.loader.requests.values())
+            outputs = self.automation.process_call_outputs(message)
+            self.automation.post_call_processing(outputs)
+            # One update per call, sent right away to measure its CRM requests
+            self.automation.crm_writes.flush()
+            crm_requests = sum(self.loader.requests.values()) - crm_before
+
+            # Virtual duration: LLM analysis, then the CRM requests of the update
+            at = self.llm_limit.reserve(self.now) + self.args.llm_seconds.sample()
+            for _ in range(crm_requests):
+                at = self.crm_limit.reserve(at) + self.args.crm_seconds.sample()
+            self.schedule(at, self._postcall_done)
+
+    def _postcall_done(self):
+        self.busy_workers -= 1
+        self.stats["crm_synced"] += 1
+        self.stats["completed_at"] = self.now
+        self._start_postcall()
+
+    def _invoke_llm(self, system_prompt, user_message, model="gpt-4o-mini", response_format=None, json_output=False):
+        self.stats["llm_requests"] += 1
+        # ~4 characters per token
+        self.stats["llm_input_tokens"] += (len(system_prompt) + len(user_message)) // 4
+        self.stats["llm_output_tokens"] += self.args.llm_output_tokens
+        output = {"summary": "Simulated summary.", "interested": "Undecided", "justification": None}
+        return output if json_output else str(output)
+
+    def report(self) -> dict:
+        args, stats = self.args, self.stats
+        llm_cost = (
+            stats["llm_input_tokens"] / 1e6 * args.llm_input_price
+            + stats["llm_output_tokens"] / 1e6 * args.llm_output_price
+        )
+        completed = stats["completed_at"] or 1.0
+        return {
+            **stats,
+            "completion_hours": round(stats["completed_at"] / 3600, 2),
+            "dialing_hours": round(stats["dialing_done_at"] / 3600, 2),
+            "line_utilization": round(stats["line_seconds"] / (self.line_capacity * completed), 3),
+            "avg_crm_requests_per_second": round(stats["crm_requests"] / completed, 2),
+            "llm_cost": round(llm_cost, 2),
+            "voice_cost": round(stats["voice_minutes"] * args.voice_price_per_minute, 2),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate a calling campaign in virtual time")
+    parser.add_argument("--leads", type=int, default=50000)
+    parser.add_argument("--answer-rate", type=float, default=0.35, help="Share of calls answered by the lead")
+    parser.add_argument("--voicemail-rate", type=float, default=0.3, help="Share of unanswered calls reaching voicemail")
+    parser.add_argument("--call-minutes", type=Distribution, default=Distribution("lognormal:2,0.6"),
+                        help="Conversation duration of answered calls (minutes)")
+    parser.add_argument("--ring-seconds", type=Distribution, default=Distribution("uniform:5,30"),
+                        help="Ringing time before answer or no-answer (seconds)")
+    parser.add_argument("--phone-numbers", type=int, default=1)
+    parser.add_argument("--calls-per-number", type=int, default=1, help="Concurrent calls per phone number")
+    parser.add_argument("--workers", type=int, default=1, help="Concurrent post-call analyses")
+    parser.add_argument("--dial-interval", type=float, default=1.0, help="Seconds between two dials")
+    parser.add_argument("--calling-hours", default="0-24", help="Local calling hours of the leads, e.g. 9-20")
+    parser.add_argument("--calling-days", default="mon-sun", help="Local calling days, e.g. mon-fri")
+    parser.add_argument("--start", help="Start of the campaign (ISO datetime), defaults to now")
+    parser.add_argument("--provider-rate-limit", type=float, default=10.0, help="Call creations per second")
+    parser.add_argument("--crm-rate-limit", type=float, default=5.0, help="CRM requests per second")
+    parser.add_argument("--crm-seconds", type=Distribution, default=Distribution("lognormal:0.15,0.4"),
+                        help="Latency of a CRM request (seconds)")
+    parser.add_argument("--llm-rate-limit", type=float, default=5.0, help="LLM requests per second")
+    parser.add_argument("--llm-seconds", type=Distribution, default=Distribution("lognormal:1.5,0.4"),
+                        help="Latency of the post-call analysis (seconds)")
+    parser.add_argument("--llm-output-tokens", type=int, default=200)
+    parser.add_argument("--llm-input-price", type=float, default=0.15, help="USD per 1M input tokens")
+    parser.add_argument("--llm-output-price", type=float, default=0.60, help="USD per 1M output tokens")
+    parser.add_argument("--voice-price-per-minute", type=float, default=0.12, help="USD per call minute")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    report = asyncio.run(CampaignSimulator(args).run())
+
+    print(f"Leads                   : {args.leads}")
+    print(f"Completion time         : {report['completion_hours']} h (dialing done after {report['dialing_hours']} h)")
+    print(f"Peak concurrent calls   : {report['peak_live_calls']} / {args.phone_numbers * args.calls_per_number} lines")
+    print(f"Line utilization        : {report['line_utilization'] * 100:.1f}%")
+    print(f"Connected calls         : {report['connected_calls']}")
+    print(f"Peak post-call backlog  : {report['peak_postcall_backlog']}")
+    print(f"LLM requests            : {report['llm_requests']} "
+          f"({report['llm_input_tokens']} in / {report['llm_output_tokens']} out tokens, ${report['llm_cost']})")
+    print(f"Voice minutes           : {report['voice_minutes']:.0f} (${report['voice_cost']})")
+    print(f"CRM requests            : {report['crm_requests']} ({report['avg_crm_requests_per_second']}/s on average)")
+    print(f"Call states             : {report['call_states']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+from .service import FakeService, FakeAPIError
+from .vapi import FakeVapiClient
+from .retell import FakeRetellClient
+from .airtable import FakeAirtableTable
+from .google_sheets import FakeSheetsService
+from .hubspot import FakeHubSpotClient
+from .llm import FakeLLM
+from .openai_realtime import FakeRealtimeServer
+
+__all__ = [
+    'FakeService',
+    'FakeAPIError',
+    'FakeVapiClient',
+    'FakeRetellClient',
+    'FakeAirtableTable',
+    'FakeSheetsService',
+    'FakeHubSpotClient',
+    'FakeLLM',
+    'FakeRealtimeServer',
+]
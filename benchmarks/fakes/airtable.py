@@ -0,0 +1,67 @@
+import re
+import time
+import threading
+from datetime import datetime
+from .service import FakeService, FakeAPIError
+
+
+class FakeAirtableTable:
+    """
+    Stand-in for `pyairtable.Table` backed by an in-memory dict of records.
+    """
+
+    def __init__(self, records: list, service: FakeService = None):
+        """
+        Args:
+            records (list): Lead records, each a dict with an "id" and the CRM fields.
+            service (FakeService): Latency and rate limit of the fake API.
+        """
+        self.service = service or FakeService("airtable", rate_limit=5)
+        self.records = {record["id"]: {k: v for k, v in record.items() if k != "id"} for record in records}
+        # LAST_MODIFIED_TIME() of every record
+        self.modified_at = {record_id: time.time() for record_id in self.records}
+        self._lock = threading.Lock()
+
+    def get(self, record_id):
+        self.service.request("get")
+        with self._lock:
+            fields = self.records.get(record_id)
+        if fields is None:
+            raise FakeAPIError(404, "NOT_FOUND")
+        return {"id": record_id, "fields": dict(fields)}
+
+    def all(self, formula=None, **kwargs):
+        self.service.request("all")
+        # Only the `{Field}='value'` formulas built by pyairtable's match() are supported
+        # and the `IS_AFTER(LAST_MODIFIED_TIME(), ...)` formulas of incremental syncs
+        conditions = re.findall(r"\{([^}]+)\}\s*=\s*'([^']*)'", str(formula or ""))
+        modified_after = re.search(r"LAST_MODIFIED_TIME\(\), DATETIME_PARSE\('([^']+)'\)", str(formula or ""))
+        since = datetime.fromisoformat(modified_after.group(1).replace("Z", "+00:00")).timestamp() if modified_after else 0
+        with self._lock:
+            return [
+                {"id": record_id, "fields": dict(fields)}
+                for record_id, fields in self.records.items()
+                if all(str(fields.get(field)) == value for field, value in conditions)
+                and self.modified_at[record_id] > since
+            ]
+
+    def update(self, record_id, fields, **kwargs):
+        self.service.request("update")
+        with self._lock:
+            if record_id not in self.records:
+                raise FakeAPIError(404, "NOT_FOUND")
+            self.records[record_id].update(fields)
+            self.modified_at[record_id] = time.time()
+            return {"id": record_id, "fields": dict(self.records[record_id])}
+
+    def batch_update(self, records, **kwargs):
+        self.service.request("batch_update")
+        if len(records) > 10:
+            raise FakeAPIError(422, "Too many records in batch")
+        updated = []
+        with self._lock:
+            for record in records:
+                self.records.setdefault(record["id"], {}).update(record["fields"])
+                self.modified_at[record["id"]] = time.time()
+                updated.append({"id": record["id"], "fields": dict(self.records[record["id"]])})
+        return updated
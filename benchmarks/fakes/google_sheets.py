@@ -0,0 +1,74 @@
+import re
+import threading
+from .service import FakeService
+
+
+class _Request:
+    def __init__(self, service, operation, func):
+        self._service = service
+        self._operation = operation
+        self._func = func
+
+    def execute(self):
+        self._service.request(self._operation)
+        return self._func()
+
+
+class _FakeValues:
+    def __init__(self, sheets):
+        self._sheets = sheets
+
+    def get(self, spreadsheetId, range):
+        return _Request(self._sheets.service, "values.get", lambda: {"values": self._sheets.snapshot()})
+
+    def batchUpdate(self, spreadsheetId, body):
+        return _Request(self._sheets.service, "values.batchUpdate", lambda: self._sheets.apply(body["data"]))
+
+
+class _FakeSpreadsheets:
+    def __init__(self, sheets):
+        self._sheets = sheets
+
+    def values(self):
+        return _FakeValues(self._sheets)
+
+    def get(self, spreadsheetId):
+        return _Request(
+            self._sheets.service, "get", lambda: {"sheets": [{"properties": {"title": self._sheets.sheet_name}}]}
+        )
+
+
+class FakeSheetsService:
+    """
+    Stand-in for the `googleapiclient` Sheets v4 service backed by an in-memory grid.
+    """
+
+    def __init__(self, records: list, sheet_name="Leads", service: FakeService = None):
+        """
+        Args:
+            records (list): Lead records (dicts of CRM fields), written from row 2.
+            sheet_name (str): Name of the sheet.
+            service (FakeService): Latency and rate limit of the fake API.
+        """
+        self.service = service or FakeService("google_sheets", rate_limit=1, burst=10)
+        self.sheet_name = sheet_name
+        self.headers = sorted({field for record in records for field in record if field != "id"})
+        self.rows = [self.headers] + [[str(record.get(field, "")) for field in self.headers] for record in records]
+        self._lock = threading.Lock()
+
+    def spreadsheets(self):
+        return _FakeSpreadsheets(self)
+
+    def snapshot(self):
+        with self._lock:
+            return [list(row) for row in self.rows]
+
+    def apply(self, data):
+        with self._lock:
+            for update in data:
+                match = re.search(r"!([A-Z]+)(\d+)$", update["range"])
+                column = ord(match.group(1)) - 65
+                row = self.rows[int(match.group(2)) - 1]
+                row.extend([""] * (column + 1 - len(row)))
+                row[column] = update["values"][0][0]
+        return {"totalUpdatedCells": len(data)}
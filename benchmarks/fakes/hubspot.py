@@ -0,0 +1,117 @@
+import time
+import threading
+from types import SimpleNamespace
+from .service import FakeService, FakeAPIError
+
+
+class _FakeBasicApi:
+    def __init__(self, client):
+        self._client = client
+
+    def get_by_id(self, contact_id, properties=None, **kwargs):
+        self._client.service.request("contacts.get_by_id")
+        with self._client.lock:
+            contact = self._client.contacts.get(contact_id)
+        if contact is None:
+            raise FakeAPIError(404, "Not Found")
+        return SimpleNamespace(id=contact_id, properties=dict(contact))
+
+    def get_page(self, limit=100, properties=None, archived=False, after=None, **kwargs):
+        self._client.service.request("contacts.get_page")
+        with self._client.lock:
+            contacts = list(self._client.contacts.items())
+        start = int(after or 0)
+        page = contacts[start:start + limit]
+        next_page = None
+        if start + limit < len(contacts):
+            next_page = SimpleNamespace(next=SimpleNamespace(after=str(start + limit)))
+        return SimpleNamespace(
+            results=[SimpleNamespace(id=contact_id, properties=dict(props)) for contact_id, props in page],
+            paging=next_page,
+        )
+
+    def update(self, contact_id, simple_public_object_input, **kwargs):
+        self._client.service.request("contacts.update")
+        with self._client.lock:
+            if contact_id not in self._client.contacts:
+                raise FakeAPIError(404, "Not Found")
+            self._client.contacts[contact_id].update(simple_public_object_input.properties)
+            self._client.touch(contact_id)
+        return SimpleNamespace(id=contact_id)
+
+
+class _FakeBatchApi:
+    def __init__(self, client):
+        self._client = client
+
+    def update(self, batch_input_simple_public_object_batch_input, **kwargs):
+        self._client.service.request("contacts.batch_update")
+        inputs = batch_input_simple_public_object_batch_input.inputs
+        if len(inputs) > 100:
+            raise FakeAPIError(400, "Too many inputs in batch")
+        with self._client.lock:
+            for contact in inputs:
+                if contact.id not in self._client.contacts:
+                    raise FakeAPIError(404, "Not Found")
+            for contact in inputs:
+                self._client.contacts[contact.id].update(contact.properties)
+                self._client.touch(contact.id)
+        return SimpleNamespace(results=[SimpleNamespace(id=contact.id) for contact in inputs])
+
+
+class _FakeSearchApi:
+    def __init__(self, client):
+        self._client = client
+
+    def do_search(self, public_object_search_request, **kwargs):
+        # Only the `lastmodifieddate GTE` filter of incremental syncs is supported
+        self._client.service.request("contacts.search")
+        request = public_object_search_request
+        since = 0
+        for group in request.filter_groups or []:
+            for condition in group["filters"]:
+                if condition["propertyName"] == "lastmodifieddate" and condition["operator"] == "GTE":
+                    since = int(condition["value"])
+        with self._client.lock:
+            contacts = sorted(
+                (item for item in self._client.contacts.items() if int(item[1]["lastmodifieddate"]) >= since),
+                key=lambda item: int(item[1]["lastmodifieddate"]),
+            )
+        start = int(request.after or 0)
+        page = contacts[start:start + request.limit]
+        next_page = None
+        if start + request.limit < len(contacts):
+            next_page = SimpleNamespace(next=SimpleNamespace(after=str(start + request.limit)))
+        return SimpleNamespace(
+            results=[SimpleNamespace(id=contact_id, properties=dict(props)) for contact_id, props in page],
+            paging=next_page,
+        )
+
+
+class FakeHubSpotClient:
+    """
+    Stand-in for `hubspot.Client` exposing `crm.contacts.basic_api`, `batch_api` and `search_api`, backed by an in-memory dict.
+    """
+
+    def __init__(self, records: list, service: FakeService = None):
+        """
+        Args:
+            records (list): Lead records, each a dict with an "id" and the contact properties.
+            service (FakeService): Latency and rate limit of the fake API.
+        """
+        self.service = service or FakeService("hubspot", rate_limit=10)
+        self.contacts = {
+            record["id"]: {k: v for k, v in record.items() if k != "id"} for record in records
+        }
+        for contact_id in self.contacts:
+            self.touch(contact_id)
+        self.lock = threading.Lock()
+        self.crm = SimpleNamespace(
+            contacts=SimpleNamespace(
+                basic_api=_FakeBasicApi(self), batch_api=_FakeBatchApi(self), search_api=_FakeSearchApi(self)
+            )
+        )
+
+    def touch(self, contact_id):
+        """Set the `lastmodifieddate` of a contact (milliseconds, as returned by HubSpot)."""
+        self.contacts[contact_id]["lastmodifieddate"] = str(int(time.time() * 1000))
@@ -0,0 +1,40 @@
+import time
+import random
+import asyncio
+from types import SimpleNamespace
+from collections import Counter
+
+
+class FakeLLM:
+    """
+    Stand-in for the LLMs of the app. Replaces `invoke_llm` with a fixed-latency function returning
+    a valid `CallAnalysisOutput`, and the streamed completions of the Retell custom LLM with a stream
+    of `answer_tokens` tokens, the first one after `latency` seconds, then one every `token_interval` seconds.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.0, token_interval=0.02, answer_tokens=30):
+        self.latency = latency
+        self.jitter = jitter
+        self.token_interval = token_interval
+        self.answer_tokens = answer_tokens
+        self.requests = Counter()
+        self.tokens_streamed = 0
+
+    def invoke_llm(self, system_prompt, user_message, model="gpt-4o-mini", response_format=None, json_output=False):
+        self.requests[model] += 1
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+        output = {
+            "summary": "The lead asked for a callback next week.",
+            "interested": random.choice(["Interested", "Not Interested", "Undecided"]),
+            "justification": "Benchmark analysis.",
+        }
+        return output if json_output else str(output)
+
+    async def stream_completion(self, model, messages, tools=None, temperature=0.3):
+        self.requests[model] += 1
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        for i in range(self.answer_tokens):
+            if i:
+                await asyncio.sleep(self.token_interval)
+            self.tokens_streamed += 1
+            yield SimpleNamespace(content=f"word{i} ", tool_calls=None)
@@ -0,0 +1,119 @@
+import json
+import uuid
+import base64
+import asyncio
+
+# 20 ms of μ-law silence, the size of a Twilio media frame
+SILENT_FRAME = base64.b64encode(b"\xff" * 160).decode()
+
+
+class FakeRealtimeServer:
+    """
+    Local websocket stand-in for the OpenAI Realtime API.
+
+    Speech detection is simulated: every `speech_frames` audio frames appended make one turn of the lead
+    (`speech_started`, then `speech_stopped` and its transcription). The server answers each turn and each
+    `response.create` after `response_latency` seconds with `response_frames` audio deltas and their
+    transcript, unless the lead starts talking again before. Every `tool_call_every` turns, the answer is
+    a call of `tool_name` instead, answered with audio once the client sends the tool output back.
+    """
+
+    def __init__(
+        self,
+        response_latency: float = 0.3,
+        speech_frames: int = 50,
+        response_frames: int = 25,
+        tool_name: str = "bookAppointment",
+        tool_call_every: int = 0,
+    ):
+        self.response_latency = response_latency
+        self.speech_frames = speech_frames
+        self.response_frames = response_frames
+        self.tool_name = tool_name
+        self.tool_call_every = tool_call_every
+        self.url = None
+        self.sessions = 0
+        self.frames_received = 0
+        self.truncations = 0
+        self.tool_outputs = 0
+        self._server = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        """Serve on a local port, `url` is set once listening."""
+        # Imported here so the other fakes do not need the websockets package
+        from websockets.asyncio.server import serve
+
+        self._server = await serve(self._handle, host, port, max_size=None)
+        self.url = f"ws://{host}:{self._server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, connection):
+        self.sessions += 1
+        frames, turns = 0, 0
+        responses = set()
+
+        async def send(event: dict):
+            await connection.send(json.dumps(event))
+
+        def respond(tool_call: bool = False):
+            task = asyncio.create_task(self._respond(send, tool_call))
+            responses.add(task)
+            task.add_done_callback(responses.discard)
+
+        try:
+            async for message in connection:
+                event = json.loads(message)
+                kind = event.get("type")
+                if kind == "input_audio_buffer.append":
+                    self.frames_received += 1
+                    frames += 1
+                    if frames == 1:
+                        # Like the server VAD, the lead talking cancels the answer being generated
+                        for task in responses:
+                            task.cancel()
+                        await send({"type": "input_audio_buffer.speech_started"})
+                    elif frames == self.speech_frames:
+                        frames, turns = 0, turns + 1
+                        item_id = f"item_{uuid.uuid4().hex[:12]}"
+                        await send({"type": "input_audio_buffer.speech_stopped"})
+                        await send({"type": "conversation.item.created", "item": {"id": item_id, "role": "user"}})
+                        await send({
+                            "type": "conversation.item.input_audio_transcription.completed",
+                            "item_id": item_id,
+                            "transcript": f"Lead turn {turns}",
+                        })
+                        respond(tool_call=bool(self.tool_call_every) and turns % self.tool_call_every == 0)
+                elif kind == "session.update":
+                    await send({"type": "session.updated", "session": event.get("session", {})})
+                elif kind == "response.create":
+                    respond()
+                elif kind == "conversation.item.create":
+                    self.tool_outputs += 1
+                elif kind == "conversation.item.truncate":
+                    self.truncations += 1
+        finally:
+            for task in responses:
+                task.cancel()
+
+    async def _respond(self, send, tool_call: bool):
+        await asyncio.sleep(self.response_latency)
+        if tool_call:
+            await send({
+                "type": "response.function_call_arguments.done",
+                "call_id": f"call_{uuid.uuid4().hex[:12]}",
+                "name": self.tool_name,
+                "arguments": json.dumps({"Name": "Benchmark Lead", "PhoneNumber": "+15550000000", "PreferredDateTime": "tomorrow 10am"}),
+            })
+            return
+        item_id = f"item_{uuid.uuid4().hex[:12]}"
+        await send({"type": "response.created"})
+        await send({"type": "conversation.item.created", "item": {"id": item_id, "role": "assistant"}})
+        for _ in range(self.response_frames):
+            await send({"type": "response.audio.delta", "item_id": item_id, "delta": SILENT_FRAME})
+        await send({"type": "response.audio_transcript.done", "item_id": item_id, "transcript": "Agent answer."})
+        await send({"type": "response.done"})
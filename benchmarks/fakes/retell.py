@@ -0,0 +1,48 @@
+import uuid
+import threading
+from types import SimpleNamespace
+from .service import FakeService
+
+
+class _FakeRawResponse:
+    """Raw response of the `with_raw_response` methods: rate limit headers and the parsed body."""
+
+    def __init__(self, parsed):
+        self.headers = {}
+        self._parsed = parsed
+
+    def parse(self):
+        return self._parsed
+
+
+class _FakeCall:
+    def __init__(self, client):
+        self._client = client
+        self.with_raw_response = SimpleNamespace(
+            create_phone_call=lambda **request: _FakeRawResponse(self.create_phone_call(**request))
+        )
+
+    def create_phone_call(self, **request):
+        self._client.service.request("call.create_phone_call")
+        call = SimpleNamespace(call_id=str(uuid.uuid4()), call_status="registered", request=request)
+        with self._client.lock:
+            self._client.created_calls.append(call)
+        return call
+
+
+class FakeRetellClient:
+    """
+    Stand-in for the `retell.Retell` client. Webhook signatures are always accepted.
+    """
+
+    def __init__(self, service: FakeService = None):
+        self.service = service or FakeService("retell")
+        self.call = _FakeCall(self)
+        self.created_calls = []
+        self.lock = threading.Lock()
+
+    def with_options(self, **options):
+        return self
+
+    def verify(self, body, api_key, signature):
+        return True
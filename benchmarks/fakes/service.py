@@ -0,0 +1,88 @@
+import time
+import random
+import threading
+from collections import Counter
+
+
+class FakeAPIError(Exception):
+    """
+    Error raised by the fake services. Exposes `status_code` and `headers`
+    like the SDK exceptions so the rate limiter handles it the same way.
+    """
+
+    def __init__(self, status_code, message="", headers=None):
+        super().__init__(f"{status_code} {message}".strip())
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class FakeService:
+    """
+    In-process stand-in for a remote API: every request sleeps for the configured latency,
+    is counted per operation and is rejected with a 429 (and `Retry-After`) when the
+    configured rate limit is exceeded.
+
+    Thread-safe, SDK calls are made from worker threads.
+    """
+
+    def __init__(self, name, latency=0.05, jitter=0.0, rate_limit=None, burst=None, failure_rate=0.0):
+        """
+        Args:
+            name (str): Service name used in reports.
+            latency (float): Mean latency of a request in seconds.
+            jitter (float): Maximum random latency added to each request in seconds.
+            rate_limit (float): Allowed requests per second, None for unlimited.
+            burst (float): Bucket size of the rate limit, defaults to `rate_limit`.
+            failure_rate (float): Probability of a request failing with a 503.
+        """
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.burst = burst or rate_limit or 1
+        self.failure_rate = failure_rate
+        self.requests = Counter()
+        self.rate_limited = 0
+        self.failures = 0
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def request(self, operation):
+        """
+        Simulate a request to the API.
+
+        Args:
+            operation (str): Operation name, counted in `requests`.
+
+        Raises:
+            FakeAPIError: 429 when rate limited, 503 on a simulated failure.
+        """
+        with self._lock:
+            self.requests[operation] += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate_limit)
+                self._updated_at = now
+                if self._tokens < 1:
+                    self.rate_limited += 1
+                    retry_after = (1 - self._tokens) / self.rate_limit
+                    raise FakeAPIError(429, "Too Many Requests", {"Retry-After": f"{retry_after:.3f}"})
+                self._tokens -= 1
+            if self.failure_rate and random.random() < self.failure_rate:
+                self.failures += 1
+                raise FakeAPIError(503, "Service Unavailable")
+
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    def report(self) -> dict:
+        return {
+            "requests": dict(self.requests),
+            "total_requests": self.total_requests,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+        }
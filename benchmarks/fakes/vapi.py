@@ -0,0 +1,29 @@
+import uuid
+import threading
+from types import SimpleNamespace
+from .service import FakeService
+
+
+class _FakeCalls:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, **request):
+        self._client.service.request("calls.create")
+        call = SimpleNamespace(id=str(uuid.uuid4()), status="queued", request=request)
+        with self._client.lock:
+            self._client.created_calls.append(call)
+        return call
+
+
+class FakeVapiClient:
+    """
+    Stand-in for the `vapi.Vapi` client. Records every created call so the benchmark
+    can send the matching webhook events back.
+    """
+
+    def __init__(self, service: FakeService = None):
+        self.service = service or FakeService("vapi")
+        self.calls = _FakeCalls(self)
+        self.created_calls = []
+        self.lock = threading.Lock()
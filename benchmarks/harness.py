@@ -0,0 +1,160 @@
+import os
+import uuid
+import tempfile
+import importlib
+from benchmarks.fakes import (
+    FakeService,
+    FakeVapiClient,
+    FakeRetellClient,
+    FakeAirtableTable,
+    FakeSheetsService,
+    FakeHubSpotClient,
+    FakeLLM,
+)
+from benchmarks.payloads import make_lead_records
+
+
+# Placeholder credentials so the app can be imported without any real account
+BENCHMARK_ENV = {
+    "VAPI_API_KEY": "benchmark",
+    "VAPI_PHONE_ID": "benchmark-phone",
+    "VAPI_ASSISTANT_ID": "benchmark-assistant",
+    "RETELL_API_KEY": "benchmark",
+    "RETELL_AGENT_ID": "benchmark-agent",
+    "RETELL_AI_PHONE_NUMBER": "+15550000000",
+    "AIRTABLE_ACCESS_TOKEN": "benchmark",
+    "AIRTABLE_BASE_ID": "appBenchmark",
+    "AIRTABLE_TABLE_NAME": "Leads",
+    "OPENAI_API_KEY": "benchmark",
+    "DIAL_INTERVAL_SECONDS": "0",
+    # Benchmarks dial every lead whatever the time of day
+    "CALLING_HOURS": "0-24",
+    "CALLING_DAYS": "mon-sun",
+    # Keeps the reports readable, run with LOG_LEVEL=INFO to include the per-call log lines in the measurements
+    "LOG_LEVEL": "WARNING",
+}
+
+
+def load_app():
+    """
+    Import `app.py` with placeholder credentials and throwaway local databases.
+
+    Returns:
+        module: The imported app module.
+    """
+    for key, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(key, value)
+    data_dir = tempfile.mkdtemp(prefix="leads-bench-")
+    os.environ.setdefault("CALL_STATE_DB", os.path.join(data_dir, "call_state.db"))
+    os.environ.setdefault("LEAD_LEASE_DB", os.path.join(data_dir, "lead_leases.db"))
+    os.environ.setdefault("PHONE_POOL_DB", os.path.join(data_dir, "phone_numbers.db"))
+    os.environ.setdefault("CRM_WRITE_BUFFER_DB", os.path.join(data_dir, "crm_updates.db"))
+    os.environ.setdefault("LEAD_MIRROR_DB", os.path.join(data_dir, "lead_mirror.db"))
+    os.environ.setdefault("TRANSCRIPT_DIR", os.path.join(data_dir, "transcripts"))
+    os.environ.setdefault("WEBHOOK_LOG_DIR", os.path.join(data_dir, "webhook_log"))
+    os.environ.setdefault("ENRICHMENT_CACHE_DB", os.path.join(data_dir, "enrichment_cache.db"))
+    return importlib.import_module("app")
+
+
+def build_lead_loader(crm: str, records: list, service: FakeService):
+    """
+    Build a real lead loader whose API client is replaced by an in-process fake, behind a local mirror.
+    Each loader gets a fresh rate limiter budget.
+
+    Args:
+        crm (str): "airtable", "google_sheets" or "hubspot".
+        records (list): Lead records served by the fake CRM.
+        service (FakeService): Latency and rate limit of the fake CRM.
+    """
+    from src.base.rate_limiter import get_rate_limiter
+    from src.base.leads_loader import LeadMirror
+
+    budget_key = f"benchmark-{uuid.uuid4()}"
+    if crm == "airtable":
+        from src.base.leads_loader.airtable import AirtableLeadLoader
+        loader = AirtableLeadLoader(access_token="benchmark", base_id=budget_key, table_name="Leads")
+        loader.table = FakeAirtableTable(records, service)
+    elif crm == "hubspot":
+        from src.base.leads_loader.hubspot import HubSpotLeadLoader
+        loader = HubSpotLeadLoader(access_token=budget_key)
+        loader.client = FakeHubSpotClient(records, service)
+    elif crm == "google_sheets":
+        from src.base.leads_loader.google_sheets import GoogleSheetLeadLoader
+        # Skip the OAuth flow of the constructor
+        loader = GoogleSheetLeadLoader.__new__(GoogleSheetLeadLoader)
+        loader.sheet_service = FakeSheetsService(records, service=service)
+        loader.spreadsheet_id = "benchmark"
+        loader.sheet_name = "Leads"
+        loader.rate_limiter = get_rate_limiter("google_sheets", budget_key)
+    else:
+        raise ValueError(f"Unknown CRM: {crm}")
+    # Lead selection reads a local mirror, like the app
+    return LeadMirror(loader, ":memory:")
+
+
+def install_fakes(app_module, config: dict) -> dict:
+    """
+    Swap every external dependency of the app automation for an in-process fake.
+
+    Args:
+        app_module: The module returned by `load_app`.
+        config (dict): Scenario configuration (see `benchmarks.run.SCENARIOS`).
+
+    Returns:
+        dict: The fake backends, used to build the report.
+    """
+    from src.base.call_state import CallStateStore
+    from src.base.lead_lease import LeadLeaseStore
+    from src.base.voice_agent_providers.phone_number_pool import PhoneNumberPool
+    from src.base.rate_limiter import get_rate_limiter
+    from src.base.voice_agent_providers.provider_router import CircuitBreaker
+    import src.tools.call_analysis as call_analysis
+
+    crm = config.get("crm", "airtable")
+    records = make_lead_records(config.get("leads", 50), crm)
+    backends = {
+        "crm": FakeService(
+            crm,
+            latency=config.get("crm_latency", 0.08),
+            rate_limit=config.get("crm_rate_limit"),
+            failure_rate=config.get("crm_failure_rate", 0.0),
+        ),
+        "vapi": FakeService(
+            "vapi", latency=config.get("vapi_latency", 0.15), failure_rate=config.get("vapi_failure_rate", 0.0)
+        ),
+        "retell": FakeService("retell", latency=config.get("retell_latency", 0.2)),
+        "calendar": FakeService("google_calendar", latency=config.get("calendar_latency", 0.3)),
+        "llm": FakeLLM(latency=config.get("llm_latency", 0.8)),
+    }
+
+    automation = app_module.automation
+    automation.lead_loader = build_lead_loader(crm, records, backends["crm"])
+    automation.crm_writes.lead_loader = automation.lead_loader
+    # The ASGI transport skips the startup event of the app
+    automation.crm_writes.start()
+    automation.call_states = CallStateStore(":memory:")
+    app_module.dispatcher.leases = LeadLeaseStore(":memory:")
+    automation.phone_numbers = PhoneNumberPool(
+        [f"benchmark-phone-{i}" for i in range(config.get("phone_numbers", 5))],
+        ":memory:",
+        max_concurrent_calls=config.get("calls_per_number", 1000),
+    )
+
+    automation.client = FakeVapiClient(backends["vapi"])
+    automation.rate_limiter = get_rate_limiter("vapi", f"benchmark-{uuid.uuid4()}")
+    if automation.retell is not None:
+        automation.retell.client = FakeRetellClient(backends["retell"])
+        automation.retell.rate_limiter = get_rate_limiter("retell", f"benchmark-{uuid.uuid4()}")
+        automation.retell.call_states = automation.call_states
+    for route in automation.provider_router.routes:
+        route.breaker = CircuitBreaker()
+
+    def book_appointement(title, description, start):
+        backends["calendar"].request("events.insert")
+        return "Appoitement Booked successfully."
+
+    automation.allowed_tools = {**automation.allowed_tools, "bookAppointment": book_appointement}
+    if automation.retell is not None:
+        automation.retell.allowed_tools = automation.allowed_tools
+    call_analysis.invoke_llm = backends["llm"].invoke_llm
+    return backends
@@ -0,0 +1,83 @@
+"""
+Hang-up to analysis latency benchmark of the live call analysis (`LiveCallAnalyzer`).
+
+Simulated calls say one transcript line every `--line-interval` seconds, the conversation so far being
+fed to the analyzer after every line as the Vapi conversation updates would be. The call ends, and the end-of-call report arrives `--report-delay`
+seconds later. The benchmark measures the time from the report to the analysis result, which is
+what delays the CRM update. The baseline analyzes the full transcript once the report arrives.
+The LLM is `FakeLLM`, answering after a fixed latency.
+
+Usage:
+    python -m benchmarks.live_analysis_latency
+    python -m benchmarks.live_analysis_latency --calls 50 --llm-latency 1.5 --report-delay 2
+"""
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from benchmarks.fakes import FakeLLM
+from benchmarks.payloads import make_transcript, synthetic_variables
+from benchmarks.stats import summarize_latencies
+
+
+async def run_call(analyzer, args, live: bool) -> float:
+    """Run one call, returns the time from its end-of-call report to its analysis."""
+    from src.tools.call_analysis import analyze_call_transcript
+
+    call_id = str(uuid.uuid4())
+    variables = synthetic_variables()
+    lead_name = f'{variables["firstName"]} {variables["lastName"]}'
+    transcript = make_transcript(variables["firstName"])
+    lines = transcript.splitlines()
+    for said in range(1, len(lines) + 1):
+        await asyncio.sleep(args.line_interval)
+        if live:
+            analyzer.update(call_id, lines[:said], lead_name)
+    # Status update "ended", then the end-of-call report
+    if live:
+        analyzer.end(call_id)
+    await asyncio.sleep(args.report_delay)
+    reported_at = time.perf_counter()
+    if live:
+        await asyncio.to_thread(analyzer.finish, call_id, lead_name, transcript)
+    else:
+        await asyncio.to_thread(analyze_call_transcript, lead_name, transcript)
+    return time.perf_counter() - reported_at
+
+
+async def run_benchmark(args) -> dict:
+    from src.tools import call_analysis
+    from src.live_call_analysis import LiveCallAnalyzer
+
+    report = {"calls": args.calls}
+    for mode in ("full_transcript", "live"):
+        llm = FakeLLM(latency=args.llm_latency)
+        call_analysis.invoke_llm = llm.invoke_llm
+        analyzer = LiveCallAnalyzer(min_new_lines=args.min_new_lines, max_workers=args.calls)
+        try:
+            latencies = await asyncio.gather(*(run_call(analyzer, args, mode == "live") for _ in range(args.calls)))
+        finally:
+            analyzer.close()
+        report[mode] = {
+            "report_to_analysis": summarize_latencies(latencies),
+            "llm_requests_per_call": round(sum(llm.requests.values()) / args.calls, 2),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the time from the end-of-call report to the call analysis")
+    parser.add_argument("--calls", type=int, default=20, help="Concurrent calls")
+    parser.add_argument("--line-interval", type=float, default=1.0, help="Seconds between two transcript lines")
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Seconds the fake LLM takes to answer")
+    parser.add_argument("--report-delay", type=float, default=1.5, help="Seconds from the hang-up to the end-of-call report")
+    parser.add_argument("--min-new-lines", type=int, default=4, help="Transcript lines triggering an analysis during the call")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import time
+import random
+import uuid
+
+
+FIRST_NAMES = ["Alice", "Bob", "Carla", "David", "Emma", "Farid", "Grace", "Hugo", "Ines", "Jules"]
+LAST_NAMES = ["Martin", "Smith", "Garcia", "Nguyen", "Dubois", "Brown", "Rossi", "Khan", "Lopez", "Meyer"]
+CITIES = ["Austin, TX", "Denver, CO", "Seattle, WA", "Boston, MA", "Miami, FL", "Chicago, IL"]
+
+TRANSCRIPT_TURNS = [
+    "AI: Hi, is this {name}?",
+    "User: Yes, speaking.",
+    "AI: I'm following up on your past inquiry, are you currently looking to upgrade your computer systems?",
+    "User: Maybe, what kind of deals do you have?",
+    "AI: We have discounts on laptops and workstations this month. How many devices would you need?",
+    "User: Around ten laptops for the office.",
+    "AI: Great, a product specialist will contact you within an hour. Anything else?",
+    "User: No, thanks.",
+]
+
+# Vapi endedReason values with their share of calls
+ENDED_REASONS = {
+    "customer-ended-call": 0.45,
+    "assistant-ended-call": 0.15,
+    "customer-did-not-answer": 0.25,
+    "customer-busy": 0.05,
+    "voicemail": 0.10,
+}
+
+
+def make_lead_records(count: int, crm: str = "airtable") -> list:
+    """
+    Generate synthetic lead records in the format of a CRM.
+
+    Args:
+        count (int): Number of leads.
+        crm (str): "airtable", "google_sheets" or "hubspot".
+
+    Returns:
+        list: Records with an "id" and the CRM fields.
+    """
+    records = []
+    for i in range(count):
+        first_name, last_name = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+        record = {
+            "First Name": first_name,
+            "Last Name": last_name,
+            "Email": f"{first_name.lower()}.{last_name.lower()}{i}@example.com",
+            "Phone": f"+1555{i:07d}",
+            "Address": random.choice(CITIES),
+            "Status": "NEW",
+        }
+        if crm == "google_sheets":
+            record["id"] = str(i + 2)  # Rows start at 2, after the header
+        elif crm == "hubspot":
+            record["id"] = str(100000 + i)
+            record["hs_lead_status"] = "NEW"
+        else:
+            record["id"] = f"rec{i:014d}"
+        records.append(record)
+    return records
+
+
+def make_transcript(first_name: str, turns: int = None) -> str:
+    turns = turns or len(TRANSCRIPT_TURNS)
+    return "\n".join(turn.format(name=first_name) for turn in TRANSCRIPT_TURNS[:turns])
+
+
+def vapi_call(call_id: str = None, variable_values: dict = None, status: str = "in-progress") -> dict:
+    """The `call` object embedded in every Vapi webhook message."""
+    return {
+        "id": call_id or str(uuid.uuid4()),
+        "status": status,
+        "assistantOverrides": {"variableValues": variable_values or synthetic_variables()},
+    }
+
+
+def synthetic_variables(lead_id: str = None) -> dict:
+    first_name, last_name = random.choice(FIRST_NAMES), random.choice(LAST_NAMES)
+    return {
+        "leadID": lead_id or f"rec{random.randrange(10 ** 14):014d}",
+        "firstName": first_name,
+        "lastName": last_name,
+        "email": f"{first_name.lower()}@example.com",
+        "address": random.choice(CITIES),
+        "date": time.strftime("%Y-%m-%d %H:%M"),
+    }
+
+
+def vapi_status_update(call: dict, status: str) -> dict:
+    return {"message": {"type": "status-update", "status": status, "call": {**call, "status": status}}}
+
+
+def vapi_tool_calls(call: dict) -> dict:
+    return {
+        "message": {
+            "type": "tool-calls",
+            "call": call,
+            "toolCallList": [
+                {
+                    "id": str(uuid.uuid4()),
+                    "function": {
+                        "name": "bookAppointment",
+                        "arguments": {
+                            "title": "Follow-up call",
+                            "description": "Laptop upgrade for ten employees",
+                            "start": "2030-01-15T10:00:00",
+                        },
+                    },
+                }
+            ],
+        }
+    }
+
+
+def vapi_end_of_call_report(call: dict, ended_reason: str = None, duration: float = None) -> dict:
+    ended_reason = ended_reason or random.choices(list(ENDED_REASONS), weights=ENDED_REASONS.values())[0]
+    answered = ended_reason in ("customer-ended-call", "assistant-ended-call")
+    duration = duration if duration is not None else (random.uniform(0.5, 4) if answered else 0.0)
+    first_name = call["assistantOverrides"]["variableValues"].get("firstName", "")
+    return {
+        "message": {
+            "type": "end-of-call-report",
+            "call": {**call, "status": "ended"},
+            "endedReason": ended_reason,
+            "durationMinutes": round(duration, 2),
+            "cost": round(duration * 0.12, 4),
+            "artifact": {"transcript": make_transcript(first_name) if answered else ""},
+        }
+    }
+
+
+def retell_call_analyzed(call_id: str = None, dynamic_variables: dict = None) -> dict:
+    variables = {key: str(value) for key, value in (dynamic_variables or synthetic_variables()).items()}
+    end = int(time.time() * 1000)
+    start = end - random.randint(30, 240) * 1000
+    return {
+        "event": "call_analyzed",
+        "data": {
+            "call_id": call_id or str(uuid.uuid4()),
+            "call_status": "ended",
+            "start_timestamp": start,
+            "end_timestamp": end,
+            "disconnection_reason": "user_hangup",
+            "transcript": make_transcript(variables.get("firstName", "")),
+            "retell_llm_dynamic_variables": variables,
+            "call_cost": {"combined_cost": 25},
+        },
+    }
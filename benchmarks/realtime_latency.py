@@ -0,0 +1,217 @@
+"""
+Per-turn latency benchmark of the OpenAI Realtime provider.
+
+Runs the media bridge of `OpenAIRealtime` between an in-process fake Twilio media stream and a local
+websocket stand-in of the Realtime API (`FakeRealtimeServer`) answering after a fixed latency.
+The fake lead talks in 20 ms μ-law frames, and the benchmark measures the time from its last frame
+to the first frame of the agent answer, so the overhead of the bridge is the measured latency minus
+the configured model latency. Concurrent calls show how the overhead grows with the live calls of a worker.
+
+Usage:
+    python -m benchmarks.realtime_latency
+    python -m benchmarks.realtime_latency --calls 50 --turns 10 --model-latency 0.3
+    # Lead talking over the agent answers, with a tool call every 3 turns
+    python -m benchmarks.realtime_latency --barge-in --tool-call-every 3
+    # Frames sent as fast as possible instead of real time
+    python -m benchmarks.realtime_latency --frame-interval 0
+"""
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from collections import deque
+from benchmarks.fakes import FakeRealtimeServer
+from benchmarks.fakes.openai_realtime import SILENT_FRAME
+from benchmarks.stats import summarize_latencies
+
+
+class FakeTwilioStream:
+    """
+    In-process stand-in for the Twilio media stream websocket seen by the app. Agent audio is
+    "played" in real time: each mark is acknowledged once the audio sent before it has been played.
+    """
+
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.agent_frames = 0
+        self.clears = 0
+        self.agent_audio = asyncio.Event()
+        self.first_audio_at = None
+        self.played = asyncio.Event()
+        # The bridge names its marks after the agent audio item, a new name is a new answer
+        self._item_id = None
+        self._media_at = None
+        self.played.set()
+        self._playback_until = 0.0
+        self._pending_marks = deque()
+
+    def push(self, message: dict):
+        self.incoming.put_nowait(json.dumps(message))
+
+    def expect_agent_audio(self):
+        """Wait for a new answer: the rest of the answer being played does not count."""
+        self.agent_audio.clear()
+        self.first_audio_at = None
+
+    async def wait_for_playback(self):
+        await self.played.wait()
+
+    async def accept(self):
+        pass
+
+    async def close(self):
+        self.incoming.put_nowait(None)
+
+    async def iter_text(self):
+        while True:
+            message = await self.incoming.get()
+            if message is None:
+                return
+            yield message
+
+    async def send_text(self, message: str):
+        data = json.loads(message)
+        now = time.perf_counter()
+        if data["event"] == "media":
+            self.agent_frames += 1
+            self._media_at = now
+            self._playback_until = max(self._playback_until, now) + 0.02
+        elif data["event"] == "mark":
+            if data["mark"]["name"] != self._item_id:
+                self._item_id = data["mark"]["name"]
+                if not self.agent_audio.is_set():
+                    self.first_audio_at = self._media_at
+                    self.agent_audio.set()
+            self.played.clear()
+            handle = asyncio.get_running_loop().call_later(max(0.0, self._playback_until - now), self._played, data["mark"])
+            self._pending_marks.append((handle, data["mark"]))
+        elif data["event"] == "clear":
+            # Twilio drops the buffered audio and acknowledges its marks right away
+            self.clears += 1
+            self._playback_until = now
+            while self._pending_marks:
+                handle, mark = self._pending_marks[0]
+                handle.cancel()
+                self._played(mark)
+
+    def _played(self, mark: dict):
+        self._pending_marks.popleft()
+        self.push({"event": "mark", "mark": mark})
+        if not self._pending_marks:
+            self.played.set()
+
+
+async def run_call(agent, args) -> dict:
+    """Run one call: greeting, `turns` lead turns, then hang-up. Returns its latencies."""
+    call_sid = f"CA{uuid.uuid4().hex}"
+    lead_id = f"lead-{uuid.uuid4().hex[:8]}"
+    agent.call_states.record_dialing(lead_id)
+    agent.call_states.record_call_created(lead_id, call_sid, "openai", "queued")
+
+    twilio = FakeTwilioStream()
+    bridge = asyncio.create_task(agent.handle_media_stream(twilio))
+    variables = {"leadID": lead_id, "firstName": "Benchmark", "lastName": "Lead"}
+    twilio.expect_agent_audio()
+    started_at = time.perf_counter()
+    twilio.push({"event": "connected"})
+    twilio.push({
+        "event": "start",
+        "start": {"streamSid": f"MZ{uuid.uuid4().hex}", "callSid": call_sid, "customParameters": {"variables": json.dumps(variables)}},
+    })
+    await twilio.agent_audio.wait()
+    greeting = twilio.first_audio_at - started_at
+
+    turns = []
+    # Twilio media timestamps are in ms since the start of the stream
+    timestamp = 0
+    for _ in range(args.turns):
+        if not args.barge_in:
+            await twilio.wait_for_playback()
+        twilio.expect_agent_audio()
+        for frame in range(args.speech_frames):
+            timestamp += 20
+            twilio.push({"event": "media", "media": {"timestamp": str(timestamp), "payload": SILENT_FRAME}})
+            if frame == args.speech_frames - 1:
+                # The fake model starts its response latency as soon as the last frame arrives
+                turn_ended_at = time.perf_counter()
+            await asyncio.sleep(args.frame_interval)
+        await twilio.agent_audio.wait()
+        turns.append(twilio.first_audio_at - turn_ended_at)
+
+    twilio.push({"event": "stop"})
+    await bridge
+    return {"greeting": greeting, "turns": turns, "agent_frames": twilio.agent_frames, "clears": twilio.clears}
+
+
+async def run_benchmark(args) -> dict:
+    from src.base.call_state import CallStateStore
+    from src.openai_realtime_automation import OpenAIRealtimeAutomation
+
+    server = await FakeRealtimeServer(
+        response_latency=args.model_latency,
+        speech_frames=args.speech_frames,
+        response_frames=args.response_frames,
+        tool_call_every=args.tool_call_every,
+    ).start()
+
+    async def book_appointment(**kwargs):
+        return {"status": "booked"}
+
+    ended_calls = []
+    agent = OpenAIRealtimeAutomation(
+        {"bookAppointment": book_appointment},
+        lambda call_outputs, replay=False: ended_calls.append(call_outputs),
+        CallStateStore(":memory:"),
+    )
+    agent.url = server.url
+    agent.api_key = "benchmark"
+
+    started_at = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(run_call(agent, args) for _ in range(args.calls)))
+    finally:
+        await server.stop()
+    elapsed = time.perf_counter() - started_at
+
+    turn_latencies = [latency for result in results for latency in result["turns"]]
+    # Tool call turns take two model round trips, the overhead is measured on the other turns
+    overheads = [
+        latency - args.model_latency
+        for result in results
+        for turn, latency in enumerate(result["turns"], start=1)
+        if not args.tool_call_every or turn % args.tool_call_every
+    ]
+    return {
+        "calls": args.calls,
+        "elapsed_seconds": round(elapsed, 2),
+        "greeting_latency": summarize_latencies([result["greeting"] for result in results]),
+        "turn_latency": summarize_latencies(turn_latencies),
+        "bridge_overhead": summarize_latencies(overheads),
+        "lead_frames_forwarded": server.frames_received,
+        "agent_frames_forwarded": sum(result["agent_frames"] for result in results),
+        "barge_ins": {"truncations": server.truncations, "clears": sum(result["clears"] for result in results)},
+        "tool_outputs": server.tool_outputs,
+        "calls_ended": len(ended_calls),
+        "transcript_lines": sum(call["transcript"].count("\n") for call in ended_calls),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the per-turn latency of the OpenAI Realtime media bridge")
+    parser.add_argument("--calls", type=int, default=10, help="Concurrent calls")
+    parser.add_argument("--turns", type=int, default=5, help="Lead turns per call")
+    parser.add_argument("--model-latency", type=float, default=0.3, help="Seconds before the fake model answers")
+    parser.add_argument("--speech-frames", type=int, default=50, help="20 ms frames per lead turn")
+    parser.add_argument("--response-frames", type=int, default=25, help="20 ms frames per agent answer")
+    parser.add_argument("--frame-interval", type=float, default=0.02, help="Seconds between two lead frames")
+    parser.add_argument("--tool-call-every", type=int, default=0, help="Answer every N-th turn with a tool call")
+    parser.add_argument("--barge-in", action="store_true", help="Talk over the agent answers instead of listening")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Time to first token benchmark of the Retell custom LLM websocket.
+
+Drives `RetellCustomLLM` with an in-process fake of the Retell websocket, the completions being streamed
+by `FakeLLM` (first token after a fixed latency, then one token every `--token-interval` seconds).
+For every lead turn it measures the time from the response request to the first token sent back,
+which is when Retell can start the text-to-speech, and to the end of the answer, which is what an answer
+returned in one piece would cost. With `--barge-in`, the lead talks over every answer halfway through
+and the benchmark counts the tokens generated after the interruption.
+
+Usage:
+    python -m benchmarks.retell_llm_latency
+    python -m benchmarks.retell_llm_latency --calls 50 --turns 10 --model-latency 0.3 --answer-tokens 40
+    python -m benchmarks.retell_llm_latency --barge-in
+"""
+import json
+import time
+import uuid
+import asyncio
+import argparse
+from benchmarks.fakes import FakeLLM
+from benchmarks.stats import summarize_latencies
+
+
+class FakeRetellSocket:
+    """In-process stand-in for the custom LLM websocket opened by Retell for one call."""
+
+    def __init__(self):
+        self.incoming = asyncio.Queue()
+        self.first_token_at = {}
+        self.completed_at = {}
+        self.completed = asyncio.Event()
+
+    def push(self, message: dict):
+        self.incoming.put_nowait(json.dumps(message))
+
+    async def accept(self):
+        pass
+
+    async def close(self):
+        self.incoming.put_nowait(None)
+
+    async def iter_text(self):
+        while True:
+            message = await self.incoming.get()
+            if message is None:
+                return
+            yield message
+
+    async def send_text(self, message: str):
+        data = json.loads(message)
+        if data["response_type"] != "response":
+            return
+        response_id = data["response_id"]
+        if data["content"]:
+            self.first_token_at.setdefault(response_id, time.perf_counter())
+        if data["content_complete"]:
+            self.completed_at[response_id] = time.perf_counter()
+            self.completed.set()
+
+
+async def run_call(agent, args) -> dict:
+    """Run one call: begin message, then `turns` response requests. Returns its latencies."""
+    socket = FakeRetellSocket()
+    session = asyncio.create_task(agent.handle_websocket(socket, f"call_{uuid.uuid4().hex}"))
+    socket.push({
+        "interaction_type": "call_details",
+        "call": {"retell_llm_dynamic_variables": {"leadID": "benchmark", "firstName": "Benchmark", "lastName": "Lead"}},
+    })
+    # Begin message
+    await socket.completed.wait()
+    transcript = [{"role": "agent", "content": "Hi, is this Benchmark?"}]
+    first_tokens, answers, interrupted = [], [], 0
+    for response_id in range(1, args.turns + 1):
+        transcript.append({"role": "user", "content": f"Lead turn {response_id}"})
+        socket.completed.clear()
+        requested_at = time.perf_counter()
+        socket.push({"interaction_type": "response_required", "response_id": response_id, "transcript": list(transcript)})
+        if args.barge_in:
+            # The lead talks again once half of the answer was streamed
+            await asyncio.sleep(args.model_latency + args.answer_tokens * args.token_interval / 2)
+            socket.push({"interaction_type": "update_only", "turntaking": "user_turn", "transcript": list(transcript)})
+            interrupted += 1
+        else:
+            await socket.completed.wait()
+            answers.append(socket.completed_at[response_id] - requested_at)
+        if response_id in socket.first_token_at:
+            first_tokens.append(socket.first_token_at[response_id] - requested_at)
+        transcript.append({"role": "agent", "content": "Agent answer."})
+
+    await socket.close()
+    await session
+    return {"first_tokens": first_tokens, "answers": answers, "interrupted": interrupted}
+
+
+async def run_benchmark(args) -> dict:
+    from src.base.voice_agent_providers.retell_ai import custom_llm
+    from src.prompts import VOICE_AGENT_PROMPT
+    from src.tools.tool_definitions import TOOL_DEFINITIONS
+
+    llm = FakeLLM(latency=args.model_latency, token_interval=args.token_interval, answer_tokens=args.answer_tokens)
+    custom_llm.stream_completion = llm.stream_completion
+    agent = custom_llm.RetellCustomLLM(tools={}, instructions=VOICE_AGENT_PROMPT, tool_definitions=TOOL_DEFINITIONS)
+
+    started_at = time.perf_counter()
+    results = await asyncio.gather(*(run_call(agent, args) for _ in range(args.calls)))
+    elapsed = time.perf_counter() - started_at
+
+    first_tokens = [latency for result in results for latency in result["first_tokens"]]
+    report = {
+        "calls": args.calls,
+        "elapsed_seconds": round(elapsed, 2),
+        "first_token_latency": summarize_latencies(first_tokens),
+        "first_token_overhead": summarize_latencies([latency - args.model_latency for latency in first_tokens]),
+        "full_answer_latency": summarize_latencies([latency for result in results for latency in result["answers"]]),
+        "tokens_streamed": llm.tokens_streamed,
+    }
+    if args.barge_in:
+        interrupted = sum(result["interrupted"] for result in results)
+        # Tokens an uninterrupted generation would have streamed, minus the ones actually streamed
+        report["tokens_saved_by_cancellation"] = interrupted * args.answer_tokens - llm.tokens_streamed
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the time to first token of the Retell custom LLM websocket")
+    parser.add_argument("--calls", type=int, default=10, help="Concurrent calls")
+    parser.add_argument("--turns", type=int, default=5, help="Lead turns per call")
+    parser.add_argument("--model-latency", type=float, default=0.3, help="Seconds before the fake model streams its first token")
+    parser.add_argument("--token-interval", type=float, default=0.02, help="Seconds between two streamed tokens")
+    parser.add_argument("--answer-tokens", type=int, default=30, help="Tokens per answer")
+    parser.add_argument("--barge-in", action="store_true", help="Talk over every answer halfway through")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Offline end-to-end benchmark of the leads reactivation pipeline.
+
+Every external API (Vapi, Retell, Airtable, Google Sheets, HubSpot, Google Calendar, LLM)
+is replaced by an in-process fake with configurable latency and rate limits.
+A scenario triggers `/execute`, then sends the webhook events of every created call to
+`/webhook` (or `/retell/webhook`) and reports throughput, webhook latency and API usage.
+
+Usage:
+    python -m benchmarks.run --scenario baseline
+    python -m benchmarks.run --scenario all --output results.json
+    python -m benchmarks.run --scenario baseline --compare results.json --tolerance 0.2
+"""
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import httpx
+from benchmarks.harness import load_app, install_fakes
+from benchmarks.payloads import vapi_status_update, vapi_tool_calls, vapi_end_of_call_report, retell_call_analyzed
+from benchmarks.stats import summarize_latencies
+
+
+SCENARIOS = {
+    "baseline": {
+        "crm": "airtable",
+        "leads": 50,
+    },
+    "hubspot": {
+        "crm": "hubspot",
+        "leads": 50,
+    },
+    "google_sheets": {
+        "crm": "google_sheets",
+        "leads": 50,
+    },
+    "crm_rate_limited": {
+        # The CRM accepts fewer requests than the loader budget, exercising 429 handling
+        "crm": "airtable",
+        "leads": 50,
+        "crm_rate_limit": 2,
+    },
+    "vapi_outage": {
+        # Every Vapi request fails, calls must fail over to Retell
+        "crm": "airtable",
+        "leads": 50,
+        "vapi_failure_rate": 1.0,
+    },
+}
+
+DEFAULTS = {
+    "webhook_concurrency": 20,
+    "tool_call_rate": 0.2,
+}
+
+
+async def run_scenario(name: str, config: dict) -> dict:
+    """
+    Run one scenario against the app and return its report.
+
+    Args:
+        name (str): Scenario name.
+        config (dict): Scenario configuration.
+    """
+    config = {**DEFAULTS, **config}
+    app_module = load_app()
+    backends = install_fakes(app_module, config)
+    automation = app_module.automation
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        # Dial every NEW lead. The ASGI transport skips the startup event, without campaign worker
+        # /execute drains the queue in a background task
+        started_at = time.perf_counter()
+        response = await client.post("/execute", json={"lead_ids": []})
+        execute_result = response.json()
+        dispatched = await app_module._drain_task
+        execute_result["dispatch"] = {key: len(lead_ids) for key, lead_ids in dispatched.items()}
+        dial_seconds = time.perf_counter() - started_at
+
+        # Replay the webhook events of every created call, calls in parallel, events of a call in order
+        semaphore = asyncio.Semaphore(config["webhook_concurrency"])
+        latencies, errors = [], 0
+
+        async def send(path, payload):
+            nonlocal errors
+            async with semaphore:
+                sent_at = time.perf_counter()
+                webhook_response = await client.post(path, json=payload)
+                latencies.append(time.perf_counter() - sent_at)
+                if webhook_response.status_code >= 400:
+                    errors += 1
+
+        async def vapi_call_events(created_call):
+            call = {
+                "id": created_call.id,
+                "status": "queued",
+                "assistantOverrides": {
+                    "variableValues": created_call.request["assistant_overrides"]["variable_values"]
+                },
+            }
+            await send("/webhook", vapi_status_update(call, "in-progress"))
+            if random.random() < config["tool_call_rate"]:
+                await send("/webhook", vapi_tool_calls(call))
+            await send("/webhook", vapi_end_of_call_report(call))
+
+        async def retell_call_events(created_call):
+            variables = created_call.request["retell_llm_dynamic_variables"]
+            await send("/retell/webhook", retell_call_analyzed(created_call.call_id, variables))
+
+        tasks = [vapi_call_events(call) for call in automation.client.created_calls]
+        if automation.retell is not None:
+            tasks += [retell_call_events(call) for call in automation.retell.client.created_calls]
+        await asyncio.gather(*tasks)
+        # Send the CRM updates still buffered
+        await asyncio.to_thread(automation.crm_writes.flush)
+        total_seconds = time.perf_counter() - started_at
+
+    leads = config["leads"]
+    return {
+        "scenario": name,
+        "leads": leads,
+        "execute": execute_result,
+        "dial_seconds": round(dial_seconds, 3),
+        "leads_per_second": round(leads / dial_seconds, 2) if dial_seconds else None,
+        "total_seconds": round(total_seconds, 3),
+        "webhook_latency": summarize_latencies(latencies),
+        "webhook_errors": errors,
+        "crm": backends["crm"].report(),
+        "crm_requests_per_lead": round(backends["crm"].total_requests / leads, 2),
+        "vapi": backends["vapi"].report(),
+        "retell": backends["retell"].report(),
+        "llm_requests": sum(backends["llm"].requests.values()),
+        "call_states": automation.call_states.counts(),
+        "providers": automation.provider_router.health(),
+    }
+
+
+def compare(results: list, baseline: list, tolerance: float) -> list:
+    """
+    Compare results with a previous run.
+
+    Returns:
+        list: Human readable regressions (empty when none).
+    """
+    previous = {result["scenario"]: result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result["scenario"])
+        if not before:
+            continue
+        if before["leads_per_second"] and result["leads_per_second"] < before["leads_per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{result['scenario']}: leads/s {before['leads_per_second']} -> {result['leads_per_second']}"
+            )
+        p99_before, p99_now = before["webhook_latency"]["p99_ms"], result["webhook_latency"]["p99_ms"]
+        if p99_before and p99_now and p99_now > p99_before * (1 + tolerance):
+            regressions.append(f"{result['scenario']}: webhook p99 {p99_before}ms -> {p99_now}ms")
+        if result["crm_requests_per_lead"] > before["crm_requests_per_lead"] * (1 + tolerance):
+            regressions.append(
+                f"{result['scenario']}: CRM requests/lead "
+                f"{before['crm_requests_per_lead']} -> {result['crm_requests_per_lead']}"
+            )
+    return regressions
+
+
+def print_report(result: dict):
+    latency = result["webhook_latency"]
+    print(f"\n=== {result['scenario']} ({result['leads']} leads) ===")
+    print(f"Dial throughput   : {result['leads_per_second']} leads/s ({result['dial_seconds']}s)")
+    print(f"End to end        : {result['total_seconds']}s")
+    print(f"Webhook latency   : p50 {latency['p50_ms']}ms, p99 {latency['p99_ms']}ms ({latency['count']} events)")
+    print(f"Webhook errors    : {result['webhook_errors']}")
+    print(f"CRM requests      : {result['crm']['total_requests']} ({result['crm_requests_per_lead']}/lead, "
+          f"{result['crm']['rate_limited']} rate limited)")
+    print(f"Provider requests : vapi {result['vapi']['total_requests']}, retell {result['retell']['total_requests']}")
+    print(f"LLM requests      : {result['llm_requests']}")
+    print(f"Call states       : {result['call_states']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the leads reactivation pipeline")
+    parser.add_argument("--scenario", default="baseline", help=f"One of {', '.join(SCENARIOS)} or 'all'")
+    parser.add_argument("--leads", type=int, help="Override the number of leads of the scenario")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    results = []
+    for name in names:
+        config = dict(SCENARIOS[name])
+        if args.leads:
+            config["leads"] = args.leads
+        result = asyncio.run(run_scenario(name, config))
+        print_report(result)
+        results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, default=str)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nPerformance regressions:")
+            for regression in regressions:
+                print(f" - {regression}")
+            sys.exit(1)
+        print("\nNo performance regression.")
+
+
+if __name__ == "__main__":
+    main()
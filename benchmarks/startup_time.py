@@ -0,0 +1,123 @@
+"""
+Startup time benchmark.
+
+Imports `app.py` in fresh interpreters (as a uvicorn/gunicorn worker boot does) with placeholder
+credentials, and reports the wall time of the import and the modules with the highest
+cumulative import cost from `python -X importtime`.
+
+Usage:
+    python -m benchmarks.startup_time
+    python -m benchmarks.startup_time --runs 10 --top 30
+    # Fail when the import of app.py takes more than 1.5s (median)
+    python -m benchmarks.startup_time --max-seconds 1.5
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+from benchmarks.harness import BENCHMARK_ENV
+
+
+IMPORT_APP = "import time; started_at = time.perf_counter(); import app; print(time.perf_counter() - started_at)"
+
+
+def benchmark_env(lead_loader: str = None) -> dict:
+    """Environment of the child interpreter: placeholder credentials and throwaway databases."""
+    env = {**os.environ, **BENCHMARK_ENV}
+    data_dir = tempfile.mkdtemp(prefix="leads-startup-")
+    env["CALL_STATE_DB"] = os.path.join(data_dir, "call_state.db")
+    env["LEAD_LEASE_DB"] = os.path.join(data_dir, "lead_leases.db")
+    env["PHONE_POOL_DB"] = os.path.join(data_dir, "phone_numbers.db")
+    env["CRM_WRITE_BUFFER_DB"] = os.path.join(data_dir, "crm_updates.db")
+    env["LEAD_MIRROR_DB"] = os.path.join(data_dir, "lead_mirror.db")
+    env["TRANSCRIPT_DIR"] = os.path.join(data_dir, "transcripts")
+    env["WEBHOOK_LOG_DIR"] = os.path.join(data_dir, "webhook_log")
+    env["ENRICHMENT_CACHE_DB"] = os.path.join(data_dir, "enrichment_cache.db")
+    if lead_loader:
+        env["LEAD_LOADER"] = lead_loader
+    return env
+
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Parse the output of `python -X importtime`.
+
+    Returns:
+        list: (module, depth, self_us, cumulative_us) tuples of every import, depth 0 being the
+            modules imported by the `-c` command itself (`app`) and 1 the modules they import.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        # The module name follows one space, then two spaces of indentation per nesting level
+        name = module.lstrip()
+        depth = (len(module) - len(name) - 1) // 2
+        imports.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return imports
+
+
+def measure(env: dict, importtime: bool = False):
+    """
+    Import the app in a fresh interpreter.
+
+    Returns:
+        tuple: (seconds, stderr)
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", IMPORT_APP]
+    result = subprocess.run(command, env=env, capture_output=True, text=True, cwd=os.getcwd())
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing app.py failed:\n{result.stderr[-2000:]}")
+    return float(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the import time of app.py")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=20, help="Number of most expensive imports to show")
+    parser.add_argument("--depth", type=int, default=1, help="Deepest nesting level of the imports shown (0: app only)")
+    parser.add_argument("--lead-loader", help="LEAD_LOADER to boot with (default: airtable)")
+    parser.add_argument("--max-seconds", type=float, help="Fail when the median import time is above this")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    env = benchmark_env(args.lead_loader)
+    # Warm up the filesystem and bytecode caches
+    measure(env)
+    timings = [measure(env)[0] for _ in range(args.runs)]
+    _, stderr = measure(env, importtime=True)
+    imports = sorted(
+        (item for item in parse_importtime(stderr) if item[1] <= args.depth), key=lambda item: item[3], reverse=True
+    )
+
+    median = statistics.median(timings)
+    print(f"import app: median {median:.3f}s, min {min(timings):.3f}s, max {max(timings):.3f}s ({args.runs} runs)")
+    print(f"\n{'cumulative':>12} {'self':>10}  module")
+    for module, depth, self_us, cumulative_us in imports[:args.top]:
+        print(f"{cumulative_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {'  ' * depth}{module}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "median_seconds": median,
+                "timings": timings,
+                "imports": [
+                    {"module": module, "depth": depth, "self_us": self_us, "cumulative_us": cumulative_us}
+                    for module, depth, self_us, cumulative_us in imports
+                ],
+            }, f, indent=2)
+
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f"\nStartup regression: {median:.3f}s > {args.max_seconds}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
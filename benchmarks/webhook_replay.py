@@ -0,0 +1,259 @@
+"""
+Webhook replay load generator.
+
+Replays captured or synthetic Vapi `tool-calls`, `status-update`, `end-of-call-report` and
+Retell `call_analyzed` events against the webhook endpoints at a controlled rate, and reports
+latency percentiles, error rates and the saturation point of the server.
+
+Latencies are measured from the time each event was scheduled to be sent, so queueing caused
+by a saturated server is included (no coordinated omission).
+
+Warning: against a live server, `end-of-call-report` and `call_analyzed` events run the real
+post-call analysis and CRM update. Use a staging CRM, or `--in-process` to target the app with
+every external API replaced by the benchmark fakes.
+
+Usage:
+    # Constant rate against a running server
+    python -m benchmarks.webhook_replay --url http://localhost:8000 --rate 50 --duration 30
+
+    # Find the saturation point of a server running 2 workers and size for a 300 events/s peak
+    python -m benchmarks.webhook_replay --url http://localhost:8000 --ramp 10:200:10 --workers 2 --peak-rate 300
+
+    # Replay captured events (JSON lines) in-process
+    python -m benchmarks.webhook_replay --in-process --capture events.jsonl --rate 100
+"""
+import math
+import json
+import time
+import random
+import asyncio
+import argparse
+import httpx
+from benchmarks.payloads import (
+    vapi_call,
+    vapi_status_update,
+    vapi_tool_calls,
+    vapi_end_of_call_report,
+    retell_call_analyzed,
+)
+from benchmarks.stats import summarize_latencies
+
+
+DEFAULT_MIX = {
+    "status-update": 0.3,
+    "tool-calls": 0.2,
+    "end-of-call-report": 0.4,
+    "call_analyzed": 0.1,
+}
+
+
+def parse_mix(value: str) -> dict:
+    """Parse an event mix such as `tool-calls=0.2,end-of-call-report=0.8`."""
+    mix = {}
+    for item in value.split(","):
+        name, weight = item.split("=")
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown event type: {name}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def webhook_path(payload: dict) -> str:
+    """Endpoint receiving a payload: Retell events carry an `event` key, Vapi ones a `message`."""
+    return "/retell/webhook" if "event" in payload else "/webhook"
+
+
+def load_captured_events(path: str) -> list:
+    """
+    Load captured webhook events from a JSON lines file. Each line is either a raw webhook
+    body or `{"path": "/webhook", "payload": {...}}`.
+
+    Returns:
+        list: (path, payload) tuples.
+    """
+    events = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "payload" in record:
+                events.append((record.get("path") or webhook_path(record["payload"]), record["payload"]))
+            else:
+                events.append((webhook_path(record), record))
+    return events
+
+
+def synthetic_event(mix: dict):
+    """Build a random webhook event following the event mix."""
+    event_type = random.choices(list(mix), weights=mix.values())[0]
+    if event_type == "call_analyzed":
+        return "/retell/webhook", retell_call_analyzed()
+    call = vapi_call()
+    if event_type == "status-update":
+        return "/webhook", vapi_status_update(call, random.choice(["ringing", "in-progress", "ended"]))
+    if event_type == "tool-calls":
+        return "/webhook", vapi_tool_calls(call)
+    return "/webhook", vapi_end_of_call_report(call)
+
+
+def event_source(captured: list, mix: dict):
+    """Infinite iterator over captured events (looped) or synthetic events."""
+    while True:
+        if captured:
+            yield from captured
+        else:
+            yield synthetic_event(mix)
+
+
+def is_error(response: httpx.Response) -> bool:
+    if response.status_code >= 400:
+        return True
+    # Some handlers report failures in the body with a 200 response
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    return isinstance(body, dict) and isinstance(body.get("status_code"), int) and body["status_code"] >= 400
+
+
+async def run_step(client, events, rate: float, concurrency: int, duration: float, poisson: bool = False) -> dict:
+    """
+    Send events at a fixed offered rate for a given duration.
+
+    Args:
+        client (httpx.AsyncClient): Client bound to the target server.
+        events: Iterator of (path, payload).
+        rate (float): Offered events per second.
+        concurrency (int): Maximum number of requests in flight.
+        duration (float): Duration of the step in seconds.
+        poisson (bool): Use exponential inter-arrival times instead of a constant interval.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors, tasks = [], 0, []
+
+    async def send(path, payload, scheduled_at):
+        nonlocal errors
+        async with semaphore:
+            try:
+                response = await client.post(path, json=payload)
+                if is_error(response):
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+        latencies.append(time.perf_counter() - scheduled_at)
+
+    started_at = time.perf_counter()
+    scheduled_at = started_at
+    while scheduled_at - started_at < duration:
+        delay = scheduled_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        path, payload = next(events)
+        tasks.append(asyncio.create_task(send(path, payload, scheduled_at)))
+        scheduled_at += random.expovariate(rate) if poisson else 1 / rate
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started_at
+    sent = len(tasks)
+    return {
+        "offered_rate": rate,
+        "achieved_rate": round(sent / elapsed, 2),
+        "events": sent,
+        "errors": errors,
+        "error_rate": round(errors / sent, 4) if sent else 0.0,
+        **summarize_latencies(latencies),
+    }
+
+
+def is_saturated(step: dict, slo_p99_ms: float, max_error_rate: float) -> bool:
+    """A step is saturated when the server misses the latency SLO, errors out or falls behind the offered rate."""
+    return (
+        step["p99_ms"] is None
+        or step["p99_ms"] > slo_p99_ms
+        or step["error_rate"] > max_error_rate
+        or step["achieved_rate"] < step["offered_rate"] * 0.9
+    )
+
+
+def print_step(step: dict):
+    print(
+        f"offered {step['offered_rate']:>7.1f}/s | achieved {step['achieved_rate']:>7.1f}/s | "
+        f"p50 {step['p50_ms']}ms | p90 {step['p90_ms']}ms | p99 {step['p99_ms']}ms | "
+        f"errors {step['error_rate'] * 100:.2f}%"
+    )
+
+
+async def main_async(args):
+    captured = load_captured_events(args.capture) if args.capture else []
+    events = event_source(captured, args.mix)
+
+    if args.in_process:
+        from benchmarks.harness import load_app, install_fakes
+        app_module = load_app()
+        install_fakes(app_module, {"crm_latency": args.fake_latency, "llm_latency": args.fake_latency * 10})
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app_module.app), base_url="http://replay", timeout=args.timeout
+        )
+    else:
+        client = httpx.AsyncClient(
+            base_url=args.url,
+            timeout=args.timeout,
+            limits=httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency),
+        )
+
+    async with client:
+        if args.ramp:
+            start, stop, step = (float(value) for value in args.ramp.split(":"))
+            rates = [start + i * step for i in range(int((stop - start) / step) + 1)]
+        else:
+            rates = [args.rate]
+
+        saturation_rate, last_good_rate = None, None
+        for rate in rates:
+            result = await run_step(client, events, rate, args.concurrency, args.duration, args.poisson)
+            print_step(result)
+            if is_saturated(result, args.slo_p99_ms, args.max_error_rate):
+                saturation_rate = rate
+                break
+            last_good_rate = result["achieved_rate"]
+
+    if not args.ramp:
+        return
+    if saturation_rate is None:
+        print(f"\nNo saturation up to {rates[-1]:.1f} events/s.")
+    else:
+        print(f"\nSaturated at {saturation_rate:.1f} events/s "
+              f"(p99 > {args.slo_p99_ms}ms, errors > {args.max_error_rate * 100:.1f}% or falling behind).")
+    if last_good_rate and args.peak_rate:
+        per_worker = last_good_rate / args.workers
+        needed = math.ceil(args.peak_rate / per_worker)
+        print(f"Sustained {last_good_rate:.1f} events/s with {args.workers} worker(s) "
+              f"(~{per_worker:.1f}/worker): {needed} worker(s) needed for a {args.peak_rate:.0f} events/s peak.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay webhook events against the app and measure saturation")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Base URL of a running server, e.g. http://localhost:8000")
+    target.add_argument("--in-process", action="store_true", help="Target the app in-process with fake APIs")
+    parser.add_argument("--capture", help="JSON lines file of captured webhook events to replay")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="Synthetic event mix, e.g. tool-calls=0.2,end-of-call-report=0.8")
+    parser.add_argument("--rate", type=float, default=20.0, help="Offered events per second")
+    parser.add_argument("--ramp", help="Step the rate as start:stop:step to find the saturation point")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per rate step")
+    parser.add_argument("--concurrency", type=int, default=100, help="Maximum requests in flight")
+    parser.add_argument("--poisson", action="store_true", help="Poisson arrivals instead of a constant rate")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Request timeout in seconds")
+    parser.add_argument("--slo-p99-ms", type=float, default=2000.0, help="p99 latency above which the server is saturated")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Error rate above which the server is saturated")
+    parser.add_argument("--workers", type=int, default=1, help="Number of workers of the target server")
+    parser.add_argument("--peak-rate", type=float, help="Expected peak events/s, to size the number of workers")
+    parser.add_argument("--fake-latency", type=float, default=0.05, help="CRM latency of the in-process fakes")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
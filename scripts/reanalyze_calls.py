@@ -0,0 +1,40 @@
+import asyncio
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from src.base.leads_loader import create_lead_loader_from_env
+from src.base.structured_logging import configure_logging
+from src.call_reanalysis import CallReanalysisJob
+
+# Progress is logged, set LOG_FORMAT=text for human readable lines
+configure_logging()
+
+# Re-scores past calls after a change of CALL_ANALYSIS_PROMPT or CallAnalysisOutput:
+# the latest transcript of every lead is analyzed again and the CRM analysis fields are updated.
+# Progress is checkpointed in REANALYSIS_CHECKPOINT_DB, run the same command again to resume.
+# The LLM request budget is set with LLM_RATE_LIMIT (requests per second).
+#
+#   python scripts/reanalyze_calls.py --since 2024-05-01 --concurrency 16
+
+parser = argparse.ArgumentParser(description="Re-score past calls with the current analysis prompt")
+parser.add_argument("--since", help="Only calls stored from this date (ISO format)")
+parser.add_argument("--limit", type=int, help="Maximum number of calls processed by this run")
+parser.add_argument("--concurrency", type=int, default=8, help="Maximum number of analyses running at once")
+parser.add_argument("--job-id", help="Progress to resume, defaults to the version of the analysis prompt and schema")
+parser.add_argument("--dry-run", action="store_true", help="Only count the calls left to re-score")
+args = parser.parse_args()
+
+since = datetime.fromisoformat(args.since).timestamp() if args.since else None
+job = CallReanalysisJob(create_lead_loader_from_env(), job_id=args.job_id, concurrency=args.concurrency)
+try:
+    if args.dry_run:
+        print(f"{len(job.pending_calls(since))} calls left to re-score (job {job.job_id})")
+    else:
+        result = asyncio.run(job.run(since=since, limit=args.limit))
+        print(f"Re-scored {result['done']} calls, {result['skipped']} skipped, {result['failed']} failed")
+finally:
+    # Send the buffered CRM updates before exiting
+    job.close()
@@ -0,0 +1,56 @@
+import asyncio
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Imported after loading .env, the app reads its configuration when imported
+from app import automation
+
+# Replays the raw webhook payloads logged in WEBHOOK_LOG_DIR into the webhook handlers,
+# e.g. to process again the end-of-call reports received while a bug was deployed.
+# Replayed events go through the same processing as live ones (call states, analysis, CRM updates),
+# except that unanswered calls are not redialed and call outcomes are not fed to the dial pacer again.
+#
+#   python scripts/replay_webhooks.py --event-type end-of-call-report --since 2024-05-01T08:00 --dry-run
+#   python scripts/replay_webhooks.py --call-id <call_id>
+
+parser = argparse.ArgumentParser(description="Replay logged webhook events")
+parser.add_argument("--provider", choices=["vapi", "retell", "openai"], help="Only events of this provider")
+parser.add_argument("--event-type", help="Only events of this type (e.g. end-of-call-report, call_analyzed)")
+parser.add_argument("--call-id", help="Only events of this call")
+parser.add_argument("--since", help="Only events received from this date (ISO format)")
+parser.add_argument("--until", help="Only events received before this date (ISO format)")
+parser.add_argument("--limit", type=int, help="Maximum number of events")
+parser.add_argument("--include-tool-calls", action="store_true", help="Also replay the tool calls, running them again (e.g. booking appointments)")
+parser.add_argument("--dry-run", action="store_true", help="List the matching events without replaying them")
+args = parser.parse_args()
+
+filters = {
+    "provider": args.provider,
+    "event_type": args.event_type,
+    "call_id": args.call_id,
+    "since": datetime.fromisoformat(args.since).timestamp() if args.since else None,
+    "until": datetime.fromisoformat(args.until).timestamp() if args.until else None,
+    "limit": args.limit,
+}
+
+if args.dry_run:
+    for event in automation.event_log.scan(**filters):
+        received_at = datetime.fromtimestamp(event["received_at"]).isoformat(timespec="seconds")
+        print(f"{event['id']}\t{received_at}\t{event['provider']}\t{event['event_type']}\t{event['call_id']}")
+else:
+    handlers = {"vapi": automation.handle_webhook_payload}
+    if automation.retell is not None:
+        handlers["retell"] = automation.retell.handle_webhook_payload
+    if automation.openai is not None:
+        handlers["openai"] = automation.openai.handle_webhook_payload
+    # The flush thread is only started by the app startup, start it to send the CRM updates of the replayed events
+    automation.crm_writes.start()
+    try:
+        result = asyncio.run(automation.event_log.replay(handlers, include_tool_calls=args.include_tool_calls, **filters))
+    finally:
+        # Last flush of the CRM updates before exiting
+        automation.crm_writes.close()
+    print(f"Replayed {result['replayed']} events, {result['failed']} failed, {result['skipped']} skipped")
@@ -0,0 +1,107 @@
+import os
+import random
+
+
+class CallOutcome:
+    """
+    Provider-agnostic outcome of an ended call, derived from the Vapi `endedReason`,
+    the Retell `disconnection_reason` or the Twilio call status.
+    """
+    CONNECTED = "connected"
+    NO_ANSWER = "no_answer"
+    BUSY = "busy"
+    VOICEMAIL = "voicemail"
+    FAILED = "failed"
+    INVALID_NUMBER = "invalid_number"
+
+    # Calls that reached the line but not the lead
+    UNANSWERED = [NO_ANSWER, BUSY, VOICEMAIL]
+
+
+ENDED_REASON_OUTCOMES = {
+    # Vapi
+    "customer-did-not-answer": CallOutcome.NO_ANSWER,
+    "customer-busy": CallOutcome.BUSY,
+    "voicemail": CallOutcome.VOICEMAIL,
+    # Retell
+    "dial_no_answer": CallOutcome.NO_ANSWER,
+    "dial_busy": CallOutcome.BUSY,
+    "voicemail_reached": CallOutcome.VOICEMAIL,
+    "machine_detected": CallOutcome.VOICEMAIL,
+    "dial_failed": CallOutcome.FAILED,
+    "invalid_destination": CallOutcome.INVALID_NUMBER,
+    # Twilio (OpenAI Realtime calls)
+    "no-answer": CallOutcome.NO_ANSWER,
+    "busy": CallOutcome.BUSY,
+    "failed": CallOutcome.FAILED,
+    "canceled": CallOutcome.FAILED,
+}
+
+# Ended reasons telling that the call could not be placed (carrier or provider errors)
+FAILED_REASON_MARKERS = ("failed-to-connect", "rejected", "error", "provider-closed")
+
+
+def classify_ended_reason(ended_reason) -> str:
+    """
+    Classify why a call ended.
+
+    Args:
+        ended_reason (str): Vapi `endedReason` or Retell `disconnection_reason`.
+
+    Returns:
+        str: A `CallOutcome` value. Unknown reasons count as a conversation.
+    """
+    reason = (ended_reason or "").lower()
+    if reason in ENDED_REASON_OUTCOMES:
+        return ENDED_REASON_OUTCOMES[reason]
+    if any(marker in reason for marker in FAILED_REASON_MARKERS):
+        return CallOutcome.FAILED
+    return CallOutcome.CONNECTED
+
+
+# Delay before the first redial of each retryable outcome, in seconds
+DEFAULT_REDIAL_DELAYS = {
+    CallOutcome.BUSY: 15 * 60,
+    CallOutcome.FAILED: 10 * 60,
+    CallOutcome.NO_ANSWER: 2 * 3600,
+    CallOutcome.VOICEMAIL: 4 * 3600,
+}
+
+
+class RedialPolicy:
+    """
+    Decides whether and when a lead is called again after an unsuccessful call.
+    Delays grow exponentially with the number of consecutive unsuccessful calls.
+    """
+
+    def __init__(self, max_attempts: int = None, delays: dict = None, backoff_factor: float = 2.0, max_delay: float = 24 * 3600):
+        """
+        Args:
+            max_attempts (int): Consecutive unsuccessful calls after which the lead is given up on
+                (`REDIAL_MAX_ATTEMPTS`, default 3).
+            delays (dict): Delay before the first redial, by retryable `CallOutcome`.
+                Outcomes missing from it are never redialed.
+            backoff_factor (float): Multiplier of the delay for each further attempt.
+            max_delay (float): Upper bound of the delay, in seconds.
+        """
+        self.max_attempts = max_attempts or int(os.getenv("REDIAL_MAX_ATTEMPTS", "3"))
+        self.delays = DEFAULT_REDIAL_DELAYS if delays is None else delays
+        self.backoff_factor = backoff_factor
+        self.max_delay = max_delay
+
+    def next_delay(self, outcome: str, attempts: int):
+        """
+        Delay before the next call of a lead.
+
+        Args:
+            outcome (str): Outcome of the last call.
+            attempts (int): Consecutive unsuccessful calls so far, including the last one.
+
+        Returns:
+            float: Seconds to wait, or None if the lead must not be redialed.
+        """
+        if outcome not in self.delays or attempts >= self.max_attempts:
+            return None
+        delay = min(self.max_delay, self.delays[outcome] * self.backoff_factor ** (attempts - 1))
+        # Spread redials of leads that failed together
+        return delay * random.uniform(0.9, 1.1)
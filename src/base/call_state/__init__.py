@@ -0,0 +1,3 @@
+from .call_state_store import CallState, CallStateStore, map_provider_status
+
+__all__ = ['CallState', 'CallStateStore', 'map_provider_status']
@@ -0,0 +1,340 @@
+import os
+import json
+import time
+import threading
+from src.base.sqlite_store import open_database, immediate_transaction
+
+
+class CallState:
+    """
+    Provider-agnostic lifecycle of an outbound call.
+    A call only moves forward through these states, `FAILED` can be reached from any non-final state.
+    """
+    QUEUED = "queued"
+    DIALING = "dialing"
+    IN_PROGRESS = "in_progress"
+    ENDED = "ended"
+    ANALYZED = "analyzed"
+    CRM_SYNCED = "crm_synced"
+    FAILED = "failed"
+
+    ORDER = [QUEUED, DIALING, IN_PROGRESS, ENDED, ANALYZED, CRM_SYNCED]
+    FINAL = [CRM_SYNCED, FAILED]
+
+
+# Provider call statuses / webhook events mapped to the lifecycle states
+PROVIDER_STATUS_MAPPING = {
+    "vapi": {
+        "scheduled": CallState.DIALING,
+        "queued": CallState.DIALING,
+        "ringing": CallState.DIALING,
+        "in-progress": CallState.IN_PROGRESS,
+        "forwarding": CallState.IN_PROGRESS,
+        "ended": CallState.ENDED,
+    },
+    "retell": {
+        "registered": CallState.DIALING,
+        "ongoing": CallState.IN_PROGRESS,
+        "ended": CallState.ENDED,
+        "error": CallState.FAILED,
+        "call_started": CallState.IN_PROGRESS,
+        "call_ended": CallState.ENDED,
+        "call_analyzed": CallState.ENDED,
+    },
+    # Twilio call statuses of the OpenAI Realtime calls
+    "openai": {
+        "queued": CallState.DIALING,
+        "initiated": CallState.DIALING,
+        "ringing": CallState.DIALING,
+        "in-progress": CallState.IN_PROGRESS,
+        "completed": CallState.ENDED,
+        "busy": CallState.ENDED,
+        "no-answer": CallState.ENDED,
+        "canceled": CallState.ENDED,
+        "failed": CallState.ENDED,
+    },
+}
+
+
+def map_provider_status(provider, status):
+    """
+    Translate a provider call status or webhook event into a lifecycle state.
+
+    Args:
+        provider (str): Provider name ("vapi", "retell", "openai").
+        status (str): The status or event name reported by the provider.
+
+    Returns:
+        str: The matching `CallState` value, or None if the status is unknown.
+    """
+    return PROVIDER_STATUS_MAPPING.get(provider, {}).get(status)
+
+
+class CallStateStore:
+    """
+    Tracks every call attempt through its lifecycle in a local, indexed SQLite database.
+
+    Each row is one call attempt for a lead. Attempts are created as `queued` before dialing,
+    receive their provider call ID once `make_call` returns and are then advanced by webhook events.
+    Lookups by lead ID and call ID are served by indexes and per-state counts are cheap enough
+    to be polled by a live campaign dashboard.
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Open (or create) the call state database.
+
+        Args:
+            db_path (str): Path to the SQLite file. Defaults to the `CALL_STATE_DB` env variable
+                or `data/call_state.db`. Use ":memory:" for a throwaway store.
+        """
+        self.db_path = db_path or os.getenv("CALL_STATE_DB", "data/call_state.db")
+        self._lock = threading.Lock()
+        self._conn = open_database(self.db_path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS call_attempts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                lead_id TEXT NOT NULL,
+                call_id TEXT,
+                provider TEXT,
+                state TEXT NOT NULL,
+                details TEXT NOT NULL DEFAULT '{}',
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_call_attempts_lead ON call_attempts (lead_id, id);
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_call_attempts_call ON call_attempts (call_id);
+            CREATE INDEX IF NOT EXISTS idx_call_attempts_state ON call_attempts (state);
+            """
+        )
+
+    def record_queued(self, lead_id, provider=None) -> dict:
+        """
+        Register a new call attempt for a lead, unless the lead already has one waiting to be dialed.
+
+        Args:
+            lead_id (str): The lead ID.
+            provider (str): The provider expected to place the call.
+
+        Returns:
+            dict: The queued call attempt.
+        """
+        with self._lock:
+            attempt = self._open_attempt(lead_id)
+            if attempt is None:
+                now = time.time()
+                self._conn.execute(
+                    "INSERT INTO call_attempts (lead_id, provider, state, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (lead_id, provider, CallState.QUEUED, now, now),
+                )
+                attempt = self._open_attempt(lead_id)
+            return attempt
+
+    def record_dialing(self, lead_id, provider=None) -> dict:
+        """
+        Mark the lead's pending attempt as being dialed, creating it if it was never queued.
+
+        Args:
+            lead_id (str): The lead ID.
+            provider (str): The provider placing the call.
+
+        Returns:
+            dict: The updated call attempt.
+        """
+        attempt = self.record_queued(lead_id, provider)
+        return self._advance(attempt, CallState.DIALING, provider=provider)
+
+    def record_call_created(self, lead_id, call_id, provider, status=None) -> dict:
+        """
+        Attach the provider call ID returned by `make_call` to the lead's pending attempt.
+        A status webhook received before `make_call` returned may have attached it already.
+
+        Args:
+            lead_id (str): The lead ID.
+            call_id (str): The call ID returned by the provider.
+            provider (str): The provider that created the call.
+            status (str): The provider call status returned with the call, if any.
+
+        Returns:
+            dict: The updated call attempt.
+        """
+        state = map_provider_status(provider, status) or CallState.DIALING
+        with self._lock, immediate_transaction(self._conn):
+            self._attach_call(lead_id, call_id, provider)
+        return self.advance(call_id, state)
+
+    def record_failed(self, lead_id=None, call_id=None, reason=None) -> dict:
+        """
+        Mark an attempt as failed, e.g. when the dial request was rejected.
+
+        Args:
+            lead_id (str): The lead ID, used when no call ID exists yet.
+            call_id (str): The provider call ID.
+            reason (str): A short failure description.
+
+        Returns:
+            dict: The updated call attempt, or None if no matching attempt exists.
+        """
+        attempt = self.get_by_call(call_id) if call_id else self.get_latest_for_lead(lead_id)
+        if attempt is None:
+            return None
+        return self._advance(attempt, CallState.FAILED, details={"failure_reason": reason})
+
+    def advance(self, call_id, state, lead_id=None, provider=None, details=None) -> dict:
+        """
+        Move a call forward to a new state. Out-of-order events that would move the call
+        backwards (e.g. a late `in-progress` status after the end-of-call report) are ignored.
+        A call the store has not seen yet (webhook received before `make_call` returned)
+        is attached to the lead's pending attempt.
+
+        Args:
+            call_id (str): The provider call ID.
+            state (str): The target `CallState`.
+            lead_id (str): The lead ID, used to attach calls the store has not seen before.
+            provider (str): The provider of the call.
+            details (dict): Extra details to merge into the attempt (end reason, cost, ...).
+
+        Returns:
+            dict: The call attempt after the update, or None if the call is unknown and no lead ID was given.
+        """
+        attempt = self.get_by_call(call_id)
+        if attempt is None:
+            if lead_id is None:
+                return None
+            with self._lock, immediate_transaction(self._conn):
+                self._attach_call(lead_id, call_id, provider)
+            attempt = self.get_by_call(call_id)
+        return self._advance(attempt, state, provider=provider, details=details)
+
+    def get_by_call(self, call_id) -> dict:
+        """
+        Look up a call attempt by its provider call ID.
+
+        Args:
+            call_id (str): The provider call ID.
+
+        Returns:
+            dict: The call attempt, or None if unknown.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM call_attempts WHERE call_id = ?", (call_id,)).fetchone()
+        return self._to_dict(row)
+
+    def get_latest_for_lead(self, lead_id) -> dict:
+        """
+        Look up the most recent call attempt of a lead.
+
+        Args:
+            lead_id (str): The lead ID.
+
+        Returns:
+            dict: The call attempt, or None if the lead was never queued.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM call_attempts WHERE lead_id = ? ORDER BY id DESC LIMIT 1", (lead_id,)
+            ).fetchone()
+        return self._to_dict(row)
+
+    def get_attempts_for_lead(self, lead_id) -> list:
+        """
+        List all call attempts of a lead, oldest first.
+
+        Args:
+            lead_id (str): The lead ID.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM call_attempts WHERE lead_id = ? ORDER BY id", (lead_id,)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def counts(self, since=None, states=None) -> dict:
+        """
+        Count call attempts per state.
+
+        Args:
+            since (float): Only count attempts created after this UNIX timestamp.
+            states (list): Only count these states (served by the state index), the others are reported as 0.
+
+        Returns:
+            dict: Mapping of every `CallState` to its number of attempts.
+        """
+        query = "SELECT state, COUNT(*) AS total FROM call_attempts"
+        conditions, params = [], []
+        if states:
+            conditions.append(f"state IN ({','.join('?' * len(states))})")
+            params += list(states)
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(since)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " GROUP BY state"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        counts = {state: 0 for state in CallState.ORDER + [CallState.FAILED]}
+        counts.update({row["state"]: row["total"] for row in rows})
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _open_attempt(self, lead_id):
+        row = self._conn.execute(
+            "SELECT * FROM call_attempts WHERE lead_id = ? AND call_id IS NULL AND state IN (?, ?) "
+            "ORDER BY id DESC LIMIT 1",
+            (lead_id, CallState.QUEUED, CallState.DIALING),
+        ).fetchone()
+        return self._to_dict(row)
+
+    def _attach_call(self, lead_id, call_id, provider):
+        """Give a call ID to the lead's pending attempt, creating one if needed. Known call IDs are left as is."""
+        if self._conn.execute("SELECT 1 FROM call_attempts WHERE call_id = ?", (call_id,)).fetchone():
+            return
+        attempt = self._open_attempt(lead_id)
+        now = time.time()
+        if attempt is None:
+            self._conn.execute(
+                "INSERT INTO call_attempts (lead_id, call_id, provider, state, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (lead_id, call_id, provider, CallState.DIALING, now, now),
+            )
+        else:
+            self._conn.execute(
+                "UPDATE call_attempts SET call_id = ?, provider = COALESCE(?, provider), updated_at = ? WHERE id = ?",
+                (call_id, provider, now, attempt["id"]),
+            )
+
+    def _advance(self, attempt, state, provider=None, details=None):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM call_attempts WHERE id = ?", (attempt["id"],)).fetchone()
+            current = self._to_dict(row)
+            if not self._can_transition(current["state"], state):
+                return current
+
+            merged_details = {**current["details"], **(details or {})}
+            self._conn.execute(
+                "UPDATE call_attempts SET state = ?, provider = COALESCE(?, provider), details = ?, updated_at = ? "
+                "WHERE id = ?",
+                (state, provider, json.dumps(merged_details), time.time(), current["id"]),
+            )
+            row = self._conn.execute("SELECT * FROM call_attempts WHERE id = ?", (current["id"],)).fetchone()
+        return self._to_dict(row)
+
+    @staticmethod
+    def _can_transition(current, target):
+        if current in CallState.FINAL:
+            return False
+        if target == CallState.FAILED:
+            return True
+        return CallState.ORDER.index(target) > CallState.ORDER.index(current)
+
+    @staticmethod
+    def _to_dict(row):
+        if row is None:
+            return None
+        attempt = dict(row)
+        attempt["details"] = json.loads(attempt["details"] or "{}")
+        return attempt
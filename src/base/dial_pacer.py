@@ -0,0 +1,176 @@
+import os
+import time
+import math
+from collections import deque
+from src.base.call_state import CallState
+from src.base.metrics import REGISTRY
+from src.base.call_outcomes import CallOutcome, classify_ended_reason
+
+
+PACER_CONCURRENCY = REGISTRY.gauge(
+    "leads_pacer_dial_concurrency", "Calls (ringing or live) the pacer currently allows at once."
+)
+PACER_ANSWER_RATE = REGISTRY.gauge(
+    "leads_pacer_answer_rate", "Share of answered calls over the pacer window."
+)
+PACER_LIVE_CALLS = REGISTRY.gauge(
+    "leads_pacer_live_calls", "Live conversations observed by the pacer."
+)
+PACER_TARGET_LIVE_CALLS = REGISTRY.gauge(
+    "leads_pacer_target_live_calls", "Live conversations the pacer aims for."
+)
+
+
+class DialPacer:
+    """
+    Predictive dialing pacer: sets how many calls may be ringing or live at once so that the number
+    of live conversations stays close to a target.
+
+    The feedforward part comes from the last call outcomes (answer rate, ringing time of unanswered
+    calls, conversation duration of answered ones): to keep `T` conversations live, about
+    `T * ((1 - answer_rate) * ring + answer_rate * talk) / (answer_rate * talk)` calls must be in flight.
+    A proportional-integral correction on the observed live conversations absorbs the estimation
+    errors, and the limit shrinks when the post-call backlog (analysis, CRM updates) grows too large.
+    """
+
+    def __init__(
+        self,
+        target_live_calls: int = None,
+        window: int = 200,
+        max_concurrency: int = None,
+        max_postcall_backlog: int = None,
+        initial_answer_rate: float = 0.3,
+        initial_ring_seconds: float = 20,
+        initial_talk_seconds: float = 120,
+        proportional_gain: float = 0.5,
+        integral_gain: float = 0.05,
+        refresh_interval: float = 2.0,
+    ):
+        """
+        Args:
+            target_live_calls (int): Live conversations to aim for (`PACER_TARGET_LIVE_CALLS`).
+                0 or unset disables pacing.
+            window (int): Number of most recent calls the estimates are based on.
+            max_concurrency (int): Upper bound of the calls in flight (`PACER_MAX_CONCURRENCY`, default 10x the target).
+            max_postcall_backlog (int): Ended calls waiting for analysis or CRM update above which dialing
+                slows down (`PACER_MAX_POSTCALL_BACKLOG`, unset means no limit).
+            initial_answer_rate (float): Answer rate assumed until calls have been observed.
+            initial_ring_seconds (float): Ringing time assumed until unanswered calls have been observed.
+            initial_talk_seconds (float): Conversation duration assumed until answered calls have been observed.
+            proportional_gain (float): Correction per missing (or extra) live conversation.
+            integral_gain (float): Accumulated correction per missing live conversation, per refresh.
+            refresh_interval (float): Minimum seconds between two updates of the control signal.
+        """
+        self.target_live_calls = (
+            target_live_calls if target_live_calls is not None else int(os.getenv("PACER_TARGET_LIVE_CALLS", "0"))
+        )
+        self.max_concurrency = max_concurrency or int(
+            os.getenv("PACER_MAX_CONCURRENCY", str(max(1, self.target_live_calls * 10)))
+        )
+        backlog = max_postcall_backlog or os.getenv("PACER_MAX_POSTCALL_BACKLOG")
+        self.max_postcall_backlog = int(backlog) if backlog else None
+        self.initial_answer_rate = initial_answer_rate
+        self.initial_ring_seconds = initial_ring_seconds
+        self.initial_talk_seconds = initial_talk_seconds
+        self.proportional_gain = proportional_gain
+        self.integral_gain = integral_gain
+        self.refresh_interval = refresh_interval
+
+        # (answered, seconds) of the most recent calls
+        self._outcomes = deque(maxlen=window)
+        self._integral = 0.0
+        self._refreshed_at = 0.0
+        self.concurrency = float(self.target_live_calls)
+        PACER_TARGET_LIVE_CALLS.set(self.target_live_calls)
+
+    @property
+    def enabled(self) -> bool:
+        return self.target_live_calls > 0
+
+    def record_call(self, call_outputs: dict):
+        """
+        Add the outcome of an ended call to the window.
+
+        Args:
+            call_outputs (dict): Processed call outputs (`process_call_outputs` of Vapi or Retell).
+        """
+        answered = classify_ended_reason(call_outputs.get("endedReason")) == CallOutcome.CONNECTED
+        seconds = (call_outputs.get("duration") or 0) * 60
+        self._outcomes.append((answered, seconds))
+
+    def estimates(self) -> dict:
+        """
+        Answer rate, mean ringing time of unanswered calls and mean duration of answered calls over the window.
+        """
+        answered = [seconds for is_answered, seconds in self._outcomes if is_answered]
+        unanswered = [seconds for is_answered, seconds in self._outcomes if not is_answered]
+        return {
+            "answer_rate": len(answered) / len(self._outcomes) if self._outcomes else self.initial_answer_rate,
+            "ring_seconds": sum(unanswered) / len(unanswered) if unanswered else self.initial_ring_seconds,
+            "talk_seconds": sum(answered) / len(answered) if answered else self.initial_talk_seconds,
+            "calls": len(self._outcomes),
+        }
+
+    def update(self, live_calls: int, postcall_backlog: int = 0) -> float:
+        """
+        Recompute the control signal: the number of calls allowed in flight.
+
+        Args:
+            live_calls (int): Conversations currently live.
+            postcall_backlog (int): Ended calls still waiting for analysis or CRM update.
+
+        Returns:
+            float: The allowed number of calls in flight.
+        """
+        estimates = self.estimates()
+        answer_rate = max(estimates["answer_rate"], 0.01)
+        talk = max(estimates["talk_seconds"], 1.0)
+        # In flight calls needed to keep the target live: a dial holds a line for `talk` when answered and
+        # `ring` when not. The ringing before an answer is not measured, usually a few seconds against
+        # the full ring-out of unanswered calls, the PI correction absorbs it
+        line_seconds = (1 - answer_rate) * estimates["ring_seconds"] + answer_rate * talk
+        feedforward = self.target_live_calls * line_seconds / (answer_rate * talk)
+
+        error = self.target_live_calls - live_calls
+        # Anti-windup: the integral never corrects by more than the target itself
+        self._integral = max(
+            -self.target_live_calls, min(self.target_live_calls, self._integral + self.integral_gain * error)
+        )
+        concurrency = feedforward + self.proportional_gain * error + self._integral
+
+        if self.max_postcall_backlog and postcall_backlog > self.max_postcall_backlog:
+            concurrency *= self.max_postcall_backlog / postcall_backlog
+
+        self.concurrency = max(1.0, min(float(self.max_concurrency), concurrency))
+        PACER_CONCURRENCY.set(round(self.concurrency, 2))
+        PACER_ANSWER_RATE.set(round(estimates["answer_rate"], 4))
+        PACER_LIVE_CALLS.set(live_calls)
+        return self.concurrency
+
+    def available_slots(self, call_states, max_call_age: float = 2 * 3600) -> int:
+        """
+        Number of new calls that may be dialed now.
+
+        Args:
+            call_states (CallStateStore): Shared call lifecycle store, counting the calls of every worker.
+            max_call_age (float): Calls older than this are not counted (end never reported).
+        """
+        counts = call_states.counts(
+            since=time.time() - max_call_age,
+            states=[CallState.DIALING, CallState.IN_PROGRESS, CallState.ENDED, CallState.ANALYZED],
+        )
+        in_flight = counts[CallState.DIALING] + counts[CallState.IN_PROGRESS]
+        now = time.monotonic()
+        if now - self._refreshed_at >= self.refresh_interval:
+            self._refreshed_at = now
+            self.update(counts[CallState.IN_PROGRESS], counts[CallState.ENDED] + counts[CallState.ANALYZED])
+        return max(0, math.floor(self.concurrency) - in_flight)
+
+    def status(self) -> dict:
+        """Control signal and estimates, for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "target_live_calls": self.target_live_calls,
+            "dial_concurrency": round(self.concurrency, 2),
+            **self.estimates(),
+        }
@@ -0,0 +1,325 @@
+import os
+import re
+import time
+import heapq
+import itertools
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+
+# US states and Canadian provinces
+STATE_TIMEZONES = {
+    "CT": "America/New_York", "DE": "America/New_York", "DC": "America/New_York", "FL": "America/New_York",
+    "GA": "America/New_York", "KY": "America/New_York", "ME": "America/New_York", "MD": "America/New_York",
+    "MA": "America/New_York", "NH": "America/New_York", "NJ": "America/New_York", "NY": "America/New_York",
+    "NC": "America/New_York", "OH": "America/New_York", "PA": "America/New_York", "RI": "America/New_York",
+    "SC": "America/New_York", "VT": "America/New_York", "VA": "America/New_York", "WV": "America/New_York",
+    "MI": "America/Detroit", "IN": "America/Indiana/Indianapolis",
+    "AL": "America/Chicago", "AR": "America/Chicago", "IL": "America/Chicago", "IA": "America/Chicago",
+    "KS": "America/Chicago", "LA": "America/Chicago", "MN": "America/Chicago", "MS": "America/Chicago",
+    "MO": "America/Chicago", "NE": "America/Chicago", "ND": "America/Chicago", "OK": "America/Chicago",
+    "SD": "America/Chicago", "TN": "America/Chicago", "TX": "America/Chicago", "WI": "America/Chicago",
+    "CO": "America/Denver", "MT": "America/Denver", "NM": "America/Denver", "UT": "America/Denver",
+    "WY": "America/Denver", "ID": "America/Boise", "AZ": "America/Phoenix",
+    "CA": "America/Los_Angeles", "NV": "America/Los_Angeles", "OR": "America/Los_Angeles",
+    "WA": "America/Los_Angeles", "AK": "America/Anchorage", "HI": "Pacific/Honolulu",
+    "AB": "America/Edmonton", "BC": "America/Vancouver", "MB": "America/Winnipeg", "NB": "America/Moncton",
+    "NL": "America/St_Johns", "NS": "America/Halifax", "PE": "America/Halifax", "ON": "America/Toronto",
+    "QC": "America/Toronto", "SK": "America/Regina", "NT": "America/Yellowknife", "YT": "America/Whitehorse",
+    "NU": "America/Iqaluit",
+}
+
+STATE_NAMES = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR", "california": "CA", "colorado": "CO",
+    "connecticut": "CT", "delaware": "DE", "district of columbia": "DC", "florida": "FL", "georgia": "GA",
+    "hawaii": "HI", "idaho": "ID", "illinois": "IL", "indiana": "IN", "iowa": "IA", "kansas": "KS",
+    "kentucky": "KY", "louisiana": "LA", "maine": "ME", "maryland": "MD", "massachusetts": "MA",
+    "michigan": "MI", "minnesota": "MN", "mississippi": "MS", "missouri": "MO", "montana": "MT",
+    "nebraska": "NE", "nevada": "NV", "new hampshire": "NH", "new jersey": "NJ", "new mexico": "NM",
+    "new york": "NY", "north carolina": "NC", "north dakota": "ND", "ohio": "OH", "oklahoma": "OK",
+    "oregon": "OR", "pennsylvania": "PA", "rhode island": "RI", "south carolina": "SC", "south dakota": "SD",
+    "tennessee": "TN", "texas": "TX", "utah": "UT", "vermont": "VT", "virginia": "VA", "washington": "WA",
+    "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY", "alberta": "AB", "british columbia": "BC",
+    "manitoba": "MB", "new brunswick": "NB", "newfoundland": "NL", "nova scotia": "NS", "ontario": "ON",
+    "prince edward island": "PE", "quebec": "QC", "saskatchewan": "SK",
+}
+
+# First digit of the ZIP codes (US) or first letter of the postal codes (Canada) of each state/province
+POSTAL_CODE_PREFIXES = {
+    "CT": "0", "MA": "0", "ME": "0", "NH": "0", "NJ": "0", "RI": "0", "VT": "0",
+    "DE": "1", "NY": "01", "PA": "1", "DC": "2", "MD": "2", "NC": "2", "SC": "2", "VA": "2", "WV": "2",
+    "AL": "3", "FL": "3", "GA": "3", "MS": "3", "TN": "3", "IN": "4", "KY": "4", "MI": "4", "OH": "4",
+    "IA": "5", "MN": "5", "MT": "5", "ND": "5", "SD": "5", "WI": "5", "IL": "6", "KS": "6", "MO": "6", "NE": "6",
+    "AR": "7", "LA": "7", "OK": "7", "TX": "7", "AZ": "8", "CO": "8", "ID": "8", "NM": "8", "NV": "8",
+    "UT": "8", "WY": "8", "AK": "9", "CA": "9", "HI": "9", "OR": "9", "WA": "9",
+    "NL": "A", "NS": "B", "PE": "C", "NB": "E", "QC": "GHJ", "ON": "KLMNP", "MB": "R", "SK": "S",
+    "AB": "T", "BC": "V", "NT": "X", "NU": "X", "YT": "Y",
+}
+
+COUNTRY_TIMEZONES = {
+    "united kingdom": "Europe/London", "uk": "Europe/London", "england": "Europe/London",
+    "ireland": "Europe/Dublin", "france": "Europe/Paris", "germany": "Europe/Berlin", "spain": "Europe/Madrid",
+    "italy": "Europe/Rome", "netherlands": "Europe/Amsterdam", "belgium": "Europe/Brussels",
+    "switzerland": "Europe/Zurich", "portugal": "Europe/Lisbon", "morocco": "Africa/Casablanca",
+    "south africa": "Africa/Johannesburg", "united arab emirates": "Asia/Dubai", "uae": "Asia/Dubai",
+    "india": "Asia/Kolkata", "singapore": "Asia/Singapore", "japan": "Asia/Tokyo",
+    "australia": "Australia/Sydney", "mexico": "America/Mexico_City", "brazil": "America/Sao_Paulo",
+}
+
+# International calling codes, for numbers outside the North American Numbering Plan
+CALLING_CODE_TIMEZONES = {
+    "44": "Europe/London", "353": "Europe/Dublin", "33": "Europe/Paris", "49": "Europe/Berlin",
+    "34": "Europe/Madrid", "39": "Europe/Rome", "31": "Europe/Amsterdam", "32": "Europe/Brussels",
+    "41": "Europe/Zurich", "351": "Europe/Lisbon", "212": "Africa/Casablanca", "27": "Africa/Johannesburg",
+    "971": "Asia/Dubai", "91": "Asia/Kolkata", "65": "Asia/Singapore", "81": "Asia/Tokyo",
+    "61": "Australia/Sydney", "52": "America/Mexico_City", "55": "America/Sao_Paulo",
+}
+
+# North American area codes by state/province
+AREA_CODES = {
+    "AL": "205 251 256 334 659 938", "AK": "907", "AZ": "480 520 602 623 928", "AR": "479 501 870",
+    "CA": "209 213 279 310 323 341 408 415 424 442 510 530 559 562 619 626 628 650 657 661 669 707 714 747 "
+          "760 805 818 820 831 840 858 909 916 925 949 951",
+    "CO": "303 719 720 970 983", "CT": "203 475 860 959", "DE": "302", "DC": "202 771",
+    "FL": "239 305 321 352 386 407 448 561 656 689 727 754 772 786 813 850 863 904 941 954",
+    "GA": "229 404 470 478 678 706 762 770 912 943", "HI": "808", "ID": "208 986",
+    "IL": "217 224 309 312 331 447 464 618 630 708 773 779 815 847 872",
+    "IN": "219 260 317 463 574 765 812 930", "IA": "319 515 563 641 712", "KS": "316 620 785 913",
+    "KY": "270 364 502 606 859", "LA": "225 318 337 504 985", "ME": "207", "MD": "227 240 301 410 443 667",
+    "MA": "339 351 413 508 617 774 781 857 978", "MI": "231 248 269 313 517 586 616 734 810 906 947 989",
+    "MN": "218 320 507 612 651 763 952", "MS": "228 601 662 769", "MO": "314 417 557 573 636 660 816",
+    "MT": "406", "NE": "308 402 531", "NV": "702 725 775", "NH": "603",
+    "NJ": "201 551 609 640 732 848 856 862 908 973", "NM": "505 575",
+    "NY": "212 315 332 347 516 518 585 607 631 646 680 716 718 838 845 914 917 929 934",
+    "NC": "252 336 704 743 828 910 919 980 984", "ND": "701",
+    "OH": "216 220 234 283 326 330 380 419 440 513 567 614 740 937", "OK": "405 539 580 918",
+    "OR": "458 503 541 971", "PA": "215 223 267 272 412 445 484 570 582 610 717 724 814 835 878",
+    "RI": "401", "SC": "803 839 843 854 864", "SD": "605", "TN": "423 615 629 731 865 901 931",
+    "TX": "210 214 254 281 325 346 361 409 430 432 469 512 682 713 726 737 806 817 830 832 903 915 936 940 "
+          "945 956 972 979",
+    "UT": "385 435 801", "VT": "802", "VA": "276 434 540 571 703 757 804 826 948",
+    "WA": "206 253 360 425 509 564", "WV": "304 681", "WI": "262 274 414 534 608 715 920", "WY": "307",
+    "AB": "403 587 780 825", "BC": "236 250 604 672 778", "MB": "204 431", "NB": "506", "NL": "709",
+    "NS": "782 902", "ON": "226 249 289 343 365 416 437 519 548 613 647 705 807 905",
+    "QC": "367 418 438 450 514 579 581 819 873", "SK": "306 639",
+}
+AREA_CODE_TIMEZONES = {
+    code: STATE_TIMEZONES[state] for state, codes in AREA_CODES.items() for code in codes.split()
+}
+# Area codes in a different time zone than most of their state
+AREA_CODE_TIMEZONES.update({
+    "915": "America/Denver", "219": "America/Chicago", "270": "America/Chicago", "364": "America/Chicago",
+    "423": "America/New_York", "865": "America/New_York",
+})
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+# Two-letter codes only name a state when followed by a ZIP (US) or postal code (Canada), as in
+# "Austin, TX 78701": on their own they clash with country codes ("CA", "DE") and words ("IN", "OR")
+_STATE_CODE_PATTERN = re.compile(r"\b([A-Z]{2}),?\s+(\d{5}(?:-\d{4})?|[A-Z]\d[A-Z] ?\d[A-Z]\d)\b")
+_STATE_NAME_PATTERN = re.compile(r"\b(" + "|".join(sorted(STATE_NAMES, key=len, reverse=True)) + r")\b")
+_COUNTRY_PATTERN = re.compile(r"\b(" + "|".join(sorted(COUNTRY_TIMEZONES, key=len, reverse=True)) + r")\b")
+
+
+def timezone_from_postal_code(address: str):
+    """
+    Find the time zone of a US or Canadian postal address from its state/province code followed by
+    its ZIP or postal code ("Austin, TX 78701", "Toronto, ON M5V 2T6").
+
+    Returns:
+        str: IANA time zone name, or None if the address is not in that format.
+    """
+    # The postal code must belong to the state, "Munich DE 80331" is not in Delaware
+    codes = [
+        code for code, postal_code in _STATE_CODE_PATTERN.findall(address or "")
+        if code in STATE_TIMEZONES and postal_code[0] in POSTAL_CODE_PREFIXES.get(code, "")
+    ]
+    # The state comes last in "City, ST ZIP"
+    return STATE_TIMEZONES[codes[-1]] if codes else None
+
+
+def timezone_from_address(address: str):
+    """
+    Find the time zone of a postal address from its state/province and ZIP code ("Austin, TX 78701"),
+    the name of its state/province ("Austin, Texas") or its country ("Paris, France").
+
+    Returns:
+        str: IANA time zone name, or None if the address does not name a known region.
+    """
+    if not address:
+        return None
+    postal = timezone_from_postal_code(address)
+    if postal:
+        return postal
+    lowered = address.lower()
+    names = _STATE_NAME_PATTERN.findall(lowered)
+    if names:
+        return STATE_TIMEZONES[STATE_NAMES[names[-1]]]
+    countries = _COUNTRY_PATTERN.findall(lowered)
+    if countries:
+        return COUNTRY_TIMEZONES[countries[-1]]
+    return None
+
+
+def timezone_from_phone(phone: str):
+    """
+    Find the time zone of an E.164 phone number from its area code (North America)
+    or its country calling code.
+
+    Returns:
+        str: IANA time zone name, or None if the prefix is unknown.
+    """
+    digits = re.sub(r"\D", "", phone or "")
+    if not digits:
+        return None
+    if len(digits) == 10 and not (phone or "").strip().startswith("+"):
+        # National North American format
+        digits = "1" + digits
+    if digits.startswith("1") and len(digits) == 11:
+        return AREA_CODE_TIMEZONES.get(digits[1:4])
+    for length in (3, 2):
+        if digits[:length] in CALLING_CODE_TIMEZONES:
+            return CALLING_CODE_TIMEZONES[digits[:length]]
+    return None
+
+
+def parse_days(value: str) -> set:
+    """Parse calling days such as "mon-fri", "mon-sat" or "mon,wed,fri" into weekday numbers."""
+    days = set()
+    for part in value.lower().replace(" ", "").split(","):
+        if "-" in part:
+            first, last = (WEEKDAYS.index(day[:3]) for day in part.split("-"))
+            days.update(range(first, last + 1))
+        elif part:
+            days.add(WEEKDAYS.index(part[:3]))
+    return days
+
+
+class CallWindow:
+    """
+    Local hours and weekdays during which a lead may be called.
+    """
+
+    def __init__(self, hours: str = None, days: str = None):
+        """
+        Args:
+            hours (str): Local calling hours "HH:MM-HH:MM" or "H-H" (`CALLING_HOURS`, default 9-20).
+                "0-24" allows calls at any time.
+            days (str): Calling days, e.g. "mon-fri" (`CALLING_DAYS`, default mon-fri).
+        """
+        hours = hours or os.getenv("CALLING_HOURS", "9-20")
+        start, end = hours.split("-")
+        self.start_minutes, self.end_minutes = self._minutes(start), self._minutes(end)
+        if not 0 <= self.start_minutes < self.end_minutes <= 24 * 60:
+            raise ValueError(f"Invalid calling hours: {hours}")
+        self.days = parse_days(days or os.getenv("CALLING_DAYS", "mon-fri"))
+        if not self.days:
+            raise ValueError("At least one calling day is required")
+
+    def next_allowed(self, moment: datetime, tz: ZoneInfo) -> datetime:
+        """
+        First time at or after `moment` that falls inside the window, in the given time zone.
+
+        Args:
+            moment (datetime): Timezone-aware current time.
+            tz (ZoneInfo): Time zone of the lead.
+        """
+        local = moment.astimezone(tz)
+        for offset in range(8):
+            day = local.date() + timedelta(days=offset)
+            if day.weekday() not in self.days:
+                continue
+            midnight = datetime(day.year, day.month, day.day, tzinfo=tz)
+            start = midnight + timedelta(minutes=self.start_minutes)
+            end = midnight + timedelta(minutes=self.end_minutes)
+            if local < end:
+                return max(local, start)
+        raise ValueError("No calling window in the coming week")
+
+    @staticmethod
+    def _minutes(value: str) -> int:
+        hour, _, minute = value.strip().partition(":")
+        return int(hour) * 60 + int(minute or 0)
+
+
+class DialScheduler:
+    """
+    Orders leads by the next time they may be called in their own time zone.
+
+    The time zone of a lead is read from the state and ZIP code of its address, then from its phone
+    number prefix, then from the state or country named in its address, and falls back to
+    `DEFAULT_LEAD_TIMEZONE`. Leads are kept in a heap keyed by their next allowed
+    call time and only released by `pop_ready` once that time has come.
+    """
+
+    def __init__(self, window: CallWindow = None, default_timezone: str = None):
+        """
+        Args:
+            window (CallWindow): Local calling window, configured from the env variables by default.
+            default_timezone (str): Time zone of leads without a recognizable address or phone prefix
+                (`DEFAULT_LEAD_TIMEZONE`, default America/New_York).
+        """
+        self.window = window or CallWindow()
+        self.default_timezone = ZoneInfo(default_timezone or os.getenv("DEFAULT_LEAD_TIMEZONE", "America/New_York"))
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def timezone_for(self, lead) -> ZoneInfo:
+        """Time zone of a lead, from its US/Canadian postal address, then its phone number, then its address."""
+        name = (
+            timezone_from_postal_code(lead.address)
+            or timezone_from_phone(lead.phone)
+            or timezone_from_address(lead.address)
+        )
+        return ZoneInfo(name) if name else self.default_timezone
+
+    def next_call_time(self, lead, now: float = None) -> float:
+        """
+        Next time the lead may be called.
+
+        Args:
+            lead (Lead): The lead.
+            now (float): Current UNIX timestamp, defaults to the current time.
+
+        Returns:
+            float: UNIX timestamp, `now` if the lead is inside its calling window.
+        """
+        now = time.time() if now is None else now
+        moment = datetime.fromtimestamp(now, self.default_timezone)
+        allowed = self.window.next_allowed(moment, self.timezone_for(lead))
+        return max(now, allowed.timestamp())
+
+    def push(self, lead, now: float = None) -> float:
+        """
+        Schedule a lead at its next allowed call time.
+
+        Returns:
+            float: The scheduled UNIX timestamp.
+        """
+        at = self.next_call_time(lead, now)
+        heapq.heappush(self._heap, (at, next(self._sequence), lead))
+        return at
+
+    def pop_ready(self, now: float = None):
+        """
+        Take the lead that has waited the longest among those inside their calling window.
+
+        Returns:
+            Lead: The lead, or None if no lead may be called yet.
+        """
+        now = time.time() if now is None else now
+        while self._heap and self._heap[0][0] <= now:
+            _, _, lead = heapq.heappop(self._heap)
+            # The window may have closed while the lead was waiting behind others
+            at = self.next_call_time(lead, now)
+            if at <= now:
+                return lead
+            heapq.heappush(self._heap, (at, next(self._sequence), lead))
+        return None
+
+    def next_ready_at(self):
+        """UNIX timestamp at which the next lead may be called, None if no lead is scheduled."""
+        return self._heap[0][0] if self._heap else None
+
+    def __len__(self):
+        return len(self._heap)
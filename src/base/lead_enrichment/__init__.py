@@ -0,0 +1,41 @@
+import os
+import importlib
+from .enricher_base import EnricherBase
+from .enrichment_cache import EnrichmentCache
+from .enrichment_pipeline import EnrichmentPipeline
+
+# Enrichers by name, imported only when selected
+ENRICHERS = {
+    "email_domain": ("src.base.lead_enrichment.email_domain", "EmailDomainEnricher"),
+}
+
+
+def get_enricher_class(name: str):
+    """
+    Import and return the enricher class registered under a name.
+
+    Args:
+        name (str): One of `ENRICHERS`, or a "module:ClassName" path for a custom enricher.
+    """
+    if name in ENRICHERS:
+        module_name, class_name = ENRICHERS[name]
+    elif ":" in name:
+        module_name, class_name = name.split(":", 1)
+    else:
+        raise ValueError(f"Unknown enricher '{name}', expected one of {list(ENRICHERS)}")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_enrichment_pipeline_from_env():
+    """
+    Create the enrichment pipeline running the enrichers listed in the `LEAD_ENRICHERS` env variable
+    (comma separated, none by default). Enrichers read their own configuration.
+    """
+    names = [name.strip() for name in os.getenv("LEAD_ENRICHERS", "").split(",") if name.strip()]
+    return EnrichmentPipeline([get_enricher_class(name)() for name in names])
+
+
+__all__ = [
+    'ENRICHERS', 'get_enricher_class', 'create_enrichment_pipeline_from_env',
+    'EnricherBase', 'EnrichmentCache', 'EnrichmentPipeline',
+]
@@ -0,0 +1,32 @@
+from .enricher_base import EnricherBase
+
+# Domains of personal mailboxes, not tied to the company of the lead
+FREE_EMAIL_DOMAINS = {
+    "gmail.com", "googlemail.com", "yahoo.com", "hotmail.com", "outlook.com", "live.com", "msn.com",
+    "aol.com", "icloud.com", "me.com", "proton.me", "protonmail.com", "gmx.com", "mail.com",
+}
+
+
+class EmailDomainEnricher(EnricherBase):
+    """
+    Company domain of the lead read from its email address, without any API call.
+    Results are cached per domain.
+    """
+
+    name = "email_domain"
+
+    def cache_key(self, lead) -> str:
+        return self._domain(lead) or None
+
+    async def enrich(self, lead) -> dict:
+        domain = self._domain(lead)
+        if not domain:
+            return {}
+        if domain in FREE_EMAIL_DOMAINS:
+            return {"business_email": False}
+        return {"business_email": True, "company_domain": domain}
+
+    @staticmethod
+    def _domain(lead) -> str:
+        email = (lead.email or "").strip().lower()
+        return email.rsplit("@", 1)[1] if "@" in email else ""
@@ -0,0 +1,25 @@
+from abc import ABC, abstractmethod
+
+
+class EnricherBase(ABC):
+    # Name of the enricher, key of its results in `Lead.enrichment` and label of its metrics
+    name = "custom"
+
+    # Seconds a result stays in the enrichment cache
+    cache_ttl = 7 * 24 * 3600
+
+    def cache_key(self, lead) -> str:
+        """
+        Key the results are cached under, shared by the leads it applies to (e.g. the email, or the
+        email domain for company data). None disables caching for this lead.
+        """
+        email = (lead.email or "").strip().lower()
+        return email or None
+
+    @abstractmethod
+    async def enrich(self, lead) -> dict:
+        """
+        Abstract method returning the data found about a lead. Must be implemented by subclasses.
+        Blocking API clients should be run with `asyncio.to_thread` so enrichers run concurrently.
+        """
+        pass
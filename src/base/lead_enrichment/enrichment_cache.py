@@ -0,0 +1,58 @@
+import os
+import json
+import time
+import threading
+from src.base.sqlite_store import open_database
+
+
+class EnrichmentCache:
+    """
+    Enrichment results shared by the workers of the host, by enricher and cache key, with an expiry.
+    """
+
+    def __init__(self, db_path: str = None):
+        """
+        Args:
+            db_path (str): Path to the SQLite file (`ENRICHMENT_CACHE_DB`, default `data/enrichment_cache.db`).
+                Use ":memory:" for a single process cache.
+        """
+        self.db_path = db_path or os.getenv("ENRICHMENT_CACHE_DB", "data/enrichment_cache.db")
+        self._lock = threading.Lock()
+        self._conn = open_database(self.db_path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS enrichment_cache (
+                enricher TEXT NOT NULL,
+                cache_key TEXT NOT NULL,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                PRIMARY KEY (enricher, cache_key)
+            );
+            """
+        )
+
+    def get(self, enricher: str, cache_key: str) -> dict:
+        """Cached result of an enricher, None if missing or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM enrichment_cache WHERE enricher = ? AND cache_key = ? AND expires_at > ?",
+                (enricher, cache_key, time.time()),
+            ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def put(self, enricher: str, cache_key: str, data: dict, ttl: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO enrichment_cache (enricher, cache_key, data, expires_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (enricher, cache_key) DO UPDATE SET data = excluded.data, expires_at = excluded.expires_at",
+                (enricher, cache_key, json.dumps(data, default=str), time.time() + ttl),
+            )
+
+    def purge(self) -> int:
+        """Delete the expired results. Returns the number deleted."""
+        with self._lock:
+            return self._conn.execute("DELETE FROM enrichment_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
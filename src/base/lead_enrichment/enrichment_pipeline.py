@@ -0,0 +1,140 @@
+import os
+import asyncio
+from collections import deque
+from src.base.metrics import REGISTRY, track_stage
+from src.base.structured_logging import get_logger
+from .enricher_base import EnricherBase
+from .enrichment_cache import EnrichmentCache
+
+logger = get_logger(__name__)
+
+ENRICHMENT_RESULTS = REGISTRY.counter(
+    "leads_enrichment_results_total", "Enrichment results per enricher and source (cache, fetched, error).",
+    ("enricher", "result"),
+)
+ENRICHMENT_OVER_BUDGET = REGISTRY.counter(
+    "leads_enrichment_over_budget_total", "Leads dialed with partial enrichment data after their time budget ran out."
+)
+
+
+class EnrichmentPipeline:
+    """
+    Runs the enrichers of a lead concurrently before its call, within a strict time budget.
+
+    Leads are enriched ahead of the dialer: `prefetch` is called when leads are queued, and a few
+    background workers enrich them in queue order. At dial time `enrich` picks up the running or
+    finished enrichment of the lead, and waits at most `budget` seconds for what is still missing:
+    the lead is then dialed with partial data while the late enrichers finish in the background.
+    Results are cached by enricher and cache key (email, domain, ...) in an `EnrichmentCache`.
+    """
+
+    def __init__(
+        self,
+        enrichers: list = None,
+        cache: EnrichmentCache = None,
+        budget: float = None,
+        enricher_timeout: float = 30,
+        prefetch_concurrency: int = 5,
+    ):
+        """
+        Args:
+            enrichers (list[EnricherBase]): Enrichers run for every lead.
+            cache (EnrichmentCache): Cache of the enrichment results.
+            budget (float): Maximum seconds a dial waits for the enrichment of its lead
+                (`ENRICHMENT_BUDGET_SECONDS`, default 2).
+            enricher_timeout (float): Seconds after which an enricher is cancelled, even in the background.
+            prefetch_concurrency (int): Leads enriched at once ahead of the dialer.
+        """
+        self.enrichers = enrichers or []
+        self.cache = cache or (EnrichmentCache() if self.enrichers else None)
+        self.budget = budget if budget is not None else float(os.getenv("ENRICHMENT_BUDGET_SECONDS", "2"))
+        self.enricher_timeout = enricher_timeout
+        self.prefetch_concurrency = prefetch_concurrency
+        # Running enrichments by lead ID, with the results collected so far
+        self._tasks = {}
+        self._results = {}
+        self._backlog = deque()
+        self._prefetchers = set()
+
+    def prefetch(self, leads: list):
+        """
+        Start enriching queued leads in the background. Does nothing outside of an event loop.
+
+        Args:
+            leads (list[Lead]): Leads to enrich ahead of their call.
+        """
+        if not self.enrichers:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._backlog.extend(leads)
+        while len(self._prefetchers) < self.prefetch_concurrency and len(self._prefetchers) < len(self._backlog):
+            prefetcher = asyncio.create_task(self._prefetch_backlog())
+            self._prefetchers.add(prefetcher)
+            prefetcher.add_done_callback(self._prefetchers.discard)
+
+    async def enrich(self, lead):
+        """
+        Add the enrichment data of a lead to `lead.enrichment`, waiting at most `budget` seconds.
+
+        Args:
+            lead (Lead): The lead about to be called.
+
+        Returns:
+            Lead: The lead, with the results of the enrichers that finished in time.
+        """
+        if not self.enrichers:
+            return lead
+        task = self._start(lead)
+        done, _ = await asyncio.wait({task}, timeout=self.budget)
+        if not done:
+            ENRICHMENT_OVER_BUDGET.inc()
+            logger.info("enrichment_over_budget", lead_id=lead.id, budget=self.budget)
+        lead.enrichment.update(self._results.get(lead.id, {}) if not done else task.result())
+        return lead
+
+    def _start(self, lead) -> asyncio.Task:
+        """Return the enrichment task of a lead, starting it if needed."""
+        task = self._tasks.get(lead.id)
+        if task is None:
+            results = self._results[lead.id] = {}
+            task = self._tasks[lead.id] = asyncio.create_task(self._enrich(lead, results))
+            task.add_done_callback(lambda _: self._forget(lead.id, task))
+        return task
+
+    def _forget(self, lead_id, task):
+        # Finished results are in the cache, later dials of the lead read them from there
+        if self._tasks.get(lead_id) is task:
+            del self._tasks[lead_id]
+            self._results.pop(lead_id, None)
+
+    async def _prefetch_backlog(self):
+        while self._backlog:
+            lead = self._backlog.popleft()
+            await asyncio.wait({self._start(lead)})
+
+    async def _enrich(self, lead, results: dict) -> dict:
+        await asyncio.gather(*(self._run_enricher(enricher, lead, results) for enricher in self.enrichers))
+        return results
+
+    async def _run_enricher(self, enricher: EnricherBase, lead, results: dict):
+        key = enricher.cache_key(lead)
+        if key is not None:
+            cached = await asyncio.to_thread(self.cache.get, enricher.name, key)
+            if cached is not None:
+                ENRICHMENT_RESULTS.inc(enricher=enricher.name, result="cache")
+                results[enricher.name] = cached
+                return
+        try:
+            with track_stage("enrich", tool=enricher.name):
+                data = await asyncio.wait_for(enricher.enrich(lead), timeout=self.enricher_timeout)
+        except Exception as e:
+            ENRICHMENT_RESULTS.inc(enricher=enricher.name, result="error")
+            logger.warning("enrichment_failed", enricher=enricher.name, lead_id=lead.id, error=str(e) or type(e).__name__)
+            return
+        ENRICHMENT_RESULTS.inc(enricher=enricher.name, result="fetched")
+        results[enricher.name] = data
+        if key is not None:
+            await asyncio.to_thread(self.cache.put, enricher.name, key, data, enricher.cache_ttl)
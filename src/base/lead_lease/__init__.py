@@ -0,0 +1,3 @@
+from .lead_lease_store import LeaseState, LeadLeaseStore
+
+__all__ = ['LeaseState', 'LeadLeaseStore']
@@ -0,0 +1,258 @@
+import os
+import json
+import time
+import threading
+from src.base.sqlite_store import open_database, immediate_transaction
+
+
+class LeaseState:
+    """
+    Lifecycle of a lead in the shared campaign queue.
+    `pending` leads are claimable once their `not_before` time has come (local calling window),
+    `leased` leads whose lease expired (crashed or stuck worker) can be claimed again.
+    """
+    PENDING = "pending"
+    LEASED = "leased"
+    DONE = "done"
+
+
+class LeadLeaseStore:
+    """
+    Campaign work queue shared by every worker of the host, backed by a local SQLite database.
+
+    Leads are enqueued once and claimed in small batches by the workers, earliest allowed call
+    time first: the `not_before` index is a priority queue shared by the workers. A claim is an
+    atomic write transaction that hands each lead to a single worker for a limited time (the lease).
+    The worker renews the lease of a lead right before dialing it, so a lead whose lease was
+    taken over by another worker is never dialed twice. Leads of a worker that crashed are
+    claimed again once their lease expires.
+    """
+
+    def __init__(self, db_path=None):
+        """
+        Open (or create) the lease database.
+
+        Args:
+            db_path (str): Path to the SQLite file. Defaults to the `LEAD_LEASE_DB` env variable
+                or `data/lead_leases.db`. Every worker of a campaign must use the same file.
+                Use ":memory:" for a single process store.
+        """
+        self.db_path = db_path or os.getenv("LEAD_LEASE_DB", "data/lead_leases.db")
+        self._lock = threading.Lock()
+        self._conn = open_database(self.db_path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS lead_leases (
+                lead_id TEXT PRIMARY KEY,
+                lead TEXT NOT NULL,
+                state TEXT NOT NULL,
+                worker_id TEXT,
+                expires_at REAL,
+                not_before REAL NOT NULL DEFAULT 0,
+                claims INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_lead_leases_state ON lead_leases (state, expires_at);
+            CREATE INDEX IF NOT EXISTS idx_lead_leases_schedule ON lead_leases (state, not_before);
+            """
+        )
+
+    def enqueue(self, leads, not_before=None) -> list:
+        """
+        Add leads to the queue. Leads already pending or leased are left untouched,
+        leads that were done are queued again.
+
+        Args:
+            leads (list[dict]): Serialized leads, each with an "id" key.
+            not_before (dict): UNIX timestamp before which each lead must not be claimed, by lead ID.
+                Leads without one are claimable right away.
+
+        Returns:
+            list: IDs of the leads (re)queued.
+        """
+        now = time.time()
+        not_before = not_before or {}
+        rows = [
+            (lead["id"], json.dumps(lead), LeaseState.PENDING, not_before.get(lead["id"], now), now, now)
+            for lead in leads
+        ]
+        queued = []
+        with self._lock, immediate_transaction(self._conn):
+            for row in rows:
+                cursor = self._conn.execute(
+                    "INSERT INTO lead_leases (lead_id, lead, state, not_before, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (lead_id) DO UPDATE SET lead = excluded.lead, state = excluded.state, "
+                    "worker_id = NULL, expires_at = NULL, not_before = excluded.not_before, "
+                    "updated_at = excluded.updated_at "
+                    f"WHERE lead_leases.state = '{LeaseState.DONE}'",
+                    row,
+                )
+                if cursor.rowcount:
+                    queued.append(row[0])
+        return queued
+
+    def claim(self, worker_id, limit=5, lease_seconds=60) -> list:
+        """
+        Atomically lease up to `limit` pending leads whose time has come (or leads with an expired lease)
+        to a worker.
+
+        Args:
+            worker_id (str): Unique ID of the claiming worker.
+            limit (int): Maximum number of leads to claim.
+            lease_seconds (float): Duration of the lease.
+
+        Returns:
+            list[dict]: The claimed leads, earliest allowed call time first.
+        """
+        now = time.time()
+        with self._lock, immediate_transaction(self._conn):
+            rows = self._conn.execute(
+                "SELECT lead_id, lead FROM lead_leases "
+                "WHERE (state = ? AND not_before <= ?) OR (state = ? AND expires_at < ?) "
+                "ORDER BY not_before, created_at, lead_id LIMIT ?",
+                (LeaseState.PENDING, now, LeaseState.LEASED, now, limit),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE lead_leases SET state = ?, worker_id = ?, expires_at = ?, claims = claims + 1, updated_at = ? "
+                "WHERE lead_id = ?",
+                [(LeaseState.LEASED, worker_id, now + lease_seconds, now, row["lead_id"]) for row in rows],
+            )
+        return [json.loads(row["lead"]) for row in rows]
+
+    def renew(self, lead_id, worker_id, lease_seconds=60) -> bool:
+        """
+        Extend the lease of a lead, only if the worker still holds it.
+
+        Args:
+            lead_id (str): The lead ID.
+            worker_id (str): The worker holding the lease.
+            lease_seconds (float): New duration of the lease, from now.
+
+        Returns:
+            bool: False if the lease expired and was claimed by another worker (or the lead is done).
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE lead_leases SET expires_at = ?, updated_at = ? WHERE lead_id = ? AND state = ? AND worker_id = ?",
+                (now + lease_seconds, now, lead_id, LeaseState.LEASED, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, lead_id, worker_id) -> bool:
+        """
+        Mark a leased lead as done (dialed, or given up on).
+
+        Args:
+            lead_id (str): The lead ID.
+            worker_id (str): The worker holding the lease.
+
+        Returns:
+            bool: False if the worker no longer held the lease.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE lead_leases SET state = ?, expires_at = NULL, updated_at = ? "
+                "WHERE lead_id = ? AND state = ? AND worker_id = ?",
+                (LeaseState.DONE, time.time(), lead_id, LeaseState.LEASED, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def defer(self, lead_id, worker_id, not_before) -> bool:
+        """
+        Put a leased lead back in the queue until a later time, e.g. when its calling window closed.
+
+        Args:
+            lead_id (str): The lead ID.
+            worker_id (str): The worker holding the lease.
+            not_before (float): UNIX timestamp from which the lead can be claimed again.
+
+        Returns:
+            bool: False if the worker no longer held the lease.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE lead_leases SET state = ?, worker_id = NULL, expires_at = NULL, not_before = ?, updated_at = ? "
+                "WHERE lead_id = ? AND state = ? AND worker_id = ?",
+                (LeaseState.PENDING, not_before, time.time(), lead_id, LeaseState.LEASED, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def get(self, lead_id):
+        """
+        Look up the serialized lead as it was enqueued.
+
+        Returns:
+            dict: The lead, or None if it was never enqueued.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT lead FROM lead_leases WHERE lead_id = ?", (lead_id,)).fetchone()
+        return json.loads(row["lead"]) if row else None
+
+    def requeue(self, lead_id, not_before) -> bool:
+        """
+        Queue a done lead again with its enqueued data, e.g. to redial it after an unanswered call.
+
+        Args:
+            lead_id (str): The lead ID.
+            not_before (float): UNIX timestamp from which the lead can be claimed again.
+
+        Returns:
+            bool: False if the lead is unknown or still pending or leased.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE lead_leases SET state = ?, worker_id = NULL, expires_at = NULL, not_before = ?, updated_at = ? "
+                "WHERE lead_id = ? AND state = ?",
+                (LeaseState.PENDING, not_before, time.time(), lead_id, LeaseState.DONE),
+            )
+        return cursor.rowcount == 1
+
+    def next_pending_at(self):
+        """UNIX timestamp at which the next pending lead becomes claimable, None if the queue is empty."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(not_before) AS next_at FROM lead_leases WHERE state = ?", (LeaseState.PENDING,)
+            ).fetchone()
+        return row["next_at"]
+
+    def release(self, worker_id) -> int:
+        """
+        Give back every lead leased by a worker, e.g. on graceful shutdown.
+
+        Args:
+            worker_id (str): The worker ID.
+
+        Returns:
+            int: Number of leads put back in the queue.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE lead_leases SET state = ?, worker_id = NULL, expires_at = NULL, updated_at = ? "
+                "WHERE state = ? AND worker_id = ?",
+                (LeaseState.PENDING, time.time(), LeaseState.LEASED, worker_id),
+            )
+        return cursor.rowcount
+
+    def counts(self) -> dict:
+        """
+        Count leads per lease state. Pending leads outside their calling window are counted as `scheduled`,
+        leased leads whose lease expired as `expired`.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT CASE WHEN state = ? AND expires_at < ? THEN 'expired' "
+                "WHEN state = ? AND not_before > ? THEN 'scheduled' ELSE state END AS state, "
+                "COUNT(*) AS total FROM lead_leases GROUP BY 1",
+                (LeaseState.LEASED, now, LeaseState.PENDING, now),
+            ).fetchall()
+        counts = {LeaseState.PENDING: 0, "scheduled": 0, LeaseState.LEASED: 0, "expired": 0, LeaseState.DONE: 0}
+        counts.update({row["state"]: row["total"] for row in rows})
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
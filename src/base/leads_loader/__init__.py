@@ -0,0 +1,58 @@
+import os
+import importlib
+from .write_buffer import CRMWriteBuffer
+from .lead_mirror import LeadMirror
+
+# Lead loaders by name, imported only when selected so unused CRM SDKs are never loaded
+LEAD_LOADERS = {
+    "airtable": ("src.base.leads_loader.airtable", "AirtableLeadLoader"),
+    "google_sheets": ("src.base.leads_loader.google_sheets", "GoogleSheetLeadLoader"),
+    "hubspot": ("src.base.leads_loader.hubspot", "HubSpotLeadLoader"),
+}
+
+
+def get_lead_loader_class(name: str):
+    """
+    Import and return the lead loader class registered under a name.
+
+    Args:
+        name (str): One of `LEAD_LOADERS`, or a "module:ClassName" path for a custom CRM.
+    """
+    if name in LEAD_LOADERS:
+        module_name, class_name = LEAD_LOADERS[name]
+    elif ":" in name:
+        module_name, class_name = name.split(":", 1)
+    else:
+        raise ValueError(f"Unknown lead loader '{name}', expected one of {list(LEAD_LOADERS)}")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_lead_loader_from_env():
+    """
+    Create the lead loader selected by the `LEAD_LOADER` env variable (default: airtable),
+    configured from the CRM env variables. Loaders reporting their changes are wrapped in a
+    local `LeadMirror`, unless `LEAD_MIRROR=0`.
+    """
+    loader = _create_lead_loader(os.getenv("LEAD_LOADER", "airtable"))
+    if os.getenv("LEAD_MIRROR", "1") != "0" and LeadMirror.supports(loader):
+        return LeadMirror(loader)
+    return loader
+
+
+def _create_lead_loader(name: str):
+    loader_class = get_lead_loader_class(name)
+    if name == "airtable":
+        return loader_class(
+            access_token=os.getenv("AIRTABLE_ACCESS_TOKEN"),
+            base_id=os.getenv("AIRTABLE_BASE_ID"),
+            table_name=os.getenv("AIRTABLE_TABLE_NAME"),
+        )
+    if name == "google_sheets":
+        return loader_class(spreadsheet_id=os.getenv("SHEET_ID"), sheet_name=os.getenv("SHEET_NAME"))
+    if name == "hubspot":
+        return loader_class(access_token=os.getenv("HUBSPOT_API_KEY"))
+    # Custom loaders read their own configuration
+    return loader_class()
+
+
+__all__ = ['LEAD_LOADERS', 'get_lead_loader_class', 'create_lead_loader_from_env', 'CRMWriteBuffer', 'LeadMirror']
@@ -1,11 +1,22 @@
+import time
+from datetime import datetime, timezone
 from pyairtable import Table
 from pyairtable.formulas import match
 from .lead_loader_base import LeadLoaderBase
+from ..rate_limiter import get_rate_limiter
 
 class AirtableLeadLoader(LeadLoaderBase):
+    name = "airtable"
+    # Airtable updates at most 10 records per request
+    max_batch_size = 10
+    # Margin covering the clock difference with Airtable and writes in flight during a sync
+    sync_overlap_seconds = 60
+
     def __init__(self, access_token, base_id, table_name):
         # Use the access_token instead of api_key
         self.table = Table(access_token, base_id, table_name)
+        # Airtable limits requests per base
+        self.rate_limiter = get_rate_limiter("airtable", base_id)
 
     def fetch_records(self, lead_ids=None, status="NEW"):
         """
@@ -15,7 +26,7 @@ class AirtableLeadLoader(LeadLoaderBase):
         if lead_ids:
             leads = []
             for lead_id in lead_ids:
-                record = self.table.get(lead_id)
+                record = self._call_api(self.table.get, lead_id)
                 if record:
                     # Merge id and fields into a single dictionary
                     lead = {"id": record["id"], **record.get("fields", {})}
@@ -24,12 +35,30 @@ class AirtableLeadLoader(LeadLoaderBase):
         else:
             # Fetch leads by status filter (based on "Status" field)
             # You can choose your own field for filter with different naming
-            records = self.table.all(formula=match({"Status": status}))
+            records = self._call_api(self.table.all, formula=match({"Status": status}))
             return [
                 {"id": record["id"], **record.get("fields", {})}
                 for record in records
             ]
 
+    def fetch_changes(self, since=None):
+        """
+        Fetches the records modified since the previous sync, using the `LAST_MODIFIED_TIME()` formula.
+
+        Args:
+            since (float): UNIX timestamp returned by the previous call, None to fetch every record.
+
+        Returns:
+            tuple: (records, UNIX timestamp to pass to the next call)
+        """
+        started_at = time.time()
+        formula = None
+        if since:
+            modified_after = datetime.fromtimestamp(since - self.sync_overlap_seconds, tz=timezone.utc)
+            formula = f"IS_AFTER(LAST_MODIFIED_TIME(), DATETIME_PARSE('{modified_after.strftime('%Y-%m-%dT%H:%M:%S.000Z')}'))"
+        records = self._call_api(self.table.all, formula=formula)
+        return [{"id": record["id"], **record.get("fields", {})} for record in records], started_at
+
     def update_record(self, lead_id, updates: dict):
         """
         Updates a record in Airtable, adding new fields dynamically if they don't exist.
@@ -42,7 +71,7 @@ class AirtableLeadLoader(LeadLoaderBase):
             dict: The updated record from Airtable.
         """
         # Fetch the current record to ensure it exists and get its fields
-        record = self.table.get(lead_id)
+        record = self._call_api(self.table.get, lead_id)
         if not record:
             raise ValueError(f"Record with ID {lead_id} not found.")
         
@@ -51,24 +80,20 @@ class AirtableLeadLoader(LeadLoaderBase):
         updated_fields = {**current_fields, **updates}
 
         # Update the record in Airtable
-        return self.table.update(lead_id, updated_fields)
+        return self._call_api(self.table.update, lead_id, updated_fields)
     
     def update_records_batch(self, leads):
         """
-        Updates multiple records in Airtable based on a list of Lead objects.
+        Updates multiple records in Airtable, 10 records per request.
+
+        Args:
+            leads (list[dict]): Records to update, each with an "id" and an "updates" dict.
+
+        Returns:
+            list[dict]: The updated records from Airtable.
         """
         updated_records = []
-        for lead in leads:
-            try:
-                lead_id = lead['id']
-                record = self.table.get(lead_id)
-                
-                # Merge current fields with updates, adding any new fields
-                current_fields = record.get("fields", {})
-                updated_fields = {**current_fields, **lead['updates']}
-                updated_record = self.update_record(lead['id'], updated_fields)
-                updated_records.append(updated_record)
-            except ValueError as e:
-                print(f"Skipping lead ID {lead['id']}: {e}")
-
-        return updated_records
\ No newline at end of file
+        for start in range(0, len(leads), self.max_batch_size):
+            records = [{"id": lead["id"], "fields": lead["updates"]} for lead in leads[start:start + self.max_batch_size]]
+            updated_records += self._call_api(self.table.batch_update, records)
+        return updated_records
@@ -5,6 +5,10 @@ from googleapiclient.discovery import build
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from .lead_loader_base import LeadLoaderBase
+from ..rate_limiter import get_rate_limiter
+from ..structured_logging import get_logger
+
+logger = get_logger(__name__)
 
 # Set the scopes for Google API for using Google Sheets as CRM
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
@@ -24,9 +28,18 @@ def get_google_credentials():
     return creds
 
 class GoogleSheetLeadLoader(LeadLoaderBase):
+    name = "google_sheets"
+    # Cells of many rows are written by one request, keep the request body reasonable
+    max_batch_size = 100
+
     def __init__(self, spreadsheet_id, sheet_name=None):
-        self.sheet_service = build("sheets", "v4", credentials=get_google_credentials())
+        # Use the discovery document bundled with the client library instead of fetching it
+        self.sheet_service = build(
+            "sheets", "v4", credentials=get_google_credentials(), static_discovery=True, cache_discovery=False
+        )
         self.spreadsheet_id = spreadsheet_id
+        # Google Sheets quotas apply per user, so all spreadsheets share the same budget
+        self.rate_limiter = get_rate_limiter("google_sheets")
         self.sheet_name = sheet_name or self._get_sheet_name_from_id()
 
     def fetch_records(self, lead_ids=None, status="NEW"):
@@ -35,17 +48,8 @@ class GoogleSheetLeadLoader(LeadLoaderBase):
         Otherwise, fetch leads matching the given status.
         """
         try:
-            result = self.sheet_service.spreadsheets().values().get(
-                spreadsheetId=self.spreadsheet_id, range=self.sheet_name
-            ).execute()
-            rows = result.get("values", [])
-            headers = rows[0]
             records = []
-
-            for i, row in enumerate(rows[1:], start=2):  # Start from row 2 for data
-                record = dict(zip(headers, row))
-                record["id"] = f"{i}"  # Add row number as an ID
-
+            for record in self._fetch_rows():
                 if lead_ids:
                     if record["id"] in lead_ids:
                         records.append(record)
@@ -54,9 +58,19 @@ class GoogleSheetLeadLoader(LeadLoaderBase):
                     
             return records
         except HttpError as e:
-            print(f"Error fetching records from Google Sheets: {e}")
+            logger.error("crm_fetch_failed", loader=self.name, error=str(e))
             return []
 
+    def fetch_changes(self, since=None):
+        """
+        Fetches every row: Sheets has no modification time, the local mirror only writes the rows
+        whose content hash changed.
+
+        Returns:
+            tuple: (records, None)
+        """
+        return self._fetch_rows(), None
+
     def update_record(self, lead_id, updates: dict):
         """
         Updates a record in Google Sheets, adding or modifying specified fields.
@@ -69,61 +83,109 @@ class GoogleSheetLeadLoader(LeadLoaderBase):
             dict: The updated record ID and fields if successful, None otherwise.
         """
         try:
-            # Fetch the header row to identify column indices
-            result = self.sheet_service.spreadsheets().values().get(
-                spreadsheetId=self.spreadsheet_id, range=self.sheet_name
-            ).execute()
-            rows = result.get("values", [])
-            headers = rows[0]
-
-            # Prepare the update body for all specified fields
-            updates_batch = []
-            for field, value in updates.items():
-                if field in headers:
-                    col_index = headers.index(field)
-                    col_letter = chr(65 + col_index)  # Convert index to column letter
-                    range_ = f"{self.sheet_name}!{col_letter}{lead_id}"
-                    updates_batch.append({
-                        "range": range_,
-                        "values": [[value]],
-                    })
+            headers = self._get_headers()
 
             # Execute batch update for efficiency
+            updates_batch = self._cell_updates(headers, lead_id, updates)
             if updates_batch:
                 body = {"valueInputOption": "RAW", "data": updates_batch}
-                self.sheet_service.spreadsheets().values().batchUpdate(
-                    spreadsheetId=self.spreadsheet_id,
-                    body=body
-                ).execute()
+                self._call_api(
+                    self.sheet_service.spreadsheets().values().batchUpdate(
+                        spreadsheetId=self.spreadsheet_id,
+                        body=body
+                    ).execute
+                )
             return {"id": lead_id, "updated_fields": updates}
         except HttpError as e:
-            print(f"Error updating Google Sheets record: {e}")
+            logger.error("crm_update_failed", loader=self.name, lead_id=lead_id, error=str(e))
             return None
 
     def update_records_batch(self, leads):
         """
-        Updates multiple records in Google Sheets based on a list of Lead objects.
+        Updates multiple records in Google Sheets, the cells of up to 100 rows per request.
+
+        Args:
+            leads (list[dict]): Records to update, each with an "id" (row number) and an "updates" dict.
+
+        Returns:
+            list[dict]: The updated record IDs and fields.
+        """
+        headers = self._get_headers()
+        for start in range(0, len(leads), self.max_batch_size):
+            updates_batch = [
+                cell
+                for lead in leads[start:start + self.max_batch_size]
+                for cell in self._cell_updates(headers, lead["id"], lead["updates"])
+            ]
+            if updates_batch:
+                body = {"valueInputOption": "RAW", "data": updates_batch}
+                self._call_api(
+                    self.sheet_service.spreadsheets().values().batchUpdate(
+                        spreadsheetId=self.spreadsheet_id,
+                        body=body
+                    ).execute
+                )
+        return [{"id": lead["id"], "updated_fields": lead["updates"]} for lead in leads]
+
+    def _fetch_rows(self):
+        """
+        Fetches every row of the sheet as records, identified by their row number.
+        """
+        result = self._call_api(
+            self.sheet_service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id, range=self.sheet_name
+            ).execute
+        )
+        rows = result.get("values", [])
+        if not rows:
+            return []
+        headers = rows[0]
+        records = []
+        for i, row in enumerate(rows[1:], start=2):  # Start from row 2 for data
+            record = dict(zip(headers, row))
+            record["id"] = f"{i}"  # Add row number as an ID
+            records.append(record)
+        return records
+
+    def _get_headers(self):
+        """
+        Fetches the header row, to identify column indices.
+        """
+        result = self._call_api(
+            self.sheet_service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id, range=f"{self.sheet_name}!1:1"
+            ).execute
+        )
+        return result.get("values", [[]])[0]
+
+    def _cell_updates(self, headers, lead_id, updates: dict):
+        """
+        Prepares the cell updates of a record, for the fields present in the sheet.
         """
-        updated_records = []
-        for lead in leads:
-            try:
-                updated_record = self.update_record(lead['id'], lead['updates'])
-                if updated_record:
-                    updated_records.append(updated_record)
-            except Exception as e:
-                print(f"Skipping lead ID {lead['id']}: {e}")
-        return updated_records
+        updates_batch = []
+        for field, value in updates.items():
+            if field in headers:
+                col_index = headers.index(field)
+                col_letter = chr(65 + col_index)  # Convert index to column letter
+                range_ = f"{self.sheet_name}!{col_letter}{lead_id}"
+                updates_batch.append({
+                    "range": range_,
+                    "values": [[value]],
+                })
+        return updates_batch
 
     def _get_sheet_name_from_id(self):
         """
         Retrieves the default sheet name if not explicitly provided.
         """
         try:
-            result = self.sheet_service.spreadsheets().get(spreadsheetId=self.spreadsheet_id).execute()
+            result = self._call_api(
+                self.sheet_service.spreadsheets().get(spreadsheetId=self.spreadsheet_id).execute
+            )
             sheets = result.get("sheets", [])
             if not sheets:
                 raise ValueError("No sheets found in the spreadsheet.")
             return sheets[0]["properties"]["title"]  # Default to the first sheet
         except HttpError as e:
-            print(f"Error fetching sheet name: {e}")
+            logger.error("sheet_name_fetch_failed", loader=self.name, error=str(e))
             raise
@@ -1,14 +1,37 @@
 import os
+from datetime import datetime
 import hubspot
-from hubspot.crm.contacts import SimplePublicObjectInput, ApiException
+from hubspot.crm.contacts import (
+    SimplePublicObjectInput,
+    SimplePublicObjectBatchInput,
+    BatchInputSimplePublicObjectBatchInput,
+    PublicObjectSearchRequest,
+    ApiException,
+)
 from .lead_loader_base import LeadLoaderBase
+from ..rate_limiter import get_rate_limiter
+from ..structured_logging import get_logger
+
+logger = get_logger(__name__)
 
 HUBSPOT_CONTACTS_PROPERTIES = ["email", "firstname", "lastname", "hs_lead_status", "address", "phone"]
 
+# The search API pages through at most 10,000 results per query
+HUBSPOT_SEARCH_MAX_RESULTS = 10000
+
 class HubSpotLeadLoader(LeadLoaderBase):
+    name = "hubspot"
+    # HubSpot batch endpoints take at most 100 inputs
+    max_batch_size = 100
+    status_field = "hs_lead_status"
+    phone_field = "phone"
+
     def __init__(self, access_token=None):
         # Use access_token instead of environment variable for more flexibility
-        self.client = hubspot.Client.create(access_token=access_token or os.getenv("HUBSPOT_API_KEY"))
+        access_token = access_token or os.getenv("HUBSPOT_API_KEY")
+        self.client = hubspot.Client.create(access_token=access_token)
+        # HubSpot limits requests per private app token
+        self.rate_limiter = get_rate_limiter("hubspot", access_token)
 
     def fetch_records(self, lead_ids=None, status="NEW"):
         """
@@ -19,7 +42,8 @@ class HubSpotLeadLoader(LeadLoaderBase):
             if lead_ids:
                 leads = []
                 for lead_id in lead_ids:
-                    contact = self.client.crm.contacts.basic_api.get_by_id(
+                    contact = self._call_api(
+                        self.client.crm.contacts.basic_api.get_by_id,
                         contact_id=lead_id,
                         properties=HUBSPOT_CONTACTS_PROPERTIES
                     )
@@ -30,7 +54,8 @@ class HubSpotLeadLoader(LeadLoaderBase):
                 return leads
             else:
                 # Fetch leads by status filter
-                api_response = self.client.crm.contacts.basic_api.get_page(
+                api_response = self._call_api(
+                    self.client.crm.contacts.basic_api.get_page,
                     limit=100,
                     properties=HUBSPOT_CONTACTS_PROPERTIES,
                     archived=False,
@@ -44,10 +69,69 @@ class HubSpotLeadLoader(LeadLoaderBase):
                         records.append(lead)
                 return records
         except ApiException as e:
-            print(f"Error fetching records from HubSpot: {e}")
+            logger.error("crm_fetch_failed", loader=self.name, error=str(e))
             return []
 
 
+    def fetch_changes(self, since=None):
+        """
+        Fetches the contacts modified since the previous sync, searching on `lastmodifieddate`.
+        Without cursor, every contact is listed page by page. The search API stops after 10,000 results,
+        the search is then restarted from the most recent `lastmodifieddate` seen.
+
+        Args:
+            since (int): `lastmodifieddate` (milliseconds) returned by the previous call, None to fetch every contact.
+
+        Returns:
+            tuple: (records, most recent `lastmodifieddate` seen, in milliseconds)
+
+        Raises:
+            RuntimeError: More than 10,000 contacts share the same `lastmodifieddate`, the search
+                cannot go past them. A full sync (without cursor) lists them page by page instead.
+        """
+        properties = HUBSPOT_CONTACTS_PROPERTIES + ["lastmodifieddate"]
+        # Contacts read again after a restart are kept once, with their latest values
+        records, cursor, after = {}, since, None
+        search_from = since
+        while True:
+            if since is None:
+                page = self._call_api(
+                    self.client.crm.contacts.basic_api.get_page,
+                    limit=100,
+                    properties=properties,
+                    archived=False,
+                    after=after,
+                )
+            else:
+                search = PublicObjectSearchRequest(
+                    filter_groups=[
+                        {"filters": [{"propertyName": "lastmodifieddate", "operator": "GTE", "value": str(cursor)}]}
+                    ],
+                    sorts=[{"propertyName": "lastmodifieddate", "direction": "ASCENDING"}],
+                    properties=properties,
+                    limit=100,
+                    after=after,
+                )
+                page = self._call_api(
+                    self.client.crm.contacts.search_api.do_search, public_object_search_request=search
+                )
+            for contact in page.results:
+                values = contact.properties or {}
+                records[contact.id] = {"id": contact.id, **values}
+                modified_at = self._timestamp_ms(values.get("lastmodifieddate"))
+                cursor = max(cursor or 0, modified_at or 0)
+            after = page.paging.next.after if page.paging and page.paging.next else None
+            if after is None:
+                return list(records.values()), cursor
+            if since is not None and int(after) >= HUBSPOT_SEARCH_MAX_RESULTS:
+                # Results are sorted by modification time: restart the search from the last one seen
+                if cursor == search_from:
+                    # Every result of the search had that same time, the restart would read them again forever
+                    raise RuntimeError(
+                        f"More than {HUBSPOT_SEARCH_MAX_RESULTS} HubSpot contacts modified at {cursor}, run a full sync"
+                    )
+                search_from, after = cursor, None
+
     def update_record(self, lead_id, updates: dict):
         """
         Updates a record in HubSpot, adding new fields dynamically if they don't exist.
@@ -64,30 +148,57 @@ class HubSpotLeadLoader(LeadLoaderBase):
             simple_public_object_input = SimplePublicObjectInput(properties=updates)
 
             # Update the record in HubSpot
-            self.client.crm.contacts.basic_api.update(
-                contact_id=lead_id, simple_public_object_input=simple_public_object_input
+            self._call_api(
+                self.client.crm.contacts.basic_api.update,
+                contact_id=lead_id,
+                simple_public_object_input=simple_public_object_input,
             )
             return {"lead_id": lead_id, "updated_fields": updates}
         except ApiException as e:
-            print(f"Error updating HubSpot record: {e}")
+            logger.error("crm_update_failed", loader=self.name, lead_id=lead_id, error=str(e))
             return None
 
     def update_records_batch(self, leads):
         """
-        Updates multiple records in HubSpot based on a list of Lead objects.
+        Updates multiple records in HubSpot with the batch API, 100 records per request.
 
         Args:
-            leads (List[Lead]): A list of Lead objects containing the updates.
+            leads (list[dict]): Records to update, each with an "id" and an "updates" dict.
 
         Returns:
             List[dict]: A list of updated record details.
         """
-        updated_records = []
-        for lead in leads:
-            try:
-                updated_record = self.update_record(lead['id'], lead['updates'])
-                if updated_record:
-                    updated_records.append(updated_record)
-            except Exception as e:
-                print(f"Skipping lead ID {lead['id']}: {e}")
-        return updated_records
+        for start in range(0, len(leads), self.max_batch_size):
+            batch = BatchInputSimplePublicObjectBatchInput(
+                inputs=[
+                    SimplePublicObjectBatchInput(id=lead["id"], properties=lead["updates"])
+                    for lead in leads[start:start + self.max_batch_size]
+                ]
+            )
+            self._call_api(
+                self.client.crm.contacts.batch_api.update,
+                batch_input_simple_public_object_batch_input=batch,
+            )
+        return [{"lead_id": lead["id"], "updated_fields": lead["updates"]} for lead in leads]
+
+    def _call_api(self, func, *args, **kwargs):
+        """
+        Call a HubSpot API function through its `_with_http_info` variant, so the rate limiter
+        also reads the `X-HubSpot-RateLimit-*` headers of the successful responses.
+        """
+        with_http_info = getattr(getattr(func, "__self__", None), f"{func.__name__}_with_http_info", None)
+        if with_http_info is None:
+            return super()._call_api(func, *args, **kwargs)
+        data, _, _ = super()._call_api(with_http_info, *args, **kwargs)
+        return data
+
+    @staticmethod
+    def _timestamp_ms(value):
+        """
+        Converts a HubSpot datetime property (ISO 8601 or milliseconds) to milliseconds.
+        """
+        if not value:
+            return None
+        if str(value).isdigit():
+            return int(value)
+        return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp() * 1000)
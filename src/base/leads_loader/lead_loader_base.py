@@ -1,8 +1,22 @@
 from abc import ABC, abstractmethod
+from ..rate_limiter import call_with_retry
 
 
 class LeadLoaderBase(ABC):
-    available_statuses = ["NEW", "CONTACTED"]
+    available_statuses = ["NEW", "CONTACTED", "REDIAL", "UNREACHABLE"]
+
+    # Name of the CRM, used to label metrics
+    name = "custom"
+
+    # Shared rate limiter of the CRM API budget, set by subclasses
+    rate_limiter = None
+
+    # Records updated per API request by `update_records_batch`
+    max_batch_size = 1
+
+    # Record fields holding the lead status and phone number, indexed by the local mirror
+    status_field = "Status"
+    phone_field = "Phone"
 
     @abstractmethod
     def fetch_records(self, lead_ids=None, status="NEW"):
@@ -18,3 +32,44 @@ class LeadLoaderBase(ABC):
         Abstract method to update a record's status. Must be implemented by subclasses.
         """
         pass
+
+    def update_records_batch(self, leads):
+        """
+        Update several records in as few API requests as the CRM allows (`max_batch_size` records per request).
+        Subclasses override it with the batch endpoint of their CRM.
+
+        Args:
+            leads (list[dict]): Records to update, each with an "id" and an "updates" dict.
+
+        Returns:
+            list: The results of the updates.
+
+        Raises:
+            Exception: A request failed, some records of the batch may not have been updated.
+        """
+        return [self.update_record(lead["id"], lead["updates"]) for lead in leads]
+
+    def fetch_changes(self, since=None):
+        """
+        Fetch the records created or modified since the previous sync, to keep a `LeadMirror` current.
+        Loaders implementing it can be mirrored locally.
+
+        Args:
+            since: Cursor returned by the previous call, None to fetch every record.
+
+        Returns:
+            tuple: (records, cursor of the next call). Without `since` the records are the complete table,
+                records missing from it were deleted. Loaders that cannot tell changes apart return a
+                None cursor, so every sync fetches the complete table.
+        """
+        raise NotImplementedError(f"The {self.name} lead loader does not track changes")
+
+    def _call_api(self, func, *args, **kwargs):
+        """
+        Call a CRM API function through the loader's rate limiter,
+        retrying rate-limited and transient failures with exponential backoff.
+        Reads and field updates are idempotent, so connection errors are retried too.
+        """
+        if self.rate_limiter is None:
+            return func(*args, **kwargs)
+        return call_with_retry(self.rate_limiter, func, *args, retry_connection_errors=True, **kwargs)
@@ -0,0 +1,245 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from src.base.metrics import track_stage
+from src.base.sqlite_store import open_database, immediate_transaction
+from .lead_loader_base import LeadLoaderBase
+
+
+def normalize_phone(phone) -> str:
+    """Keep the digits of a phone number, so numbers formatted differently match."""
+    return re.sub(r"\D", "", str(phone or ""))
+
+
+class LeadMirror(LeadLoaderBase):
+    """
+    Local SQLite copy of the CRM records of a lead loader, indexed by status, phone number and ID.
+
+    Lead selection and lookups read the local copy. Before reading, a copy older than `max_staleness`
+    is brought up to date with the changes of the CRM only (`fetch_changes` of the loader), and a full
+    sync catches deleted records every `full_sync_interval`. Records are only rewritten when their
+    content hash changed. Updates go to the CRM first, then to the local copy.
+    """
+
+    def __init__(
+        self,
+        lead_loader: LeadLoaderBase,
+        db_path: str = None,
+        max_staleness: float = None,
+        full_sync_interval: float = 24 * 3600,
+    ):
+        """
+        Args:
+            lead_loader (LeadLoaderBase): The mirrored CRM, it must implement `fetch_changes`.
+            db_path (str): Path to the SQLite file (`LEAD_MIRROR_DB`, default `data/lead_mirror.db`).
+                Use ":memory:" for a single process mirror.
+            max_staleness (float): Age of the copy, in seconds, above which reads sync the changes first
+                (`LEAD_MIRROR_MAX_STALENESS_SECONDS`, default 30).
+            full_sync_interval (float): Seconds between two full syncs.
+        """
+        self.lead_loader = lead_loader
+        self.name = lead_loader.name
+        self.rate_limiter = lead_loader.rate_limiter
+        self.max_batch_size = lead_loader.max_batch_size
+        self.status_field = lead_loader.status_field
+        self.phone_field = lead_loader.phone_field
+        self.max_staleness = (
+            max_staleness if max_staleness is not None else float(os.getenv("LEAD_MIRROR_MAX_STALENESS_SECONDS", "30"))
+        )
+        self.full_sync_interval = full_sync_interval
+
+        self.db_path = db_path or os.getenv("LEAD_MIRROR_DB", "data/lead_mirror.db")
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._conn = open_database(self.db_path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS mirrored_leads (
+                loader TEXT NOT NULL,
+                lead_id TEXT NOT NULL,
+                status TEXT,
+                phone TEXT,
+                record TEXT NOT NULL,
+                row_hash TEXT NOT NULL,
+                synced_at REAL NOT NULL,
+                PRIMARY KEY (loader, lead_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_mirrored_leads_status ON mirrored_leads (loader, status);
+            CREATE INDEX IF NOT EXISTS idx_mirrored_leads_phone ON mirrored_leads (loader, phone);
+            CREATE TABLE IF NOT EXISTS mirror_syncs (
+                loader TEXT PRIMARY KEY,
+                cursor TEXT,
+                synced_at REAL NOT NULL DEFAULT 0,
+                full_synced_at REAL NOT NULL DEFAULT 0
+            );
+            """
+        )
+
+    @staticmethod
+    def supports(lead_loader) -> bool:
+        """Check whether a lead loader reports its changes and can be mirrored."""
+        return type(lead_loader).fetch_changes is not LeadLoaderBase.fetch_changes
+
+    def fetch_records(self, lead_ids=None, status="NEW"):
+        """
+        Read leads from the local copy. If lead IDs are provided, read those specific records
+        (records unknown locally are fetched from the CRM). Otherwise, read leads matching the given status.
+        """
+        self.sync_if_stale()
+        if not lead_ids:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT record FROM mirrored_leads WHERE loader = ? AND status = ? ORDER BY lead_id",
+                    (self.name, status),
+                ).fetchall()
+            return [json.loads(row["record"]) for row in rows]
+
+        lead_ids = [str(lead_id) for lead_id in lead_ids]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT lead_id, record FROM mirrored_leads WHERE loader = ? AND lead_id IN ({','.join('?' * len(lead_ids))})",
+                [self.name, *lead_ids],
+            ).fetchall()
+        records = {row["lead_id"]: json.loads(row["record"]) for row in rows}
+        missing = [lead_id for lead_id in lead_ids if lead_id not in records]
+        if missing:
+            fetched = self.lead_loader.fetch_records(lead_ids=missing)
+            self._store(fetched)
+            records.update({str(record["id"]): record for record in fetched})
+        return [records[lead_id] for lead_id in lead_ids if lead_id in records]
+
+    def find_by_phone(self, phone) -> list:
+        """
+        Read the leads with a phone number, whatever its formatting.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT record FROM mirrored_leads WHERE loader = ? AND phone = ?", (self.name, normalize_phone(phone))
+            ).fetchall()
+        return [json.loads(row["record"]) for row in rows]
+
+    def update_record(self, lead_id, updates: dict):
+        result = self.lead_loader.update_record(lead_id, updates)
+        if result is not None:
+            self._apply_updates([{"id": lead_id, "updates": updates}])
+        return result
+
+    def update_records_batch(self, leads):
+        result = self.lead_loader.update_records_batch(leads)
+        self._apply_updates(leads)
+        return result
+
+    def sync_if_stale(self):
+        """Sync the changes of the CRM if the local copy is older than `max_staleness`."""
+        state = self._sync_state()
+        if time.time() - state["synced_at"] >= self.max_staleness:
+            self.sync()
+
+    def sync(self, full: bool = False) -> dict:
+        """
+        Bring the local copy up to date with the CRM.
+
+        Args:
+            full (bool): Fetch every record, removing the records deleted from the CRM.
+                Done anyway on the first sync and every `full_sync_interval`.
+
+        Returns:
+            dict: Number of records "fetched", "changed" and "deleted", and whether the sync was "full".
+        """
+        with self._sync_lock:
+            state = self._sync_state()
+            now = time.time()
+            full = full or state["cursor"] is None or now - state["full_synced_at"] >= self.full_sync_interval
+            with track_stage("sync_leads", loader=self.name):
+                records, cursor = self.lead_loader.fetch_changes(None if full else state["cursor"])
+            changed = self._store(records)
+            deleted = 0
+            if full:
+                deleted = self._delete_missing({str(record["id"]) for record in records})
+            with self._lock:
+                self._conn.execute(
+                    "INSERT INTO mirror_syncs (loader, cursor, synced_at, full_synced_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (loader) DO UPDATE SET cursor = excluded.cursor, synced_at = excluded.synced_at, "
+                    "full_synced_at = CASE WHEN ? THEN excluded.full_synced_at ELSE full_synced_at END",
+                    (self.name, json.dumps(cursor), now, now if full else 0, full),
+                )
+        return {"fetched": len(records), "changed": changed, "deleted": deleted, "full": full}
+
+    def stats(self) -> dict:
+        """Number of mirrored leads per status and time of the last syncs."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS total FROM mirrored_leads WHERE loader = ? GROUP BY status", (self.name,)
+            ).fetchall()
+        state = self._sync_state()
+        return {
+            "statuses": {row["status"]: row["total"] for row in rows},
+            "synced_at": state["synced_at"] or None,
+            "full_synced_at": state["full_synced_at"] or None,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _sync_state(self) -> dict:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cursor, synced_at, full_synced_at FROM mirror_syncs WHERE loader = ?", (self.name,)
+            ).fetchone()
+        if row is None:
+            return {"cursor": None, "synced_at": 0, "full_synced_at": 0}
+        return {"cursor": json.loads(row["cursor"]), "synced_at": row["synced_at"], "full_synced_at": row["full_synced_at"]}
+
+    def _store(self, records) -> int:
+        """Upsert records, skipping those whose content did not change. Returns the number written."""
+        now = time.time()
+        rows = []
+        for record in records:
+            serialized = json.dumps(record, sort_keys=True, default=str)
+            rows.append((
+                self.name,
+                str(record["id"]),
+                record.get(self.status_field),
+                normalize_phone(record.get(self.phone_field)),
+                serialized,
+                hashlib.sha1(serialized.encode()).hexdigest(),
+                now,
+            ))
+        with self._lock, immediate_transaction(self._conn):
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT INTO mirrored_leads (loader, lead_id, status, phone, record, row_hash, synced_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (loader, lead_id) DO UPDATE SET status = excluded.status, phone = excluded.phone, "
+                "record = excluded.record, row_hash = excluded.row_hash, synced_at = excluded.synced_at "
+                "WHERE mirrored_leads.row_hash != excluded.row_hash",
+                rows,
+            )
+            return self._conn.total_changes - before
+
+    def _delete_missing(self, lead_ids: set) -> int:
+        with self._lock, immediate_transaction(self._conn):
+            known = [row["lead_id"] for row in self._conn.execute(
+                "SELECT lead_id FROM mirrored_leads WHERE loader = ?", (self.name,)
+            )]
+            deleted = [(self.name, lead_id) for lead_id in known if lead_id not in lead_ids]
+            self._conn.executemany("DELETE FROM mirrored_leads WHERE loader = ? AND lead_id = ?", deleted)
+        return len(deleted)
+
+    def _apply_updates(self, leads):
+        """Merge updates written to the CRM into the local records."""
+        if not leads:
+            return
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT lead_id, record FROM mirrored_leads WHERE loader = ? AND lead_id IN ({','.join('?' * len(leads))})",
+                [self.name, *[str(lead["id"]) for lead in leads]],
+            ).fetchall()
+        records = {row["lead_id"]: json.loads(row["record"]) for row in rows}
+        self._store([
+            {**records[str(lead["id"])], **lead["updates"]} for lead in leads if str(lead["id"]) in records
+        ])
@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import threading
+from src.base.metrics import REGISTRY, track_stage
+from src.base.sqlite_store import open_database, immediate_transaction
+from src.base.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+CRM_UPDATES = REGISTRY.counter(
+    "leads_crm_updates_total",
+    "Buffered CRM record updates sent, retried or given up on (dead).",
+    ("loader", "outcome"),
+)
+
+
+class CRMWriteBuffer:
+    """
+    Write-behind buffer in front of `LeadLoaderBase.update_record`.
+
+    Updates are appended to a local SQLite write-ahead log and merged with the pending updates of the
+    same lead, so the webhook path never waits for the CRM. A background thread flushes them with the
+    batch endpoint of the loader (`update_records_batch`, `max_batch_size` records per request) every
+    `flush_interval` seconds, or as soon as a full batch is pending. Updates left unflushed by a crash,
+    or a CRM outage, stay in the log and are sent by the next flush of any worker sharing the file.
+    Failed updates are retried with exponential backoff, then kept as `dead` for inspection.
+    """
+
+    def __init__(
+        self,
+        lead_loader,
+        db_path: str = None,
+        flush_interval: float = None,
+        max_attempts: int = 8,
+        retry_interval: float = 5,
+        claim_seconds: float = 120,
+        on_flushed=None,
+        on_failed=None,
+    ):
+        """
+        Args:
+            lead_loader (LeadLoaderBase): The CRM the updates are written to.
+            db_path (str): Path to the SQLite file (`CRM_WRITE_BUFFER_DB`, default `data/crm_updates.db`).
+                Use ":memory:" for a buffer that does not survive restarts.
+            flush_interval (float): Maximum seconds an update waits before being sent
+                (`CRM_FLUSH_INTERVAL_SECONDS`, default 2).
+            max_attempts (int): Failed sends after which an update is given up on.
+            retry_interval (float): Delay before the first retry of a failed update, doubled at each attempt.
+            claim_seconds (float): Time a worker has to send the updates it claimed before another one may.
+            on_flushed (callable): Called with the call IDs of the updates written to the CRM.
+            on_failed (callable): Called with the call IDs and the error of the updates given up on.
+        """
+        self.lead_loader = lead_loader
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else float(os.getenv("CRM_FLUSH_INTERVAL_SECONDS", "2"))
+        )
+        self.max_attempts = max_attempts
+        self.retry_interval = retry_interval
+        self.claim_seconds = claim_seconds
+        self.on_flushed = on_flushed
+        self.on_failed = on_failed
+
+        self.db_path = db_path or os.getenv("CRM_WRITE_BUFFER_DB", "data/crm_updates.db")
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._conn = open_database(self.db_path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS crm_updates (
+                lead_id TEXT PRIMARY KEY,
+                updates TEXT NOT NULL,
+                call_ids TEXT NOT NULL DEFAULT '[]',
+                version INTEGER NOT NULL DEFAULT 1,
+                dead INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                claimed_until REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_crm_updates_due ON crm_updates (dead, next_attempt_at);
+            """
+        )
+
+    @property
+    def batch_size(self) -> int:
+        return max(1, self.lead_loader.max_batch_size)
+
+    def update_record(self, lead_id, updates: dict, call_id=None):
+        """
+        Queue an update of a CRM record, merged into the updates of the record not sent yet.
+
+        Args:
+            lead_id (str): The ID of the record to update.
+            updates (dict): Fields to update, later values win.
+            call_id (str): The call the update comes from, reported to `on_flushed` once written.
+        """
+        now = time.time()
+        with self._lock, immediate_transaction(self._conn):
+            row = self._conn.execute(
+                "SELECT updates, call_ids FROM crm_updates WHERE lead_id = ?", (lead_id,)
+            ).fetchone()
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO crm_updates (lead_id, updates, call_ids, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (lead_id, json.dumps(updates), json.dumps([call_id] if call_id else []), now, now),
+                )
+            else:
+                merged = {**json.loads(row["updates"]), **updates}
+                call_ids = json.loads(row["call_ids"])
+                if call_id and call_id not in call_ids:
+                    call_ids.append(call_id)
+                # A new update revives a dead record: it is sent again with everything merged so far
+                self._conn.execute(
+                    "UPDATE crm_updates SET updates = ?, call_ids = ?, version = version + 1, dead = 0, "
+                    "attempts = CASE WHEN dead = 1 THEN 0 ELSE attempts END, updated_at = ? WHERE lead_id = ?",
+                    (json.dumps(merged), json.dumps(call_ids), now, lead_id),
+                )
+            pending = self._conn.execute("SELECT COUNT(*) FROM crm_updates WHERE dead = 0").fetchone()[0]
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def flush(self) -> dict:
+        """
+        Send every update that is due, one batch at a time.
+
+        Returns:
+            dict: Number of records "flushed", "retried" and "dead".
+        """
+        result = {"flushed": 0, "retried": 0, "dead": 0}
+        with self._flush_lock:
+            while True:
+                rows = self._claim()
+                if not rows:
+                    return result
+                for key, count in self._send(rows).items():
+                    result[key] += count
+
+    def start(self):
+        """Start the background flush thread. Updates left by a previous run are sent right away."""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="crm-write-buffer", daemon=True)
+        self._thread.start()
+
+    def close(self, timeout: float = 30):
+        """Stop the flush thread after a last flush, unsent updates stay in the log."""
+        if self._thread is not None:
+            self._stopped.set()
+            self._wake.set()
+            self._thread.join(timeout)
+            self._thread = None
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> dict:
+        """Number of records with updates "pending" (including retries) and "dead"."""
+        with self._lock:
+            rows = self._conn.execute("SELECT dead, COUNT(*) AS total FROM crm_updates GROUP BY dead").fetchall()
+        counts = {"pending": 0, "dead": 0}
+        counts.update({"dead" if row["dead"] else "pending": row["total"] for row in rows})
+        return counts
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("crm_flush_error")
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("crm_final_flush_error")
+
+    def _claim(self) -> list:
+        """Atomically take a batch of due updates, so two workers never send the same one."""
+        now = time.time()
+        with self._lock, immediate_transaction(self._conn):
+            rows = self._conn.execute(
+                "SELECT lead_id, updates, call_ids, version, attempts FROM crm_updates "
+                "WHERE dead = 0 AND next_attempt_at <= ? AND claimed_until < ? ORDER BY created_at LIMIT ?",
+                (now, now, self.batch_size),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE crm_updates SET claimed_until = ? WHERE lead_id = ?",
+                [(now + self.claim_seconds, row["lead_id"]) for row in rows],
+            )
+        return rows
+
+    def _send(self, rows) -> dict:
+        leads = [{"id": row["lead_id"], "updates": json.loads(row["updates"])} for row in rows]
+        errors = {}
+        try:
+            with track_stage("update_record", loader=self.lead_loader.name):
+                self.lead_loader.update_records_batch(leads)
+        except Exception as e:
+            if len(leads) == 1:
+                errors[leads[0]["id"]] = e
+            else:
+                # A single bad record fails the whole request: send them one by one to isolate it
+                for lead in leads:
+                    try:
+                        if self.lead_loader.update_record(lead["id"], lead["updates"]) is None:
+                            errors[lead["id"]] = RuntimeError("CRM rejected the update")
+                    except Exception as record_error:
+                        errors[lead["id"]] = record_error
+
+        result = {"flushed": 0, "retried": 0, "dead": 0}
+        for row in rows:
+            error = errors.get(row["lead_id"])
+            outcome = self._acknowledge(row) if error is None else self._retry(row, error)
+            result[outcome] += 1
+            CRM_UPDATES.inc(loader=self.lead_loader.name, outcome=outcome)
+        return result
+
+    def _acknowledge(self, row) -> str:
+        call_ids = list(dict.fromkeys(json.loads(row["call_ids"])))
+        with self._lock, immediate_transaction(self._conn):
+            # Updates merged in while the batch was in flight keep the record queued for the next flush
+            deleted = self._conn.execute(
+                "DELETE FROM crm_updates WHERE lead_id = ? AND version = ?", (row["lead_id"], row["version"])
+            ).rowcount
+            if not deleted:
+                # Only the calls merged in since are reported by the next flush, the ones sent now are reported once
+                current = self._conn.execute(
+                    "SELECT call_ids FROM crm_updates WHERE lead_id = ?", (row["lead_id"],)
+                ).fetchone()
+                remaining = [call_id for call_id in json.loads(current["call_ids"]) if call_id not in call_ids]
+                self._conn.execute(
+                    "UPDATE crm_updates SET claimed_until = 0, call_ids = ? WHERE lead_id = ?",
+                    (json.dumps(remaining), row["lead_id"]),
+                )
+        if self.on_flushed and call_ids:
+            self.on_flushed(call_ids)
+        return "flushed"
+
+    def _retry(self, row, error) -> str:
+        attempts = row["attempts"] + 1
+        dead = attempts >= self.max_attempts
+        with self._lock:
+            self._conn.execute(
+                "UPDATE crm_updates SET attempts = ?, dead = ?, next_attempt_at = ?, claimed_until = 0, last_error = ? "
+                "WHERE lead_id = ?",
+                (
+                    attempts,
+                    int(dead),
+                    time.time() + self.retry_interval * 2 ** (attempts - 1),
+                    str(error),
+                    row["lead_id"],
+                ),
+            )
+        if not dead:
+            return "retried"
+        logger.error("crm_update_dead", lead_id=row["lead_id"], attempts=attempts, error=error)
+        if self.on_failed:
+            self.on_failed(json.loads(row["call_ids"]), str(error))
+        return "dead"
@@ -0,0 +1,387 @@
+import os
+import time
+import random
+import asyncio
+import hashlib
+import inspect
+import threading
+from email.utils import parsedate_to_datetime
+from .structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+# Default request budgets (requests per second, burst) for each external API.
+# Each value can be overridden with a `<API>_RATE_LIMIT` env variable, e.g. AIRTABLE_RATE_LIMIT=5
+DEFAULT_RATE_LIMITS = {
+    "airtable": (5.0, 5),  # 5 requests per second per base
+    "google_sheets": (1.0, 10),  # 60 requests per minute per user
+    "hubspot": (10.0, 10),  # 100 requests per 10 seconds for private apps
+    "vapi": (10.0, 10),
+    "retell": (10.0, 10),
+    "twilio": (1.0, 1),  # 1 outbound call per second per account by default
+    "llm": (5.0, 10),
+}
+
+RATE_LIMIT_STATUSES = (429,)
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. Callers reserve tokens and are told how long to wait
+    before using them, so the same bucket can be shared by threads and coroutines.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        Take tokens from the bucket, going into debt if needed.
+
+        Args:
+            tokens (float): Number of tokens to take.
+
+        Returns:
+            float: Seconds the caller must wait before using the reserved tokens.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+
+class AdaptiveRateLimiter:
+    """
+    Token-bucket rate limiter that adapts its rate to the feedback of the API.
+
+    - A 429 response halves the rate and blocks every caller until `Retry-After` has elapsed.
+    - Rate-limit headers (`X-RateLimit-Remaining`, `X-HubSpot-RateLimit-Remaining`, ...) cap
+      the rate to what is left in the current window.
+    - Successful calls slowly restore the rate up to its configured maximum.
+
+    Safe to share between threads and coroutines.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float = 1, min_rate: float = None):
+        """
+        Args:
+            name (str): Name used in log messages.
+            rate (float): Maximum requests per second.
+            burst (float): Maximum number of requests sent back to back.
+            min_rate (float): Lower bound when backing off. Defaults to 5% of `rate`.
+        """
+        self.name = name
+        self.max_rate = rate
+        self.min_rate = min_rate or rate * 0.05
+        self._bucket = TokenBucket(rate, burst)
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._bucket.rate
+
+    def acquire(self):
+        """Block the current thread until a request may be sent."""
+        delay = self._next_delay()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Wait, without blocking the event loop, until a request may be sent."""
+        delay = self._next_delay()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def on_success(self, headers=None):
+        """
+        Report a successful request.
+
+        Args:
+            headers (dict): Response headers, if available.
+        """
+        if headers and self._apply_rate_limit_headers(headers):
+            return
+        if self.rate < self.max_rate:
+            self._bucket.set_rate(min(self.max_rate, self.rate + self.max_rate * 0.05))
+
+    def on_rate_limited(self, headers=None):
+        """
+        Report a rate-limited (429) request.
+
+        Args:
+            headers (dict): Response headers, if available.
+        """
+        self._bucket.set_rate(max(self.min_rate, self.rate / 2))
+        retry_after = parse_retry_after(headers)
+        if retry_after is None:
+            retry_after = 1 / self.rate
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        self._apply_rate_limit_headers(headers or {})
+        logger.warning("rate_limited", limiter=self.name, retry_after=round(retry_after, 2), rate=round(self.rate, 2))
+
+    def _next_delay(self):
+        with self._lock:
+            blocked_for = max(0.0, self._blocked_until - time.monotonic())
+        return blocked_for + self._bucket.reserve()
+
+    def _apply_rate_limit_headers(self, headers):
+        headers = {str(key).lower(): value for key, value in dict(headers).items()}
+        remaining = _first_number(headers, "x-ratelimit-remaining", "x-hubspot-ratelimit-remaining", "ratelimit-remaining")
+        if remaining is None:
+            return False
+
+        window = _first_number(headers, "x-ratelimit-reset", "ratelimit-reset")
+        interval_ms = _first_number(headers, "x-hubspot-ratelimit-interval-milliseconds")
+        if interval_ms is not None:
+            window = interval_ms / 1000
+        if not window:
+            return False
+        if window > 10 ** 9:
+            # Reset given as an epoch timestamp
+            window = max(1.0, window - time.time())
+
+        rate = max(self.min_rate, min(self.max_rate, remaining / window))
+        self._bucket.set_rate(rate)
+        return True
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(api: str, key: str = None, rate: float = None, burst: float = None) -> AdaptiveRateLimiter:
+    """
+    Return the shared rate limiter of an API budget, creating it on first use.
+    Each API key (or Airtable base, HubSpot token, ...) gets its own budget.
+
+    Args:
+        api (str): API name, e.g. "airtable", "hubspot", "vapi".
+        key (str): The API key or resource the budget applies to. Hashed, never stored.
+        rate (float): Requests per second, defaults to `<API>_RATE_LIMIT` or `DEFAULT_RATE_LIMITS`.
+        burst (float): Maximum burst size.
+
+    Returns:
+        AdaptiveRateLimiter: The limiter shared by every client of this budget.
+    """
+    key_hash = hashlib.sha256(str(key).encode()).hexdigest()[:12] if key else "default"
+    limiter_key = (api, key_hash)
+    with _limiters_lock:
+        limiter = _limiters.get(limiter_key)
+        if limiter is None:
+            default_rate, default_burst = DEFAULT_RATE_LIMITS.get(api, (5.0, 5))
+            rate = rate or float(os.getenv(f"{api.upper()}_RATE_LIMIT", default_rate))
+            limiter = AdaptiveRateLimiter(f"{api}:{key_hash}", rate, burst or default_burst)
+            _limiters[limiter_key] = limiter
+        return limiter
+
+
+def get_error_status_and_headers(error):
+    """
+    Extract the HTTP status code and response headers from the exceptions raised by the
+    different SDKs (pyairtable/requests, googleapiclient, hubspot, vapi, retell/httpx).
+
+    Args:
+        error (Exception): The raised exception.
+
+    Returns:
+        tuple: (status code or None, headers dict)
+    """
+    response = getattr(error, "response", None)
+    resp = getattr(error, "resp", None)  # googleapiclient.errors.HttpError
+
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    if status is None and response is not None:
+        status = getattr(response, "status_code", None) or getattr(response, "status", None)
+    if status is None and resp is not None:
+        status = getattr(resp, "status", None)
+
+    headers = getattr(error, "headers", None)
+    if headers is None and response is not None:
+        headers = getattr(response, "headers", None)
+    if headers is None and resp is not None:
+        headers = resp
+
+    try:
+        status = int(status) if status is not None else None
+    except (TypeError, ValueError):
+        status = None
+    return status, dict(headers or {})
+
+
+def is_connection_error(error) -> bool:
+    """
+    Tell whether a request failed without an answer from the API: connection errors and timeouts,
+    including the ones of the SDK HTTP clients (httpx `ConnectError`, `ReadTimeout`, `APIConnectionError`, ...).
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return any("Connect" in cls.__name__ or "Timeout" in cls.__name__ for cls in type(error).__mro__)
+
+
+def get_response_headers(result):
+    """
+    Extract the response headers of a successful call, when the SDK exposes them: raw HTTP responses
+    (requests/httpx, Retell `with_raw_response`) and the (data, status, headers) tuples of the
+    `_with_http_info` methods of the OpenAPI generated clients (HubSpot).
+
+    Returns:
+        dict: The headers, or None if the result does not carry them.
+    """
+    if isinstance(result, tuple) and len(result) == 3 and hasattr(result[2], "items"):
+        return dict(result[2].items())
+    headers = getattr(result, "headers", None)
+    if headers is None or not hasattr(headers, "items"):
+        return None
+    return dict(headers.items())
+
+
+def parse_retry_after(headers):
+    """
+    Read the `Retry-After` header, given either in seconds or as an HTTP date.
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing.
+    """
+    if not headers:
+        return None
+    headers = {str(key).lower(): value for key, value in dict(headers).items()}
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retry(
+    limiter: AdaptiveRateLimiter,
+    func,
+    *args,
+    max_retries: int = 5,
+    base_delay: float = 0.5,
+    max_delay: float = 30.0,
+    retry_statuses=RETRYABLE_STATUSES,
+    retry_connection_errors: bool = False,
+    **kwargs,
+):
+    """
+    Call a blocking API function through a rate limiter, retrying rate-limited and
+    transient failures with exponential backoff and jitter.
+
+    Args:
+        limiter (AdaptiveRateLimiter): The API budget to draw from.
+        func: The API function to call.
+        max_retries (int): Maximum number of retries.
+        base_delay (float): Backoff delay of the first retry in seconds.
+        max_delay (float): Maximum backoff delay in seconds.
+        retry_statuses (tuple): HTTP statuses that are safe to retry.
+        retry_connection_errors (bool): Also retry connection errors and timeouts. Only safe for
+            idempotent requests, the API may have processed a request whose answer was lost.
+    """
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            delay = _handle_error(
+                limiter, e, attempt, max_retries, base_delay, max_delay, retry_statuses, retry_connection_errors
+            )
+            time.sleep(delay)
+            attempt += 1
+            continue
+        limiter.on_success(get_response_headers(result))
+        return result
+
+
+async def async_call_with_retry(
+    limiter: AdaptiveRateLimiter,
+    func,
+    *args,
+    max_retries: int = 5,
+    base_delay: float = 0.5,
+    max_delay: float = 30.0,
+    retry_statuses=RETRYABLE_STATUSES,
+    retry_connection_errors: bool = False,
+    **kwargs,
+):
+    """
+    Async version of `call_with_retry`. Coroutine functions are awaited,
+    blocking SDK functions are run in a worker thread.
+    """
+    attempt = 0
+    while True:
+        await limiter.acquire_async()
+        try:
+            if inspect.iscoroutinefunction(func):
+                result = await func(*args, **kwargs)
+            else:
+                result = await asyncio.to_thread(func, *args, **kwargs)
+        except Exception as e:
+            delay = _handle_error(
+                limiter, e, attempt, max_retries, base_delay, max_delay, retry_statuses, retry_connection_errors
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+            continue
+        limiter.on_success(get_response_headers(result))
+        return result
+
+
+def _handle_error(limiter, error, attempt, max_retries, base_delay, max_delay, retry_statuses, retry_connection_errors):
+    """Update the limiter from a failed call and return the delay before retrying, or re-raise."""
+    status, headers = get_error_status_and_headers(error)
+    if status in RATE_LIMIT_STATUSES:
+        limiter.on_rate_limited(headers)
+
+    retryable = status in retry_statuses or (retry_connection_errors and status is None and is_connection_error(error))
+    if not retryable or attempt >= max_retries:
+        raise error
+
+    backoff = min(max_delay, base_delay * 2 ** attempt)
+    delay = random.uniform(backoff / 2, backoff)
+    retry_after = parse_retry_after(headers)
+    if retry_after is not None:
+        # The limiter already waits out Retry-After before the next request
+        delay = min(delay, retry_after)
+    logger.warning(
+        "request_retry", limiter=limiter.name, status=status or type(error).__name__, attempt=attempt + 1, max_retries=max_retries
+    )
+    return delay
+
+
+def _first_number(headers, *names):
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            continue
+    return None
@@ -0,0 +1,40 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+
+def open_database(db_path: str) -> sqlite3.Connection:
+    """
+    Open a local SQLite database shared by the workers of the host.
+
+    Args:
+        db_path (str): Path to the SQLite file, created with its directory if missing.
+            ":memory:" opens a throwaway single process database.
+
+    Returns:
+        sqlite3.Connection: An autocommit connection returning `sqlite3.Row` rows.
+    """
+    if db_path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    # Writes of other workers hold the lock for a few milliseconds, wait for them
+    conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+    conn.row_factory = sqlite3.Row
+    if db_path != ":memory:":
+        conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+@contextmanager
+def immediate_transaction(conn: sqlite3.Connection):
+    """
+    Run a read-then-write sequence atomically across processes: the write lock is taken up front,
+    so two workers can never read the same state and both act on it.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
@@ -0,0 +1,191 @@
+import os
+import re
+import sys
+import json
+import queue
+import atexit
+import random
+import logging
+import contextvars
+import logging.handlers
+from datetime import datetime, timezone
+from contextlib import contextmanager
+from src.base.metrics import REGISTRY
+
+
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "leads_log_records_dropped_total", "Log records dropped because the log queue was full."
+)
+
+# Call the log lines emitted in the current task or thread belong to
+CALL_ID = contextvars.ContextVar("call_id", default=None)
+
+# Fields holding personal data of the leads: the `Lead` fields, with their CRM and provider names
+# (compared lowercased, without spaces, dashes or underscores)
+PII_FIELDS = {
+    "firstname", "lastname", "address", "email", "phone",
+    "number", "tonumber", "customernumber", "transcript",
+}
+REDACTED = "[REDACTED]"
+
+_TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(call_id)s] %(message)s"
+
+_listener = None
+
+
+@contextmanager
+def bind_call_id(call_id):
+    """
+    Stamp the log lines emitted inside the block with a call ID. Tasks and threads started
+    inside the block (`asyncio.create_task`, `asyncio.to_thread`) inherit it.
+    """
+    token = CALL_ID.set(call_id)
+    try:
+        yield
+    finally:
+        CALL_ID.reset(token)
+
+
+def redact(value):
+    """
+    Copy of a value with the personal data of the leads replaced, in nested dicts, lists and models.
+    """
+    if hasattr(value, "model_dump"):
+        value = value.model_dump()
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if _normalize(key) in PII_FIELDS and value[key] else redact(value[key])
+            for key in value
+        }
+    if isinstance(value, (list, tuple, set)):
+        return [redact(item) for item in value]
+    return value
+
+
+def _normalize(key) -> str:
+    return re.sub(r"[\s_\-]", "", str(key)).lower()
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """
+    Logger taking the fields of an event as keyword arguments:
+
+        logger.info("call_placed", lead_id=lead.id, provider="vapi")
+
+    The message names the event. High-volume events can be sampled with `sample` (share of the
+    events kept) or with the `LOG_SAMPLE_RATES` env variable, e.g. "webhook_received=0.01,call_placed=0.1".
+    Kept sampled events carry their `sample_rate`.
+    """
+
+    def __init__(self, logger: logging.Logger, sample_rates: dict = None):
+        super().__init__(logger, {})
+        self.sample_rates = sample_rates if sample_rates is not None else _parse_sample_rates(os.getenv("LOG_SAMPLE_RATES", ""))
+
+    def log(self, level, msg, *args, sample: float = None, **kwargs):
+        if not self.isEnabledFor(level):
+            return
+        rate = sample if sample is not None else self.sample_rates.get(msg)
+        if rate is not None:
+            if random.random() >= rate:
+                return
+            kwargs["sample_rate"] = rate
+        super().log(level, msg, *args, **kwargs)
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in ("exc_info", "stack_info", "stacklevel", "extra")}
+        kwargs["extra"] = {**(kwargs.get("extra") or {}), "fields": fields}
+        return msg, kwargs
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """
+    Return the structured logger of a module, e.g. `get_logger(__name__)`.
+    """
+    return StructuredLogger(logging.getLogger(name))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, event, call ID and the redacted event fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        if getattr(record, "call_id", None):
+            line["call_id"] = record.call_id
+        line.update(redact(getattr(record, "fields", None) or {}))
+        if record.exc_info:
+            line["exception"] = self.formatException(record.exc_info)
+        return json.dumps(line, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human readable lines for local runs, with the redacted event fields as key=value pairs."""
+
+    def __init__(self):
+        super().__init__(_TEXT_FORMAT)
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.call_id = getattr(record, "call_id", None) or "-"
+        line = super().format(record)
+        fields = redact(getattr(record, "fields", None) or {})
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records over to the listener thread without formatting them: formatting, redaction and
+    writing happen off the calling thread (the event loop). Records are dropped when the queue is full.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.call_id = CALL_ID.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+def configure_logging(level: str = None, fmt: str = None, queue_size: int = 10000):
+    """
+    Send the log records of the app through a bounded queue to a background thread writing to stdout.
+    Called once at startup, later calls do nothing.
+
+    Args:
+        level (str): Minimum level logged (`LOG_LEVEL`, default INFO).
+        fmt (str): "json" or "text" (`LOG_FORMAT`, default json).
+        queue_size (int): Records waiting to be written above which new records are dropped.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    fmt = fmt or os.getenv("LOG_FORMAT", "json")
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(TextFormatter() if fmt == "text" else JsonFormatter())
+
+    log_queue = queue.Queue(maxsize=queue_size)
+    root = logging.getLogger()
+    root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+    root.addHandler(_NonBlockingQueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    # Write the records still queued on exit
+    atexit.register(_listener.stop)
+
+
+def _parse_sample_rates(value: str) -> dict:
+    rates = {}
+    for item in value.split(","):
+        if "=" in item:
+            event, rate = item.split("=", 1)
+            rates[event.strip()] = float(rate)
+    return rates
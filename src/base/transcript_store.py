@@ -0,0 +1,167 @@
+import os
+import hmac
+import gzip
+import time
+import hashlib
+import tempfile
+import threading
+from src.base.sqlite_store import open_database
+
+
+class TranscriptStore:
+    """
+    Compressed, content-addressed store of call transcripts on local disk.
+
+    Each transcript is gzipped into `objects/<2 first hex chars>/<sha256>.gz`, so identical transcripts
+    (e.g. the same voicemail greeting) are stored once. A SQLite index maps call IDs and lead IDs to the
+    content hashes. The CRM receives a reference to the transcript instead of its full text: a link
+    signed with `link_secret` that expires after `link_ttl` seconds, so only the CRM users get to read it.
+    """
+
+    def __init__(self, root: str = None, link_secret: str = None, link_ttl: float = None):
+        """
+        Args:
+            root (str): Directory of the store (`TRANSCRIPT_DIR`, default `data/transcripts`),
+                shared by the workers of the host.
+            link_secret (str): Key signing the transcript links written to the CRM (`TRANSCRIPT_LINK_SECRET`).
+                Without it the CRM gets a plain `transcript:<call_id>` reference and no link is served.
+            link_ttl (float): Validity of the transcript links in seconds, 0 for links that never expire
+                (`TRANSCRIPT_LINK_TTL_SECONDS`, default 90 days).
+        """
+        self.root = root or os.getenv("TRANSCRIPT_DIR", "data/transcripts")
+        self.link_secret = link_secret or os.getenv("TRANSCRIPT_LINK_SECRET")
+        self.link_ttl = link_ttl if link_ttl is not None else float(os.getenv("TRANSCRIPT_LINK_TTL_SECONDS", str(90 * 86400)))
+        os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = open_database(os.path.join(self.root, "index.db"))
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS transcripts (
+                call_id TEXT PRIMARY KEY,
+                lead_id TEXT,
+                digest TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_transcripts_lead ON transcripts (lead_id, created_at);
+            CREATE INDEX IF NOT EXISTS idx_transcripts_digest ON transcripts (digest);
+            """
+        )
+
+    def put(self, call_id, lead_id, transcript: str) -> str:
+        """
+        Store the transcript of a call.
+
+        Args:
+            call_id (str): The provider call ID.
+            lead_id (str): The lead ID.
+            transcript (str): The full transcript.
+
+        Returns:
+            str: The content hash (sha256) of the transcript.
+        """
+        data = (transcript or "").encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written under a temporary name then renamed, readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(gzip.compress(data))
+            os.replace(tmp_path, path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO transcripts (call_id, lead_id, digest, size, created_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (call_id) DO UPDATE SET lead_id = excluded.lead_id, digest = excluded.digest, "
+                "size = excluded.size",
+                (call_id, lead_id, digest, len(data), time.time()),
+            )
+        return digest
+
+    def get(self, call_id) -> dict:
+        """
+        Read the transcript of a call.
+
+        Returns:
+            dict: Call ID, lead ID, content hash, size and transcript, or None if the call has no transcript.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM transcripts WHERE call_id = ?", (call_id,)).fetchone()
+        if row is None:
+            return None
+        return {**dict(row), "transcript": self.read(row["digest"])}
+
+    def read(self, digest: str) -> str:
+        """
+        Read a transcript by content hash, None if unknown.
+        """
+        try:
+            with open(self._path(digest), "rb") as file:
+                return gzip.decompress(file.read()).decode("utf-8")
+        except FileNotFoundError:
+            return None
+
+    def list_for_lead(self, lead_id) -> list:
+        """
+        List the transcripts of a lead (call ID, size and date), oldest first. Neither their text
+        nor their digest are returned, the transcripts are only served through signed links.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT call_id, size, created_at FROM transcripts WHERE lead_id = ? ORDER BY created_at", (lead_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def latest_per_lead(self, since: float = None) -> list:
+        """
+        List the most recent transcript of every lead (without its text), oldest first.
+
+        Args:
+            since (float): Only transcripts stored at or after this UNIX timestamp.
+        """
+        with self._lock:
+            # SQLite takes the other columns from the row holding the MAX
+            rows = self._conn.execute(
+                "SELECT call_id, lead_id, digest, size, MAX(created_at) AS created_at FROM transcripts "
+                "WHERE lead_id IS NOT NULL AND created_at >= ? GROUP BY lead_id ORDER BY created_at",
+                (since or 0,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def reference(self, call_id) -> str:
+        """
+        Reference to the transcript of a call written to the CRM: its signed API URL when `SERVER_URL`
+        and the link secret are set.
+        """
+        server_url = os.getenv("SERVER_URL")
+        if server_url and self.link_secret:
+            expires = int(time.time() + self.link_ttl) if self.link_ttl else 0
+            signature = self._sign(call_id, expires)
+            return f"{server_url.rstrip('/')}/calls/{call_id}/transcript?expires={expires}&signature={signature}"
+        return f"transcript:{call_id}"
+
+    def verify_link(self, call_id, expires, signature) -> bool:
+        """
+        Check the signature and expiry of a transcript link.
+
+        Args:
+            call_id (str): The call ID of the link.
+            expires (int): Expiry of the link (UNIX timestamp, 0 for never).
+            signature (str): Signature of the link.
+        """
+        if not self.link_secret or expires is None or not signature:
+            return False
+        if expires and expires < time.time():
+            return False
+        return hmac.compare_digest(self._sign(call_id, int(expires)), signature)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _sign(self, call_id, expires: int) -> str:
+        return hmac.new(self.link_secret.encode(), f"{call_id}:{expires}".encode(), hashlib.sha256).hexdigest()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.gz")
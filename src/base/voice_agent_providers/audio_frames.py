@@ -0,0 +1,332 @@
+import numpy as np
+from numpy.lib.stride_tricks import as_strided, sliding_window_view
+
+# Telephony audio: G.711 μ-law, 8 kHz, 20 ms frames of 160 bytes
+TELEPHONY_RATE = 8000
+# Model audio (OpenAI Realtime `pcm16`): signed 16-bit little-endian PCM, 24 kHz
+MODEL_RATE = 24000
+FRAME_MS = 20
+
+ULAW_SILENCE = 0xFF
+_ULAW_BIAS = 0x84
+_ULAW_CLIP = 8159
+_ULAW_SEGMENT_ENDS = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+
+
+def _build_ulaw_tables():
+    # G.711 decoding of the 256 μ-law codes
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + _ULAW_BIAS) << exponent) - _ULAW_BIAS
+    decode = np.where(codes & 0x80, -magnitude, magnitude).astype("<i2")
+
+    # G.711 encoding (14-bit reference algorithm) of every 16-bit sample, indexed by the sample bits read as unsigned
+    samples = np.arange(65536, dtype=np.int32)
+    samples = np.where(samples >= 32768, samples - 65536, samples) >> 2
+    mask = np.where(samples < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(samples), _ULAW_CLIP) + (_ULAW_BIAS >> 2)
+    segment = np.searchsorted(_ULAW_SEGMENT_ENDS, magnitude)
+    code = (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F)
+    encode = ((np.where(segment >= 8, 0x7F, code) ^ mask) & 0xFF).astype(np.uint8)
+    return decode, encode
+
+
+# Lookup tables: decoding reads 256 entries, encoding 64 KiB (fits in the L2 cache)
+ULAW_TO_PCM16, PCM16_TO_ULAW = _build_ulaw_tables()
+_ULAW_TO_FLOAT = ULAW_TO_PCM16.astype(np.float32)
+
+
+def ulaw_decode(data, out: np.ndarray = None) -> np.ndarray:
+    """
+    Decode μ-law bytes to 16-bit PCM samples.
+
+    Args:
+        data: μ-law bytes (bytes, bytearray, memoryview or uint8 array).
+        out (np.ndarray): int16 array the samples are written to, allocated if not given.
+
+    Returns:
+        np.ndarray: The int16 samples.
+    """
+    codes = data if isinstance(data, np.ndarray) else np.frombuffer(data, dtype=np.uint8)
+    return np.take(ULAW_TO_PCM16, codes, out=out)
+
+
+def ulaw_encode(samples, out: np.ndarray = None) -> np.ndarray:
+    """
+    Encode 16-bit PCM samples to μ-law.
+
+    Args:
+        samples: int16 samples (array, or little-endian PCM bytes).
+        out (np.ndarray): uint8 array the codes are written to, allocated if not given.
+
+    Returns:
+        np.ndarray: The μ-law codes.
+    """
+    if not isinstance(samples, np.ndarray):
+        samples = np.frombuffer(samples, dtype="<i2")
+    return np.take(PCM16_TO_ULAW, samples.view(np.uint16), out=out)
+
+
+def _lowpass(factor: int, taps_per_phase: int) -> np.ndarray:
+    """Windowed-sinc low-pass filter at the Nyquist frequency of the lower rate, at the higher rate."""
+    taps = factor * taps_per_phase
+    t = np.arange(taps) - (taps - 1) / 2
+    kernel = np.sinc(t / factor) * np.blackman(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+class Resampler:
+    """
+    Streaming polyphase resampler between two rates where one is a multiple of the other
+    (8 kHz <-> 24 kHz), for fixed-size frames.
+
+    Every buffer is allocated once: the input frame is copied behind the filter history, the filter runs
+    as a single matrix product over a strided view of that buffer, and the output is written in place.
+    `process` returns a view of the output buffer, overwritten by the next call.
+    """
+
+    def __init__(self, from_rate: int, to_rate: int, frame_ms: int = FRAME_MS, taps_per_phase: int = 16):
+        """
+        Args:
+            from_rate (int): Sample rate of the input frames.
+            to_rate (int): Sample rate of the output frames.
+            frame_ms (int): Duration of a frame.
+            taps_per_phase (int): Filter length per output phase, longer filters alias less.
+        """
+        high, low = max(from_rate, to_rate), min(from_rate, to_rate)
+        if high % low:
+            raise ValueError(f"Unsupported resampling ratio: {from_rate} -> {to_rate}")
+        self.factor = high // low
+        self.upsampling = to_rate > from_rate
+        self.input_samples = from_rate * frame_ms // 1000
+        self.output_samples = to_rate * frame_ms // 1000
+        kernel = _lowpass(self.factor, taps_per_phase)
+
+        if self.upsampling:
+            # Output sample n * factor + p = sum over k of kernel[p + k * factor] * x[n - k]
+            self.history = taps_per_phase - 1
+            self._buffer = np.zeros(self.history + self.input_samples, dtype=np.float32)
+            self._windows = sliding_window_view(self._buffer, taps_per_phase)
+            phases = kernel.reshape(taps_per_phase, self.factor)[::-1] * self.factor
+            self._kernel = np.ascontiguousarray(phases)
+            self._output = np.zeros((self.input_samples, self.factor), dtype=np.float32)
+        else:
+            # Output sample m = sum over t of kernel[t] * x[m * factor + factor - 1 - t]
+            self.history = len(kernel) - 1
+            self._buffer = np.zeros(self.history + self.input_samples, dtype=np.float32)
+            start = self._buffer[self.factor - 1:]
+            self._windows = as_strided(
+                start,
+                shape=(self.output_samples, len(kernel)),
+                strides=(self.factor * start.strides[0], start.strides[0]),
+                writeable=False,
+            )
+            self._kernel = np.ascontiguousarray(kernel[::-1])
+            self._output = np.zeros(self.output_samples, dtype=np.float32)
+        self._frame = self._buffer[self.history:]
+        self._history_source = self._buffer[self.input_samples:]
+        self._history_target = self._buffer[:self.history]
+        self._flat_output = self._output.reshape(-1)
+
+    @property
+    def frame(self) -> np.ndarray:
+        """float32 input buffer of the next frame, fill it in place and call `process()` without argument."""
+        return self._frame
+
+    def process(self, samples: np.ndarray = None) -> np.ndarray:
+        """
+        Resample one frame.
+
+        Args:
+            samples (np.ndarray): The `input_samples` samples of the frame (any numeric dtype),
+                or None when `frame` was filled in place.
+
+        Returns:
+            np.ndarray: View of the `output_samples` float32 samples, valid until the next call.
+        """
+        if samples is not None:
+            np.copyto(self._frame, samples, casting="unsafe")
+        np.matmul(self._windows, self._kernel, out=self._output)
+        # The end of this frame is the filter history of the next one
+        np.copyto(self._history_target, self._history_source)
+        return self._flat_output
+
+
+class JitterBuffer:
+    """
+    Ring buffer of audio frames, reordering the frames of a media stream by sequence number and playing
+    them out at a steady pace.
+
+    Frames are copied into slots of a single preallocated `bytearray`: `put` and `get` allocate nothing,
+    `get` returns a `memoryview` of the slot, valid until the ring wraps around. Playout starts once
+    `target_depth` frames are buffered, and starts over after an underrun. Missing frames are played
+    as silence, frames arriving after their playout time are dropped.
+    """
+
+    def __init__(self, frame_bytes: int = 160, capacity: int = 16, target_depth: int = 3, silence: int = ULAW_SILENCE):
+        """
+        Args:
+            frame_bytes (int): Size of a frame (160 bytes for 20 ms of 8 kHz μ-law).
+            capacity (int): Frames held by the ring.
+            target_depth (int): Frames buffered before playout starts, i.e. the added delay.
+            silence (int): Byte value of a silent frame (0xFF for μ-law, 0 for PCM).
+        """
+        if not 0 < target_depth <= capacity:
+            raise ValueError("target_depth must be between 1 and capacity")
+        self.frame_bytes = frame_bytes
+        self.capacity = capacity
+        self.target_depth = target_depth
+        self._storage = bytearray(frame_bytes * capacity)
+        view = memoryview(self._storage)
+        self._slots = [view[i * frame_bytes:(i + 1) * frame_bytes] for i in range(capacity)]
+        self._sequences = [None] * capacity
+        self._silence = memoryview(bytes([silence]) * frame_bytes)
+        self._next = None
+        self._highest = None
+        self._playing = False
+        self.received = 0
+        self.late = 0
+        self.concealed = 0
+        self.underruns = 0
+
+    @property
+    def depth(self) -> int:
+        """Frames between the playout position and the most recent frame received, gaps included."""
+        if self._next is None or self._highest < self._next:
+            return 0
+        return self._highest - self._next + 1
+
+    def put(self, sequence: int, frame) -> bool:
+        """
+        Store a received frame.
+
+        Args:
+            sequence (int): Sequence number of the frame (e.g. the Twilio media `chunk`).
+            frame: The `frame_bytes` bytes of the frame.
+
+        Returns:
+            bool: False if the frame came too late and was dropped.
+        """
+        if self._next is None:
+            self._next = self._highest = sequence
+        if sequence < self._next:
+            self.late += 1
+            return False
+        if sequence >= self._next + self.capacity:
+            # Too far ahead: skip the oldest frames, counted as concealed
+            skipped = sequence - self.capacity + 1 - self._next
+            self.concealed += skipped
+            self._next += skipped
+        slot = sequence % self.capacity
+        self._slots[slot][:] = frame
+        self._sequences[slot] = sequence
+        self._highest = max(self._highest, sequence)
+        self.received += 1
+        return True
+
+    def get(self):
+        """
+        Take the next frame to play, called once per frame period.
+
+        Returns:
+            memoryview: The frame (silence if it is missing), or None while buffering.
+        """
+        if not self._playing:
+            if self.depth < self.target_depth:
+                return None
+            self._playing = True
+        slot = self._next % self.capacity
+        if self._sequences[slot] == self._next:
+            self._sequences[slot] = None
+            frame = self._slots[slot]
+        else:
+            self.concealed += 1
+            frame = self._silence
+        self._next += 1
+        if self.depth == 0:
+            # Nothing left to play: buffer `target_depth` frames again before resuming
+            self._playing = False
+            self.underruns += 1
+        return frame
+
+    def stats(self) -> dict:
+        """Frames received, dropped late and concealed, underruns and current depth."""
+        return {
+            "received": self.received,
+            "late": self.late,
+            "concealed": self.concealed,
+            "underruns": self.underruns,
+            "depth": self.depth,
+        }
+
+
+class TelephonyTranscoder:
+    """
+    Per-call transcoder between 8 kHz μ-law telephony frames and 24 kHz PCM16 model audio.
+
+    Both directions work on 20 ms frames with buffers allocated once per call: decoding and encoding
+    are table lookups, resampling a matrix product, all written in place. The returned `memoryview`s
+    point to the internal buffers and are overwritten by the next frame of the same direction.
+    """
+
+    def __init__(self, telephony_rate: int = TELEPHONY_RATE, model_rate: int = MODEL_RATE, frame_ms: int = FRAME_MS):
+        """
+        Args:
+            telephony_rate (int): Sample rate of the μ-law audio.
+            model_rate (int): Sample rate of the PCM16 audio.
+            frame_ms (int): Duration of a frame.
+        """
+        self.upsampler = Resampler(telephony_rate, model_rate, frame_ms)
+        self.downsampler = Resampler(model_rate, telephony_rate, frame_ms)
+        self.ulaw_frame_bytes = self.upsampler.input_samples
+        self.pcm_frame_bytes = self.downsampler.input_samples * 2
+
+        self._ulaw_in = bytearray(self.ulaw_frame_bytes)
+        self._ulaw_in_codes = np.frombuffer(self._ulaw_in, dtype=np.uint8)
+        self._pcm_out = np.zeros(self.upsampler.output_samples, dtype="<i2")
+        self._pcm_out_bytes = memoryview(self._pcm_out).cast("B")
+
+        self._pcm_in = bytearray(self.pcm_frame_bytes)
+        self._pcm_in_samples = np.frombuffer(self._pcm_in, dtype="<i2")
+        self._pcm_scratch = np.zeros(self.downsampler.output_samples, dtype="<i2")
+        self._pcm_scratch_codes = self._pcm_scratch.view(np.uint16)
+        self._ulaw_out = np.zeros(self.downsampler.output_samples, dtype=np.uint8)
+        self._ulaw_out_bytes = memoryview(self._ulaw_out).cast("B")
+
+    def to_model(self, frame) -> memoryview:
+        """
+        Convert a 20 ms μ-law telephony frame to 24 kHz PCM16.
+
+        Args:
+            frame: The 160 μ-law bytes of the frame.
+
+        Returns:
+            memoryview: The 960 bytes of PCM16, valid until the next `to_model` call.
+        """
+        self._ulaw_in[:] = frame
+        np.take(_ULAW_TO_FLOAT, self._ulaw_in_codes, out=self.upsampler.frame)
+        _to_pcm16(self.upsampler.process(), self._pcm_out)
+        return self._pcm_out_bytes
+
+    def to_telephony(self, frame) -> memoryview:
+        """
+        Convert a 20 ms frame of 24 kHz PCM16 model audio to μ-law telephony audio.
+
+        Args:
+            frame: The 960 bytes of PCM16 of the frame.
+
+        Returns:
+            memoryview: The 160 μ-law bytes, valid until the next `to_telephony` call.
+        """
+        self._pcm_in[:] = frame
+        _to_pcm16(self.downsampler.process(self._pcm_in_samples), self._pcm_scratch)
+        np.take(PCM16_TO_ULAW, self._pcm_scratch_codes, out=self._ulaw_out)
+        return self._ulaw_out_bytes
+
+
+def _to_pcm16(samples: np.ndarray, out: np.ndarray):
+    """Round and clip float samples into an int16 array, in place."""
+    np.rint(samples, out=samples)
+    np.clip(samples, -32768, 32767, out=samples)
+    np.copyto(out, samples, casting="unsafe")
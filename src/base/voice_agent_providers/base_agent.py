@@ -1,5 +1,19 @@
+import re
 from abc import ABC, abstractmethod
 
+_VARIABLE = re.compile(r"\{\{\s*([\w.]+)\s*\}\}")
+
+
+def render_variables(template: str, variables: dict) -> str:
+    """Fill the `{{variable}}` placeholders of a prompt, dotted names read nested values."""
+    def replace(match):
+        value = variables
+        for key in match.group(1).split("."):
+            value = value.get(key) if isinstance(value, dict) else None
+        return "" if value is None else str(value)
+    return _VARIABLE.sub(replace, template or "")
+
+
 class BaseAgent(ABC):
     """
     Abstract Base Class for voice agent frameworks.
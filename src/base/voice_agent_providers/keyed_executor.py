@@ -0,0 +1,95 @@
+import asyncio
+import inspect
+
+
+async def run_handler(handler, *args, **kwargs):
+    """
+    Run a handler without blocking the event loop.
+
+    Coroutine functions are awaited directly, plain (blocking) functions such as
+    CRM writes or LLM calls are offloaded to a worker thread.
+
+    Args:
+        handler: A coroutine function or a regular callable.
+        *args: Positional arguments passed to the handler.
+        **kwargs: Keyword arguments passed to the handler.
+
+    Returns:
+        The value returned by the handler.
+    """
+    if inspect.iscoroutinefunction(handler):
+        return await handler(*args, **kwargs)
+    result = await asyncio.to_thread(handler, *args, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+class _KeyState:
+    __slots__ = ("lock", "pending")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+
+
+class KeyedExecutor:
+    """
+    Serializes handlers sharing the same key (e.g. a call ID) while handlers for
+    different keys run fully in parallel.
+
+    Handlers submitted for a key run one at a time in submission order, so events
+    of the same call (tool calls, status updates, end-of-call report) can never
+    overtake each other. A key only holds state while it has pending handlers:
+    as soon as the last one finishes its entry is dropped, keeping memory bounded
+    by the number of calls with in-flight events rather than all calls ever seen.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(self):
+        self._keys = {}
+
+    @property
+    def active_keys(self) -> int:
+        """Number of keys that currently have running or queued handlers."""
+        return len(self._keys)
+
+    def pending(self, key) -> int:
+        """
+        Number of handlers running or queued for a key.
+
+        Args:
+            key: The serialization key.
+        """
+        state = self._keys.get(key)
+        return state.pending if state else 0
+
+    async def submit(self, key, handler, *args, **kwargs):
+        """
+        Run a handler once all handlers previously submitted for the same key have completed.
+
+        Args:
+            key: The serialization key. `None` disables serialization for this handler.
+            handler: A coroutine function or a regular callable (run in a worker thread).
+            *args: Positional arguments passed to the handler.
+            **kwargs: Keyword arguments passed to the handler.
+
+        Returns:
+            The value returned by the handler.
+        """
+        if key is None:
+            return await run_handler(handler, *args, **kwargs)
+
+        state = self._keys.get(key)
+        if state is None:
+            state = self._keys[key] = _KeyState()
+        state.pending += 1
+        try:
+            # asyncio.Lock wakes up waiters in FIFO order which preserves submission order
+            async with state.lock:
+                return await run_handler(handler, *args, **kwargs)
+        finally:
+            state.pending -= 1
+            if state.pending == 0 and self._keys.get(key) is state:
+                del self._keys[key]
@@ -0,0 +1,3 @@
+from .openai_realtime import OpenAIRealtime
+
+__all__ = ['OpenAIRealtime']
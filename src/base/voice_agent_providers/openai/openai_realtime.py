@@ -1,5 +1,483 @@
-from ..base_agent import BaseAgent
+import os
+import re
+import hmac
+import json
+import time
+import base64
+import asyncio
+import hashlib
+from collections import deque
+from types import SimpleNamespace
+from urllib.parse import parse_qsl, quote
+from xml.sax.saxutils import quoteattr
+import httpx
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+from ..base_agent import BaseAgent, render_variables
+from ..keyed_executor import KeyedExecutor, run_handler
+from ...metrics import REGISTRY, track_stage
+from ...structured_logging import get_logger, bind_call_id
+from ...rate_limiter import get_rate_limiter, async_call_with_retry, RATE_LIMIT_STATUSES
+
+logger = get_logger(__name__)
+
+TURN_LATENCY = REGISTRY.histogram(
+    "leads_realtime_turn_latency_seconds",
+    "Time from the end of the lead speech (server VAD) to the first audio of the agent answer sent to the call.",
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0),
+)
+
+TWILIO_API_URL = "https://api.twilio.com/2010-04-01"
+
+# Twilio statuses after which the call never reached the media stream
+UNANSWERED_STATUSES = ("busy", "no-answer", "failed", "canceled")
+
+# Audio is forwarded as is between both websockets: base64 G.711 μ-law, 8 kHz, on both sides
+_APPEND_AUDIO = '{"type":"input_audio_buffer.append","audio":"%s"}'
+_TWILIO_MEDIA = '{"event":"media","streamSid":"%s","media":{"payload":"%s"}}'
+_TWILIO_MARK = '{"event":"mark","streamSid":"%s","mark":{"name":"%s"}}'
+
+
+class _MediaStream:
+    """State of one call shared by both directions of the media bridge."""
+
+    def __init__(self, stream_sid: str, call_sid: str, variables: dict):
+        self.stream_sid = stream_sid
+        self.call_sid = call_sid
+        self.variables = variables
+        self.started_at = time.time()
+        # Timeline of the lead audio (ms), used to cut the agent audio when the lead talks over it
+        self.latest_media_timestamp = 0
+        self.response_item_id = None
+        self.response_start_timestamp = None
+        # Agent audio sent to Twilio and not played yet
+        self.marks = deque()
+        self.speech_stopped_at = None
+        # Conversation items in order, with their transcript
+        self.items = []
+        self.transcripts = {}
+        self.tool_tasks = set()
+        self.ended_reason = None
+
+    def transcript(self) -> str:
+        return "".join(
+            f"{self.transcripts[item_id][0]}: {self.transcripts[item_id][1]}\n"
+            for item_id in self.items if item_id in self.transcripts
+        )
+
 
 class OpenAIRealtime(BaseAgent):
-    #Not implemented yet
-    pass
+    """
+    Voice agent running on the OpenAI Realtime API, with Twilio as the telephony provider.
+
+    Calls are placed through the Twilio REST API with a TwiML `<Connect><Stream>` pointing at the
+    media stream endpoint of the app. Once the lead answers, the call audio is bridged between the
+    Twilio media stream and a Realtime websocket: the μ-law frames are forwarded as is in both
+    directions (no transcoding), turns are detected by the server VAD and tool calls are run in-band,
+    so an answer only costs one model round trip. When the lead talks over the agent, the agent
+    audio still buffered by Twilio is cleared and the conversation truncated where the lead stopped
+    hearing it.
+
+    Attributes:
+        allowed_tools (dict): Tools the model can call, by name.
+        session_config (dict): Realtime session configuration sent at the start of every call.
+        webhook_executor (KeyedExecutor): Serializes status callbacks and post-call processing per call SID.
+        event_log (WebhookEventLog): Log the raw status callbacks are appended to, if set.
+        rate_limiter (AdaptiveRateLimiter): Request budget of the Twilio account.
+    """
+
+    def __init__(self, tools: dict={}, instructions: str = "", tool_definitions: list = None):
+        """
+        Args:
+            tools (dict): Tools accessible to the agent, by name.
+            instructions (str): System prompt of the agent. `{{variable}}` placeholders are filled
+                with the call variables.
+            tool_definitions (list): JSON schemas of the tools, in the Realtime `tools` format.
+        """
+        self.allowed_tools = tools
+        self.account_sid = os.getenv("TWILIO_ACCOUNT_SID")
+        self.auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        self.url = os.getenv("OPENAI_REALTIME_URL", "wss://api.openai.com/v1/realtime")
+        self.model = os.getenv("OPENAI_REALTIME_MODEL", "gpt-4o-realtime-preview")
+        self.session_config = {
+            "instructions": instructions,
+            "input_audio_format": "g711_ulaw",
+            "output_audio_format": "g711_ulaw",
+            "voice": os.getenv("OPENAI_REALTIME_VOICE", "alloy"),
+            "modalities": ["text", "audio"],
+            "turn_detection": {
+                "type": "server_vad",
+                "silence_duration_ms": int(os.getenv("OPENAI_REALTIME_SILENCE_MS", "500")),
+            },
+            "input_audio_transcription": {"model": "whisper-1"},
+            "tools": tool_definitions or [],
+            "tool_choice": "auto",
+        }
+        self.rate_limiter = get_rate_limiter("twilio", self.account_sid)
+        self.webhook_executor = KeyedExecutor()
+        self.event_log = None
+        self._http = None
+
+    async def make_call(self, request: dict):
+        """
+        Place a call through Twilio, streaming its audio to the media stream endpoint once answered.
+
+        Args:
+            request (dict): "to" and "from" numbers and the "variables" of the call.
+
+        Returns:
+            SimpleNamespace: The Twilio `call_id` (call SID) and `call_status`.
+        """
+        server_url = os.getenv("SERVER_URL", "").rstrip("/")
+        stream_url = re.sub(r"^http", "ws", server_url) + "/openai/media-stream"
+        variables = json.dumps(request.get("variables") or {}, separators=(",", ":"), default=str)
+        twiml = (
+            f"<Response><Connect><Stream url={quoteattr(stream_url)}>"
+            f"<Parameter name=\"variables\" value={quoteattr(variables)}/>"
+            f"</Stream></Connect></Response>"
+        )
+        lead_id = (request.get("variables") or {}).get("leadID", "")
+        form = {
+            "To": request["to"],
+            "From": request["from"],
+            "Twiml": twiml,
+            "StatusCallback": f"{server_url}/openai/status?leadID={quote(str(lead_id))}",
+            "StatusCallbackEvent": ["initiated", "ringing", "answered", "completed"],
+        }
+        # Only rate-limited requests are retried, a failed create may still have dialed the lead
+        response = await async_call_with_retry(
+            self.rate_limiter, self._create_twilio_call, form, retry_statuses=RATE_LIMIT_STATUSES
+        )
+        call = response.json()
+        return SimpleNamespace(call_id=call["sid"], call_status=call.get("status"))
+
+    async def handle_webhook_call(self, request):
+        """
+        Handle the Twilio status callbacks of the calls (initiated, ringing, answered, completed, ...).
+
+        Args:
+            request: The form-encoded request sent by Twilio.
+
+        Returns:
+            dict: Response indicating the result of the webhook processing.
+        """
+        body = (await request.body()).decode()
+        form = dict(parse_qsl(body, keep_blank_values=True))
+        if not self._validate_webhook(self._public_url(request), form, request.headers.get("X-Twilio-Signature")):
+            return {"status_code": 401, "content": {"message": "Unauthorized"}}
+
+        payload = {**form, "leadID": request.query_params.get("leadID")}
+        if self.event_log is not None:
+            self.event_log.append_later("openai", payload, event_type=form.get("CallStatus"), call_id=form.get("CallSid"))
+        return await self.handle_webhook_payload(payload)
+
+    async def handle_webhook_payload(self, payload: dict, replay: bool = False):
+        """
+        Process a verified status callback, received or replayed from the webhook event log.
+
+        Args:
+            payload (dict): The Twilio status callback parameters, with the "leadID" of the call.
+            replay (bool): The callback is replayed from the webhook event log.
+        """
+        call_id = payload.get("CallSid")
+        with bind_call_id(call_id), track_stage("webhook", provider="openai", event=payload.get("CallStatus")):
+            logger.info("webhook_received", provider="openai", event=payload.get("CallStatus"))
+            return await self.webhook_executor.submit(call_id, self.status_update_handler, payload, replay=replay)
+
+    async def handle_media_stream(self, websocket):
+        """
+        Bridge the Twilio media stream of an answered call to a Realtime session until either side hangs up,
+        then run the post-call processing.
+
+        Args:
+            websocket: The Twilio media stream websocket (`accept`, `iter_text`, `send_text`, `close`).
+        """
+        await websocket.accept()
+        stream = await self._wait_for_start(websocket)
+        if stream is None or not await run_handler(self.accept_stream, stream.call_sid, stream.variables):
+            logger.warning("media_stream_rejected", provider="openai", call_id=stream.call_sid if stream else None)
+            await websocket.close()
+            return
+
+        with bind_call_id(stream.call_sid):
+            logger.info("media_stream_started", provider="openai")
+            try:
+                async with connect(
+                    f"{self.url}?model={self.model}",
+                    additional_headers={"Authorization": f"Bearer {self.api_key}", "OpenAI-Beta": "realtime=v1"},
+                    max_size=None,
+                ) as realtime:
+                    session = {**self.session_config, "instructions": render_variables(self.session_config["instructions"], stream.variables)}
+                    await realtime.send(json.dumps({"type": "session.update", "session": session}))
+                    # The agent talks first
+                    await realtime.send('{"type":"response.create"}')
+                    await self._bridge(websocket, realtime, stream)
+            except Exception as e:
+                logger.warning("media_stream_error", provider="openai", error=str(e) or type(e).__name__)
+                stream.ended_reason = stream.ended_reason or "realtime-provider-error"
+            finally:
+                for task in stream.tool_tasks:
+                    task.cancel()
+
+            outputs = {
+                "call_id": stream.call_sid,
+                "status": "completed",
+                "duration": (time.time() - stream.started_at) / 60,
+                "endedReason": stream.ended_reason or "customer-ended-call",
+                "transcript": stream.transcript(),
+                "variables": stream.variables,
+            }
+            logger.info("media_stream_ended", provider="openai", ended_reason=outputs["endedReason"])
+            await self.webhook_executor.submit(stream.call_sid, self._finish_call, outputs)
+
+    def get_allowed_tools(self):
+        """
+        Retrieve the list of tools accessible to the agent.
+
+        Returns:
+            dict: Dictionary of allowed tools.
+        """
+        return self.allowed_tools
+
+    def create_agent(self, config: dict):
+        """
+        Set the Realtime session configuration (voice, VAD, instructions, tools, ...) used by the next calls.
+        Realtime sessions are configured when each call starts, nothing is stored by OpenAI.
+
+        Args:
+            config (dict): Realtime `session` fields.
+        """
+        self.session_config.update(config)
+        return {"status": "success", "details": self.session_config}
+
+    def update_agent(self, agent_id: str, config: dict):
+        """
+        Update the Realtime session configuration used by the next calls.
+
+        Args:
+            agent_id (str): Unused, there is a single session configuration.
+            config (dict): Realtime `session` fields.
+        """
+        return self.create_agent(config)
+
+    def accept_stream(self, call_id: str, variables: dict) -> bool:
+        """
+        Decide whether a media stream is bridged to the model, e.g. only for calls placed by the app.
+        Accepts every stream unless overridden.
+
+        Args:
+            call_id (str): The Twilio call SID.
+            variables (dict): The call variables.
+        """
+        return True
+
+    def pre_call_processing(self, payload):
+        """
+        Perform pre-call processing to prepare the lead data.
+        This method must be overridden in a subclass to implement specific pre-call logic.
+
+        Args:
+            payload: Payload containing lead details.
+        """
+        pass
+
+    def get_call_input_params(self, payload):
+        """
+        Build the input parameters for initiating a call.
+        This method must be overridden in a subclass to implement specific pre-call logic.
+
+        Args:
+            payload: Payload containing lead details.
+        """
+        pass
+
+    def process_call_outputs(self, payload):
+        """
+        Process the outputs from the completed call.
+        This method must be overridden in a subclass to implement specific pre-call logic.
+
+        Args:
+            payload: Call SID, duration, ended reason, transcript and variables of the call.
+        """
+        pass
+
+    def post_call_processing(self, call_outputs: dict, replay: bool = False):
+        """
+        Perform post-call processing to analyze results and update the CRM.
+        This method must be overridden in a subclass to implement specific pre-call logic.
+
+        Args:
+            call_outputs (dict): Outputs from the call analysis.
+            replay (bool): The call outputs come from a status callback replayed from the webhook event log.
+        """
+        pass
+
+    def status_update_handler(self, payload: dict, replay: bool = False):
+        """
+        Handle a Twilio status callback.
+        This method must be overridden in a subclass to implement specific logic.
+
+        Args:
+            payload (dict): The status callback parameters.
+            replay (bool): The callback is replayed from the webhook event log.
+        """
+        pass
+
+    def transcript_update_handler(self, call_id: str, variables: dict, transcript: str):
+        """
+        Handle the transcript of a call, sent again every time an utterance is transcribed.
+        Runs on the event loop, it must not block. This method can be overridden in a subclass
+        to follow the conversation live.
+
+        Args:
+            call_id (str): The Twilio call SID.
+            variables (dict): The call variables.
+            transcript (str): Transcript of the call so far, one line per utterance.
+        """
+        pass
+
+    async def _create_twilio_call(self, form: dict):
+        if self._http is None:
+            self._http = httpx.AsyncClient(auth=(self.account_sid, self.auth_token), timeout=10)
+        response = await self._http.post(f"{TWILIO_API_URL}/Accounts/{self.account_sid}/Calls.json", data=form)
+        response.raise_for_status()
+        return response
+
+    async def _wait_for_start(self, websocket):
+        """Wait for the `start` message of the Twilio media stream, None if the stream ends first."""
+        async for message in websocket.iter_text():
+            data = json.loads(message)
+            if data.get("event") == "start":
+                start = data["start"]
+                variables = json.loads((start.get("customParameters") or {}).get("variables") or "{}")
+                return _MediaStream(start["streamSid"], start["callSid"], variables)
+            if data.get("event") == "stop":
+                return None
+        return None
+
+    async def _bridge(self, websocket, realtime, stream: _MediaStream):
+        tasks = [
+            asyncio.create_task(self._forward_lead_audio(websocket, realtime, stream)),
+            asyncio.create_task(self._forward_agent_events(websocket, realtime, stream)),
+        ]
+        try:
+            # Either side hanging up ends the call
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _forward_lead_audio(self, websocket, realtime, stream: _MediaStream):
+        """Twilio -> Realtime: lead audio frames, playback marks and hang-up."""
+        async for message in websocket.iter_text():
+            data = json.loads(message)
+            event = data.get("event")
+            if event == "media":
+                stream.latest_media_timestamp = int(data["media"]["timestamp"])
+                await realtime.send(_APPEND_AUDIO % data["media"]["payload"])
+            elif event == "mark":
+                if stream.marks:
+                    stream.marks.popleft()
+            elif event == "stop":
+                break
+        stream.ended_reason = stream.ended_reason or "customer-ended-call"
+
+    async def _forward_agent_events(self, websocket, realtime, stream: _MediaStream):
+        """Realtime -> Twilio: agent audio, interruptions, tool calls and transcripts."""
+        try:
+            async for message in realtime:
+                event = json.loads(message)
+                kind = event.get("type")
+                if kind == "response.audio.delta":
+                    if stream.response_item_id != event["item_id"]:
+                        stream.response_item_id = event["item_id"]
+                        stream.response_start_timestamp = stream.latest_media_timestamp
+                        if stream.speech_stopped_at is not None:
+                            TURN_LATENCY.observe(time.perf_counter() - stream.speech_stopped_at)
+                            stream.speech_stopped_at = None
+                    await websocket.send_text(_TWILIO_MEDIA % (stream.stream_sid, event["delta"]))
+                    await websocket.send_text(_TWILIO_MARK % (stream.stream_sid, event["item_id"]))
+                    stream.marks.append(event["item_id"])
+                elif kind == "input_audio_buffer.speech_started":
+                    # The server VAD cancels the response, drop the agent audio the lead has not heard yet
+                    stream.speech_stopped_at = None
+                    await self._interrupt(websocket, realtime, stream)
+                elif kind == "input_audio_buffer.speech_stopped":
+                    stream.speech_stopped_at = time.perf_counter()
+                elif kind == "conversation.item.created":
+                    stream.items.append(event["item"]["id"])
+                elif kind == "conversation.item.input_audio_transcription.completed":
+                    stream.transcripts[event["item_id"]] = ("User", event.get("transcript", "").strip())
+                    self.transcript_update_handler(stream.call_sid, stream.variables, stream.transcript())
+                elif kind == "response.audio_transcript.done":
+                    stream.transcripts[event["item_id"]] = ("AI", event.get("transcript", "").strip())
+                    self.transcript_update_handler(stream.call_sid, stream.variables, stream.transcript())
+                elif kind == "response.function_call_arguments.done":
+                    task = asyncio.create_task(self._run_tool(realtime, event))
+                    stream.tool_tasks.add(task)
+                    task.add_done_callback(stream.tool_tasks.discard)
+                elif kind == "error":
+                    logger.warning("realtime_error", provider="openai", error=(event.get("error") or {}).get("message"))
+        except ConnectionClosed:
+            pass
+        stream.ended_reason = stream.ended_reason or "realtime-provider-closed"
+
+    async def _interrupt(self, websocket, realtime, stream: _MediaStream):
+        if stream.marks and stream.response_start_timestamp is not None:
+            played_ms = max(0, stream.latest_media_timestamp - stream.response_start_timestamp)
+            await realtime.send(json.dumps({
+                "type": "conversation.item.truncate",
+                "item_id": stream.response_item_id,
+                "content_index": 0,
+                "audio_end_ms": played_ms,
+            }))
+            await websocket.send_text(json.dumps({"event": "clear", "streamSid": stream.stream_sid}))
+            stream.marks.clear()
+        stream.response_item_id = None
+        stream.response_start_timestamp = None
+
+    async def _run_tool(self, realtime, event: dict):
+        """Run a tool called by the model and hand its result back so the agent can answer."""
+        name = event.get("name")
+        try:
+            if name in self.allowed_tools:
+                args = json.loads(event.get("arguments") or "{}")
+                with track_stage("tool_call", provider="openai", tool=name):
+                    result = await run_handler(self.allowed_tools[name], **args)
+            else:
+                result = "Unknown function"
+        except Exception as e:
+            logger.warning("tool_call_failed", provider="openai", tool=name, error=str(e))
+            result = f"Error: {e}"
+        await realtime.send(json.dumps({
+            "type": "conversation.item.create",
+            "item": {"type": "function_call_output", "call_id": event.get("call_id"), "output": json.dumps(result, default=str)},
+        }))
+        await realtime.send('{"type":"response.create"}')
+
+    def _finish_call(self, outputs: dict):
+        call_outputs = self.process_call_outputs(outputs)
+        self.post_call_processing(call_outputs)
+
+    def _public_url(self, request) -> str:
+        """URL Twilio sent the request to (signed by Twilio), behind any proxy."""
+        server_url = os.getenv("SERVER_URL")
+        if not server_url:
+            return str(request.url)
+        query = f"?{request.url.query}" if request.url.query else ""
+        return f"{server_url.rstrip('/')}{request.url.path}{query}"
+
+    def _validate_webhook(self, url: str, params: dict, signature: str = None) -> bool:
+        """
+        Validate the `X-Twilio-Signature` of a request: HMAC-SHA1 of the URL followed by the sorted
+        POST parameters, keyed with the auth token.
+        """
+        data = url + "".join(f"{key}{params[key]}" for key in sorted(params))
+        digest = hmac.new(str(self.auth_token).encode(), data.encode(), hashlib.sha1).digest()
+        valid_signature = hmac.compare_digest(base64.b64encode(digest).decode(), signature or "")
+        if not valid_signature:
+            logger.warning("webhook_unauthorized", provider="openai", call_id=params.get("CallSid"))
+        return valid_signature
@@ -0,0 +1,263 @@
+import os
+import time
+import uuid
+import threading
+from src.base.sqlite_store import open_database, immediate_transaction
+from src.base.call_outcomes import CallOutcome, classify_ended_reason
+from src.base.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+# Reserved or ongoing calls of a number
+LIVE_CALLS = (
+    "(SELECT COUNT(*) FROM phone_number_calls c WHERE c.number_id = n.number_id AND c.ended_at IS NULL)"
+)
+
+
+class NoPhoneNumberAvailableError(Exception):
+    """Raised when every phone number of the pool is at capacity or cooling down."""
+
+    def __init__(self, message, retry_at=None):
+        super().__init__(message)
+        self.retry_at = retry_at
+
+
+class PhoneNumberPool:
+    """
+    Pool of outbound caller numbers shared by every worker of the host, backed by a local SQLite database.
+
+    Each dial reserves the least-loaded available number: the one with the fewest live calls, then the
+    fewest calls placed. A number is available while it is below its concurrent call cap, past the
+    minimum interval since its last dial and not cooling down. Numbers cool down after a streak of
+    failed calls (carrier errors) or of unanswered calls (likely spam flagged).
+    Live calls are released by the call status webhooks, whichever worker receives them.
+    """
+
+    def __init__(
+        self,
+        number_ids: list = None,
+        db_path: str = None,
+        max_concurrent_calls: int = None,
+        min_interval: float = None,
+        failure_threshold: int = 3,
+        failure_cooldown: float = 600,
+        unanswered_threshold: int = 25,
+        unanswered_cooldown: float = 3600,
+        max_call_seconds: float = 2 * 3600,
+    ):
+        """
+        Args:
+            number_ids (list): Provider phone number IDs, defaults to the comma separated `VAPI_PHONE_IDS`
+                env variable, or `VAPI_PHONE_ID`.
+            db_path (str): Path to the SQLite file (`PHONE_POOL_DB`, default `data/phone_numbers.db`).
+                Use ":memory:" for a single process pool.
+            max_concurrent_calls (int): Live calls allowed per number (`PHONE_NUMBER_MAX_CONCURRENT_CALLS`, default 10).
+            min_interval (float): Minimum seconds between two dials of a number
+                (`PHONE_NUMBER_MIN_INTERVAL_SECONDS`, default 0).
+            failure_threshold (int): Consecutive failed calls putting a number in cooldown.
+            failure_cooldown (float): Cooldown after failed calls, in seconds.
+            unanswered_threshold (int): Consecutive unanswered calls putting a number in cooldown.
+            unanswered_cooldown (float): Cooldown after unanswered calls, in seconds.
+            max_call_seconds (float): Age after which a call never reported as ended stops counting as live.
+        """
+        if number_ids is None:
+            number_ids = os.getenv("VAPI_PHONE_IDS") or os.getenv("VAPI_PHONE_ID") or ""
+            number_ids = [number_id.strip() for number_id in number_ids.split(",") if number_id.strip()]
+        self.number_ids = list(number_ids)
+        self.max_concurrent_calls = max_concurrent_calls or int(os.getenv("PHONE_NUMBER_MAX_CONCURRENT_CALLS", "10"))
+        self.min_interval = (
+            min_interval if min_interval is not None else float(os.getenv("PHONE_NUMBER_MIN_INTERVAL_SECONDS", "0"))
+        )
+        self.failure_threshold = failure_threshold
+        self.failure_cooldown = failure_cooldown
+        self.unanswered_threshold = unanswered_threshold
+        self.unanswered_cooldown = unanswered_cooldown
+        self.max_call_seconds = max_call_seconds
+
+        self.db_path = db_path or os.getenv("PHONE_POOL_DB", "data/phone_numbers.db")
+        self._lock = threading.Lock()
+        self._conn = open_database(self.db_path)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS phone_numbers (
+                number_id TEXT PRIMARY KEY,
+                last_dial_at REAL NOT NULL DEFAULT 0,
+                cooldown_until REAL NOT NULL DEFAULT 0,
+                consecutive_failures INTEGER NOT NULL DEFAULT 0,
+                consecutive_unanswered INTEGER NOT NULL DEFAULT 0,
+                total_calls INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS phone_number_calls (
+                reservation_id TEXT PRIMARY KEY,
+                number_id TEXT NOT NULL,
+                call_id TEXT,
+                started_at REAL NOT NULL,
+                ended_at REAL,
+                ended_reason TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_phone_number_calls_number ON phone_number_calls (number_id);
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_phone_number_calls_call ON phone_number_calls (call_id);
+            """
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO phone_numbers (number_id) VALUES (?)", [(number_id,) for number_id in self.number_ids]
+        )
+
+    def acquire(self):
+        """
+        Reserve a line on the least-loaded available number.
+
+        Returns:
+            tuple: (number ID, reservation ID), pass the reservation to `assign` or `cancel`.
+
+        Raises:
+            NoPhoneNumberAvailableError: Every number is at capacity or cooling down.
+        """
+        if not self.number_ids:
+            raise NoPhoneNumberAvailableError("No phone number configured (VAPI_PHONE_IDS)")
+        now = time.time()
+        placeholders = ",".join("?" * len(self.number_ids))
+        with self._lock, immediate_transaction(self._conn):
+            # Old calls, including calls whose end was never reported (lost webhooks),
+            # and dials that never completed (crashed worker)
+            self._conn.execute(
+                "DELETE FROM phone_number_calls WHERE started_at < ? OR (call_id IS NULL AND started_at < ?)",
+                (now - self.max_call_seconds, now - 300),
+            )
+            rows = self._conn.execute(
+                f"SELECT n.*, {LIVE_CALLS} AS live_calls "
+                f"FROM phone_numbers n WHERE n.number_id IN ({placeholders}) "
+                "ORDER BY live_calls, n.total_calls, n.last_dial_at",
+                self.number_ids,
+            ).fetchall()
+            for row in rows:
+                if row["live_calls"] < self.max_concurrent_calls and self._ready_at(row) <= now:
+                    reservation_id = uuid.uuid4().hex
+                    self._conn.execute(
+                        "INSERT INTO phone_number_calls (reservation_id, number_id, started_at) VALUES (?, ?, ?)",
+                        (reservation_id, row["number_id"], now),
+                    )
+                    self._conn.execute(
+                        "UPDATE phone_numbers SET last_dial_at = ?, total_calls = total_calls + 1 WHERE number_id = ?",
+                        (now, row["number_id"]),
+                    )
+                    return row["number_id"], reservation_id
+
+        retry_at = min(
+            (self._ready_at(row) for row in rows if row["live_calls"] < self.max_concurrent_calls), default=None
+        )
+        raise NoPhoneNumberAvailableError("Every phone number is busy or cooling down", retry_at=retry_at)
+
+    def assign(self, reservation_id, call_id):
+        """
+        Attach the provider call ID to a reservation, so the call status webhooks can release it.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE phone_number_calls SET call_id = ? WHERE reservation_id = ?", (call_id, reservation_id)
+            )
+
+    def cancel(self, reservation_id, failed=False):
+        """
+        Free a reservation that did not lead to a call through this number.
+
+        Args:
+            reservation_id (str): The reservation returned by `acquire`.
+            failed (bool): The provider rejected the call from this number.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "DELETE FROM phone_number_calls WHERE reservation_id = ? RETURNING number_id", (reservation_id,)
+            ).fetchone()
+        if row and failed:
+            self._record_outcome(row["number_id"], "failed")
+
+    def release_call(self, call_id, ended_reason=None):
+        """
+        Free the line of an ended call and update the health of its number. Unknown calls are ignored
+        and a call can be released more than once, so every end-of-call event can be forwarded here.
+
+        Args:
+            call_id (str): The provider call ID.
+            ended_reason (str): Why the call ended, if known.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT number_id, ended_reason FROM phone_number_calls WHERE call_id = ?", (call_id,)
+            ).fetchone()
+            if row is None:
+                return
+            self._conn.execute(
+                "UPDATE phone_number_calls SET ended_at = COALESCE(ended_at, ?), ended_reason = COALESCE(ended_reason, ?) "
+                "WHERE call_id = ?",
+                (time.time(), ended_reason, call_id),
+            )
+        # The status update and the end-of-call report both end the call, count its outcome once
+        if ended_reason and row["ended_reason"] is None:
+            outcome = classify_ended_reason(ended_reason)
+            # A wrong lead number says nothing about the health of the caller number
+            if outcome in CallOutcome.UNANSWERED:
+                self._record_outcome(row["number_id"], "unanswered")
+            elif outcome == CallOutcome.FAILED:
+                self._record_outcome(row["number_id"], "failed")
+            elif outcome == CallOutcome.CONNECTED:
+                self._record_outcome(row["number_id"], "connected")
+
+    def stats(self) -> list:
+        """
+        Load and health of every number of the pool.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT n.*, {LIVE_CALLS} AS live_calls FROM phone_numbers n ORDER BY n.number_id"
+            ).fetchall()
+        return [
+            {
+                "number_id": row["number_id"],
+                "live_calls": row["live_calls"],
+                "max_concurrent_calls": self.max_concurrent_calls,
+                "total_calls": row["total_calls"],
+                "cooling_down": row["cooldown_until"] > now,
+                "cooldown_until": row["cooldown_until"] or None,
+                "consecutive_failures": row["consecutive_failures"],
+                "consecutive_unanswered": row["consecutive_unanswered"],
+            }
+            for row in rows
+            if row["number_id"] in self.number_ids
+        ]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _ready_at(self, row) -> float:
+        return max(row["cooldown_until"], row["last_dial_at"] + self.min_interval)
+
+    def _record_outcome(self, number_id, outcome):
+        now = time.time()
+        with self._lock:
+            if outcome == "connected":
+                self._conn.execute(
+                    "UPDATE phone_numbers SET consecutive_failures = 0, consecutive_unanswered = 0 WHERE number_id = ?",
+                    (number_id,),
+                )
+                return
+            column, threshold, cooldown = (
+                ("consecutive_failures", self.failure_threshold, self.failure_cooldown)
+                if outcome == "failed"
+                else ("consecutive_unanswered", self.unanswered_threshold, self.unanswered_cooldown)
+            )
+            row = self._conn.execute(
+                f"UPDATE phone_numbers SET {column} = {column} + 1 WHERE number_id = ? RETURNING {column}",
+                (number_id,),
+            ).fetchone()
+            if row and row[0] >= threshold:
+                self._conn.execute(
+                    f"UPDATE phone_numbers SET cooldown_until = ?, {column} = 0 WHERE number_id = ?",
+                    (now + cooldown, number_id),
+                )
+                logger.warning(
+                    "phone_number_cooling_down", number_id=number_id, cooldown=cooldown, calls=row[0], outcome=outcome
+                )
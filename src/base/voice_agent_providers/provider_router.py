@@ -0,0 +1,241 @@
+import time
+import asyncio
+import threading
+from ..metrics import track_stage
+from ..rate_limiter import RATE_LIMIT_STATUSES, get_error_status_and_headers, is_connection_error
+from ..structured_logging import get_logger
+from .phone_number_pool import NoPhoneNumberAvailableError
+
+logger = get_logger(__name__)
+
+
+class NoProviderAvailableError(Exception):
+    """Raised when every configured voice provider is unavailable or failed to place the call."""
+
+
+def is_provider_failure(error) -> bool:
+    """
+    Tell whether a failed call says the provider is unhealthy (server error, rate limit, connection error
+    or timeout), as opposed to a call the provider refused (invalid number or payload, 4xx).
+    """
+    status, _ = get_error_status_and_headers(error)
+    if status is None:
+        return is_connection_error(error)
+    return status >= 500 or status in RATE_LIMIT_STATUSES
+
+
+def is_unsent_request(error) -> bool:
+    """
+    Tell whether a connection error happened before the request was sent (connection refused or
+    connect timeout), so the provider cannot have placed the call. The SDKs wrap the errors of their
+    HTTP client, the whole `__cause__` chain is checked.
+    """
+    while error is not None:
+        if isinstance(error, ConnectionRefusedError) or type(error).__name__ in ("ConnectError", "ConnectTimeout"):
+            return True
+        error = error.__cause__
+    return False
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker guarding calls to a single provider.
+
+    - closed: requests flow normally, consecutive failures are counted.
+    - open: after `failure_threshold` consecutive failures requests are rejected
+      immediately for `recovery_timeout` seconds.
+    - half_open: once the timeout elapsed a limited number of probe requests are let through,
+      a success closes the circuit again, a failure re-opens it.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, recovery_timeout: float = 30.0, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh()
+            return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a request may be sent to the provider, reserving a probe slot when half-open.
+        """
+        with self._lock:
+            self._refresh()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._half_open_calls = 0
+
+    def release(self):
+        """
+        Give back the probe slot of a request that said nothing about the provider health.
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._half_open_calls = 0
+
+    def _refresh(self):
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+
+
+class ProviderRoute:
+    """
+    A voice provider registered in the router.
+
+    Attributes:
+        name (str): Provider name ("vapi", "retell", ...).
+        agent (BaseAgent): The provider implementation used to place calls.
+        build_params: Function turning a lead into the provider's call payload.
+        timeout (float): Maximum time in seconds to wait for the provider to accept a call.
+        breaker (CircuitBreaker): The provider circuit breaker.
+    """
+
+    def __init__(self, name, agent, build_params, timeout: float = 15.0, breaker: CircuitBreaker = None):
+        self.name = name
+        self.agent = agent
+        self.build_params = build_params
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.successes = 0
+        self.failures = 0
+        self.avg_latency = None
+        self.last_error = None
+
+    def record(self, latency, error=None):
+        if error is None:
+            self.successes += 1
+            self.breaker.record_success()
+        else:
+            self.failures += 1
+            self.last_error = str(error) or type(error).__name__
+            self.breaker.record_failure()
+        # Exponentially weighted moving average of the request latency
+        self.avg_latency = latency if self.avg_latency is None else 0.8 * self.avg_latency + 0.2 * latency
+
+    def health(self) -> dict:
+        return {
+            "state": self.breaker.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "avg_latency": self.avg_latency,
+            "last_error": self.last_error,
+        }
+
+
+class ProviderRouter:
+    """
+    Routes outbound calls over several voice providers (`BaseAgent` implementations) by priority.
+
+    Each provider sits behind a circuit breaker: once a provider keeps failing its circuit opens
+    and new dials go straight to the next healthy provider instead of waiting out failing requests.
+    Only server errors, rate limits, connection errors and timeouts count as failures, a call refused
+    by the provider (4xx) is not retried elsewhere. A request that timed out or lost its connection
+    after being sent is not retried elsewhere either, the provider may have placed the call.
+    The primary provider is probed again after its recovery timeout.
+
+    Every route builds its payload from the same lead, so dynamic variables stay consistent
+    whichever provider places the call.
+    """
+
+    def __init__(self, routes: list):
+        """
+        Args:
+            routes (list): `ProviderRoute` instances, in order of preference.
+        """
+        self.routes = routes
+
+    async def make_call(self, lead):
+        """
+        Place a call to the lead through the first available provider.
+
+        Args:
+            lead: The lead to call.
+
+        Returns:
+            tuple: (provider name, provider response)
+
+        Raises:
+            Exception: The error of a provider refusing the call (4xx), the other providers are not tried.
+            NoPhoneNumberAvailableError: A provider had no caller number available and no other provider
+                placed the call.
+            NoProviderAvailableError: If no provider could place the call.
+        """
+        errors = {}
+        no_number = None
+        for route in self.routes:
+            if not route.breaker.allow_request():
+                errors[route.name] = "circuit open"
+                continue
+
+            started_at = time.monotonic()
+            try:
+                call_params = route.build_params(lead)
+                with track_stage("make_call", provider=route.name):
+                    response = await asyncio.wait_for(route.agent.make_call(call_params), timeout=route.timeout)
+            except NoPhoneNumberAvailableError as e:
+                # Every line of the provider is busy, the provider itself is healthy
+                route.breaker.release()
+                errors[route.name] = str(e)
+                no_number = e
+                continue
+            except asyncio.TimeoutError as e:
+                # The provider may still have accepted the call, do not risk dialing the lead twice
+                route.record(time.monotonic() - started_at, e)
+                raise NoProviderAvailableError(f"{route.name} timed out placing the call") from e
+            except Exception as e:
+                if not is_provider_failure(e):
+                    # The call itself is invalid, the next provider would refuse it too
+                    route.breaker.release()
+                    raise
+                route.record(time.monotonic() - started_at, e)
+                status, _ = get_error_status_and_headers(e)
+                if status is None and not is_unsent_request(e):
+                    # Read timeout or dropped connection: the call may have been placed, same as a timeout
+                    raise NoProviderAvailableError(f"{route.name} failed placing the call: {e}") from e
+                errors[route.name] = str(e)
+                logger.warning("provider_call_failed", provider=route.name, error=str(e))
+                continue
+
+            route.record(time.monotonic() - started_at)
+            return route.name, response
+
+        if no_number is not None:
+            # Retry once a line frees up rather than failing the lead
+            raise no_number
+        raise NoProviderAvailableError(f"No voice provider could place the call: {errors}")
+
+    def health(self) -> dict:
+        """
+        Health of every provider: circuit state, success/failure counts and average latency.
+        """
+        return {route.name: route.health() for route in self.routes}
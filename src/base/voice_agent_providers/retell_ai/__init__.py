@@ -1,3 +1,4 @@
 from .retell_ai import RetellAI
+from .custom_llm import RetellCustomLLM
 
-__all__ = ['RetellAI']
+__all__ = ['RetellAI', 'RetellCustomLLM']
@@ -0,0 +1,245 @@
+import os
+import json
+import time
+import asyncio
+from ..base_agent import render_variables
+from ..keyed_executor import run_handler
+from ...metrics import REGISTRY, track_stage
+from ...structured_logging import get_logger, bind_call_id
+
+logger = get_logger(__name__)
+
+FIRST_TOKEN_LATENCY = REGISTRY.histogram(
+    "leads_custom_llm_first_token_seconds",
+    "Time from a Retell response request to the first token of the answer sent back on the custom LLM websocket.",
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0),
+)
+
+# Built-in tool of the Retell hosted LLM, handled by Retell hanging up once the answer is spoken
+END_CALL_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "end_call",
+        "description": "Used to end the call with the customer.",
+        "parameters": {"type": "object", "properties": {}},
+    },
+}
+
+# Sent as the last turn when Retell asks for a reminder after the lead stayed silent
+REMINDER_MESSAGE = "(The lead has not said anything for a while. Briefly check that they are still there.)"
+
+_ROLES = {"agent": "assistant", "user": "user"}
+
+
+async def stream_completion(model: str, messages: list, tools: list = None, temperature: float = 0.3):
+    """
+    Stream a chat completion through litellm.
+
+    Yields:
+        The `delta` of every chunk, as soon as it is received.
+    """
+    # litellm is slow to import, load it on first use instead of at startup
+    from litellm import acompletion
+
+    response = await acompletion(
+        model=model,
+        messages=messages,
+        tools=tools or None,
+        temperature=temperature,
+        stream=True,
+    )
+    async for chunk in response:
+        if chunk.choices:
+            yield chunk.choices[0].delta
+
+
+class RetellCustomLLM:
+    """
+    Custom LLM websocket of Retell calls, answering in place of the Retell hosted LLM.
+
+    Retell opens one websocket per call and sends the live transcript every time the agent has to answer.
+    The answer is generated with litellm and streamed back token by token, so Retell starts the
+    text-to-speech on the first words instead of waiting for the full answer. When the lead talks over the
+    agent or a newer answer is requested, the generation in flight is cancelled right away. Tool calls
+    are run in the app and the model then continues its answer with their results.
+
+    Attributes:
+        allowed_tools (dict): Tools the model can call, by name.
+        instructions (str): System prompt of the agent, with `{{variable}}` placeholders.
+        tools (list): Chat completion definitions of the tools, with the `end_call` tool.
+        model (str): litellm model answering the lead.
+        temperature (float): Sampling temperature of the model.
+        begin_message (str): First sentence of the agent, empty to wait for the lead to talk first.
+        max_tool_rounds (int): Tool call rounds allowed in one answer.
+    """
+
+    def __init__(
+        self,
+        tools: dict={},
+        instructions: str = "",
+        tool_definitions: list = None,
+        model: str = None,
+        temperature: float = None,
+        begin_message: str = None,
+        max_tool_rounds: int = 3,
+        accept_call=None,
+        transcript_handler=None,
+    ):
+        """
+        Args:
+            tools (dict): Tools accessible to the agent, by name.
+            instructions (str): System prompt of the agent. `{{variable}}` placeholders are filled
+                with the dynamic variables of the call.
+            tool_definitions (list): JSON schemas of the tools, in the Realtime `tools` format.
+            model (str): litellm model answering the lead (`RETELL_LLM_MODEL`, default "gpt-4o-mini").
+            temperature (float): Sampling temperature (`RETELL_LLM_TEMPERATURE`, default 0.3).
+            begin_message (str): First sentence of the agent (`RETELL_BEGIN_MESSAGE`,
+                default "Hi, is this {{firstName}}?").
+            max_tool_rounds (int): Tool call rounds allowed in one answer.
+            accept_call: Function telling whether a call ID belongs to a call placed by the app.
+                Every call is answered if None.
+            transcript_handler: Function called with the call ID, the live transcript (list of
+                utterances) and the dynamic variables of the call on every transcript update.
+                Runs on the event loop, it must not block.
+        """
+        self.allowed_tools = tools
+        self.instructions = instructions
+        self.tools = [
+            {"type": "function", "function": {key: value for key, value in definition.items() if key != "type"}}
+            for definition in tool_definitions or []
+        ] + [END_CALL_TOOL]
+        self.model = model or os.getenv("RETELL_LLM_MODEL", "gpt-4o-mini")
+        self.temperature = temperature if temperature is not None else float(os.getenv("RETELL_LLM_TEMPERATURE", "0.3"))
+        self.begin_message = begin_message if begin_message is not None else os.getenv("RETELL_BEGIN_MESSAGE", "Hi, is this {{firstName}}?")
+        self.max_tool_rounds = max_tool_rounds
+        self.accept_call = accept_call
+        self.transcript_handler = transcript_handler
+
+    async def handle_websocket(self, websocket, call_id: str):
+        """
+        Answer the response requests of one call until Retell closes the websocket.
+
+        Args:
+            websocket: The Retell custom LLM websocket (`accept`, `iter_text`, `send_text`).
+            call_id (str): ID of the Retell call, from the websocket path.
+        """
+        await websocket.accept()
+        if self.accept_call is not None and not await run_handler(self.accept_call, call_id):
+            logger.warning("custom_llm_rejected", provider="retell", call_id=call_id)
+            await websocket.close()
+            return
+        await self._send(websocket, {"response_type": "config", "config": {"auto_reconnect": True, "call_details": True}})
+        variables = {}
+        instructions = render_variables(self.instructions, variables)
+        answer = None
+
+        with bind_call_id(call_id):
+            logger.info("custom_llm_connected", provider="retell")
+            try:
+                async for message in websocket.iter_text():
+                    request = json.loads(message)
+                    kind = request.get("interaction_type")
+                    if "transcript" in request and self.transcript_handler is not None:
+                        self.transcript_handler(call_id, request["transcript"], variables)
+                    if kind == "ping_pong":
+                        await self._send(websocket, {"response_type": "ping_pong", "timestamp": request.get("timestamp")})
+                    elif kind == "call_details":
+                        variables = (request.get("call") or {}).get("retell_llm_dynamic_variables") or {}
+                        instructions = render_variables(self.instructions, variables)
+                        await self._send(websocket, {
+                            "response_type": "response",
+                            "response_id": 0,
+                            "content": render_variables(self.begin_message, variables),
+                            "content_complete": True,
+                        })
+                    elif kind == "update_only":
+                        # The lead talking over the agent makes the answer being generated obsolete
+                        if request.get("turntaking") == "user_turn" and answer is not None:
+                            answer.cancel()
+                    elif kind in ("response_required", "reminder_required"):
+                        if answer is not None:
+                            answer.cancel()
+                        answer = asyncio.create_task(self._answer(websocket, request, instructions, time.perf_counter()))
+            except Exception as e:
+                logger.warning("custom_llm_error", provider="retell", error=str(e) or type(e).__name__)
+            finally:
+                if answer is not None:
+                    answer.cancel()
+            logger.info("custom_llm_disconnected", provider="retell")
+
+    async def _answer(self, websocket, request: dict, instructions: str, requested_at: float):
+        """Stream the answer to one response request, running the tools the model calls."""
+        response_id = request.get("response_id")
+        messages = [{"role": "system", "content": instructions}] + [
+            {"role": _ROLES.get(utterance.get("role"), "user"), "content": utterance.get("content", "")}
+            for utterance in request.get("transcript") or []
+        ]
+        if request.get("interaction_type") == "reminder_required":
+            messages.append({"role": "user", "content": REMINDER_MESSAGE})
+
+        first_token = True
+        end_call = False
+        try:
+            for _ in range(self.max_tool_rounds + 1):
+                content, tool_calls = "", {}
+                async for delta in stream_completion(self.model, messages, self.tools, self.temperature):
+                    if getattr(delta, "content", None):
+                        if first_token:
+                            FIRST_TOKEN_LATENCY.observe(time.perf_counter() - requested_at)
+                            first_token = False
+                        content += delta.content
+                        await self._send(websocket, {
+                            "response_type": "response",
+                            "response_id": response_id,
+                            "content": delta.content,
+                            "content_complete": False,
+                        })
+                    # Tool calls arrive in fragments, the arguments are concatenated by tool call index
+                    for fragment in getattr(delta, "tool_calls", None) or []:
+                        call = tool_calls.setdefault(fragment.index, {"id": None, "name": "", "arguments": ""})
+                        call["id"] = fragment.id or call["id"]
+                        call["name"] += fragment.function.name or ""
+                        call["arguments"] += fragment.function.arguments or ""
+                if not tool_calls:
+                    break
+                if any(call["name"] == "end_call" for call in tool_calls.values()):
+                    end_call = True
+                    break
+                messages.append({
+                    "role": "assistant",
+                    "content": content or None,
+                    "tool_calls": [
+                        {"id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": call["arguments"]}}
+                        for call in tool_calls.values()
+                    ],
+                })
+                for call in tool_calls.values():
+                    # A booking already started completes even if the lead interrupts the answer
+                    result = await asyncio.shield(self._run_tool(call["name"], call["arguments"]))
+                    messages.append({"role": "tool", "tool_call_id": call["id"], "content": json.dumps(result, default=str)})
+
+            completion = {"response_type": "response", "response_id": response_id, "content": "", "content_complete": True}
+            if end_call:
+                completion["end_call"] = True
+            await self._send(websocket, completion)
+        except asyncio.CancelledError:
+            logger.info("custom_llm_answer_cancelled", provider="retell", response_id=response_id)
+            raise
+        except Exception as e:
+            logger.warning("custom_llm_answer_failed", provider="retell", response_id=response_id, error=str(e) or type(e).__name__)
+
+    async def _run_tool(self, name: str, arguments: str):
+        """Run a tool called by the model, returns its result or the error for the model."""
+        try:
+            if name not in self.allowed_tools:
+                return "Unknown function"
+            args = json.loads(arguments or "{}")
+            with track_stage("tool_call", provider="retell", tool=name):
+                return await run_handler(self.allowed_tools[name], **args)
+        except Exception as e:
+            logger.warning("tool_call_failed", provider="retell", tool=name, error=str(e))
+            return f"Error: {e}"
+
+    @staticmethod
+    async def _send(websocket, message: dict):
+        await websocket.send_text(json.dumps(message))
@@ -1,8 +1,14 @@
 import os
 import json
 from ..base_agent import BaseAgent
+from ..keyed_executor import KeyedExecutor, run_handler
+from ...metrics import track_stage
+from ...structured_logging import get_logger, bind_call_id
+from ...rate_limiter import get_rate_limiter, call_with_retry, async_call_with_retry, RATE_LIMIT_STATUSES
 from retell import Retell
 
+logger = get_logger(__name__)
+
 class RetellAI(BaseAgent):
     def __init__(self, tools: dict={}):
         """
@@ -13,6 +19,10 @@ class RetellAI(BaseAgent):
         """
         self.client = Retell(api_key=os.getenv("RETELL_API_KEY"))
         self.allowed_tools = tools
+        self.rate_limiter = get_rate_limiter("retell", os.getenv("RETELL_API_KEY"))
+        self.webhook_executor = KeyedExecutor()
+        # Log the raw webhook payloads are appended to, if set
+        self.event_log = None
 
     async def make_call(self, request: dict):
         """
@@ -24,12 +34,22 @@ class RetellAI(BaseAgent):
         Returns:
             dict: Response from the Retell API.
         """
-        response = await self.client.call.create_phone_call(**request)
-        return response
+        # Only rate-limited requests are retried, a failed create may still have dialed the lead.
+        # The SDK retries are turned off so they don't retry timeouts behind the rate limiter's back.
+        # The raw response gives the rate limiter the rate limit headers
+        response = await async_call_with_retry(
+            self.rate_limiter,
+            self.client.with_options(max_retries=0).call.with_raw_response.create_phone_call,
+            retry_statuses=RATE_LIMIT_STATUSES,
+            **request,
+        )
+        return response.parse()
 
     async def handle_webhook_call(self, request: dict):
         """
         Handle incoming webhook requests from Retell.
+        Events of the same call are processed one at a time in arrival order,
+        events of different calls are processed concurrently.
         
         Args:
             request (dict): The webhook request payload.
@@ -39,23 +59,45 @@ class RetellAI(BaseAgent):
         """
         try:
             post_data = await request.json()
-            event = post_data.get("event", "")
-            print(post_data)
 
             # Verify signature
-            valid_signature = self._validate_webhook(post_data)
+            valid_signature = self._validate_webhook(post_data, request.headers.get("X-Retell-Signature"))
             if not valid_signature:
                 return {"status_code": 401, "content": {"message": "Unauthorized"}}
 
-            if event:
-                self._handle_retell_event(event, post_data)
-            else:
-                output = self._handle_tool_call(post_data)
-                return output
-        except Exception as err:
-            print(f"Error in webhook: {err}")
+            if self.event_log is not None:
+                event = post_data.get("event") or "tool_call"
+                call_id = (post_data.get("data") or post_data.get("call") or {}).get("call_id")
+                self.event_log.append_later("retell", post_data, event_type=event, call_id=call_id)
+            return await self.handle_webhook_payload(post_data)
+        except Exception:
+            logger.exception("webhook_error", provider="retell")
             return {"status_code": 500, "content": {"message": "Internal Server Error"}}
 
+    async def handle_webhook_payload(self, post_data: dict, replay: bool = False):
+        """
+        Process a verified webhook payload, received or replayed from the webhook event log.
+        
+        Args:
+            post_data (dict): The webhook payload.
+            replay (bool): The payload is replayed from the webhook event log.
+        
+        Returns:
+            dict: Output of the tool call, None for call events.
+        """
+        event = post_data.get("event", "")
+        if event:
+            call_id = (post_data.get("data") or {}).get("call_id")
+            with bind_call_id(call_id), track_stage("webhook", provider="retell", event=event):
+                logger.info("webhook_received", provider="retell", event=event)
+                await self.webhook_executor.submit(call_id, self._handle_retell_event, event, post_data, replay=replay)
+        else:
+            call_id = (post_data.get("call") or {}).get("call_id")
+            with bind_call_id(call_id), track_stage("webhook", provider="retell", event="tool_call"):
+                logger.info("webhook_received", provider="retell", event="tool_call")
+                output = await self.webhook_executor.submit(call_id, self._handle_tool_call, post_data)
+            return output
+
     def get_allowed_tools(self):
         """
         Retrieve the list of tools accessible to the agent.
@@ -75,7 +117,7 @@ class RetellAI(BaseAgent):
         Returns:
             dict: Response from the Retell API.
         """
-        response = self.client.agent.create(**config)
+        response = call_with_retry(self.rate_limiter, self.client.agent.create, **config)
         return response
 
     def update_agent(self, agent_id: str, config: dict):
@@ -89,7 +131,7 @@ class RetellAI(BaseAgent):
         Returns:
             dict: Response from the Retell API.
         """
-        response = self.client.agent.update(agent_id=agent_id, **config)
+        response = call_with_retry(self.rate_limiter, self.client.agent.update, agent_id=agent_id, **config)
         return response
 
     def create_llm(self, config: dict):
@@ -102,7 +144,7 @@ class RetellAI(BaseAgent):
         Returns:
             dict: Response from the Retell API.
         """
-        response = self.client.llm.create(**config)
+        response = call_with_retry(self.rate_limiter, self.client.llm.create, **config)
         return response
 
     def update_llm(self, llm_id: str, config: dict):
@@ -116,7 +158,7 @@ class RetellAI(BaseAgent):
         Returns:
             dict: Response from the Retell API.
         """
-        response = self.client.llm.update(llm_id=llm_id, **config)
+        response = call_with_retry(self.rate_limiter, self.client.llm.update, llm_id=llm_id, **config)
         return response
 
     def add_phone_number(self, config: str):
@@ -129,7 +171,7 @@ class RetellAI(BaseAgent):
         Returns:
             dict: Response from the Retell API.
         """
-        phone_number_response = self.client.phone_number.import_(**config)
+        phone_number_response = call_with_retry(self.rate_limiter, self.client.phone_number.import_, **config)
         return phone_number_response
 
     def pre_call_processing(self, payload):
@@ -162,22 +204,24 @@ class RetellAI(BaseAgent):
         """
         pass
 
-    def post_call_processing(self, call_outputs: dict):
+    def post_call_processing(self, call_outputs: dict, replay: bool = False):
         """
         Perform post-call processing to analyze results and update the CRM.
         This method must be overridden in a subclass to implement specific pre-call logic.
         
         Args:
             call_outputs (dict): Outputs from the call analysis.
+            replay (bool): The call outputs come from a webhook replayed from the webhook event log.
         """
         pass
 
-    def _validate_webhook(self, data):
+    def _validate_webhook(self, data, signature=None):
         """
         Validate the webhook signature for authenticity.
         
         Args:
             data (dict): Webhook data received from Retell.
+            signature (str): The `X-Retell-Signature` request header.
         
         Returns:
             bool: True if the signature is valid, False otherwise.
@@ -185,32 +229,27 @@ class RetellAI(BaseAgent):
         valid_signature = self.client.verify(
             json.dumps(data, separators=(",", ":"), ensure_ascii=False),
             api_key=str(os.getenv("RETELL_API_KEY")),
-            signature=str(data.get("headers", {}).get("X-Retell-Signature")),
+            signature=str(signature or data.get("headers", {}).get("X-Retell-Signature")),
         )
         if not valid_signature:
-            print("Received Unauthorized", data["event"], data["data"]["call_id"])
+            logger.warning("webhook_unauthorized", provider="retell", event=data.get("event"), call_id=(data.get("data") or {}).get("call_id"))
         return valid_signature
 
-    def _handle_retell_event(self, event, data):
+    def _handle_retell_event(self, event, data, replay=False):
         """
         Handle specific events received from Retell.
         
         Args:
             event (str): The type of event received.
             data (dict): Event data payload.
+            replay (bool): The event is replayed from the webhook event log.
         """
-        if event == "call_started":
-            print("Call started event", data["data"]["call_id"])
-        elif event == "call_ended":
-            print("Call ended event", data["data"]["call_id"])
-        elif event == "call_analyzed":
-            print("Call analyzed event", data["data"]["call_id"])
-
+        if event == "call_analyzed":
             # Post-call analysis and update CRM
             call_output = self.process_call_outputs(data["data"])
-            self.post_call_processing(call_output)
-        else:
-            print("Unknown event", event)
+            self.post_call_processing(call_output, replay=replay)
+        elif event not in ("call_started", "call_ended"):
+            logger.warning("webhook_unknown_event", provider="retell", event=event)
 
     async def _handle_tool_call(self, data):
         """
@@ -226,7 +265,8 @@ class RetellAI(BaseAgent):
         args = data.get("args", {})
 
         if function_name in self.allowed_tools:
-            result = await self.allowed_tools[function_name](**args)
+            with track_stage("tool_call", provider="retell", tool=function_name):
+                result = await run_handler(self.allowed_tools[function_name], **args)
             return {"name": function_name, "result": result}
         else:
             return {"name": function_name, "result": "Unknown function"}
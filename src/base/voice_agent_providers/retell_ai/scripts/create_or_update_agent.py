@@ -8,6 +8,11 @@ agent_config = {
         "type": "retell-llm",  # Required: Available option is 'retell-llm'
         "llm_id": "your_llm_id_here"  # Required: ID of the Retell LLM
     },
+    # To answer with the app instead of the Retell hosted LLM (streamed litellm completions):
+    # "response_engine": {
+    #     "type": "custom-llm",
+    #     "llm_websocket_url": "wss://your-server.com/retell/llm-websocket",  # Retell appends /{call_id}
+    # },
     "voice_id": "your_voice_id_here",  # Required: Unique voice ID
     "agent_name": None,  # Optional: Agent name for reference
     "voice_model": None,  # Optional: Voice model (e.g., 'eleven_turbo_v2')
@@ -41,7 +41,9 @@ assistant_config = {
             "enabled": False
         }
     },
-    "server_url": ""
+    "server_url": "",
+    # "conversation-update" feeds the live analysis of the call
+    "server_messages": ["conversation-update", "end-of-call-report", "status-update", "tool-calls"]
 }
 
 
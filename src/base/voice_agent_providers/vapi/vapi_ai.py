@@ -1,6 +1,12 @@
 import os
 from vapi import Vapi
 from ..base_agent import BaseAgent
+from ..keyed_executor import KeyedExecutor, run_handler
+from ...metrics import track_stage
+from ...structured_logging import get_logger, bind_call_id
+from ...rate_limiter import get_rate_limiter, call_with_retry, async_call_with_retry, RATE_LIMIT_STATUSES
+
+logger = get_logger(__name__)
 
 
 class VapiAI(BaseAgent):
@@ -11,6 +17,9 @@ class VapiAI(BaseAgent):
     Attributes:
         client (Vapi): An instance of the Vapi client initialized with the API key.
         allowed_tools (dict): A dictionary of tools allowed for interaction by the agent.
+        webhook_executor (KeyedExecutor): Serializes webhook events per call ID.
+        event_log (WebhookEventLog): Log the raw webhook payloads are appended to, if set.
+        rate_limiter (AdaptiveRateLimiter): Request budget shared by all clients of the same API key.
     """
     
     def __init__(self, tools: dict={}):
@@ -22,6 +31,9 @@ class VapiAI(BaseAgent):
         """
         self.client = Vapi(token=os.getenv("VAPI_API_KEY"))
         self.allowed_tools = tools
+        self.rate_limiter = get_rate_limiter("vapi", os.getenv("VAPI_API_KEY"))
+        self.webhook_executor = KeyedExecutor()
+        self.event_log = None
 
     async def make_call(self, request: dict):
         """
@@ -30,26 +42,68 @@ class VapiAI(BaseAgent):
         Args:
             request (dict): The payload with details for the call request.
         """
-        print(f"Making a Vapi call")
-        response = self.client.calls.create(**request)
+        logger.debug("call_creating", provider="vapi")
+        # Only rate-limited requests are retried, a failed create may still have dialed the lead.
+        # The SDK retries are turned off so they don't retry timeouts behind the rate limiter's back
+        response = await async_call_with_retry(
+            self.rate_limiter,
+            self.client.calls.create,
+            retry_statuses=RATE_LIMIT_STATUSES,
+            request_options={"max_retries": 0},
+            **request,
+        )
         return response
     
     async def handle_webhook_call(self, request: dict):
         """
         Handle incoming webhook calls based on the message type in the payload.
+        Events of the same call are processed one at a time in arrival order,
+        events of different calls are processed concurrently.
         
         Args:
             request (dict): The request payload containing event details.
         """
         # Parse the JSON payload from the request
         payload = await request.json()
+        message = payload["message"]
+        if self.event_log is not None:
+            self.event_log.append_later(
+                "vapi", payload, event_type=message.get("type"), call_id=(message.get("call") or {}).get("id")
+            )
+        return await self.handle_webhook_payload(payload)
+
+    async def handle_webhook_payload(self, payload: dict, replay: bool = False):
+        """
+        Process a parsed webhook payload, received or replayed from the webhook event log.
         
+        Args:
+            payload (dict): The webhook payload.
+            replay (bool): The payload is replayed from the webhook event log.
+        """
+        message = payload["message"]
+        call_id = (message.get("call") or {}).get("id")
+        with bind_call_id(call_id), track_stage("webhook", provider="vapi", event=message.get("type")):
+            logger.info("webhook_received", provider="vapi", event=message.get("type"))
+            return await self.webhook_executor.submit(call_id, self.dispatch_webhook_message, message, replay=replay)
+
+    async def dispatch_webhook_message(self, message: dict, replay: bool = False):
+        """
+        Route a webhook message to its handler based on the message type.
+        
+        Args:
+            message (dict): The `message` object of the webhook payload.
+            replay (bool): The message is replayed from the webhook event log.
+        """
         response = None
-        message_type = payload['message']['type']
+        message_type = message['type']
         if message_type == "tool-calls":
-            response = await self.tools_call_handler(payload["message"])
+            response = await self.tools_call_handler(message)
+        elif message_type == "status-update":
+            response = await self.status_update_handler(message)
+        elif message_type == "conversation-update":
+            response = await self.conversation_update_handler(message)
         elif message_type == "end-of-call-report":
-            response = await self.end_of_call_report_handler(payload["message"])
+            response = await self.end_of_call_report_handler(message, replay=replay)
         else:
             pass
         
@@ -63,7 +117,7 @@ class VapiAI(BaseAgent):
             request (dict): A dictionary containing all required parameters for creating the agent.
         """
         print("Vapi creating assistant.")
-        output = self.client.assistants.create(**request)
+        output = call_with_retry(self.rate_limiter, self.client.assistants.create, **request)
         return {"status": "success", "details": output}
 
     def update_agent(self, agent_id: str, request: dict):
@@ -75,7 +129,7 @@ class VapiAI(BaseAgent):
             request (dict): A dictionary containing the new configuration for the agent.
         """
         print("Vapi updating assistant.")
-        output = self.client.assistants.update(id=agent_id, **request)
+        output = call_with_retry(self.rate_limiter, self.client.assistants.update, id=agent_id, **request)
         return {"status": "success", "details": output}
 
     def create_tool(self, request: dict):
@@ -86,7 +140,7 @@ class VapiAI(BaseAgent):
             request (dict): A dictionary containing the parameters to create the tool.
         """
         print("Vapi creating tool.")
-        tool_creation_output = self.client.tools.create(request=request)
+        tool_creation_output = call_with_retry(self.rate_limiter, self.client.tools.create, request=request)
         return {"status": "success", "details": tool_creation_output}
 
     def update_tool(self, tool_id: str, request: dict):
@@ -98,7 +152,7 @@ class VapiAI(BaseAgent):
             request (dict): A dictionary containing the new configuration for the tool.
         """
         print("Updating Vapi tool")
-        output = self.client.tools.update(id=tool_id, **request)
+        output = call_with_retry(self.rate_limiter, self.client.tools.update, id=tool_id, **request)
         return {"status": "success", "details": output}
 
     def add_phone_number(self, request: dict):
@@ -112,7 +166,7 @@ class VapiAI(BaseAgent):
             dict: A dictionary with the status and details of the phone number creation.
         """
         print("Adding phone number in Vapi")
-        phone_creation_output = self.client.phone_numbers.create(request=request)
+        phone_creation_output = call_with_retry(self.rate_limiter, self.client.phone_numbers.create, request=request)
         return {"status": "success", "details": phone_creation_output}
     
     def get_allowed_tools(self):
@@ -144,7 +198,8 @@ class VapiAI(BaseAgent):
             arguments = function_call.get('arguments')
             
             if name in self.allowed_tools:
-                result = await self.allowed_tools[name](**arguments)
+                with track_stage("tool_call", provider="vapi", tool=name):
+                    result = await run_handler(self.allowed_tools[name], **arguments)
                 results.append({
                     "name": name,
                     "toolCallId": call_id,
@@ -159,15 +214,37 @@ class VapiAI(BaseAgent):
 
         return {"results": results}
     
-    async def end_of_call_report_handler(self, payload):
+    async def status_update_handler(self, payload):
+        """
+        Handle call status updates (queued, ringing, in-progress, ended...).
+        This method can be overridden in a subclass to track the call progress.
+        
+        Args:
+            payload (dict): The payload containing the new call status.
+        """
+        pass
+
+    async def conversation_update_handler(self, payload):
+        """
+        Handle the conversation so far, sent by Vapi after every turn.
+        This method can be overridden in a subclass to follow the conversation live.
+
+        Args:
+            payload (dict): The payload with the "messages" of the conversation.
+        """
+        pass
+
+    async def end_of_call_report_handler(self, payload, replay: bool = False):
         """
         Handle the end of call report and initiate post-call processing.
         
         Args:
             payload (dict): The payload containing the call's end details.
+            replay (bool): The report is replayed from the webhook event log.
         """
         call_output = self.process_call_outputs(payload)
-        self.post_call_processing(call_output)
+        # Post-call analysis and CRM writes are blocking, run them off the event loop
+        await run_handler(self.post_call_processing, call_output, replay=replay)
         
     def pre_call_processing(self, payload):
         """
@@ -196,12 +273,13 @@ class VapiAI(BaseAgent):
         """
         pass
        
-    def post_call_processing(self, payload):
+    def post_call_processing(self, payload, replay: bool = False):
         """
         Perform post-call processing to analyze results and update the CRM.
         This method must be overridden in a subclass to implement specific pre-call logic.
         
         Args:
             payload: Payload containing processed call details.
+            replay (bool): The call outputs come from a webhook replayed from the webhook event log.
         """
         pass
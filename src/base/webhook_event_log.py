@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import zlib
+import queue
+import struct
+import threading
+from src.base.sqlite_store import open_database
+from src.base.structured_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+# Record header: length and CRC32 of the compressed payload
+RECORD_HEADER = struct.Struct(">II")
+
+# Tool calls run side effects (appointments booked, ...) and are not replayed unless asked for
+TOOL_CALL_EVENTS = ("tool-calls", "tool_call")
+
+
+class WebhookEventLog:
+    """
+    Append-only log of the raw webhook payloads received from the voice providers.
+
+    Payloads are compressed one by one and appended to segment files (`segment-<start>-<pid>.log`),
+    each worker writing its own segments, rotated once they reach `segment_bytes`. A SQLite index keeps
+    the segment and offset of every event by receive time, call ID and event type, so range scans only
+    read the matching records. Events can be replayed into the webhook handlers, e.g. after a bug fix.
+    The webhook handlers log their payloads with `append_later`, written by a background thread
+    so the event loop never waits on the disk.
+    """
+
+    def __init__(self, root: str = None, segment_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            root (str): Directory of the log (`WEBHOOK_LOG_DIR`, default `data/webhook_log`),
+                shared by the workers of the host.
+            segment_bytes (int): Size after which a new segment is started.
+        """
+        self.root = root or os.getenv("WEBHOOK_LOG_DIR", "data/webhook_log")
+        self.segment_bytes = segment_bytes
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._segment = None
+        self._segment_file = None
+        self._sequence = 0
+        self._queue = queue.Queue()
+        self._writer = None
+        self._conn = open_database(os.path.join(self.root, "index.db"))
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS webhook_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                received_at REAL NOT NULL,
+                provider TEXT NOT NULL,
+                event_type TEXT,
+                call_id TEXT,
+                segment TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_webhook_events_time ON webhook_events (received_at);
+            CREATE INDEX IF NOT EXISTS idx_webhook_events_call ON webhook_events (call_id, id);
+            CREATE INDEX IF NOT EXISTS idx_webhook_events_type ON webhook_events (event_type, received_at);
+            """
+        )
+
+    def append(self, provider: str, payload: dict, event_type: str = None, call_id: str = None,
+               received_at: float = None) -> int:
+        """
+        Append a raw webhook payload to the log.
+
+        Args:
+            provider (str): "vapi", "retell" or "openai".
+            payload (dict): The parsed request body.
+            event_type (str): Type of the event (status-update, end-of-call-report, call_analyzed, Twilio call status, ...).
+            call_id (str): The provider call ID.
+            received_at (float): UNIX timestamp the event was received at, defaults to now.
+
+        Returns:
+            int: ID of the event in the log.
+        """
+        body = zlib.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+        record = RECORD_HEADER.pack(len(body), zlib.crc32(body)) + body
+        with self._lock:
+            if self._segment_file is None or self._segment_file.tell() >= self.segment_bytes:
+                self._rotate()
+            offset = self._segment_file.tell()
+            self._segment_file.write(record)
+            self._segment_file.flush()
+            cursor = self._conn.execute(
+                "INSERT INTO webhook_events (received_at, provider, event_type, call_id, segment, offset, length) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (received_at or time.time(), provider, event_type, call_id, self._segment, offset, len(record)),
+            )
+        return cursor.lastrowid
+
+    def append_later(self, provider: str, payload: dict, event_type: str = None, call_id: str = None):
+        """
+        Queue a raw webhook payload for the background writer and return right away, for the async
+        webhook handlers. Events are written in the order they were queued. Arguments of `append`.
+        """
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_queued, name="webhook-event-log", daemon=True)
+                self._writer.start()
+        self._queue.put((provider, payload, event_type, call_id, time.time()))
+
+    def scan(self, since: float = None, until: float = None, provider: str = None, event_type: str = None,
+             call_id: str = None, limit: int = None):
+        """
+        Iterate over the logged events matching the filters, in arrival order.
+
+        Args:
+            since (float): Only events received at or after this UNIX timestamp.
+            until (float): Only events received before this UNIX timestamp.
+            provider (str): Only events of this provider.
+            event_type (str): Only events of this type.
+            call_id (str): Only events of this call.
+            limit (int): Maximum number of events.
+
+        Yields:
+            dict: The event "id", "received_at", "provider", "event_type", "call_id" and raw "payload".
+        """
+        conditions, params = [], []
+        for column, operator, value in (
+            ("received_at", ">=", since),
+            ("received_at", "<", until),
+            ("provider", "=", provider),
+            ("event_type", "=", event_type),
+            ("call_id", "=", call_id),
+        ):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(value)
+        query = "SELECT * FROM webhook_events"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY id"
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        files = {}
+        try:
+            for row in rows:
+                if row["segment"] not in files:
+                    files[row["segment"]] = open(os.path.join(self.root, row["segment"]), "rb")
+                segment_file = files[row["segment"]]
+                segment_file.seek(row["offset"])
+                yield {
+                    "id": row["id"],
+                    "received_at": row["received_at"],
+                    "provider": row["provider"],
+                    "event_type": row["event_type"],
+                    "call_id": row["call_id"],
+                    "payload": self._decode(segment_file.read(row["length"])),
+                }
+        finally:
+            for segment_file in files.values():
+                segment_file.close()
+
+    async def replay(self, handlers: dict, include_tool_calls: bool = False, **filters) -> dict:
+        """
+        Feed logged events back into the webhook handlers, one at a time in arrival order.
+
+        Args:
+            handlers (dict): Async handler taking the raw payload and a `replay` keyword, by provider
+                (e.g. `handle_webhook_payload` of the automations). Events of other providers are skipped.
+                The handlers are called with `replay=True`, so they don't redial the leads again.
+            include_tool_calls (bool): Replay the tool calls too, running their side effects again
+                (e.g. booking the appointment twice). Skipped by default.
+            **filters: Filters of `scan`.
+
+        Returns:
+            dict: Number of events "replayed", "skipped" and "failed".
+        """
+        result = {"replayed": 0, "skipped": 0, "failed": 0}
+        for event in self.scan(**filters):
+            handler = handlers.get(event["provider"])
+            if handler is None or (event["event_type"] in TOOL_CALL_EVENTS and not include_tool_calls):
+                result["skipped"] += 1
+                continue
+            try:
+                await handler(event["payload"], replay=True)
+                result["replayed"] += 1
+            except Exception as e:
+                logger.warning(
+                    "webhook_replay_failed", event_id=event["id"], event_type=event["event_type"], call_id=event["call_id"], error=str(e)
+                )
+                result["failed"] += 1
+        return result
+
+    def stats(self) -> list:
+        """Number of logged events and size of the log by provider and event type."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT provider, event_type, COUNT(*) AS events, SUM(length) AS bytes "
+                "FROM webhook_events GROUP BY provider, event_type ORDER BY provider, event_type"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        """Write the queued events and close the log."""
+        if self._writer is not None:
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+        with self._lock:
+            if self._segment_file is not None:
+                self._segment_file.close()
+                self._segment_file = None
+            self._conn.close()
+
+    def _write_queued(self):
+        while True:
+            event = self._queue.get()
+            if event is None:
+                return
+            provider, payload, event_type, call_id, received_at = event
+            try:
+                self.append(provider, payload, event_type=event_type, call_id=call_id, received_at=received_at)
+            except Exception as e:
+                logger.warning("webhook_log_append_failed", provider=provider, call_id=call_id, error=str(e))
+
+    def _rotate(self):
+        if self._segment_file is not None:
+            self._segment_file.close()
+        self._sequence += 1
+        self._segment = f"segment-{int(time.time())}-{os.getpid()}-{self._sequence}.log"
+        self._segment_file = open(os.path.join(self.root, self._segment), "ab")
+
+    @staticmethod
+    def _decode(record: bytes) -> dict:
+        length, checksum = RECORD_HEADER.unpack_from(record)
+        body = record[RECORD_HEADER.size:RECORD_HEADER.size + length]
+        if len(body) != length or zlib.crc32(body) != checksum:
+            raise ValueError("Corrupted webhook log record")
+        return json.loads(zlib.decompress(body))
@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from src.base.call_state import CallStateStore
+from src.base.call_outcomes import CallOutcome, classify_ended_reason
+from src.base.leads_loader import CRMWriteBuffer
+from src.base.rate_limiter import get_rate_limiter, async_call_with_retry
+from src.base.sqlite_store import open_database
+from src.base.structured_logging import get_logger
+from src.base.transcript_store import TranscriptStore
+from src.prompts import CALL_ANALYSIS_PROMPT
+from src.tools.call_analysis import CallAnalysisOutput, analyze_call_transcript
+
+logger = get_logger(__name__)
+
+
+def analysis_version() -> str:
+    """Hash of the analysis prompt and output schema: re-scoring starts over when either changes."""
+    definition = CALL_ANALYSIS_PROMPT + json.dumps(CallAnalysisOutput.model_json_schema(), sort_keys=True)
+    return hashlib.sha1(definition.encode()).hexdigest()[:12]
+
+
+class CallReanalysisJob:
+    """
+    Re-scores past calls with the current analysis prompt and writes the results back to the CRM.
+
+    The most recent transcript of every lead is read from the transcript store and analyzed again,
+    a bounded number at a time, within the shared LLM request budget (`LLM_RATE_LIMIT`, rate-limited
+    requests are retried and slow the budget down). Results go through the CRM write-behind buffer,
+    which sends them with the batch endpoint of the CRM. Each processed call is checkpointed, so an
+    interrupted job resumes where it stopped; calls whose analysis failed are retried on the next run.
+    """
+
+    def __init__(
+        self,
+        lead_loader,
+        transcripts: TranscriptStore = None,
+        call_states: CallStateStore = None,
+        crm_writes: CRMWriteBuffer = None,
+        checkpoint_path: str = None,
+        job_id: str = None,
+        concurrency: int = 8,
+        page_size: int = 200,
+    ):
+        """
+        Args:
+            lead_loader (LeadLoaderBase): The CRM the leads are read from and the results written to.
+            transcripts (TranscriptStore): Store of the call transcripts.
+            call_states (CallStateStore): Used to skip the calls that were not answered.
+            crm_writes (CRMWriteBuffer): Write-behind buffer of the CRM updates.
+            checkpoint_path (str): SQLite file of the job progress (`REANALYSIS_CHECKPOINT_DB`,
+                default `data/reanalysis.db`).
+            job_id (str): Name of the job progress, defaults to the version of the analysis prompt and schema.
+            concurrency (int): Maximum number of analyses running at once.
+            page_size (int): Leads read from the CRM at once.
+        """
+        self.lead_loader = lead_loader
+        self.transcripts = transcripts or TranscriptStore()
+        self.call_states = call_states or CallStateStore()
+        self.crm_writes = crm_writes or CRMWriteBuffer(lead_loader)
+        self.job_id = job_id or analysis_version()
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.rate_limiter = get_rate_limiter("llm")
+
+        self._conn = open_database(checkpoint_path or os.getenv("REANALYSIS_CHECKPOINT_DB", "data/reanalysis.db"))
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS reanalyzed_calls (
+                job_id TEXT NOT NULL,
+                call_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (job_id, call_id)
+            );
+            """
+        )
+
+    def pending_calls(self, since: float = None) -> list:
+        """
+        List the calls left to re-score: the latest transcript of every lead, minus the calls already
+        processed by this job.
+
+        Args:
+            since (float): Only transcripts stored at or after this UNIX timestamp.
+        """
+        processed = {
+            row["call_id"] for row in self._conn.execute(
+                "SELECT call_id FROM reanalyzed_calls WHERE job_id = ? AND status != 'failed'", (self.job_id,)
+            )
+        }
+        return [call for call in self.transcripts.latest_per_lead(since) if call["call_id"] not in processed]
+
+    async def run(self, since: float = None, limit: int = None) -> dict:
+        """
+        Re-score the pending calls.
+
+        Args:
+            since (float): Only transcripts stored at or after this UNIX timestamp.
+            limit (int): Maximum number of calls processed by this run.
+
+        Returns:
+            dict: Number of calls "done", "skipped" (not answered, lead or transcript missing) and "failed".
+        """
+        calls = self.pending_calls(since)[:limit]
+        result = {"done": 0, "skipped": 0, "failed": 0}
+        started_at = time.time()
+        logger.info("reanalysis_started", job_id=self.job_id, calls=len(calls), concurrency=self.concurrency)
+        self.crm_writes.start()
+
+        # Bounded queue: leads are read from the CRM page by page, as the analyses progress
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [asyncio.create_task(self._worker(queue, result, len(calls), started_at)) for _ in range(self.concurrency)]
+        try:
+            for start in range(0, len(calls), self.page_size):
+                page = calls[start:start + self.page_size]
+                records = await asyncio.to_thread(
+                    self.lead_loader.fetch_records, lead_ids=[call["lead_id"] for call in page]
+                )
+                leads = {str(record["id"]): record for record in records}
+                for call in page:
+                    await queue.put((call, leads.get(str(call["lead_id"]))))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for worker in workers:
+                worker.cancel()
+        return result
+
+    def close(self):
+        """Send the buffered CRM updates and close the checkpoint."""
+        self.crm_writes.close()
+        self._conn.close()
+
+    async def _worker(self, queue: asyncio.Queue, result: dict, total: int, started_at: float):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            call, lead = item
+            try:
+                status, error = await self._reanalyze(call, lead)
+            except Exception as e:
+                status, error = "failed", str(e)
+            self._conn.execute(
+                "INSERT INTO reanalyzed_calls (job_id, call_id, status, error, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (job_id, call_id) DO UPDATE SET status = excluded.status, error = excluded.error, "
+                "updated_at = excluded.updated_at",
+                (self.job_id, call["call_id"], status, error, time.time()),
+            )
+            result[status] += 1
+            processed = sum(result.values())
+            if processed % 100 == 0 or processed == total:
+                rate = processed / max(time.time() - started_at, 1e-6)
+                logger.info("reanalysis_progress", job_id=self.job_id, processed=processed, total=total, rate=round(rate, 1), **result)
+
+    async def _reanalyze(self, call: dict, lead: dict):
+        """Analyze a call again and queue the CRM update. Returns (status, error)."""
+        if lead is None:
+            return "skipped", "Lead not found in the CRM"
+        attempt = self.call_states.get_by_call(call["call_id"])
+        ended_reason = attempt["details"].get("endedReason") if attempt else None
+        if ended_reason and classify_ended_reason(ended_reason) != CallOutcome.CONNECTED:
+            return "skipped", f"Call not answered ({ended_reason})"
+        transcript = await asyncio.to_thread(self.transcripts.read, call["digest"])
+        if not transcript:
+            return "skipped", "Transcript missing"
+
+        lead_name = f'{lead.get("First Name", "")} {lead.get("Last Name", "")}'
+        output = await async_call_with_retry(
+            self.rate_limiter, analyze_call_transcript, lead_name, transcript, retry_connection_errors=True
+        )
+
+        # Make sure to use the same field names as the post-call processing
+        self.crm_writes.update_record(
+            call["lead_id"],
+            {
+                "Call Summary": output.get("summary"),
+                "Interested": output.get("interested"),
+                "Comment": output.get("justification"),
+            },
+        )
+        return "done", None
@@ -0,0 +1,276 @@
+import os
+import time
+import uuid
+import socket
+import asyncio
+from src.base.call_state import CallState
+from src.base.call_outcomes import CallOutcome, RedialPolicy, classify_ended_reason
+from src.base.dial_scheduler import DialScheduler
+from src.base.lead_lease import LeadLeaseStore
+from src.base.metrics import REGISTRY, track_stage
+from src.base.structured_logging import get_logger
+from src.base.voice_agent_providers.provider_router import NoProviderAvailableError
+from src.base.voice_agent_providers.phone_number_pool import NoPhoneNumberAvailableError
+from src.base.voice_agent_providers.keyed_executor import run_handler
+from src.utils import Lead
+
+logger = get_logger(__name__)
+
+
+LEADS_DISPATCHED = REGISTRY.counter(
+    "leads_dispatched_total", "Leads claimed from the shared campaign queue by this worker, per outcome.", ("outcome",)
+)
+REDIALS_SCHEDULED = REGISTRY.counter(
+    "leads_redials_scheduled_total", "Leads queued again after an unsuccessful call, per call outcome.", ("outcome",)
+)
+
+
+class CampaignDispatcher:
+    """
+    Distributes the dials of a campaign across every worker of the host.
+
+    `/execute` enqueues the leads in a shared `LeadLeaseStore`, each scheduled at the next time it may
+    be called in its local calling window. Every worker (the one handling the request and the background
+    loop of the others) claims small batches of leads whose time has come and dials them. Each worker
+    dials at its own pace, so dialing throughput grows with the number of workers.
+    Leads whose call was not answered are queued again after a backoff delay (`RedialPolicy`).
+    """
+
+    def __init__(
+        self,
+        automation,
+        leases: LeadLeaseStore = None,
+        scheduler: DialScheduler = None,
+        worker_id: str = None,
+        batch_size: int = None,
+        lease_seconds: float = None,
+        dial_interval: float = None,
+        open_call_timeout: float = 2 * 3600,
+        line_retry_interval: float = 5,
+        redial_policy: RedialPolicy = None,
+    ):
+        """
+        Args:
+            automation (VapiAutomation): Automation used to dial the leads.
+            leases (LeadLeaseStore): Shared campaign queue.
+            scheduler (DialScheduler): Local calling windows of the leads.
+            worker_id (str): Unique ID of this worker, generated from the host name and PID by default.
+            batch_size (int): Leads claimed at once (`LEAD_CLAIM_BATCH_SIZE`, default 5).
+            lease_seconds (float): Lease duration, renewed before each dial (`LEAD_LEASE_SECONDS`, default 60).
+            dial_interval (float): Pause between two dials of this worker (`DIAL_INTERVAL_SECONDS`, default 1).
+            open_call_timeout (float): Age after which a call never reported as ended no longer blocks a new dial.
+            line_retry_interval (float): Seconds before retrying leads that found every caller number busy.
+            redial_policy (RedialPolicy): When to call again leads whose call was not answered.
+        """
+        self.automation = automation
+        self.leases = leases or LeadLeaseStore()
+        # An empty scheduler is falsy (`__len__`), test for None
+        self.scheduler = scheduler if scheduler is not None else DialScheduler()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.batch_size = batch_size or int(os.getenv("LEAD_CLAIM_BATCH_SIZE", "5"))
+        self.lease_seconds = lease_seconds or float(os.getenv("LEAD_LEASE_SECONDS", "60"))
+        self.dial_interval = (
+            dial_interval if dial_interval is not None else float(os.getenv("DIAL_INTERVAL_SECONDS", "1"))
+        )
+        self.open_call_timeout = open_call_timeout
+        self.line_retry_interval = line_retry_interval
+        self.redial_policy = redial_policy or RedialPolicy()
+        self._wake = asyncio.Event()
+
+    def enqueue(self, leads: list) -> dict:
+        """
+        Add leads to the shared campaign queue at their next allowed call time,
+        skipping leads with a call still in progress and leads already queued or leased.
+
+        Args:
+            leads (list[Lead]): Leads to call.
+
+        Returns:
+            dict: Next allowed call time (UNIX timestamp) of the leads actually queued, by lead ID.
+        """
+        now = time.time()
+        leads = [lead for lead in leads if not self.has_open_call(lead.id)]
+        not_before = {lead.id: self.scheduler.next_call_time(lead, now) for lead in leads}
+        queued = set(self.leases.enqueue([lead.model_dump() for lead in leads], not_before=not_before))
+        leads = [lead for lead in leads if lead.id in queued]
+        for lead in leads:
+            self.automation.call_states.record_queued(lead.id)
+        # Enrich the leads ahead of their call, their dial then only waits for what is not ready yet
+        self.automation.enrichment.prefetch(leads)
+        return {lead.id: not_before[lead.id] for lead in leads}
+
+    def has_open_call(self, lead_id) -> bool:
+        """
+        Check the call state store for a call of the lead that was created and has not finished yet.
+        """
+        attempt = self.automation.call_states.get_latest_for_lead(lead_id)
+        return bool(
+            attempt
+            and attempt["call_id"]
+            and attempt["state"] not in CallState.FINAL
+            and time.time() - attempt["updated_at"] < self.open_call_timeout
+        )
+
+    def unsuccessful_attempts(self, lead_id) -> int:
+        """
+        Count the calls of a lead that did not reach it since its last conversation.
+        """
+        attempts = 0
+        for attempt in reversed(self.automation.call_states.get_attempts_for_lead(lead_id)):
+            ended_reason = attempt["details"].get("endedReason")
+            if not attempt["call_id"] or not ended_reason:
+                continue
+            if classify_ended_reason(ended_reason) == CallOutcome.CONNECTED:
+                break
+            attempts += 1
+        return attempts
+
+    def schedule_redial(self, lead_id, ended_reason):
+        """
+        Queue a lead again after an unsuccessful call, at the next allowed call time after the backoff delay.
+        Call once the call ended and its reason was recorded in the call state store.
+
+        Args:
+            lead_id (str): The lead ID.
+            ended_reason (str): Why the call ended (Vapi `endedReason` or Retell `disconnection_reason`).
+
+        Returns:
+            float: UNIX timestamp of the redial, or None if the lead is not called again
+                (conversation took place, attempts exhausted, or lead not dialed through the campaign queue).
+        """
+        outcome = classify_ended_reason(ended_reason)
+        delay = self.redial_policy.next_delay(outcome, self.unsuccessful_attempts(lead_id))
+        if delay is None:
+            return None
+        lead_data = self.leases.get(lead_id)
+        if lead_data is None:
+            return None
+        redial_at = self.scheduler.next_call_time(Lead(**lead_data), time.time() + delay)
+        if not self.leases.requeue(lead_id, redial_at):
+            return None
+        self.automation.call_states.record_queued(lead_id)
+        REDIALS_SCHEDULED.inc(outcome=outcome)
+        return redial_at
+
+    async def dial_batch(self) -> dict:
+        """
+        Claim a batch of leads and dial them one after the other.
+
+        Returns:
+            dict: Lead IDs "dialed", "failed" (no provider available or call refused), "deferred" (calling window closed
+                or every caller number busy) and "skipped" (lease lost to another worker or call already placed).
+                Empty when nothing was claimed.
+        """
+        result = {"dialed": [], "failed": [], "deferred": [], "skipped": []}
+        limit = self.batch_size
+        pacer = self.automation.pacer
+        if pacer.enabled:
+            # Never claim more leads than the pacer lets us dial
+            limit = min(limit, pacer.available_slots(self.automation.call_states))
+            if limit == 0:
+                return result
+        claimed = self.leases.claim(self.worker_id, limit=limit, lease_seconds=self.lease_seconds)
+        for index, lead_data in enumerate(claimed):
+            lead = Lead(**lead_data)
+            # Never dial a lead whose lease expired and was claimed by another worker
+            if not self.leases.renew(lead.id, self.worker_id, self.lease_seconds):
+                result["skipped"].append(lead.id)
+                LEADS_DISPATCHED.inc(outcome="skipped")
+                continue
+            # A crashed worker may have placed the call before its lease expired
+            if self.has_open_call(lead.id):
+                self.leases.complete(lead.id, self.worker_id)
+                result["skipped"].append(lead.id)
+                LEADS_DISPATCHED.inc(outcome="skipped")
+                continue
+            # The calling window of the lead may have closed while it was queued
+            call_at = self.scheduler.next_call_time(lead)
+            if call_at > time.time():
+                self.leases.defer(lead.id, self.worker_id, call_at)
+                result["deferred"].append(lead.id)
+                LEADS_DISPATCHED.inc(outcome="deferred")
+                continue
+
+            # Augment the lead data (web research, linkedIn profile,...)
+            with track_stage("pre_call_processing"):
+                await run_handler(self.automation.pre_call_processing, lead)
+
+            logger.info("lead_dialing", lead_id=lead.id)
+            try:
+                await self.automation.dial_lead(lead)
+                result["dialed"].append(lead.id)
+                LEADS_DISPATCHED.inc(outcome="dialed")
+            except NoPhoneNumberAvailableError as e:
+                # Every line is busy: give this lead and the rest of the batch back until a number frees up
+                retry_at = e.retry_at or time.time() + self.line_retry_interval
+                for waiting in [lead_data] + claimed[index + 1:]:
+                    self.leases.defer(waiting["id"], self.worker_id, retry_at)
+                    result["deferred"].append(waiting["id"])
+                    LEADS_DISPATCHED.inc(outcome="deferred")
+                break
+            except NoProviderAvailableError as e:
+                # Keep going with the other leads, the failed ones are tracked in the call state store
+                logger.warning("lead_dial_failed", lead_id=lead.id, error=str(e))
+                result["failed"].append(lead.id)
+                LEADS_DISPATCHED.inc(outcome="failed")
+            except Exception:
+                # Call refused by the provider or unexpected error: give up on this lead, not on the batch
+                logger.exception("lead_dial_error", lead_id=lead.id)
+                result["failed"].append(lead.id)
+                LEADS_DISPATCHED.inc(outcome="failed")
+            finally:
+                self.leases.complete(lead.id, self.worker_id)
+
+            if index < len(claimed) - 1:
+                # Pause between dials without blocking the webhooks of ongoing calls
+                await asyncio.sleep(self.dial_interval)
+        return result
+
+    async def drain(self) -> dict:
+        """
+        Dial queued leads until the shared queue has no lead left to claim.
+
+        Returns:
+            dict: Lead IDs "dialed", "failed", "deferred" and "skipped" by this worker.
+        """
+        totals = {"dialed": [], "failed": [], "deferred": [], "skipped": []}
+        while True:
+            result = await self.dial_batch()
+            if not any(result.values()):
+                return totals
+            for key, lead_ids in result.items():
+                totals[key] += lead_ids
+            await asyncio.sleep(self.dial_interval)
+
+    async def run(self, poll_interval: float):
+        """
+        Background loop joining the campaigns enqueued through any worker,
+        dialing scheduled leads when their calling window opens and paced leads when calls end.
+
+        Args:
+            poll_interval (float): Maximum seconds between two polls of the queue.
+        """
+        while True:
+            try:
+                await self.drain()
+                next_at = self.leases.next_pending_at()
+            except Exception:
+                logger.exception("campaign_worker_error", worker_id=self.worker_id)
+                next_at = None
+            # Leads already claimable are held back by the pacer, check again shortly
+            delay = poll_interval if next_at is None else min(poll_interval, max(1.0, next_at - time.time()))
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def wake(self):
+        """Make the background loop poll the queue right away, e.g. after enqueuing leads."""
+        self._wake.set()
+
+    def shutdown(self):
+        """Give the leads still leased by this worker back to the queue."""
+        released = self.leases.release(self.worker_id)
+        if released:
+            logger.info("leases_released", worker_id=self.worker_id, leads=released)
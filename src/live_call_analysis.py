@@ -0,0 +1,212 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from src.base.metrics import track_stage
+from src.base.structured_logging import get_logger
+from src.tools.call_analysis import analyze_call_transcript, update_call_analysis
+
+logger = get_logger(__name__)
+
+
+def pending_lines(analyzed_text: str, lines: list):
+    """
+    Lines of a transcript not covered by the analysis of `analyzed_text`.
+
+    Args:
+        analyzed_text (str): Transcript text already analyzed, lines joined by newlines.
+        lines (list): Current transcript lines, in order.
+
+    Returns:
+        list: The lines to analyze, starting with the last analyzed line if it grew since
+            (a turn still being transcribed). None if the transcript does not extend the analyzed text.
+    """
+    text = "\n".join(lines)
+    if not text.startswith(analyzed_text):
+        return None
+    if not analyzed_text:
+        return list(lines)
+    covered = analyzed_text.count("\n") + 1
+    if len(text) > len(analyzed_text) and text[len(analyzed_text)] != "\n":
+        covered -= 1
+    return lines[covered:]
+
+
+class _LiveCall:
+    """Transcript and rolling analysis of one call in progress."""
+
+    def __init__(self, lead_name: str):
+        self.lead_name = lead_name
+        self.lines = []
+        # Transcript text covered by `analysis`
+        self.analyzed_text = ""
+        self.analysis = None
+        self.running = False
+        self.ended = False
+        self.closed = False
+        self.updated_at = time.monotonic()
+
+
+class LiveCallAnalyzer:
+    """
+    Analyzes calls while they are in progress, so the analysis is ready when they end.
+
+    Each provider sends the conversation so far from a single source (Vapi `conversation-update` messages,
+    Retell custom LLM updates, OpenAI Realtime transcriptions), folded into a rolling summary and interest
+    estimate of the call: once `min_new_lines` lines were said since the last analysis, the LLM gets that
+    analysis and the new lines only, in the background and at most one analysis at a time per call.
+    What was analyzed is tracked by its text, not by line count, so a conversation whose earlier lines
+    change is analyzed again from the start instead of skipping or repeating lines.
+    The hang-up triggers the analysis of the last lines right away, so by the time the post-call
+    processing asks for the result there is usually nothing left to analyze. Calls without live transcript
+    fall back to the analysis of the full transcript.
+    """
+
+    def __init__(self, min_new_lines: int = None, max_workers: int = None, wait_seconds: float = 30, idle_seconds: float = 3600):
+        """
+        Args:
+            min_new_lines (int): Transcript lines triggering a new analysis during the call
+                (`LIVE_ANALYSIS_MIN_NEW_LINES`, default 4).
+            max_workers (int): Analyses running at once over all calls (`LIVE_ANALYSIS_WORKERS`, default 8).
+            wait_seconds (float): Longest wait for the analysis in progress at the end of a call, the full
+                transcript is analyzed instead after that.
+            idle_seconds (float): Calls without transcript update for that long are forgotten.
+        """
+        self.min_new_lines = min_new_lines or int(os.getenv("LIVE_ANALYSIS_MIN_NEW_LINES", "4"))
+        self.wait_seconds = wait_seconds
+        self.idle_seconds = idle_seconds
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.getenv("LIVE_ANALYSIS_WORKERS", "8")),
+            thread_name_prefix="live-analysis",
+        )
+        self._calls = {}
+        self._condition = threading.Condition()
+
+    @property
+    def live_calls(self) -> int:
+        """Number of calls with a rolling analysis."""
+        return len(self._calls)
+
+    def update(self, call_id: str, lines: list, lead_name: str = ""):
+        """
+        Replace the transcript of a call with the full conversation so far, as sent by the provider.
+
+        Args:
+            call_id (str): ID of the call.
+            lines (list): Transcript lines of the call, in order.
+            lead_name (str): Name of the lead, for the analysis.
+        """
+        if not call_id:
+            return
+        with self._condition:
+            call = self._get(call_id, lead_name)
+            call.lines = [line.strip() for line in lines if line.strip()]
+            self._schedule(call_id, call)
+
+    def end(self, call_id: str):
+        """
+        Analyze the last lines of a call right away, once the call ended.
+
+        Args:
+            call_id (str): ID of the call.
+        """
+        with self._condition:
+            call = self._calls.get(call_id)
+            if call is not None:
+                call.ended = True
+                self._schedule(call_id, call)
+
+    def discard(self, call_id: str):
+        """
+        Forget the rolling analysis of a call, e.g. a call that reached a voicemail.
+
+        Args:
+            call_id (str): ID of the call.
+        """
+        with self._condition:
+            call = self._calls.pop(call_id, None)
+            if call is not None:
+                call.closed = True
+
+    def finish(self, call_id: str, lead_name: str, transcript: str) -> dict:
+        """
+        Complete the analysis of an ended call with the lines its rolling analysis does not cover yet.
+        Blocks until the analysis in progress, if any, is done.
+
+        Args:
+            call_id (str): ID of the call.
+            lead_name (str): Name of the lead.
+            transcript (str): Final transcript of the call, one line per utterance.
+
+        Returns:
+            dict: The analysis, with the "summary", "interested" and "justification" of the call.
+        """
+        with track_stage("finish_live_analysis"):
+            with self._condition:
+                call = self._calls.pop(call_id, None)
+                if call is not None:
+                    call.closed = True
+                    if not self._condition.wait_for(lambda: not call.running, timeout=self.wait_seconds):
+                        logger.warning("live_analysis_timeout", call_id=call_id)
+                        call = None
+            if call is None or call.analysis is None:
+                return analyze_call_transcript(lead_name, transcript)
+
+            # The final transcript is authoritative, the lines the live transcript missed are analyzed now
+            lines = [line.strip() for line in (transcript or "").splitlines() if line.strip()] or call.lines
+            pending = pending_lines(call.analyzed_text, lines)
+            if pending is None:
+                logger.info("live_analysis_mismatch", call_id=call_id)
+                return analyze_call_transcript(lead_name, transcript)
+            logger.info("live_analysis_finished", call_id=call_id, pending_lines=len(pending))
+            if not pending:
+                return call.analysis
+            return update_call_analysis(lead_name, call.analysis, "\n".join(pending))
+
+    def close(self):
+        """Stop the analyses in progress."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get(self, call_id: str, lead_name: str) -> _LiveCall:
+        call = self._calls.get(call_id)
+        if call is None:
+            self._forget_idle_calls()
+            call = self._calls[call_id] = _LiveCall(lead_name)
+        call.lead_name = call.lead_name or lead_name
+        call.updated_at = time.monotonic()
+        return call
+
+    def _forget_idle_calls(self):
+        # Calls whose post-call processing never ran (lost webhook, crash) would be kept forever
+        deadline = time.monotonic() - self.idle_seconds
+        for call_id in [call_id for call_id, call in self._calls.items() if call.updated_at < deadline]:
+            self._calls.pop(call_id).closed = True
+
+    def _schedule(self, call_id: str, call: _LiveCall):
+        """Start the next analysis of a call if it is due. Called with the condition held."""
+        if call.running or call.closed:
+            return
+        pending = pending_lines(call.analyzed_text, call.lines)
+        if pending is None:
+            # Earlier lines changed since they were analyzed, start over from the whole conversation
+            call.analysis, call.analyzed_text = None, ""
+            pending = call.lines
+        if pending and (len(pending) >= self.min_new_lines or call.ended):
+            call.running = True
+            self._executor.submit(self._analyze, call_id, call, call.analysis, pending, "\n".join(call.lines))
+
+    def _analyze(self, call_id: str, call: _LiveCall, previous: dict, new_lines: list, analyzed_text: str):
+        analysis = None
+        try:
+            analysis = update_call_analysis(call.lead_name, previous, "\n".join(new_lines))
+        except Exception as e:
+            # The lines are analyzed again with the next ones, or by the post-call processing
+            logger.warning("live_analysis_failed", call_id=call_id, error=str(e))
+        with self._condition:
+            call.running = False
+            if analysis is not None:
+                call.analysis = analysis
+                call.analyzed_text = analyzed_text
+                # Lines said during this analysis, or the last lines once the call ended
+                self._schedule(call_id, call)
+            self._condition.notify_all()
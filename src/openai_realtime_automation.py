@@ -0,0 +1,97 @@
+from src.base.call_state import CallState, map_provider_status
+from src.base.voice_agent_providers.openai import OpenAIRealtime
+from src.base.voice_agent_providers.openai.openai_realtime import UNANSWERED_STATUSES
+from src.prompts import VOICE_AGENT_PROMPT
+from src.tools.tool_definitions import TOOL_DEFINITIONS
+
+
+class OpenAIRealtimeAutomation(OpenAIRealtime):
+    def __init__(self, tools, post_call_handler, call_states, live_analysis=None):
+        """
+        OpenAI Realtime provider (over Twilio), running the same agent prompt and tools as the hosted providers.
+        Call outputs are mapped to the same format as `VapiAutomation.process_call_outputs`
+        so every provider shares the same post-call analysis and CRM update.
+
+        Args:
+            tools (dict): Tools accessible to the agent.
+            post_call_handler: Function invoked with the processed call outputs once the call ended.
+            call_states (CallStateStore): Store tracking the lifecycle of every call.
+            live_analysis (LiveCallAnalyzer): Analyzes the calls from their transcript during the call.
+        """
+        super().__init__(tools=tools, instructions=VOICE_AGENT_PROMPT, tool_definitions=TOOL_DEFINITIONS)
+        self.post_call_handler = post_call_handler
+        self.call_states = call_states
+        self.live_analysis = live_analysis
+
+    def accept_stream(self, call_id: str, variables: dict) -> bool:
+        """
+        Only bridge the media streams of calls placed by the app.
+        """
+        return self.call_states.get_by_call(call_id) is not None
+
+    def process_call_outputs(self, payload: dict) -> dict:
+        """
+        Map the outputs of a bridged call to the shared call outputs format.
+
+        Args:
+            payload (dict): Call SID, duration, ended reason, transcript and variables of the call.
+
+        Returns:
+            dict: Processed call outputs.
+        """
+        return {
+            "provider": "openai",
+            "call_id": payload["call_id"],
+            "status": payload["status"],
+            "duration": payload["duration"],
+            "cost": None,  # Billed by OpenAI and Twilio separately, not reported per call
+            "endedReason": payload["endedReason"],
+            "transcript": payload["transcript"],
+            "lead_info": payload["variables"],
+        }
+
+    def post_call_processing(self, call_outputs: dict, replay: bool = False):
+        """
+        Run the shared post-call analysis and CRM update.
+
+        Args:
+            call_outputs (dict): Processed call outputs.
+            replay (bool): The call outputs come from a replayed status callback.
+        """
+        self.post_call_handler(call_outputs, replay=replay)
+
+    def transcript_update_handler(self, call_id: str, variables: dict, transcript: str):
+        """
+        Feed the transcript of the call to its live analysis.
+        """
+        if self.live_analysis is not None:
+            lead_name = f'{variables.get("firstName", "")} {variables.get("lastName", "")}'.strip()
+            self.live_analysis.update(call_id, transcript.splitlines(), lead_name)
+
+    def status_update_handler(self, payload: dict, replay: bool = False):
+        """
+        Track the call lifecycle state from the Twilio status callbacks. Calls that never reached the
+        media stream (busy, no answer, ...) go through the post-call processing from here, answered calls
+        once their media stream ends.
+
+        Args:
+            payload (dict): The Twilio status callback parameters, with the "leadID" of the call.
+            replay (bool): The callback is replayed from the webhook event log.
+        """
+        status, call_id, lead_id = payload.get("CallStatus"), payload.get("CallSid"), payload.get("leadID")
+        state = map_provider_status("openai", status)
+        if not state or not call_id:
+            return
+        if state != CallState.ENDED:
+            self.call_states.advance(call_id, state, lead_id=lead_id, provider="openai")
+        elif status in UNANSWERED_STATUSES:
+            self.post_call_processing({
+                "provider": "openai",
+                "call_id": call_id,
+                "status": status,
+                "duration": int(payload.get("CallDuration") or 0) / 60,
+                "cost": None,
+                "endedReason": status,
+                "transcript": "",
+                "lead_info": {"leadID": lead_id},
+            }, replay=replay)
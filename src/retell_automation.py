@@ -0,0 +1,97 @@
+from src.base.call_state import map_provider_status
+from src.base.voice_agent_providers.retell_ai import RetellAI, RetellCustomLLM
+from src.prompts import VOICE_AGENT_PROMPT
+from src.tools.tool_definitions import TOOL_DEFINITIONS
+
+
+class RetellAutomation(RetellAI):
+    def __init__(self, tools, post_call_handler, call_states, live_analysis=None):
+        """
+        Retell AI provider used as a fallback when Vapi is unavailable.
+        Call outputs are mapped to the same format as `VapiAutomation.process_call_outputs`
+        so both providers share the same post-call analysis and CRM update.
+        Agents using the custom LLM websocket are answered by `custom_llm`, with the same
+        agent prompt and tools as the other providers.
+
+        Args:
+            tools (dict): Tools accessible to the agent.
+            post_call_handler: Function invoked with the processed call outputs once the call is analyzed.
+            call_states (CallStateStore): Store tracking the lifecycle of every call.
+            live_analysis (LiveCallAnalyzer): Analyzes the calls from the live transcript of the custom LLM websocket.
+        """
+        super().__init__(tools=tools)
+        self.post_call_handler = post_call_handler
+        self.call_states = call_states
+        self.live_analysis = live_analysis
+        self.custom_llm = RetellCustomLLM(
+            tools=tools,
+            instructions=VOICE_AGENT_PROMPT,
+            tool_definitions=TOOL_DEFINITIONS,
+            accept_call=lambda call_id: call_states.get_by_call(call_id) is not None,
+            transcript_handler=self.live_transcript_handler if live_analysis is not None else None,
+        )
+
+    def process_call_outputs(self, payload: dict) -> dict:
+        """
+        Process the call object sent by Retell and extract relevant details.
+
+        Args:
+            payload (dict): The `data` object of the Retell `call_analyzed` event.
+
+        Returns:
+            dict: Processed call outputs.
+        """
+        start, end = payload.get("start_timestamp"), payload.get("end_timestamp")
+        duration = (end - start) / 60000 if start and end else 0
+        cost = (payload.get("call_cost") or {}).get("combined_cost")
+        return {
+            "provider": "retell",
+            "call_id": payload["call_id"],
+            "status": payload.get("call_status"),
+            "duration": duration,
+            "cost": cost / 100 if cost is not None else None,  # Retell reports cents
+            "endedReason": payload.get("disconnection_reason"),
+            "transcript": payload.get("transcript", ""),
+            "lead_info": payload.get("retell_llm_dynamic_variables") or {},
+        }
+
+    def post_call_processing(self, call_outputs: dict, replay: bool = False):
+        """
+        Run the shared post-call analysis and CRM update.
+
+        Args:
+            call_outputs (dict): Processed call outputs.
+            replay (bool): The call outputs come from a replayed webhook.
+        """
+        self.post_call_handler(call_outputs, replay=replay)
+
+    def live_transcript_handler(self, call_id: str, transcript: list, variables: dict):
+        """
+        Feed the live transcript of the custom LLM websocket to the analysis of the call,
+        in the format of the transcript of the `call_analyzed` event.
+        """
+        # The last utterance may still be in progress, it is analyzed with the transcript of `call_ended`
+        lines = [
+            f"{'Agent' if utterance.get('role') == 'agent' else 'User'}: {utterance.get('content', '').strip()}"
+            for utterance in transcript[:-1]
+        ]
+        lead_name = f'{variables.get("firstName", "")} {variables.get("lastName", "")}'.strip()
+        self.live_analysis.update(call_id, lines, lead_name)
+
+    def _handle_retell_event(self, event, data, replay=False):
+        """
+        Track the call lifecycle state before handling the Retell event.
+        """
+        state = map_provider_status("retell", event)
+        call = data.get("data") or {}
+        if state and event != "call_analyzed" and call.get("call_id"):
+            lead_id = (call.get("retell_llm_dynamic_variables") or {}).get("leadID")
+            self.call_states.advance(call["call_id"], state, lead_id=lead_id, provider="retell")
+        if event == "call_ended" and self.live_analysis is not None and call.get("call_id"):
+            # The analysis of the last lines starts now instead of with the `call_analyzed` event
+            if call.get("transcript"):
+                variables = call.get("retell_llm_dynamic_variables") or {}
+                lead_name = f'{variables.get("firstName", "")} {variables.get("lastName", "")}'.strip()
+                self.live_analysis.update(call["call_id"], call["transcript"].splitlines(), lead_name)
+            self.live_analysis.end(call["call_id"])
+        super()._handle_retell_event(event, data, replay=replay)
@@ -1,15 +1,17 @@
 import os
 from datetime import datetime, timedelta
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
+
+# Google client libraries are imported on first use to keep the app startup fast
+_calendar_service = None
 
 def get_credentials():
     """
     Get/refresh Google Calendar API credentials
     """
+    from google.oauth2.credentials import Credentials
+    from google.auth.transport.requests import Request
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
     creds = None
     SCOPES = ["https://www.googleapis.com/auth/calendar.events"]
     if os.path.exists("token.json"):
@@ -26,13 +28,28 @@ def get_credentials():
             token.write(creds.to_json())
     return creds
 
+def get_calendar_service():
+    """
+    Build the Google Calendar client once, from the discovery document bundled with the library
+    """
+    global _calendar_service
+    from googleapiclient.discovery import build
+
+    creds = get_credentials()
+    if _calendar_service is None or not creds.valid:
+        _calendar_service = build(
+            "calendar", "v3", credentials=creds, static_discovery=True, cache_discovery=False
+        )
+    return _calendar_service
+
 def book_appointement(title, description, start):
     """
     Creates an event on Google Calendar
     """
+    from googleapiclient.errors import HttpError
+
     try:
-        creds = get_credentials()
-        service = build("calendar", "v3", credentials=creds)
+        service = get_calendar_service()
 
         # Convert the string to a datetime object
         event_datetime = datetime.fromisoformat(start)
@@ -1,7 +1,9 @@
+import json
 from typing import Optional
 from pydantic import BaseModel, Field
 from src.utils import invoke_llm
-from src.prompts import CALL_ANALYSIS_PROMPT
+from src.base.metrics import track_stage
+from src.prompts import CALL_ANALYSIS_PROMPT, LIVE_CALL_ANALYSIS_PROMPT
 
 
 class CallAnalysisOutput(BaseModel):
@@ -24,13 +26,30 @@ def analyze_call_transcript(lead_name, transcript):
         f"# Lead Name: {lead_name}\n"
         f"# Call Transcript:\n {transcript}"
     )
-    call_analysis = invoke_llm(
-        system_prompt=CALL_ANALYSIS_PROMPT, 
-        user_message=inputs,
-        response_format=CallAnalysisOutput,
-        json_output=True
-    )
+    with track_stage("analyze_call_transcript"):
+        call_analysis = invoke_llm(
+            system_prompt=CALL_ANALYSIS_PROMPT, 
+            user_message=inputs,
+            response_format=CallAnalysisOutput,
+            json_output=True
+        )
     
     return call_analysis
 
 
+def update_call_analysis(lead_name, analysis, new_transcript):
+    # Only the lines said since the previous analysis are sent, with that analysis
+    inputs = (
+        f"# Lead Name: {lead_name}\n"
+        f"# Analysis So Far:\n {json.dumps(analysis) if analysis else 'None, the call just started.'}\n"
+        f"# New Transcript Lines:\n {new_transcript}"
+    )
+    with track_stage("update_call_analysis"):
+        call_analysis = invoke_llm(
+            system_prompt=LIVE_CALL_ANALYSIS_PROMPT,
+            user_message=inputs,
+            response_format=CallAnalysisOutput,
+            json_output=True
+        )
+
+    return call_analysis
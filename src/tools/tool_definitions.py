@@ -0,0 +1,18 @@
+# Definitions of the tools for the providers running the model from the app (OpenAI Realtime, Retell custom LLM),
+# matching the Vapi tool created by scripts/create_or_update_tool.py
+TOOL_DEFINITIONS = [
+    {
+        "type": "function",
+        "name": "bookAppointment",
+        "description": "Books an appointment with the provided client details.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "Name": {"type": "string"},
+                "PhoneNumber": {"type": "string"},
+                "PreferredDateTime": {"type": "string"},
+            },
+            "required": ["Name", "PhoneNumber", "PreferredDateTime"],
+        },
+    },
+]
@@ -1,6 +1,5 @@
 import json
 from datetime import datetime
-from litellm import completion
 from pydantic import BaseModel, Field
 
 # Define the base information needed about the lead
@@ -11,6 +10,7 @@ class Lead(BaseModel):
     address: str = Field(..., description="The address of the lead")
     email: str = Field(..., description="The email address of the lead")
     phone: str = Field(..., description="The phone number of the lead")
+    enrichment: dict = Field(default_factory=dict, description="Data found about the lead before the call, by enricher")
 
 def get_current_date_time():
     return datetime.now().strftime("%Y-%m-%d %H:%M")
@@ -35,6 +35,9 @@ def invoke_llm(
     response_format=None, 
     json_output=False
 ):
+    # litellm is slow to import, load it on first use instead of at startup
+    from litellm import completion
+
     messages = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_message}
@@ -1,9 +1,23 @@
 import os
+from src.base.metrics import track_stage
+from src.base.structured_logging import get_logger
+from src.base.call_state import CallState, CallStateStore, map_provider_status
+from src.base.call_outcomes import CallOutcome, classify_ended_reason
 from src.base.voice_agent_providers.vapi.vapi_ai import VapiAI
+from src.base.voice_agent_providers.provider_router import ProviderRouter, ProviderRoute
+from src.base.voice_agent_providers.phone_number_pool import PhoneNumberPool, NoPhoneNumberAvailableError
+from src.base.rate_limiter import RATE_LIMIT_STATUSES, get_error_status_and_headers
+from src.base.dial_pacer import DialPacer
+from src.base.leads_loader import CRMWriteBuffer
+from src.base.transcript_store import TranscriptStore
+from src.base.webhook_event_log import WebhookEventLog
+from src.base.lead_enrichment import EnrichmentPipeline, create_enrichment_pipeline_from_env
+from src.live_call_analysis import LiveCallAnalyzer
 from src.tools.calendar_tool import book_appointement
-from src.tools.call_analysis import analyze_call_transcript
 from src.utils import Lead, get_current_date_time, calculate_duration_in_minutes
 
+logger = get_logger(__name__)
+
 
 # Tools used directly by the AI VOICE agent
 # For this case, the agent needs only a Book appointement tool
@@ -12,18 +26,70 @@ TOOLS = {
 }
 
 class VapiAutomation(VapiAI):
-    def __init__(self, lead_loader):
+    def __init__(
+        self,
+        lead_loader,
+        call_states: CallStateStore = None,
+        phone_numbers: PhoneNumberPool = None,
+        pacer: DialPacer = None,
+        crm_writes: CRMWriteBuffer = None,
+        transcripts: TranscriptStore = None,
+        event_log: WebhookEventLog = None,
+        enrichment: EnrichmentPipeline = None,
+        live_analysis: LiveCallAnalyzer = None,
+    ):
         """
         Initialize the class VapiAutomation class.
 
         Args:
             lead_loader: A lead loader instance for managing lead data.
+            call_states (CallStateStore): Store tracking the lifecycle of every call.
+            phone_numbers (PhoneNumberPool): Vapi caller numbers the calls are spread over.
+            pacer (DialPacer): Sets the dial concurrency from the observed call outcomes.
+            crm_writes (CRMWriteBuffer): Write-behind buffer of the CRM updates.
+            transcripts (TranscriptStore): Local store of the call transcripts.
+            event_log (WebhookEventLog): Append-only log of the raw webhook payloads, for replays.
+            enrichment (EnrichmentPipeline): Enrichers run on the leads before their call.
+            live_analysis (LiveCallAnalyzer): Analyzes the calls from their live transcript, for every provider.
         """
         super().__init__(tools=TOOLS)  # Initialize the base class
         self.lead_loader = lead_loader 
+        self.call_states = call_states or CallStateStore()
+        self.phone_numbers = phone_numbers or PhoneNumberPool()
+        self.pacer = pacer or DialPacer()
+        # CRM updates are written in the background, calls are marked as synced once their update is flushed
+        self.crm_writes = crm_writes or CRMWriteBuffer(lead_loader)
+        self.crm_writes.on_flushed = self.crm_updates_flushed
+        self.crm_writes.on_failed = self.crm_updates_failed
+        self.transcripts = transcripts or TranscriptStore()
+        self.event_log = event_log or WebhookEventLog()
+        self.enrichment = enrichment or create_enrichment_pipeline_from_env()
+        self.live_analysis = live_analysis or LiveCallAnalyzer()
+        # Campaign dispatcher queuing unanswered leads again, set by the app
+        self.dispatcher = None
+
+        # Providers are tried in the `VOICE_PROVIDERS` order (default: Vapi, then Retell and OpenAI Realtime
+        # when configured), the next one takes over new dials when the previous one is unavailable
+        routes = {"vapi": ProviderRoute("vapi", self, self.get_call_input_params)}
+        self.retell = None
+        if os.getenv("RETELL_API_KEY") and os.getenv("RETELL_AGENT_ID"):
+            # Imported only when configured, to avoid loading the Retell SDK otherwise
+            from src.retell_automation import RetellAutomation
+            self.retell = RetellAutomation(TOOLS, self.post_call_processing, self.call_states, self.live_analysis)
+            self.retell.event_log = self.event_log
+            routes["retell"] = ProviderRoute("retell", self.retell, self.get_retell_call_input_params)
+        self.openai = None
+        if os.getenv("TWILIO_ACCOUNT_SID") and os.getenv("TWILIO_AUTH_TOKEN") and os.getenv("TWILIO_PHONE_NUMBER"):
+            from src.openai_realtime_automation import OpenAIRealtimeAutomation
+            self.openai = OpenAIRealtimeAutomation(TOOLS, self.post_call_processing, self.call_states, self.live_analysis)
+            self.openai.event_log = self.event_log
+            routes["openai"] = ProviderRoute("openai", self.openai, self.get_openai_call_input_params)
+        order = [name.strip() for name in os.getenv("VOICE_PROVIDERS", "vapi,retell,openai").split(",")]
+        self.provider_router = ProviderRouter([routes[name] for name in order if name in routes])
         
     def load_leads(self, lead_ids):
-        raw_leads = self.lead_loader.fetch_records(lead_ids=lead_ids)
+        with track_stage("load_leads", loader=self.lead_loader.name):
+            raw_leads = self.lead_loader.fetch_records(lead_ids=lead_ids)
         if not raw_leads:
             return []
         
@@ -39,12 +105,93 @@ class VapiAutomation(VapiAI):
             )
             for lead in raw_leads
         ]
-        print(f"Loaded {len(leads)} leads\n: {leads}")
+        logger.info("leads_loaded", loader=self.lead_loader.name, count=len(leads))
         
         return leads
 
-    def pre_call_processing(self, payload):
-        pass
+    async def pre_call_processing(self, lead: Lead):
+        """
+        Augment the lead data (web research, LinkedIn profile, ...) with the enrichers of the enrichment
+        pipeline, usually started when the lead was queued. Waits at most `ENRICHMENT_BUDGET_SECONDS`,
+        the lead is called with the data found by then.
+
+        Args:
+            lead (Lead): The lead about to be called.
+        """
+        await self.enrichment.enrich(lead)
+
+    async def dial_lead(self, lead: Lead):
+        """
+        Initiate the call through the first healthy voice provider and track its lifecycle state.
+        Vapi calls go out from the least-loaded number of the phone number pool.
+
+        Args:
+            lead (Lead): The lead to call.
+        
+        Returns:
+            tuple: (provider name, call created by the provider)
+
+        Raises:
+            NoPhoneNumberAvailableError: Every Vapi caller number is busy or cooling down and no other provider
+                placed the call, the lead can be retried later.
+        """
+        self.call_states.record_dialing(lead.id)
+        try:
+            provider, response = await self.provider_router.make_call(lead)
+        except NoPhoneNumberAvailableError:
+            # Not dialed, the attempt stays open until the lead is dialed again once a line frees up
+            raise
+        except Exception as e:
+            self.call_states.record_failed(lead_id=lead.id, reason=str(e))
+            raise
+
+        if provider != "vapi":
+            call_id, status = getattr(response, "call_id", None), getattr(response, "call_status", None)
+        else:
+            call_id, status = getattr(response, "id", None), getattr(response, "status", None)
+        self.call_states.record_call_created(lead.id, call_id, provider, status)
+        return provider, response
+
+    async def make_call(self, request: dict):
+        """
+        Create a Vapi call from the least-loaded number of the phone number pool (Vapi route of the provider router).
+        The other providers place their calls from their own number and never reserve one.
+
+        Args:
+            request (dict): The payload of the Vapi call, its `phone_number_id` is replaced by the reserved number.
+
+        Raises:
+            NoPhoneNumberAvailableError: Every caller number is busy or cooling down.
+        """
+        number_id, reservation_id = self.phone_numbers.acquire()
+        try:
+            response = await super().make_call({**request, "phone_number_id": number_id})
+        except BaseException as e:
+            # A call refused by Vapi counts against the number, a timeout or a rate limit does not
+            status, _ = get_error_status_and_headers(e)
+            rejected = status is not None and 400 <= status < 500 and status not in RATE_LIMIT_STATUSES
+            self.phone_numbers.cancel(reservation_id, failed=rejected)
+            raise
+        self.phone_numbers.assign(reservation_id, getattr(response, "id", None))
+        return response
+
+    def get_call_variables(self, lead_data: Lead) -> dict:
+        """
+        Dynamic variables injected in the voice agent prompt, shared by all providers.
+
+        Args:
+            lead_data (Lead): The lead to call.
+        """
+        return {
+            "leadID": lead_data.id,
+            "firstName": lead_data.first_name,
+            "lastName": lead_data.last_name,
+            "email": lead_data.email,
+            "address": lead_data.address,
+            "date": get_current_date_time(),
+            # Results of the enrichers by enricher name, e.g. {{enrichment.email_domain.company_domain}}
+            "enrichment": lead_data.enrichment,
+        }
        
     def get_call_input_params(self, lead_data: dict) -> dict:
         """
@@ -63,17 +210,47 @@ class VapiAutomation(VapiAI):
                 "number": lead_data.phone,
             },
             "assistant_overrides": {
-                "variable_values": {
-                    "leadID": lead_data.id,
-                    "firstName": lead_data.first_name,
-                    "lastName": lead_data.last_name,
-                    "email": lead_data.email,
-                    "address": lead_data.address,
-                    "date": get_current_date_time()
-                }
+                "variable_values": self.get_call_variables(lead_data)
             }
         }
 
+    def get_retell_call_input_params(self, lead_data: Lead) -> dict:
+        """
+        Build the payload required to initiate the same call via Retell.
+
+        Args:
+            lead_data (Lead): Lead data containing phone number and other details.
+        
+        Returns:
+            dict: A formatted payload to pass to the Retell create phone call API.
+        """
+        return {
+            "from_number": os.getenv("RETELL_AI_PHONE_NUMBER"),
+            "to_number": lead_data.phone,
+            "override_agent_id": os.getenv("RETELL_AGENT_ID"),
+            # Retell only accepts string values
+            "retell_llm_dynamic_variables": {
+                key: str(value) for key, value in self.get_call_variables(lead_data).items()
+            },
+            "metadata": {"leadID": lead_data.id},
+        }
+
+    def get_openai_call_input_params(self, lead_data: Lead) -> dict:
+        """
+        Build the payload required to initiate the same call via Twilio and the OpenAI Realtime API.
+
+        Args:
+            lead_data (Lead): Lead data containing phone number and other details.
+        
+        Returns:
+            dict: A formatted payload to pass to `OpenAIRealtime.make_call`.
+        """
+        return {
+            "to": lead_data.phone,
+            "from": os.getenv("TWILIO_PHONE_NUMBER"),
+            "variables": self.get_call_variables(lead_data),
+        }
+
     def process_call_outputs(self, response: dict) -> dict:
         """
         Process the response from a Vapi call and extract relevant details.
@@ -85,6 +262,7 @@ class VapiAutomation(VapiAI):
             dict: Processed call outputs.
         """
         return {
+            "provider": "vapi",
             "call_id": response["call"]["id"],
             "status": response["call"]["status"],
             "duration": response["durationMinutes"],
@@ -94,44 +272,144 @@ class VapiAutomation(VapiAI):
             "lead_info": response["call"]["assistantOverrides"]["variableValues"]
         }
 
-    def evaluate_call_and_update_crm(self, call_outputs: dict) -> dict:
+    def evaluate_call_and_update_crm(self, call_outputs: dict, replay: bool = False) -> dict:
         """
-        Perform post-call analysis and update the CRM with the results.
+        Perform post-call analysis and queue the CRM update with the results.
 
         Args:
             call_outputs (dict): Processed call outputs.
+            replay (bool): The call outputs come from a replayed webhook. No redial is scheduled,
+                the lead was already requeued (or given up on) when the webhook was first received.
         
         Returns:
             dict: Updated lead information.
         """
-        # Transcript analysis
-        lead_name = f'{call_outputs["lead_info"]["firstName"]} {call_outputs["lead_info"]["lastName"]}'
-        output = analyze_call_transcript(lead_name, call_outputs['transcript'])
+        lead_id = call_outputs["lead_info"]["leadID"]
+        if classify_ended_reason(call_outputs["endedReason"]) == CallOutcome.CONNECTED:
+            # Transcript analysis, mostly done during the call from its live transcript
+            lead_name = f'{call_outputs["lead_info"]["firstName"]} {call_outputs["lead_info"]["lastName"]}'
+            output = self.live_analysis.finish(call_outputs["call_id"], lead_name, call_outputs['transcript'])
+            status = "CONTACTED"
+        else:
+            # No conversation to analyze (no answer, busy, voicemail, failed): call the lead again later if allowed
+            self.live_analysis.discard(call_outputs["call_id"])
+            output = {}
+            if replay:
+                # Keep the status written when the webhook was first received
+                status = None
+            else:
+                redial_at = self.dispatcher.schedule_redial(lead_id, call_outputs["endedReason"]) if self.dispatcher else None
+                status = "REDIAL" if redial_at else "UNREACHABLE"
+
+        # The CRM only gets a reference to the transcript, kept in the local transcript store
+        if call_outputs["transcript"]:
+            self.transcripts.put(call_outputs["call_id"], lead_id, call_outputs["transcript"])
 
         # Update CRM, Make sure to use the correct field names
         updates = {
-            "Status": "CONTACTED",
+            "Status": status,
             "Call ID": call_outputs["call_id"],
             "Call Status": call_outputs["status"],
             "Duration": call_outputs["duration"],
             "Cost": call_outputs["cost"],
             "End Reason": call_outputs["endedReason"],
-            "Transcript": call_outputs["transcript"],
+            "Transcript": self.transcripts.reference(call_outputs["call_id"]) if call_outputs["transcript"] else None,
             "Call Summary": output.get("summary"),
             "Interested": output.get("interested"),
             "Comment": output.get("justification")
         }
+        if status is None:
+            del updates["Status"]
+
+        self.call_states.advance(call_outputs["call_id"], CallState.ANALYZED)
 
-        self.lead_loader.update_record(call_outputs["lead_info"]["leadID"], updates)
+        self.crm_writes.update_record(lead_id, updates, call_id=call_outputs["call_id"])
 
         return updates
+
+    def crm_updates_flushed(self, call_ids):
+        """
+        Mark the calls whose CRM update was written by the write-behind buffer as synced.
+        """
+        for call_id in call_ids:
+            self.call_states.advance(call_id, CallState.CRM_SYNCED)
+
+    def crm_updates_failed(self, call_ids, error):
+        """
+        Mark the calls whose CRM update was given up on by the write-behind buffer as failed.
+        """
+        for call_id in call_ids:
+            self.call_states.record_failed(call_id=call_id, reason=f"CRM update failed: {error}")
+
+    async def status_update_handler(self, payload):
+        """
+        Track call status updates sent by Vapi during the call.
+
+        Args:
+            payload (dict): The status-update message from Vapi.
+        """
+        state = map_provider_status("vapi", payload.get("status"))
+        call = payload.get("call") or {}
+        if state and call.get("id"):
+            lead_info = (call.get("assistantOverrides") or {}).get("variableValues") or {}
+            self.call_states.advance(call["id"], state, lead_id=lead_info.get("leadID"), provider="vapi")
+            if state == CallState.ENDED:
+                # Free the caller number right away, the end-of-call report comes later
+                self.phone_numbers.release_call(call["id"], payload.get("endedReason"))
+                # The analysis of the last lines starts now instead of with the end-of-call report
+                self.live_analysis.end(call["id"])
+
+    async def conversation_update_handler(self, payload):
+        """
+        Replace the live transcript of the call with the conversation sent by Vapi after every turn,
+        the only source of its live analysis.
+
+        Args:
+            payload (dict): The conversation-update message from Vapi.
+        """
+        speakers = {"bot": "AI", "assistant": "AI", "user": "User"}
+        lines = [
+            f"{speakers[message['role']]}: {(message.get('message') or message.get('content') or '').strip()}"
+            for message in payload.get("messages") or []
+            if message.get("role") in speakers
+        ]
+        call_id, lead_name = self._live_call(payload)
+        self.live_analysis.update(call_id, lines, lead_name)
+
+    def _live_call(self, payload: dict) -> tuple:
+        """Call ID and lead name of a Vapi message."""
+        call = payload.get("call") or {}
+        lead_info = (call.get("assistantOverrides") or {}).get("variableValues") or {}
+        return call.get("id"), f'{lead_info.get("firstName", "")} {lead_info.get("lastName", "")}'.strip()
     
-    def post_call_processing(self, call_outputs):
+    def post_call_processing(self, call_outputs, replay=False):
         """
         Post call analysis function invoked by the base VAPIAI class
-        upon receiving the end call event for Vapi
+        upon receiving the end call event for Vapi (the call analyzed event for Retell,
+        the end of the media stream or an unanswered status for OpenAI Realtime)
 
         Args:
-            call_outputs (dict): Processed call outputs from the Vapi.
+            call_outputs (dict): Processed call outputs from Vapi, Retell or OpenAI Realtime.
+            replay (bool): The call outputs come from a webhook replayed from the webhook event log.
+                The call is analyzed and the CRM updated again, without recording its outcome
+                in the pacer or redialing the lead a second time.
         """
-        self.evaluate_call_and_update_crm(call_outputs)
+        self.phone_numbers.release_call(call_outputs["call_id"], call_outputs["endedReason"])
+        if not replay:
+            self.pacer.record_call(call_outputs)
+        self.call_states.advance(
+            call_outputs["call_id"],
+            CallState.ENDED,
+            lead_id=call_outputs["lead_info"].get("leadID"),
+            provider=call_outputs.get("provider"),
+            details={
+                "endedReason": call_outputs["endedReason"],
+                "duration": call_outputs["duration"],
+                "cost": call_outputs["cost"],
+            },
+        )
+        try:
+            self.evaluate_call_and_update_crm(call_outputs, replay=replay)
+        except Exception as e:
+            self.call_states.record_failed(call_id=call_outputs["call_id"], reason=str(e))
+            raise
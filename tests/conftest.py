@@ -0,0 +1,61 @@
+import pytest
+from src.base.call_state import CallStateStore
+from src.base.dial_pacer import DialPacer
+from src.base.leads_loader import CRMWriteBuffer
+from src.base.leads_loader.lead_loader_base import LeadLoaderBase
+from src.base.lead_lease import LeadLeaseStore
+from src.base.lead_enrichment import EnrichmentPipeline
+from src.base.dial_scheduler import CallWindow, DialScheduler
+from src.base.transcript_store import TranscriptStore
+from src.base.webhook_event_log import WebhookEventLog
+from src.base.voice_agent_providers.phone_number_pool import PhoneNumberPool
+from src.live_call_analysis import LiveCallAnalyzer
+from src.campaign_dispatcher import CampaignDispatcher
+from src.vapi_automation import VapiAutomation
+
+
+class MemoryLeadLoader(LeadLoaderBase):
+    """Lead loader keeping the records in memory, with the updates written to them in order."""
+
+    name = "memory"
+
+    def __init__(self, records=None):
+        self.records = {record["id"]: dict(record) for record in records or []}
+        self.updates = []
+
+    def fetch_records(self, lead_ids=None, status="NEW"):
+        return [record for lead_id, record in self.records.items() if lead_ids is None or lead_id in lead_ids]
+
+    def update_record(self, lead_id, updates):
+        self.updates.append((lead_id, updates))
+        self.records.setdefault(lead_id, {"id": lead_id}).update(updates)
+        return self.records[lead_id]
+
+
+@pytest.fixture
+def automation(tmp_path, monkeypatch):
+    """Vapi automation with throwaway stores and no fallback provider."""
+    for name in ("RETELL_API_KEY", "TWILIO_ACCOUNT_SID", "TRANSCRIPT_LINK_SECRET", "LEAD_ENRICHERS"):
+        monkeypatch.delenv(name, raising=False)
+    lead_loader = MemoryLeadLoader()
+    automation = VapiAutomation(
+        lead_loader,
+        call_states=CallStateStore(":memory:"),
+        phone_numbers=PhoneNumberPool(["phone-1", "phone-2"], ":memory:", min_interval=0),
+        pacer=DialPacer(target_live_calls=0),
+        crm_writes=CRMWriteBuffer(lead_loader, ":memory:", flush_interval=0.01),
+        transcripts=TranscriptStore(str(tmp_path / "transcripts")),
+        event_log=WebhookEventLog(str(tmp_path / "webhook_log")),
+        enrichment=EnrichmentPipeline([]),
+        live_analysis=LiveCallAnalyzer(),
+    )
+    automation.dispatcher = CampaignDispatcher(
+        automation,
+        leases=LeadLeaseStore(":memory:"),
+        scheduler=DialScheduler(CallWindow("0-24", "mon-sun")),
+        worker_id="worker-1",
+        dial_interval=0,
+    )
+    yield automation
+    automation.crm_writes.close()
+    automation.event_log.close()
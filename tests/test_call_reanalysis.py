@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from conftest import MemoryLeadLoader
+from src import call_reanalysis
+from src.base.call_state import CallState, CallStateStore
+from src.base.leads_loader import CRMWriteBuffer
+from src.base.transcript_store import TranscriptStore
+from src.call_reanalysis import CallReanalysisJob
+
+
+@pytest.fixture
+def analyzed(monkeypatch):
+    """Lead names analyzed by the job, the transcripts containing "fail" raising an error."""
+    calls = []
+
+    def analyze_call_transcript(lead_name, transcript):
+        calls.append(lead_name)
+        if "fail" in transcript:
+            raise ValueError("Invalid model output")
+        return {"summary": f"Summary of {transcript}", "interested": True, "justification": "Asked for a demo"}
+
+    monkeypatch.setattr(call_reanalysis, "analyze_call_transcript", analyze_call_transcript)
+    return calls
+
+
+def make_job(tmp_path, lead_loader, **kwargs):
+    return CallReanalysisJob(
+        lead_loader,
+        transcripts=TranscriptStore(str(tmp_path / "transcripts")),
+        call_states=CallStateStore(str(tmp_path / "calls.db")),
+        crm_writes=CRMWriteBuffer(lead_loader, ":memory:", flush_interval=0.01),
+        checkpoint_path=str(tmp_path / "reanalysis.db"),
+        **kwargs,
+    )
+
+
+def add_call(job, lead_id, call_id, transcript, ended_reason="customer-ended-call"):
+    job.transcripts.put(call_id, lead_id, transcript)
+    job.call_states.record_call_created(lead_id, call_id, "vapi")
+    job.call_states.advance(call_id, CallState.ENDED, details={"endedReason": ended_reason})
+
+
+def leads(*lead_ids):
+    return [{"id": lead_id, "First Name": "Ada", "Last Name": lead_id} for lead_id in lead_ids]
+
+
+def test_calls_are_checkpointed_and_failed_ones_retried(tmp_path, analyzed):
+    lead_loader = MemoryLeadLoader(leads("lead-1", "lead-2", "lead-3"))
+    job = make_job(tmp_path, lead_loader, job_id="v1", concurrency=2)
+    add_call(job, "lead-1", "call-1", "AI: Hi")
+    add_call(job, "lead-2", "call-2", "AI: fail")
+    add_call(job, "lead-3", "call-3", "AI: Leave a message", ended_reason="voicemail")
+    add_call(job, "lead-4", "call-4", "AI: Hello")
+
+    assert asyncio.run(job.run()) == {"done": 1, "skipped": 2, "failed": 1}
+    assert sorted(analyzed) == ["Ada lead-1", "Ada lead-2"]
+    # Only the failed call is left
+    assert [call["call_id"] for call in job.pending_calls()] == ["call-2"]
+    job.close()
+    assert lead_loader.updates == [
+        ("lead-1", {"Call Summary": "Summary of AI: Hi", "Interested": True, "Comment": "Asked for a demo"}),
+    ]
+
+    job = make_job(tmp_path, lead_loader, job_id="v1")
+    assert asyncio.run(job.run()) == {"done": 0, "skipped": 0, "failed": 1}
+    assert analyzed[2:] == ["Ada lead-2"]
+    job.close()
+
+
+def test_new_job_rescores_every_call(tmp_path, analyzed):
+    lead_loader = MemoryLeadLoader(leads("lead-1"))
+    job = make_job(tmp_path, lead_loader, job_id="v1")
+    add_call(job, "lead-1", "call-1", "AI: Hi")
+    asyncio.run(job.run())
+    job.close()
+
+    job = make_job(tmp_path, lead_loader, job_id="v2")
+    assert [call["call_id"] for call in job.pending_calls()] == ["call-1"]
+    job.close()
+
+
+def test_only_the_latest_call_of_a_lead_is_rescored(tmp_path, analyzed):
+    lead_loader = MemoryLeadLoader(leads("lead-1"))
+    job = make_job(tmp_path, lead_loader, job_id="v1")
+    add_call(job, "lead-1", "call-1", "AI: Hi")
+    add_call(job, "lead-1", "call-2", "AI: Hi again")
+    assert [call["call_id"] for call in job.pending_calls()] == ["call-2"]
+    assert asyncio.run(job.run(limit=1)) == {"done": 1, "skipped": 0, "failed": 0}
+    job.close()
+
+
+def test_analysis_version_is_stable():
+    assert call_reanalysis.analysis_version() == call_reanalysis.analysis_version()
+    assert len(call_reanalysis.analysis_version()) == 12
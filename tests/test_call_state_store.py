@@ -0,0 +1,80 @@
+from src.base.call_state import CallState, CallStateStore, map_provider_status
+
+
+def make_store():
+    return CallStateStore(":memory:")
+
+
+def test_call_moves_through_its_lifecycle():
+    store = make_store()
+    store.record_queued("lead-1")
+    store.record_dialing("lead-1", provider="vapi")
+    store.record_call_created("lead-1", "call-1", "vapi", status="queued")
+    for state in (CallState.IN_PROGRESS, CallState.ENDED, CallState.ANALYZED, CallState.CRM_SYNCED):
+        store.advance("call-1", state)
+
+    attempts = store.get_attempts_for_lead("lead-1")
+    assert len(attempts) == 1
+    assert attempts[0]["call_id"] == "call-1" and attempts[0]["state"] == CallState.CRM_SYNCED
+
+
+def test_out_of_order_events_never_move_a_call_backwards():
+    store = make_store()
+    store.record_call_created("lead-1", "call-1", "vapi")
+    store.advance("call-1", CallState.ENDED, details={"endedReason": "customer-ended-call"})
+    attempt = store.advance("call-1", CallState.IN_PROGRESS)
+    assert attempt["state"] == CallState.ENDED
+    assert attempt["details"] == {"endedReason": "customer-ended-call"}
+
+
+def test_final_states_are_kept():
+    store = make_store()
+    store.record_call_created("lead-1", "call-1", "vapi")
+    store.record_failed(call_id="call-1", reason="rejected")
+    assert store.advance("call-1", CallState.ENDED)["state"] == CallState.FAILED
+    assert store.get_by_call("call-1")["details"]["failure_reason"] == "rejected"
+
+
+def test_record_queued_reuses_the_pending_attempt():
+    store = make_store()
+    first = store.record_queued("lead-1")
+    assert store.record_queued("lead-1")["id"] == first["id"]
+    store.record_call_created("lead-1", "call-1", "vapi")
+    assert store.record_queued("lead-1")["id"] != first["id"]
+
+
+def test_webhook_received_before_the_call_is_created():
+    # Vapi may send the first status update before `make_call` returns the call ID
+    store = make_store()
+    store.record_queued("lead-1")
+    store.record_dialing("lead-1", provider="vapi")
+    store.advance("call-1", CallState.IN_PROGRESS, lead_id="lead-1", provider="vapi")
+
+    attempt = store.record_call_created("lead-1", "call-1", "vapi", status="queued")
+
+    assert attempt["state"] == CallState.IN_PROGRESS
+    assert [(a["call_id"], a["state"]) for a in store.get_attempts_for_lead("lead-1")] == [("call-1", CallState.IN_PROGRESS)]
+
+
+def test_unknown_call_without_lead_is_ignored():
+    store = make_store()
+    assert store.advance("call-1", CallState.ENDED) is None
+    assert store.get_by_call("call-1") is None
+
+
+def test_counts_by_state():
+    store = make_store()
+    store.record_queued("lead-1")
+    store.record_call_created("lead-2", "call-2", "retell", status="registered")
+    store.record_call_created("lead-3", "call-3", "vapi")
+    store.advance("call-3", CallState.ENDED)
+
+    counts = store.counts()
+    assert counts[CallState.QUEUED] == 1 and counts[CallState.DIALING] == 1 and counts[CallState.ENDED] == 1
+    assert store.counts(states=[CallState.ENDED]) == {**{state: 0 for state in counts}, CallState.ENDED: 1}
+
+
+def test_map_provider_status():
+    assert map_provider_status("vapi", "in-progress") == CallState.IN_PROGRESS
+    assert map_provider_status("openai", "no-answer") == CallState.ENDED
+    assert map_provider_status("retell", "unknown") is None
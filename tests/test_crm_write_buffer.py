@@ -0,0 +1,116 @@
+import time
+from conftest import MemoryLeadLoader
+from src.base.leads_loader import CRMWriteBuffer
+
+
+class BatchLeadLoader(MemoryLeadLoader):
+    """Memory loader with a batch endpoint, failing the updates of the leads in `failing`."""
+
+    max_batch_size = 10
+
+    def __init__(self, records=None):
+        super().__init__(records)
+        self.batches = []
+        self.failing = set()
+        self.during_batch = None
+
+    def update_records_batch(self, leads):
+        self.batches.append([lead["id"] for lead in leads])
+        if self.during_batch:
+            during_batch, self.during_batch = self.during_batch, None
+            during_batch()
+        if any(lead["id"] in self.failing for lead in leads):
+            raise RuntimeError("HTTP 422")
+        return super().update_records_batch(leads)
+
+    def update_record(self, lead_id, updates):
+        if lead_id in self.failing:
+            raise RuntimeError("HTTP 422")
+        return super().update_record(lead_id, updates)
+
+
+def make_buffer(loader, **kwargs):
+    flushed, failed = [], []
+    buffer = CRMWriteBuffer(
+        loader, ":memory:", flush_interval=0.01, retry_interval=0, on_flushed=flushed.extend,
+        on_failed=lambda call_ids, error: failed.append((call_ids, error)), **kwargs,
+    )
+    return buffer, flushed, failed
+
+
+def test_updates_are_merged_and_sent_in_one_batch():
+    loader = BatchLeadLoader()
+    buffer, flushed, _ = make_buffer(loader)
+    buffer.update_record("lead-1", {"Status": "CALLED", "Notes": "first"}, call_id="call-1")
+    buffer.update_record("lead-1", {"Notes": "second"}, call_id="call-2")
+    buffer.update_record("lead-2", {"Status": "CALLED"}, call_id="call-3")
+    assert buffer.flush() == {"flushed": 2, "retried": 0, "dead": 0}
+    assert loader.batches == [["lead-1", "lead-2"]]
+    assert loader.records["lead-1"] == {"id": "lead-1", "Status": "CALLED", "Notes": "second"}
+    assert flushed == ["call-1", "call-2", "call-3"]
+    assert buffer.stats() == {"pending": 0, "dead": 0}
+    buffer.close()
+
+
+def test_update_merged_in_flight_is_sent_again():
+    loader = BatchLeadLoader()
+    buffer, flushed, _ = make_buffer(loader)
+    buffer.update_record("lead-1", {"Status": "CALLED"}, call_id="call-1")
+    loader.during_batch = lambda: buffer.update_record("lead-1", {"Notes": "late"}, call_id="call-2")
+    # The second flush round of the same `flush` sends the update merged in during the first one
+    assert buffer.flush()["flushed"] == 2
+    assert loader.updates == [("lead-1", {"Status": "CALLED"}), ("lead-1", {"Status": "CALLED", "Notes": "late"})]
+    # Every call is reported once
+    assert flushed == ["call-1", "call-2"]
+    buffer.close()
+
+
+def test_bad_record_is_isolated_then_given_up_on():
+    loader = BatchLeadLoader()
+    loader.failing.add("lead-2")
+    buffer, flushed, failed = make_buffer(loader, max_attempts=2)
+    buffer.update_record("lead-1", {"Status": "CALLED"}, call_id="call-1")
+    buffer.update_record("lead-2", {"Status": "CALLED"}, call_id="call-2")
+    # Without retry delay the failed record is sent again in the same flush, until given up on
+    assert buffer.flush() == {"flushed": 1, "retried": 1, "dead": 1}
+    assert loader.batches == [["lead-1", "lead-2"], ["lead-2"]]
+    assert flushed == ["call-1"]
+    assert failed == [(["call-2"], "HTTP 422")]
+    assert buffer.stats() == {"pending": 0, "dead": 1}
+    assert buffer.flush() == {"flushed": 0, "retried": 0, "dead": 0}
+
+    # A new update revives the dead record with everything merged so far
+    loader.failing.clear()
+    buffer.update_record("lead-2", {"Notes": "retry"}, call_id="call-3")
+    assert buffer.flush()["flushed"] == 1
+    assert loader.records["lead-2"] == {"id": "lead-2", "Status": "CALLED", "Notes": "retry"}
+    buffer.close()
+
+
+def test_failed_update_waits_for_its_retry():
+    loader = BatchLeadLoader()
+    loader.failing.add("lead-1")
+    buffer, _, _ = make_buffer(loader)
+    buffer.retry_interval = 60
+    buffer.update_record("lead-1", {"Status": "CALLED"})
+    assert buffer.flush()["retried"] == 1
+    assert buffer.flush() == {"flushed": 0, "retried": 0, "dead": 0}
+    assert buffer.stats() == {"pending": 1, "dead": 0}
+    buffer.close()
+
+
+def test_unsent_updates_survive_a_restart(tmp_path):
+    db_path = str(tmp_path / "crm_updates.db")
+    loader = BatchLeadLoader()
+    buffer = CRMWriteBuffer(loader, db_path)
+    buffer.update_record("lead-1", {"Status": "CALLED"})
+    buffer.close()
+    assert loader.updates == []
+
+    buffer = CRMWriteBuffer(loader, db_path, flush_interval=0.01)
+    buffer.start()
+    deadline = time.time() + 5
+    while not loader.updates and time.time() < deadline:
+        time.sleep(0.01)
+    buffer.close()
+    assert loader.updates == [("lead-1", {"Status": "CALLED"})]
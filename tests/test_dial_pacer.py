@@ -0,0 +1,63 @@
+import pytest
+from src.base.call_state import CallState, CallStateStore
+from src.base.dial_pacer import DialPacer
+
+
+def make_pacer(**kwargs):
+    return DialPacer(**{"target_live_calls": 10, "proportional_gain": 0, "integral_gain": 0, **kwargs})
+
+
+def record(pacer, answered, unanswered, talk_minutes=2.0, ring_minutes=0.5):
+    for _ in range(answered):
+        pacer.record_call({"endedReason": "customer-ended-call", "duration": talk_minutes})
+    for _ in range(unanswered):
+        pacer.record_call({"endedReason": "customer-did-not-answer", "duration": ring_minutes})
+
+
+def test_disabled_without_target(monkeypatch):
+    monkeypatch.delenv("PACER_TARGET_LIVE_CALLS", raising=False)
+    assert not DialPacer().enabled
+    assert make_pacer().enabled
+
+
+def test_estimates_from_the_recorded_outcomes():
+    pacer = make_pacer()
+    record(pacer, answered=1, unanswered=3)
+    assert pacer.estimates() == {"answer_rate": 0.25, "ring_seconds": 30, "talk_seconds": 120, "calls": 4}
+
+
+def test_feedforward_weights_ring_and_talk_by_outcome():
+    pacer = make_pacer(max_concurrency=1000)
+    record(pacer, answered=1, unanswered=3)
+    # Per dial: 0.75 * 30 s ringing + 0.25 * 120 s talking, of which 30 s live
+    assert pacer.update(live_calls=10) == pytest.approx(10 * (0.75 * 30 + 0.25 * 120) / (0.25 * 120))
+
+
+def test_feedforward_with_every_call_answered_is_the_target():
+    pacer = make_pacer()
+    record(pacer, answered=5, unanswered=0)
+    assert pacer.update(live_calls=10) == pytest.approx(10)
+
+
+def test_correction_and_bounds():
+    pacer = make_pacer(proportional_gain=0.5, max_concurrency=12)
+    record(pacer, answered=5, unanswered=0)
+    assert pacer.update(live_calls=6) == 12
+    assert pacer.update(live_calls=30) == pytest.approx(1)
+
+
+def test_postcall_backlog_slows_dialing():
+    pacer = make_pacer(max_postcall_backlog=10)
+    record(pacer, answered=5, unanswered=0)
+    assert pacer.update(live_calls=10, postcall_backlog=20) == pytest.approx(5)
+
+
+def test_available_slots_subtract_the_calls_in_flight():
+    pacer = make_pacer(refresh_interval=0)
+    record(pacer, answered=5, unanswered=0)
+    call_states = CallStateStore(":memory:")
+    for index in range(4):
+        call_states.record_call_created(f"lead-{index}", f"call-{index}", "vapi")
+    call_states.advance("call-0", CallState.IN_PROGRESS)
+    # 1 live call: the proportional gain is 0, the target of 10 calls in flight is kept
+    assert pacer.available_slots(call_states) == 10 - 4
@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import pytest
+from src.base.dial_scheduler import (
+    CallWindow, DialScheduler, parse_days, timezone_from_address, timezone_from_phone, timezone_from_postal_code,
+)
+
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+def lead(phone="", address=""):
+    return SimpleNamespace(phone=phone, address=address)
+
+
+def timestamp(*args, tz=NEW_YORK):
+    return datetime(*args, tzinfo=tz).timestamp()
+
+
+@pytest.mark.parametrize("address, expected", [
+    ("500 Congress Ave, Austin, TX 78701", "America/Chicago"),
+    ("1 Yonge St, Toronto, ON M5V 2T6", "America/Toronto"),
+    # Two-letter codes that are not followed by a postal code of their state
+    ("Marienplatz 1, Munich DE 80331", None),
+    ("Montreal, CA", None),
+    ("Portland OR", None),
+])
+def test_timezone_from_postal_code(address, expected):
+    assert timezone_from_postal_code(address) == expected
+
+
+@pytest.mark.parametrize("address, expected", [
+    ("Austin, Texas", "America/Chicago"),
+    ("Paris, France", "Europe/Paris"),
+    ("Portland, OR 97201", "America/Los_Angeles"),
+    ("Somewhere", None),
+    ("", None),
+])
+def test_timezone_from_address(address, expected):
+    assert timezone_from_address(address) == expected
+
+
+@pytest.mark.parametrize("phone, expected", [
+    ("+14155550100", "America/Los_Angeles"),
+    ("(915) 555-0100", "America/Denver"),
+    ("+442071234567", "Europe/London"),
+    ("+35312345678", "Europe/Dublin"),
+    ("+19995550100", None),
+    ("", None),
+])
+def test_timezone_from_phone(phone, expected):
+    assert timezone_from_phone(phone) == expected
+
+
+def test_timezone_precedence():
+    scheduler = DialScheduler(CallWindow("9-20", "mon-fri"), default_timezone="America/New_York")
+    # The postal address wins over the phone prefix (moved with their number), the phone over a state name
+    assert scheduler.timezone_for(lead("+14155550100", "Austin, TX 78701")) == ZoneInfo("America/Chicago")
+    assert scheduler.timezone_for(lead("+14155550100", "Austin, Texas")) == ZoneInfo("America/Los_Angeles")
+    assert scheduler.timezone_for(lead("", "Austin, Texas")) == ZoneInfo("America/Chicago")
+    assert scheduler.timezone_for(lead()) == NEW_YORK
+
+
+def test_parse_days():
+    assert parse_days("mon-fri") == {0, 1, 2, 3, 4}
+    assert parse_days("Mon, Wed,friday") == {0, 2, 4}
+
+
+def test_invalid_window():
+    with pytest.raises(ValueError):
+        CallWindow("20-9", "mon-fri")
+    with pytest.raises(ValueError):
+        CallWindow("9-20", " ")
+
+
+def test_next_allowed():
+    window = CallWindow("9:30-20", "mon-fri")
+    # Wednesday 2024-05-15
+    assert window.next_allowed(datetime(2024, 5, 15, 8, tzinfo=NEW_YORK), NEW_YORK) == datetime(2024, 5, 15, 9, 30, tzinfo=NEW_YORK)
+    assert window.next_allowed(datetime(2024, 5, 15, 12, tzinfo=NEW_YORK), NEW_YORK) == datetime(2024, 5, 15, 12, tzinfo=NEW_YORK)
+    assert window.next_allowed(datetime(2024, 5, 15, 21, tzinfo=NEW_YORK), NEW_YORK) == datetime(2024, 5, 16, 9, 30, tzinfo=NEW_YORK)
+    # Friday evening goes to Monday morning
+    assert window.next_allowed(datetime(2024, 5, 17, 20, tzinfo=NEW_YORK), NEW_YORK) == datetime(2024, 5, 20, 9, 30, tzinfo=NEW_YORK)
+
+
+def test_leads_are_released_in_their_own_window():
+    scheduler = DialScheduler(CallWindow("9-20", "mon-sun"), default_timezone="America/New_York")
+    now = timestamp(2024, 5, 15, 10)
+    new_york, los_angeles = lead("+12125550100"), lead("+14155550100")
+    assert scheduler.push(los_angeles, now) == timestamp(2024, 5, 15, 12)
+    assert scheduler.push(new_york, now) == now
+    assert len(scheduler) == 2
+    assert scheduler.pop_ready(now) is new_york
+    assert scheduler.pop_ready(now) is None
+    assert scheduler.next_ready_at() == timestamp(2024, 5, 15, 12)
+    assert scheduler.pop_ready(timestamp(2024, 5, 15, 12)) is los_angeles
+    assert scheduler.next_ready_at() is None
+
+
+def test_lead_waiting_past_its_window_is_rescheduled():
+    scheduler = DialScheduler(CallWindow("9-20", "mon-sun"), default_timezone="America/New_York")
+    waiting = lead("+12125550100")
+    scheduler.push(waiting, timestamp(2024, 5, 15, 19))
+    assert scheduler.pop_ready(timestamp(2024, 5, 15, 21)) is None
+    assert scheduler.next_ready_at() == timestamp(2024, 5, 16, 9)
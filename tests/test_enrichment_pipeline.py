@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from src.base.lead_enrichment import EnricherBase, EnrichmentCache, EnrichmentPipeline
+from src.base.lead_enrichment.email_domain import EmailDomainEnricher
+from src.utils import Lead
+
+
+class SleepyEnricher(EnricherBase):
+    """Enricher answering after `delay` seconds, or raising `error`."""
+
+    def __init__(self, name, delay=0, error=None):
+        self.name = name
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def enrich(self, lead) -> dict:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"source": self.name}
+
+
+def make_lead(lead_id="lead-1", email="ada@example.com"):
+    return Lead(id=lead_id, first_name="Ada", last_name="Lovelace", address="", email=email, phone="+14155550100")
+
+
+def make_pipeline(enrichers, **kwargs):
+    return EnrichmentPipeline(enrichers, cache=EnrichmentCache(":memory:"), **{"budget": 0.1, **kwargs})
+
+
+def test_lead_is_dialed_with_the_enrichers_done_in_time():
+    fast, slow = SleepyEnricher("fast"), SleepyEnricher("slow", delay=0.3)
+    pipeline = make_pipeline([fast, slow])
+
+    async def scenario():
+        first = await pipeline.enrich(make_lead("lead-1"))
+        assert first.enrichment == {"fast": {"source": "fast"}}
+        # The late enricher finishes in the background and caches its result for the next leads
+        await asyncio.sleep(0.4)
+        return await pipeline.enrich(make_lead("lead-2"))
+
+    second = asyncio.run(scenario())
+    assert second.enrichment == {"fast": {"source": "fast"}, "slow": {"source": "slow"}}
+    assert fast.calls == slow.calls == 1
+
+
+def test_failed_and_timed_out_enrichers_are_skipped():
+    failing = SleepyEnricher("failing", error=RuntimeError("HTTP 500"))
+    hanging = SleepyEnricher("hanging", delay=10)
+    working = SleepyEnricher("working")
+    pipeline = make_pipeline([failing, hanging, working], budget=1, enricher_timeout=0.05)
+    lead = asyncio.run(pipeline.enrich(make_lead()))
+    assert lead.enrichment == {"working": {"source": "working"}}
+    # Failures are not cached
+    assert pipeline.cache.get("failing", "ada@example.com") is None
+
+
+def test_prefetched_lead_is_not_enriched_twice():
+    enricher = SleepyEnricher("slow", delay=0.05)
+    pipeline = make_pipeline([enricher], budget=1)
+
+    async def scenario():
+        lead = make_lead()
+        pipeline.prefetch([lead])
+        await asyncio.sleep(0.01)
+        return await pipeline.enrich(lead)
+
+    assert asyncio.run(scenario()).enrichment == {"slow": {"source": "slow"}}
+    assert enricher.calls == 1
+
+
+def test_prefetch_outside_an_event_loop_does_nothing():
+    enricher = SleepyEnricher("fast")
+    pipeline = make_pipeline([enricher])
+    pipeline.prefetch([make_lead()])
+    assert enricher.calls == 0
+
+
+def test_leads_without_cache_key_are_enriched_every_time():
+    enricher = SleepyEnricher("fast")
+    pipeline = make_pipeline([enricher])
+
+    async def scenario():
+        await pipeline.enrich(make_lead(email=""))
+        await pipeline.enrich(make_lead(email=""))
+
+    asyncio.run(scenario())
+    assert enricher.calls == 2
+
+
+@pytest.mark.parametrize("email, expected, cache_key", [
+    ("ada@Example.com", {"business_email": True, "company_domain": "example.com"}, "example.com"),
+    ("ada@gmail.com", {"business_email": False}, "gmail.com"),
+    ("", {}, None),
+])
+def test_email_domain_enricher(email, expected, cache_key):
+    enricher = EmailDomainEnricher()
+    assert asyncio.run(enricher.enrich(make_lead(email=email))) == expected
+    assert enricher.cache_key(make_lead(email=email)) == cache_key
+
+
+def test_cache_expiry():
+    cache = EnrichmentCache(":memory:")
+    cache.put("fast", "ada@example.com", {"source": "fast"}, ttl=60)
+    cache.put("fast", "bob@example.com", {"source": "fast"}, ttl=-1)
+    assert cache.get("fast", "ada@example.com") == {"source": "fast"}
+    assert cache.get("fast", "bob@example.com") is None
+    assert cache.purge() == 1
@@ -0,0 +1,46 @@
+import uuid
+import pytest
+from benchmarks.fakes import FakeHubSpotClient
+from benchmarks.fakes.service import FakeService
+from src.base.leads_loader import hubspot
+from src.base.leads_loader.hubspot import HubSpotLeadLoader
+
+
+def make_loader(modified_at):
+    """HubSpot loader over a fake client, contact `i` being modified at `modified_at[i]` (ms)."""
+    records = [{"id": str(index), "firstname": f"Lead {index}"} for index in range(len(modified_at))]
+    loader = HubSpotLeadLoader(access_token=f"test-{uuid.uuid4()}")
+    loader.client = FakeHubSpotClient(records, FakeService("hubspot", latency=0))
+    for index, timestamp in enumerate(modified_at):
+        loader.client.contacts[str(index)]["lastmodifieddate"] = str(timestamp)
+    return loader
+
+
+def test_full_listing_without_cursor():
+    loader = make_loader([1000 + index for index in range(250)])
+    records, cursor = loader.fetch_changes()
+    assert sorted(int(record["id"]) for record in records) == list(range(250))
+    assert cursor == 1249
+
+
+def test_changes_since_the_cursor():
+    loader = make_loader([1000 + index for index in range(250)])
+    records, cursor = loader.fetch_changes(since=1200)
+    assert sorted(int(record["id"]) for record in records) == list(range(200, 250))
+    assert cursor == 1249
+
+
+def test_search_restarts_past_the_result_limit(monkeypatch):
+    monkeypatch.setattr(hubspot, "HUBSPOT_SEARCH_MAX_RESULTS", 100)
+    # Pages of 100 contacts, the first restart overlaps the 10 contacts sharing the last time of the page
+    loader = make_loader([1000 + index // 10 for index in range(350)])
+    records, cursor = loader.fetch_changes(since=0)
+    assert sorted(int(record["id"]) for record in records) == list(range(350))
+    assert cursor == 1034
+
+
+def test_search_fails_when_a_restart_makes_no_progress(monkeypatch):
+    monkeypatch.setattr(hubspot, "HUBSPOT_SEARCH_MAX_RESULTS", 100)
+    loader = make_loader([1000] * 150)
+    with pytest.raises(RuntimeError, match="full sync"):
+        loader.fetch_changes(since=0)
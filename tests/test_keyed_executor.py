@@ -0,0 +1,99 @@
+import time
+import asyncio
+from src.base.voice_agent_providers.keyed_executor import KeyedExecutor
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_events_of_a_key_run_in_submission_order():
+    async def scenario():
+        executor = KeyedExecutor()
+        processed = {"call-a": [], "call-b": [], "call-c": []}
+
+        async def handler(call_id, index):
+            # Later events finish faster, they would overtake the earlier ones without serialization
+            await asyncio.sleep(0.001 * (10 - index))
+            processed[call_id].append(index)
+
+        # Events of the three calls interleaved, as the webhooks would receive them
+        await asyncio.gather(*(
+            executor.submit(call_id, handler, call_id, index)
+            for index in range(10)
+            for call_id in processed
+        ))
+        return processed, executor.active_keys
+
+    processed, active_keys = run(scenario())
+    assert processed == {call_id: list(range(10)) for call_id in processed}
+    assert active_keys == 0
+
+
+def test_different_keys_run_concurrently():
+    async def scenario():
+        executor = KeyedExecutor()
+        running, peak = 0, 0
+
+        async def handler():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(executor.submit(f"call-{index}", handler) for index in range(5)))
+        return peak, time.perf_counter() - started_at
+
+    peak, elapsed = run(scenario())
+    assert peak == 5
+    assert elapsed < 0.2
+
+
+def test_blocking_handlers_of_different_keys_run_concurrently():
+    async def scenario():
+        executor = KeyedExecutor()
+        started_at = time.perf_counter()
+        await asyncio.gather(*(executor.submit(f"call-{index}", time.sleep, 0.05) for index in range(4)))
+        return time.perf_counter() - started_at
+
+    assert run(scenario()) < 0.15
+
+
+def test_failed_handler_does_not_stall_later_events_of_its_key():
+    async def scenario():
+        executor = KeyedExecutor()
+        processed = []
+
+        async def handler(index):
+            await asyncio.sleep(0.001)
+            if index == 1:
+                raise RuntimeError("handler failed")
+            processed.append(index)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*(executor.submit("call-a", handler, index) for index in range(4)), return_exceptions=True),
+            timeout=1,
+        )
+        return processed, results, executor.pending("call-a")
+
+    processed, results, pending = run(scenario())
+    assert processed == [0, 2, 3]
+    assert isinstance(results[1], RuntimeError)
+    assert pending == 0
+
+
+def test_none_key_is_not_serialized():
+    async def scenario():
+        executor = KeyedExecutor()
+        order = []
+
+        async def handler(index, delay):
+            await asyncio.sleep(delay)
+            order.append(index)
+
+        await asyncio.gather(executor.submit(None, handler, 0, 0.02), executor.submit(None, handler, 1, 0))
+        return order
+
+    assert run(scenario()) == [1, 0]
@@ -0,0 +1,98 @@
+import time
+from src.base.lead_lease import LeaseState, LeadLeaseStore
+
+
+def leads(*lead_ids):
+    return [{"id": lead_id, "phone": f"+1555000{index:04d}"} for index, lead_id in enumerate(lead_ids)]
+
+
+def claimed_ids(claimed):
+    return [lead["id"] for lead in claimed]
+
+
+def test_enqueue_skips_leads_already_queued():
+    store = LeadLeaseStore(":memory:")
+    assert store.enqueue(leads("lead-1", "lead-2")) == ["lead-1", "lead-2"]
+    store.claim("worker-1", limit=1)
+    assert store.enqueue(leads("lead-1", "lead-2", "lead-3")) == ["lead-3"]
+    assert store.get("lead-2") == leads("lead-1", "lead-2")[1]
+    assert store.get("lead-4") is None
+
+
+def test_claims_are_exclusive_and_ordered():
+    store = LeadLeaseStore(":memory:")
+    now = time.time()
+    store.enqueue(leads("lead-1", "lead-2", "lead-3"), not_before={"lead-1": now - 10, "lead-2": now - 20})
+    assert claimed_ids(store.claim("worker-1", limit=2)) == ["lead-2", "lead-1"]
+    assert claimed_ids(store.claim("worker-2", limit=5)) == ["lead-3"]
+    assert store.claim("worker-3") == []
+
+
+def test_claims_shared_between_stores(tmp_path):
+    db_path = str(tmp_path / "leases.db")
+    first, second = LeadLeaseStore(db_path), LeadLeaseStore(db_path)
+    first.enqueue(leads(*(f"lead-{index}" for index in range(10))))
+    claimed = claimed_ids(first.claim("worker-1", limit=6)) + claimed_ids(second.claim("worker-2", limit=6))
+    assert sorted(claimed) == sorted(f"lead-{index}" for index in range(10))
+    first.close()
+    second.close()
+
+
+def test_scheduled_leads_wait_for_their_time():
+    store = LeadLeaseStore(":memory:")
+    not_before = time.time() + 3600
+    store.enqueue(leads("lead-1"), not_before={"lead-1": not_before})
+    assert store.claim("worker-1") == []
+    assert store.next_pending_at() == not_before
+    assert store.counts()["scheduled"] == 1
+
+
+def test_expired_lease_is_taken_over():
+    store = LeadLeaseStore(":memory:")
+    store.enqueue(leads("lead-1"))
+    store.claim("worker-1", lease_seconds=-1)
+    assert store.counts()["expired"] == 1
+    assert claimed_ids(store.claim("worker-2")) == ["lead-1"]
+    # The first worker lost the lead, it must not dial it
+    assert not store.renew("lead-1", "worker-1")
+    assert not store.complete("lead-1", "worker-1")
+    assert store.renew("lead-1", "worker-2")
+    assert store.complete("lead-1", "worker-2")
+    assert store.counts()[LeaseState.DONE] == 1
+
+
+def test_defer_and_requeue():
+    store = LeadLeaseStore(":memory:")
+    store.enqueue(leads("lead-1"))
+    store.claim("worker-1")
+    not_before = time.time() + 3600
+    assert store.defer("lead-1", "worker-1", not_before)
+    assert not store.defer("lead-1", "worker-1", not_before)
+    assert store.claim("worker-1") == []
+    # Only done leads are requeued
+    assert not store.requeue("lead-1", time.time())
+
+    store.enqueue(leads("lead-2"))
+    store.claim("worker-1")
+    store.complete("lead-2", "worker-1")
+    assert store.requeue("lead-2", time.time() - 1)
+    assert claimed_ids(store.claim("worker-2")) == ["lead-2"]
+    assert not store.requeue("unknown", time.time())
+
+
+def test_enqueue_requeues_done_leads():
+    store = LeadLeaseStore(":memory:")
+    store.enqueue(leads("lead-1"))
+    store.claim("worker-1")
+    store.complete("lead-1", "worker-1")
+    assert store.enqueue(leads("lead-1")) == ["lead-1"]
+    assert claimed_ids(store.claim("worker-1")) == ["lead-1"]
+
+
+def test_release_gives_back_the_worker_leads():
+    store = LeadLeaseStore(":memory:")
+    store.enqueue(leads("lead-1", "lead-2", "lead-3"))
+    store.claim("worker-1", limit=2)
+    store.claim("worker-2", limit=1)
+    assert store.release("worker-1") == 2
+    assert store.counts() == {LeaseState.PENDING: 2, "scheduled": 0, LeaseState.LEASED: 1, "expired": 0, LeaseState.DONE: 0}
@@ -0,0 +1,103 @@
+from conftest import MemoryLeadLoader
+from src.base.leads_loader import LeadMirror
+from src.base.leads_loader.lead_mirror import normalize_phone
+
+
+class ChangesLeadLoader(MemoryLeadLoader):
+    """Memory loader reporting the records modified since a revision number."""
+
+    def __init__(self, records=None):
+        super().__init__(records)
+        self.revision = 0
+        self.modified = {lead_id: 0 for lead_id in self.records}
+        self.fetches = []
+
+    def touch(self, record):
+        self.revision += 1
+        self.records[record["id"]] = dict(record)
+        self.modified[record["id"]] = self.revision
+
+    def fetch_changes(self, since=None):
+        self.fetches.append(since)
+        changed = [
+            self.records[lead_id] for lead_id, revision in self.modified.items()
+            if lead_id in self.records and (since is None or revision > since)
+        ]
+        return changed, self.revision
+
+    def fetch_records(self, lead_ids=None, status="NEW"):
+        self.fetches.append(("records", lead_ids))
+        return super().fetch_records(lead_ids, status)
+
+
+def make_mirror(records, **kwargs):
+    loader = ChangesLeadLoader(records)
+    return loader, LeadMirror(loader, ":memory:", **{"max_staleness": 3600, **kwargs})
+
+
+def record(lead_id, status="NEW", phone="+1 (415) 555-0100"):
+    return {"id": lead_id, "Status": status, "Phone": phone}
+
+
+def test_only_loaders_reporting_changes_are_mirrored():
+    assert LeadMirror.supports(ChangesLeadLoader())
+    assert not LeadMirror.supports(MemoryLeadLoader())
+
+
+def test_reads_come_from_the_local_copy():
+    loader, mirror = make_mirror([record("lead-1"), record("lead-2", status="CONTACTED", phone="+14155550199")])
+    assert mirror.fetch_records() == [record("lead-1")]
+    assert mirror.fetch_records(status="CONTACTED") == [record("lead-2", status="CONTACTED", phone="+14155550199")]
+    assert mirror.find_by_phone("+1 415.555.0100") == [record("lead-1")]
+    assert mirror.fetch_records(lead_ids=["lead-2"])[0]["id"] == "lead-2"
+    # Synced once, the copy is fresh
+    assert loader.fetches == [None]
+
+
+def test_unknown_leads_are_fetched_from_the_crm():
+    loader, mirror = make_mirror([record("lead-1")])
+    mirror.sync()
+    loader.records["lead-2"] = record("lead-2")
+    assert [lead["id"] for lead in mirror.fetch_records(lead_ids=["lead-2", "lead-3"])] == ["lead-2"]
+    assert ("records", ["lead-2", "lead-3"]) in loader.fetches
+    assert mirror.stats()["statuses"] == {"NEW": 2}
+
+
+def test_incremental_sync_only_rewrites_changed_records():
+    loader, mirror = make_mirror([record("lead-1"), record("lead-2")])
+    assert mirror.sync() == {"fetched": 2, "changed": 2, "deleted": 0, "full": True}
+    loader.touch(record("lead-1", status="CONTACTED"))
+    loader.touch(record("lead-2"))
+    assert mirror.sync() == {"fetched": 2, "changed": 1, "deleted": 0, "full": False}
+    assert loader.fetches == [None, 0]
+    assert mirror.fetch_records(status="CONTACTED") == [record("lead-1", status="CONTACTED")]
+
+
+def test_full_sync_removes_deleted_records():
+    loader, mirror = make_mirror([record("lead-1"), record("lead-2")])
+    mirror.sync()
+    del loader.records["lead-2"]
+    assert mirror.sync()["deleted"] == 0
+    assert mirror.sync(full=True)["deleted"] == 1
+    assert mirror.fetch_records() == [record("lead-1")]
+
+
+def test_stale_copy_is_synced_before_reading():
+    loader, mirror = make_mirror([record("lead-1")], max_staleness=0)
+    mirror.fetch_records()
+    mirror.fetch_records()
+    assert loader.fetches == [None, 0]
+
+
+def test_updates_go_to_the_crm_and_the_copy():
+    loader, mirror = make_mirror([record("lead-1"), record("lead-2")])
+    mirror.sync()
+    mirror.update_record("lead-1", {"Status": "CONTACTED"})
+    mirror.update_records_batch([{"id": "lead-2", "updates": {"Status": "REDIAL"}}])
+    assert loader.updates == [("lead-1", {"Status": "CONTACTED"}), ("lead-2", {"Status": "REDIAL"})]
+    assert mirror.stats()["statuses"] == {"CONTACTED": 1, "REDIAL": 1}
+
+
+def test_normalize_phone():
+    assert normalize_phone("+1 (415) 555-0100") == "14155550100"
+    assert normalize_phone(None) == ""
@@ -0,0 +1,119 @@
+import time
+import threading
+import pytest
+from src import live_call_analysis
+from src.live_call_analysis import LiveCallAnalyzer, pending_lines
+
+
+@pytest.mark.parametrize("analyzed_text, lines, expected", [
+    ("", ["AI: Hi", "Lead: Hello"], ["AI: Hi", "Lead: Hello"]),
+    ("AI: Hi\nLead: Hello", ["AI: Hi", "Lead: Hello", "AI: Great"], ["AI: Great"]),
+    ("AI: Hi\nLead: Hello", ["AI: Hi", "Lead: Hello"], []),
+    # The last analyzed turn was still being transcribed, it is analyzed again in full
+    ("AI: Hi\nLead: Hel", ["AI: Hi", "Lead: Hello", "AI: Great"], ["Lead: Hello", "AI: Great"]),
+    # Earlier lines changed
+    ("AI: Hi\nLead: Hello", ["AI: Hey", "Lead: Hello"], None),
+])
+def test_pending_lines(analyzed_text, lines, expected):
+    assert pending_lines(analyzed_text, lines) == expected
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Fake analysis LLM: summaries concatenate the analyzed lines, `gate` holds the rolling analyses."""
+    state = type("LLM", (), {})()
+    state.updates, state.full = [], []
+    state.gate = threading.Event()
+    state.gate.set()
+
+    def update_call_analysis(lead_name, previous, new_lines):
+        state.gate.wait(5)
+        state.updates.append(new_lines)
+        summary = "\n".join(part for part in ((previous or {}).get("summary"), new_lines) if part)
+        return {"summary": summary, "interested": "demo" in summary, "justification": None}
+
+    def analyze_call_transcript(lead_name, transcript):
+        state.full.append(transcript)
+        return {"summary": transcript, "interested": None, "justification": "full transcript"}
+
+    monkeypatch.setattr(live_call_analysis, "update_call_analysis", update_call_analysis)
+    monkeypatch.setattr(live_call_analysis, "analyze_call_transcript", analyze_call_transcript)
+    return state
+
+
+def conversation(count):
+    return [f"{'AI' if index % 2 else 'Lead'}: line {index}" for index in range(count)]
+
+
+def wait_for_analyses(llm, count):
+    deadline = time.monotonic() + 5
+    while len(llm.updates) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(llm.updates) == count
+
+
+def test_rolling_analysis_only_sends_the_new_lines(llm):
+    analyzer = LiveCallAnalyzer(min_new_lines=2)
+    analyzer.update("call-1", conversation(1), "Ada")
+    analyzer.update("call-1", conversation(2))
+    wait_for_analyses(llm, 1)
+    analyzer.update("call-1", conversation(3))
+    analyzer.update("call-1", conversation(4))
+    wait_for_analyses(llm, 2)
+    transcript = "\n".join(conversation(5) + ["Lead: book a demo"])
+    analysis = analyzer.finish("call-1", "Ada", transcript)
+    assert llm.updates == ["\n".join(conversation(2)), "\n".join(conversation(4)[2:]), "\n".join(transcript.splitlines()[4:])]
+    assert analysis == {"summary": transcript, "interested": True, "justification": None}
+    assert llm.full == []
+    assert analyzer.live_calls == 0
+
+
+def test_one_analysis_at_a_time_per_call(llm):
+    analyzer = LiveCallAnalyzer(min_new_lines=1)
+    llm.gate.clear()
+    analyzer.update("call-1", conversation(1), "Ada")
+    analyzer.update("call-1", conversation(2))
+    analyzer.update("call-1", conversation(3))
+    # The lines said during the running analysis are analyzed together once it is done
+    llm.gate.set()
+    analyzer.end("call-1")
+    assert analyzer.finish("call-1", "Ada", "\n".join(conversation(3)))["summary"] == "\n".join(conversation(3))
+    assert llm.updates == [conversation(1)[0], "\n".join(conversation(3)[1:])]
+
+
+def test_diverging_final_transcript_is_analyzed_in_full(llm):
+    analyzer = LiveCallAnalyzer(min_new_lines=1)
+    analyzer.update("call-1", conversation(2), "Ada")
+    analyzer.end("call-1")
+    transcript = "Lead: something else entirely"
+    assert analyzer.finish("call-1", "Ada", transcript)["justification"] == "full transcript"
+    assert llm.full == [transcript]
+
+
+def test_call_without_live_transcript_falls_back_to_the_full_transcript(llm):
+    analyzer = LiveCallAnalyzer()
+    assert analyzer.finish("call-1", "Ada", "AI: Hi")["summary"] == "AI: Hi"
+    # Lines below the threshold were never analyzed either
+    analyzer.update("call-2", conversation(1), "Ada")
+    assert analyzer.finish("call-2", "Ada", "\n".join(conversation(1)))["justification"] == "full transcript"
+    assert llm.updates == []
+
+
+def test_stuck_analysis_falls_back_to_the_full_transcript(llm):
+    analyzer = LiveCallAnalyzer(min_new_lines=1, wait_seconds=0.05)
+    llm.gate.clear()
+    analyzer.update("call-1", conversation(1), "Ada")
+    assert analyzer.finish("call-1", "Ada", "AI: Hi")["justification"] == "full transcript"
+    llm.gate.set()
+
+
+def test_discarded_and_idle_calls_are_forgotten(llm):
+    analyzer = LiveCallAnalyzer(min_new_lines=10, idle_seconds=0)
+    analyzer.update("call-1", conversation(1), "Ada")
+    analyzer.discard("call-1")
+    assert analyzer.live_calls == 0
+    analyzer.update("call-2", conversation(1), "Ada")
+    analyzer.update("call-3", conversation(1), "Ada")
+    assert analyzer.live_calls == 1
+    analyzer.update("", conversation(1))
+    assert analyzer.live_calls == 1
@@ -0,0 +1,96 @@
+import pytest
+from src.base.voice_agent_providers.phone_number_pool import NoPhoneNumberAvailableError, PhoneNumberPool
+
+
+def make_pool(number_ids=("phone-1", "phone-2"), **kwargs):
+    return PhoneNumberPool(list(number_ids), ":memory:", **{"max_concurrent_calls": 2, "min_interval": 0, **kwargs})
+
+
+def place_call(pool, call_id):
+    number_id, reservation_id = pool.acquire()
+    pool.assign(reservation_id, call_id)
+    return number_id
+
+
+def live_calls(pool):
+    return {stats["number_id"]: stats["live_calls"] for stats in pool.stats()}
+
+
+def test_calls_are_spread_over_the_least_loaded_numbers():
+    pool = make_pool()
+    numbers = {f"call-{index}": place_call(pool, f"call-{index}") for index in range(4)}
+    assert sorted(numbers.values()) == ["phone-1", "phone-1", "phone-2", "phone-2"]
+    with pytest.raises(NoPhoneNumberAvailableError) as error:
+        pool.acquire()
+    # At capacity, not cooling down: no time at which a number frees up
+    assert error.value.retry_at is None
+
+    pool.release_call("call-0", "customer-ended-call")
+    assert live_calls(pool)[numbers["call-0"]] == 1
+    # The freed line is the only one left
+    assert place_call(pool, "call-4") == numbers["call-0"]
+
+
+def test_release_is_idempotent_and_ignores_unknown_calls():
+    pool = make_pool(["phone-1"], failure_threshold=2)
+    place_call(pool, "call-1")
+    pool.release_call("call-1", "twilio-failed-to-connect-call")
+    pool.release_call("call-1", "twilio-failed-to-connect-call")
+    pool.release_call("unknown", "twilio-failed-to-connect-call")
+    stats = pool.stats()[0]
+    assert stats["live_calls"] == 0
+    # The failure was counted once
+    assert stats["consecutive_failures"] == 1 and not stats["cooling_down"]
+
+
+def test_failed_calls_cool_the_number_down():
+    pool = make_pool(failure_threshold=2, failure_cooldown=600)
+    for index in range(4):
+        place_call(pool, f"call-{index}")
+    for index in range(4):
+        pool.release_call(f"call-{index}", "twilio-failed-to-connect-call")
+    assert all(stats["cooling_down"] for stats in pool.stats())
+    with pytest.raises(NoPhoneNumberAvailableError) as error:
+        pool.acquire()
+    assert error.value.retry_at is not None
+
+
+def test_rejected_dial_counts_as_failure():
+    pool = make_pool(["phone-1"], failure_threshold=1)
+    _, reservation_id = pool.acquire()
+    pool.cancel(reservation_id, failed=True)
+    assert pool.stats()[0]["cooling_down"]
+
+    pool = make_pool(["phone-1"], failure_threshold=1)
+    _, reservation_id = pool.acquire()
+    pool.cancel(reservation_id)
+    stats = pool.stats()[0]
+    assert not stats["cooling_down"] and stats["live_calls"] == 0
+
+
+def test_unanswered_streak_and_connected_reset():
+    pool = make_pool(["phone-1"], unanswered_threshold=3)
+    for index in range(2):
+        place_call(pool, f"call-{index}")
+        pool.release_call(f"call-{index}", "customer-did-not-answer")
+    assert pool.stats()[0]["consecutive_unanswered"] == 2
+    place_call(pool, "call-2")
+    pool.release_call("call-2", "customer-ended-call")
+    assert pool.stats()[0]["consecutive_unanswered"] == 0
+    # A wrong lead number says nothing about the caller number
+    place_call(pool, "call-3")
+    pool.release_call("call-3", "invalid_destination")
+    assert pool.stats()[0]["consecutive_failures"] == 0
+
+
+def test_min_interval_between_dials():
+    pool = make_pool(["phone-1"], min_interval=60)
+    pool.acquire()
+    with pytest.raises(NoPhoneNumberAvailableError) as error:
+        pool.acquire()
+    assert error.value.retry_at is not None
+
+
+def test_pool_without_numbers():
+    with pytest.raises(NoPhoneNumberAvailableError, match="No phone number"):
+        make_pool([]).acquire()
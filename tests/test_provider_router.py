@@ -0,0 +1,148 @@
+import time
+import asyncio
+import pytest
+from src.base.voice_agent_providers.phone_number_pool import NoPhoneNumberAvailableError
+from src.base.voice_agent_providers.provider_router import (
+    CircuitBreaker, NoProviderAvailableError, ProviderRoute, ProviderRouter, is_provider_failure, is_unsent_request,
+)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class ConnectError(Exception):
+    pass
+
+
+class ReadTimeout(Exception):
+    pass
+
+
+class FakeAgent:
+    """Agent placing calls with the given outcomes, in order (an exception is raised, anything else returned)."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    async def make_call(self, params):
+        self.calls.append(params)
+        outcome = self.outcomes.pop(0) if self.outcomes else {"id": f"call-{len(self.calls)}"}
+        if outcome == "hang":
+            await asyncio.sleep(1)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def make_route(name, agent, **breaker_kwargs):
+    breaker = CircuitBreaker(**{"failure_threshold": 1, "recovery_timeout": 60, **breaker_kwargs})
+    return ProviderRoute(name, agent, lambda lead: {"lead": lead}, timeout=0.05, breaker=breaker)
+
+
+def make_call(router, lead="lead-1"):
+    return asyncio.run(router.make_call(lead))
+
+
+def test_provider_failures():
+    assert is_provider_failure(StatusError(503))
+    assert is_provider_failure(StatusError(429))
+    assert not is_provider_failure(StatusError(400))
+    assert is_provider_failure(ConnectError())
+    assert is_provider_failure(ReadTimeout())
+    assert not is_provider_failure(ValueError())
+
+
+def test_unsent_requests():
+    assert is_unsent_request(ConnectError())
+    assert is_unsent_request(ConnectionRefusedError())
+    assert not is_unsent_request(ReadTimeout())
+    # SDK error wrapping the error of its HTTP client
+    try:
+        try:
+            raise ConnectError()
+        except ConnectError as e:
+            raise RuntimeError("Connection error.") from e
+    except RuntimeError as wrapped:
+        assert is_unsent_request(wrapped)
+
+
+def test_server_error_fails_over_to_the_next_provider():
+    primary, secondary = FakeAgent(StatusError(503)), FakeAgent({"id": "call-1"})
+    router = ProviderRouter([make_route("vapi", primary), make_route("retell", secondary)])
+    assert make_call(router) == ("retell", {"id": "call-1"})
+    assert router.health()["vapi"]["state"] == CircuitBreaker.OPEN
+    assert router.health()["retell"]["successes"] == 1
+    # The open circuit sends the next calls straight to the secondary provider
+    make_call(router, "lead-2")
+    assert len(primary.calls) == 1 and len(secondary.calls) == 2
+
+
+def test_refused_call_is_not_failed_over():
+    primary, secondary = FakeAgent(StatusError(400)), FakeAgent()
+    router = ProviderRouter([make_route("vapi", primary), make_route("retell", secondary)])
+    with pytest.raises(StatusError):
+        make_call(router)
+    assert secondary.calls == []
+    assert router.health()["vapi"]["state"] == CircuitBreaker.CLOSED
+
+
+def test_connect_error_fails_over():
+    router = ProviderRouter([make_route("vapi", FakeAgent(ConnectError())), make_route("retell", FakeAgent())])
+    assert make_call(router)[0] == "retell"
+
+
+@pytest.mark.parametrize("outcome", ["hang", ReadTimeout()])
+def test_call_possibly_placed_is_not_failed_over(outcome):
+    secondary = FakeAgent()
+    router = ProviderRouter([make_route("vapi", FakeAgent(outcome)), make_route("retell", secondary)])
+    with pytest.raises(NoProviderAvailableError):
+        make_call(router)
+    assert secondary.calls == []
+    assert router.health()["vapi"]["failures"] == 1
+
+
+def test_no_phone_number_falls_through_without_failure():
+    router = ProviderRouter([make_route("vapi", FakeAgent(NoPhoneNumberAvailableError("busy"))), make_route("retell", FakeAgent())])
+    assert make_call(router)[0] == "retell"
+    assert router.health()["vapi"]["state"] == CircuitBreaker.CLOSED
+
+    router = ProviderRouter([make_route("vapi", FakeAgent(NoPhoneNumberAvailableError("busy")))])
+    with pytest.raises(NoPhoneNumberAvailableError):
+        make_call(router)
+
+
+def test_every_circuit_open():
+    router = ProviderRouter([make_route("vapi", FakeAgent(StatusError(500)))])
+    with pytest.raises(NoProviderAvailableError):
+        make_call(router)
+    with pytest.raises(NoProviderAvailableError, match="circuit open"):
+        make_call(router)
+
+
+def test_half_open_probe():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+    time.sleep(0.06)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    # A single probe at a time, a probe saying nothing about the provider gives its slot back
+    assert not breaker.allow_request()
+    breaker.release()
+    assert breaker.allow_request()
+
+    # A failed probe re-opens the circuit, a successful one closes it
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
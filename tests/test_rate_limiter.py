@@ -0,0 +1,111 @@
+import asyncio
+import httpx
+import pytest
+from types import SimpleNamespace
+from src.base.rate_limiter import (
+    RATE_LIMIT_STATUSES,
+    AdaptiveRateLimiter,
+    TokenBucket,
+    call_with_retry,
+    async_call_with_retry,
+    get_response_headers,
+    is_connection_error,
+    parse_retry_after,
+)
+
+
+class StatusError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+        self.headers = headers or {}
+
+
+def make_limiter():
+    return AdaptiveRateLimiter("test", rate=1e6, burst=1e6)
+
+
+def failing(errors, result="ok"):
+    """Function raising the given errors one after the other, then returning `result`."""
+    attempts = []
+
+    def func():
+        attempts.append(len(attempts))
+        if len(attempts) <= len(errors):
+            raise errors[len(attempts) - 1]
+        return result
+
+    return func, attempts
+
+
+def test_token_bucket_goes_into_debt():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+
+
+def test_transient_statuses_are_retried():
+    func, attempts = failing([StatusError(503), StatusError(429, {"Retry-After": "0"})])
+    assert call_with_retry(make_limiter(), func, base_delay=0.001) == "ok"
+    assert len(attempts) == 3
+
+
+def test_client_errors_are_not_retried():
+    func, attempts = failing([StatusError(400)])
+    with pytest.raises(StatusError):
+        call_with_retry(make_limiter(), func, base_delay=0.001)
+    assert len(attempts) == 1
+
+
+def test_retries_are_bounded():
+    func, attempts = failing([StatusError(503)] * 10)
+    with pytest.raises(StatusError):
+        call_with_retry(make_limiter(), func, max_retries=2, base_delay=0.001)
+    assert len(attempts) == 3
+
+
+def test_connection_errors_are_not_retried_by_default():
+    # A create request that timed out may have been processed, sending it again could dial the lead twice
+    func, attempts = failing([httpx.ReadTimeout("timed out")])
+    with pytest.raises(httpx.ReadTimeout):
+        asyncio.run(async_call_with_retry(make_limiter(), func, base_delay=0.001, retry_statuses=RATE_LIMIT_STATUSES))
+    assert len(attempts) == 1
+
+
+def test_connection_errors_are_retried_when_opted_in():
+    func, attempts = failing([httpx.ConnectError("refused"), ConnectionResetError()])
+    assert call_with_retry(make_limiter(), func, base_delay=0.001, retry_connection_errors=True) == "ok"
+    assert len(attempts) == 3
+
+
+def test_rate_limited_request_halves_the_rate():
+    limiter = AdaptiveRateLimiter("test", rate=10, burst=10)
+    limiter.on_rate_limited({"Retry-After": "0"})
+    assert limiter.rate == 5
+    limiter.on_success()
+    assert limiter.rate == pytest.approx(5.5)
+
+
+def test_rate_limit_headers_cap_the_rate():
+    limiter = AdaptiveRateLimiter("test", rate=10, burst=10)
+    limiter.on_success({"X-HubSpot-RateLimit-Remaining": "4", "X-HubSpot-RateLimit-Interval-Milliseconds": "2000"})
+    assert limiter.rate == 2
+
+
+def test_is_connection_error():
+    assert is_connection_error(httpx.ReadTimeout("timed out"))
+    assert is_connection_error(ConnectionRefusedError())
+    assert not is_connection_error(StatusError(500))
+
+
+def test_parse_retry_after():
+    assert parse_retry_after({"retry-after": "2.5"}) == 2.5
+    assert parse_retry_after({}) is None
+    assert parse_retry_after({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0
+
+
+def test_get_response_headers():
+    assert get_response_headers(({"id": 1}, 200, {"X-RateLimit-Remaining": "3"})) == {"X-RateLimit-Remaining": "3"}
+    assert get_response_headers(SimpleNamespace(headers={"a": "b"})) == {"a": "b"}
+    assert get_response_headers({"id": 1}) is None
@@ -0,0 +1,81 @@
+import time
+import pytest
+from src.base.call_outcomes import CallOutcome, RedialPolicy, classify_ended_reason
+from src.base.call_state import CallState
+from src.base.lead_lease import LeaseState
+from src.utils import Lead
+
+
+@pytest.mark.parametrize("ended_reason, outcome", [
+    ("customer-did-not-answer", CallOutcome.NO_ANSWER),
+    ("dial_busy", CallOutcome.BUSY),
+    ("machine_detected", CallOutcome.VOICEMAIL),
+    ("twilio-failed-to-connect-call", CallOutcome.FAILED),
+    ("invalid_destination", CallOutcome.INVALID_NUMBER),
+    ("customer-ended-call", CallOutcome.CONNECTED),
+    (None, CallOutcome.CONNECTED),
+])
+def test_classify_ended_reason(ended_reason, outcome):
+    assert classify_ended_reason(ended_reason) == outcome
+
+
+def test_delays_grow_until_the_attempts_are_exhausted():
+    policy = RedialPolicy(max_attempts=3, delays={CallOutcome.NO_ANSWER: 100}, max_delay=150)
+    assert 90 <= policy.next_delay(CallOutcome.NO_ANSWER, 1) <= 110
+    # 200 s capped to 150 s, then spread by +/- 10%
+    assert 135 <= policy.next_delay(CallOutcome.NO_ANSWER, 2) <= 165
+    assert policy.next_delay(CallOutcome.NO_ANSWER, 3) is None
+
+
+def test_outcomes_without_delay_are_not_redialed():
+    policy = RedialPolicy(max_attempts=3)
+    assert policy.next_delay(CallOutcome.CONNECTED, 1) is None
+    assert policy.next_delay(CallOutcome.INVALID_NUMBER, 1) is None
+    assert policy.next_delay(CallOutcome.BUSY, 1) is not None
+
+
+def place_and_end_call(automation, lead_id, call_id, ended_reason):
+    """Dial a lead through the campaign queue, its call ending for `ended_reason`."""
+    dispatcher = automation.dispatcher
+    assert dispatcher.leases.claim(dispatcher.worker_id)
+    automation.call_states.record_dialing(lead_id, provider="vapi")
+    automation.call_states.record_call_created(lead_id, call_id, "vapi")
+    assert dispatcher.leases.complete(lead_id, dispatcher.worker_id)
+    automation.call_states.advance(call_id, CallState.ENDED, details={"endedReason": ended_reason})
+    automation.call_states.advance(call_id, CallState.CRM_SYNCED)
+
+
+def test_unanswered_lead_is_redialed_until_the_attempts_are_exhausted(automation):
+    dispatcher = automation.dispatcher
+    dispatcher.redial_policy = RedialPolicy(max_attempts=2, delays={CallOutcome.NO_ANSWER: -60})
+    lead = Lead(id="lead-1", first_name="Ada", last_name="Lovelace", address="", email="", phone="+14155550100")
+    dispatcher.enqueue([lead])
+
+    place_and_end_call(automation, "lead-1", "call-1", "customer-did-not-answer")
+    assert dispatcher.unsuccessful_attempts("lead-1") == 1
+    assert dispatcher.schedule_redial("lead-1", "customer-did-not-answer") <= time.time()
+    assert automation.call_states.get_latest_for_lead("lead-1")["state"] == CallState.QUEUED
+    # Requeued once: a second webhook for the same call does not queue it twice
+    assert dispatcher.schedule_redial("lead-1", "customer-did-not-answer") is None
+
+    place_and_end_call(automation, "lead-1", "call-2", "customer-did-not-answer")
+    assert dispatcher.unsuccessful_attempts("lead-1") == 2
+    assert dispatcher.schedule_redial("lead-1", "customer-did-not-answer") is None
+    assert dispatcher.leases.counts()[LeaseState.DONE] == 1
+
+
+def test_conversation_resets_the_attempts(automation):
+    dispatcher = automation.dispatcher
+    lead = Lead(id="lead-1", first_name="Ada", last_name="Lovelace", address="", email="", phone="+14155550100")
+    dispatcher.enqueue([lead])
+    place_and_end_call(automation, "lead-1", "call-1", "customer-did-not-answer")
+    dispatcher.leases.requeue("lead-1", time.time() - 1)
+    place_and_end_call(automation, "lead-1", "call-2", "customer-ended-call")
+    assert dispatcher.unsuccessful_attempts("lead-1") == 0
+    assert dispatcher.schedule_redial("lead-1", "customer-ended-call") is None
+
+
+def test_lead_outside_the_campaign_queue_is_not_redialed(automation):
+    automation.call_states.record_call_created("lead-2", "call-1", "vapi")
+    automation.call_states.advance("call-1", CallState.ENDED, details={"endedReason": "customer-busy"})
+    assert automation.dispatcher.schedule_redial("lead-2", "customer-busy") is None
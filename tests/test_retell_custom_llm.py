@@ -0,0 +1,153 @@
+import json
+import asyncio
+from types import SimpleNamespace
+import pytest
+from src.base.voice_agent_providers.retell_ai import RetellCustomLLM, custom_llm
+
+
+class FakeWebSocket:
+    """Websocket receiving the scripted messages (dicts), with pauses (seconds) in between."""
+
+    def __init__(self, *script):
+        self.script = script
+        self.sent = []
+        self.accepted = self.closed = False
+
+    async def accept(self):
+        self.accepted = True
+
+    async def close(self):
+        self.closed = True
+
+    async def iter_text(self):
+        for item in self.script:
+            if isinstance(item, (int, float)):
+                await asyncio.sleep(item)
+            else:
+                yield json.dumps(item)
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    def responses(self, response_id):
+        return [message for message in self.sent if message.get("response_id") == response_id]
+
+
+def text_delta(content):
+    return SimpleNamespace(content=content, tool_calls=None)
+
+
+def tool_delta(index, name=None, arguments=None, call_id=None):
+    fragment = SimpleNamespace(index=index, id=call_id, function=SimpleNamespace(name=name, arguments=arguments))
+    return SimpleNamespace(content=None, tool_calls=[fragment])
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    """Scripted model answers: one list of deltas per completion, the messages of every request recorded."""
+    answers, requests = [], []
+
+    async def stream_completion(model, messages, tools=None, temperature=0.3):
+        requests.append([dict(message) for message in messages])
+        for delta in answers.pop(0):
+            await asyncio.sleep(0.01)
+            yield delta
+
+    monkeypatch.setattr(custom_llm, "stream_completion", stream_completion)
+    return SimpleNamespace(answers=answers, requests=requests)
+
+
+def response_required(response_id, *utterances, kind="response_required"):
+    transcript = [{"role": role, "content": content} for role, content in utterances]
+    return {"interaction_type": kind, "response_id": response_id, "transcript": transcript}
+
+
+CALL_DETAILS = {"interaction_type": "call_details", "call": {"retell_llm_dynamic_variables": {"firstName": "Ada"}}}
+
+
+def test_answer_is_streamed_token_by_token(completions):
+    completions.answers.append([text_delta("Great, "), text_delta("let me check.")])
+    llm = RetellCustomLLM(instructions="You are calling {{firstName}}.", begin_message="Hi, is this {{firstName}}?")
+    websocket = FakeWebSocket(
+        CALL_DETAILS,
+        {"interaction_type": "ping_pong", "timestamp": 123},
+        response_required(1, ("agent", "Hi, is this Ada?"), ("user", "Yes")),
+        0.2,
+    )
+    asyncio.run(llm.handle_websocket(websocket, "call-1"))
+
+    assert websocket.sent[0]["response_type"] == "config"
+    assert websocket.responses(0) == [{"response_type": "response", "response_id": 0, "content": "Hi, is this Ada?", "content_complete": True}]
+    assert {"response_type": "ping_pong", "timestamp": 123} in websocket.sent
+    assert [(message["content"], message["content_complete"]) for message in websocket.responses(1)] == [
+        ("Great, ", False), ("let me check.", False), ("", True),
+    ]
+    assert completions.requests[0] == [
+        {"role": "system", "content": "You are calling Ada."},
+        {"role": "assistant", "content": "Hi, is this Ada?"},
+        {"role": "user", "content": "Yes"},
+    ]
+
+
+def test_interrupted_answer_is_cancelled(completions):
+    completions.answers.append([text_delta(f"word {index} ") for index in range(20)])
+    completions.answers.append([text_delta("Sorry, go ahead.")])
+    websocket = FakeWebSocket(
+        response_required(1, ("user", "Hello?")),
+        0.05,
+        {"interaction_type": "update_only", "turntaking": "user_turn"},
+        response_required(2, ("user", "Hello?"), ("user", "Wait")),
+        0.2,
+    )
+    asyncio.run(RetellCustomLLM().handle_websocket(websocket, "call-1"))
+    assert not any(message["content_complete"] for message in websocket.responses(1))
+    assert len(websocket.responses(1)) < 20
+    assert websocket.responses(2)[-1]["content_complete"]
+
+
+def test_tool_results_are_sent_back_to_the_model(completions):
+    booked = []
+    completions.answers.append([
+        tool_delta(0, name="book_appointment", arguments='{"date": ', call_id="tool-1"),
+        tool_delta(0, arguments='"2024-05-16"}'),
+    ])
+    completions.answers.append([text_delta("You are booked.")])
+    llm = RetellCustomLLM(tools={"book_appointment": lambda date: booked.append(date) or "booked"})
+    websocket = FakeWebSocket(response_required(1, ("user", "Thursday works")), 0.3)
+    asyncio.run(llm.handle_websocket(websocket, "call-1"))
+
+    assert booked == ["2024-05-16"]
+    assert completions.requests[1][-2]["tool_calls"][0]["function"] == {"name": "book_appointment", "arguments": '{"date": "2024-05-16"}'}
+    assert completions.requests[1][-1] == {"role": "tool", "tool_call_id": "tool-1", "content": '"booked"'}
+    assert [message["content"] for message in websocket.responses(1)] == ["You are booked.", ""]
+
+
+def test_end_call_tool_hangs_up(completions):
+    completions.answers.append([text_delta("Goodbye!"), tool_delta(0, name="end_call", arguments="{}", call_id="tool-1")])
+    websocket = FakeWebSocket(response_required(1, ("user", "Not interested")), 0.2)
+    asyncio.run(RetellCustomLLM().handle_websocket(websocket, "call-1"))
+    assert websocket.responses(1)[-1] == {
+        "response_type": "response", "response_id": 1, "content": "", "content_complete": True, "end_call": True,
+    }
+    assert len(completions.requests) == 1
+
+
+def test_reminder_asks_the_model_to_check_in(completions):
+    completions.answers.append([text_delta("Are you still there?")])
+    websocket = FakeWebSocket(response_required(1, ("agent", "Hi"), kind="reminder_required"), 0.2)
+    asyncio.run(RetellCustomLLM().handle_websocket(websocket, "call-1"))
+    assert completions.requests[0][-1] == {"role": "user", "content": custom_llm.REMINDER_MESSAGE}
+
+
+def test_unknown_call_is_rejected(completions):
+    websocket = FakeWebSocket(CALL_DETAILS)
+    asyncio.run(RetellCustomLLM(accept_call=lambda call_id: call_id == "call-1").handle_websocket(websocket, "call-2"))
+    assert websocket.closed and websocket.sent == []
+
+
+def test_transcript_updates_reach_the_handler(completions):
+    updates = []
+    llm = RetellCustomLLM(transcript_handler=lambda call_id, transcript, variables: updates.append((call_id, len(transcript), dict(variables))))
+    update = {"interaction_type": "update_only", "transcript": [{"role": "agent", "content": "Hi"}]}
+    asyncio.run(llm.handle_websocket(FakeWebSocket(update, CALL_DETAILS, update), "call-1"))
+    assert updates == [("call-1", 1, {}), ("call-1", 1, {"firstName": "Ada"})]
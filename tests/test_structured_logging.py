@@ -0,0 +1,90 @@
+import json
+import queue
+import logging
+from src.base.structured_logging import (
+    REDACTED, JsonFormatter, StructuredLogger, TextFormatter, _NonBlockingQueueHandler, bind_call_id, redact,
+)
+from src.utils import Lead
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def make_logger(name, **kwargs):
+    handler = ListHandler()
+    base = logging.getLogger(f"tests.{name}")
+    base.handlers = [handler]
+    base.setLevel(logging.INFO)
+    base.propagate = False
+    return StructuredLogger(base, **kwargs), handler
+
+
+def test_redact_crm_and_provider_field_names():
+    payload = {
+        "lead_id": "lead-1",
+        "First Name": "Ada",
+        "customer": {"number": "+14155550100", "name": "Ada"},
+        "calls": [{"toNumber": "+14155550100", "endedReason": "voicemail"}],
+        "artifact": {"transcript": "AI: Hi Ada"},
+        "email": "",
+    }
+    assert redact(payload) == {
+        "lead_id": "lead-1",
+        "First Name": REDACTED,
+        "customer": {"number": REDACTED, "name": "Ada"},
+        "calls": [{"toNumber": REDACTED, "endedReason": "voicemail"}],
+        "artifact": {"transcript": REDACTED},
+        # Empty values are kept, they tell the field was missing
+        "email": "",
+    }
+    # The logged value is copied, not modified
+    assert payload["First Name"] == "Ada"
+
+
+def test_redact_models():
+    lead = Lead(id="lead-1", first_name="Ada", last_name="Lovelace", address="", email="ada@example.com", phone="+14155550100")
+    redacted = redact({"lead": lead})["lead"]
+    assert redacted["id"] == "lead-1"
+    assert redacted["first_name"] == redacted["email"] == redacted["phone"] == REDACTED
+
+
+def test_formatters_redact_the_fields():
+    logger, handler = make_logger("formatters")
+    logger.info("lead_dialing", lead_id="lead-1", phone="+14155550100")
+    record = handler.records[0]
+    record.call_id = "call-1"
+    line = json.loads(JsonFormatter().format(record))
+    assert line["event"] == "lead_dialing"
+    assert line["call_id"] == "call-1"
+    assert line["lead_id"] == "lead-1" and line["phone"] == REDACTED
+    text = TextFormatter().format(record)
+    assert "[call-1] lead_dialing lead_id=lead-1 phone=[REDACTED]" in text
+    assert "+14155550100" not in text
+
+
+def test_sampled_events():
+    logger, handler = make_logger("sampling", sample_rates={"webhook_received": 0})
+    for _ in range(10):
+        logger.info("webhook_received")
+    logger.info("call_placed", sample=1)
+    assert [record.getMessage() for record in handler.records] == ["call_placed"]
+    assert handler.records[0].fields["sample_rate"] == 1
+
+
+def test_call_id_is_stamped_by_the_queue_handler():
+    log_queue = queue.Queue(maxsize=1)
+    handler = _NonBlockingQueueHandler(log_queue)
+    record = logging.LogRecord("tests", logging.INFO, __file__, 1, "call_placed", None, None)
+    with bind_call_id("call-1"):
+        handler.handle(record)
+    assert log_queue.get_nowait().call_id == "call-1"
+    # A full queue drops the record instead of blocking
+    handler.handle(record)
+    handler.handle(record)
+    assert log_queue.qsize() == 1
@@ -0,0 +1,67 @@
+import os
+from urllib.parse import urlparse, parse_qs
+from src.base.transcript_store import TranscriptStore
+
+
+def make_store(tmp_path, **kwargs):
+    return TranscriptStore(str(tmp_path), **kwargs)
+
+
+def link_params(reference):
+    url = urlparse(reference)
+    query = parse_qs(url.query)
+    return url.path, int(query["expires"][0]), query["signature"][0]
+
+
+def test_identical_transcripts_are_stored_once(tmp_path):
+    store = make_store(tmp_path)
+    first = store.put("call-1", "lead-1", "AI: Hello, please leave a message")
+    second = store.put("call-2", "lead-2", "AI: Hello, please leave a message")
+    assert first == second
+    assert len(os.listdir(tmp_path / "objects" / first[:2])) == 1
+    assert store.get("call-2")["transcript"] == "AI: Hello, please leave a message"
+    assert store.get("call-3") is None
+
+
+def test_lead_listing_does_not_expose_the_digests(tmp_path):
+    store = make_store(tmp_path)
+    store.put("call-1", "lead-1", "AI: Hi")
+    store.put("call-2", "lead-1", "AI: Hi again")
+    listed = store.list_for_lead("lead-1")
+    assert [transcript["call_id"] for transcript in listed] == ["call-1", "call-2"]
+    assert all(set(transcript) == {"call_id", "size", "created_at"} for transcript in listed)
+
+
+def test_reference_without_secret_is_not_a_link(tmp_path, monkeypatch):
+    monkeypatch.delenv("TRANSCRIPT_LINK_SECRET", raising=False)
+    monkeypatch.setenv("SERVER_URL", "https://calls.example.com")
+    store = make_store(tmp_path)
+    assert store.reference("call-1") == "transcript:call-1"
+    assert not store.verify_link("call-1", 0, "anything")
+
+
+def test_signed_link_is_verified(tmp_path, monkeypatch):
+    monkeypatch.setenv("SERVER_URL", "https://calls.example.com/")
+    store = make_store(tmp_path, link_secret="secret", link_ttl=3600)
+    path, expires, signature = link_params(store.reference("call-1"))
+    assert path == "/calls/call-1/transcript"
+    assert store.verify_link("call-1", expires, signature)
+    # The signature covers the call ID and the expiry
+    assert not store.verify_link("call-2", expires, signature)
+    assert not store.verify_link("call-1", expires + 3600, signature)
+    assert not make_store(tmp_path, link_secret="other", link_ttl=3600).verify_link("call-1", expires, signature)
+
+
+def test_expired_link_is_refused(tmp_path, monkeypatch):
+    monkeypatch.setenv("SERVER_URL", "https://calls.example.com")
+    store = make_store(tmp_path, link_secret="secret", link_ttl=3600)
+    expired = 1_000_000
+    assert not store.verify_link("call-1", expired, store._sign("call-1", expired))
+
+
+def test_link_without_expiry(tmp_path, monkeypatch):
+    monkeypatch.setenv("SERVER_URL", "https://calls.example.com")
+    store = make_store(tmp_path, link_secret="secret", link_ttl=0)
+    _, expires, signature = link_params(store.reference("call-1"))
+    assert expires == 0
+    assert store.verify_link("call-1", expires, signature)
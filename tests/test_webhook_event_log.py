@@ -0,0 +1,99 @@
+import asyncio
+from src.base.call_state import CallState
+from src.base.lead_lease import LeaseState
+from src.base.webhook_event_log import WebhookEventLog
+from src.utils import Lead
+
+
+def end_of_call_report(call_id, lead_id, ended_reason="customer-did-not-answer", transcript=""):
+    return {
+        "message": {
+            "type": "end-of-call-report",
+            "call": {
+                "id": call_id,
+                "status": "ended",
+                "assistantOverrides": {"variableValues": {"leadID": lead_id, "firstName": "Ada", "lastName": "Lovelace"}},
+            },
+            "durationMinutes": 0.4,
+            "cost": 0.02,
+            "endedReason": ended_reason,
+            "artifact": {"transcript": transcript},
+        }
+    }
+
+
+def dialed_lead(automation, lead_id="lead-1", call_id="call-1"):
+    """Queue a lead and record its call as placed, the lead being done in the campaign queue."""
+    dispatcher = automation.dispatcher
+    lead = Lead(id=lead_id, first_name="Ada", last_name="Lovelace", address="", email="", phone="+14155550100")
+    dispatcher.enqueue([lead])
+    assert dispatcher.leases.claim(dispatcher.worker_id)
+    automation.call_states.record_dialing(lead_id, provider="vapi")
+    automation.call_states.record_call_created(lead_id, call_id, "vapi")
+    assert dispatcher.leases.complete(lead_id, dispatcher.worker_id)
+
+
+def test_events_are_scanned_in_arrival_order_with_filters(tmp_path):
+    log = WebhookEventLog(str(tmp_path), segment_bytes=64)
+    for index in range(6):
+        log.append("vapi", {"index": index}, event_type="status-update" if index % 2 else "end-of-call-report",
+                   call_id=f"call-{index % 3}", received_at=1000 + index)
+    assert [event["payload"]["index"] for event in log.scan()] == list(range(6))
+    assert [event["payload"]["index"] for event in log.scan(event_type="status-update")] == [1, 3, 5]
+    assert [event["payload"]["index"] for event in log.scan(call_id="call-1", since=1002)] == [4]
+    assert [event["payload"]["index"] for event in log.scan(until=1002)] == [0, 1]
+    log.close()
+
+
+def test_append_later_is_written_before_close(tmp_path):
+    log = WebhookEventLog(str(tmp_path))
+    for index in range(20):
+        log.append_later("retell", {"index": index}, event_type="call_ended", call_id="call-1")
+    log.close()
+    log = WebhookEventLog(str(tmp_path))
+    assert [event["payload"]["index"] for event in log.scan(provider="retell")] == list(range(20))
+    log.close()
+
+
+def test_replay_skips_tool_calls_unless_asked(tmp_path):
+    log = WebhookEventLog(str(tmp_path))
+    log.append("vapi", {"message": {"type": "tool-calls"}}, event_type="tool-calls", call_id="call-1")
+    log.append("vapi", {"message": {"type": "status-update"}}, event_type="status-update", call_id="call-1")
+    log.append("retell", {"event": "call_ended"}, event_type="call_ended", call_id="call-2")
+    replayed = []
+
+    async def handler(payload, replay=False):
+        replayed.append((payload, replay))
+
+    result = asyncio.run(log.replay({"vapi": handler}))
+    assert result == {"replayed": 1, "skipped": 2, "failed": 0}
+    assert replayed == [({"message": {"type": "status-update"}}, True)]
+
+    result = asyncio.run(log.replay({"vapi": handler}, include_tool_calls=True))
+    assert result == {"replayed": 2, "skipped": 1, "failed": 0}
+    log.close()
+
+
+def test_live_unanswered_call_schedules_a_redial(automation):
+    dialed_lead(automation)
+    asyncio.run(automation.handle_webhook_payload(end_of_call_report("call-1", "lead-1")))
+
+    assert automation.dispatcher.leases.counts()["scheduled"] == 1
+    assert automation.pacer.estimates()["calls"] == 1
+
+
+def test_replayed_unanswered_call_is_not_redialed(automation):
+    dialed_lead(automation)
+    automation.event_log.append("vapi", end_of_call_report("call-1", "lead-1"), event_type="end-of-call-report", call_id="call-1")
+
+    result = asyncio.run(automation.event_log.replay({"vapi": automation.handle_webhook_payload}))
+
+    assert result["replayed"] == 1
+    leases = automation.dispatcher.leases.counts()
+    assert leases[LeaseState.DONE] == 1 and leases["scheduled"] == 0 and leases[LeaseState.PENDING] == 0
+    assert automation.pacer.estimates()["calls"] == 0
+    assert automation.call_states.get_by_call("call-1")["state"] == CallState.ANALYZED
+    # The status written when the webhook was first received is kept
+    automation.crm_writes.flush()
+    (lead_id, updates), = automation.lead_loader.updates
+    assert lead_id == "lead-1" and "Status" not in updates and updates["End Reason"] == "customer-did-not-answer"